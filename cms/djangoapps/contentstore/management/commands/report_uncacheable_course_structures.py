@@ -0,0 +1,73 @@
+"""
+A Command which reports the versions of courses whose structures can't be stored in the course_structure_cache,
+so that reading them always queries Mongo.
+"""
+
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from xmodule.modulestore import ModuleStoreEnum
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.split_mongo.mongo_connection import CourseStructureCache
+
+
+class Command(BaseCommand):
+    """
+    Report the course structure versions which can't be cached.
+
+    The structure of each branch of the courses which isn't already cached is read
+    from Mongo, without writing it to any cache, and serialized once to report the
+    versions which would be split across more chunks than the cache allows, with
+    their compressed size and number of chunks.
+
+    Example usage:
+        $ ./manage.py cms report_uncacheable_course_structures
+        $ ./manage.py cms report_uncacheable_course_structures course-v1:edX+DemoX+Demo_Course
+    """
+    help = 'Reports the versions of course structures which are too large to be cached.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'course_keys',
+            nargs='*',
+            help='The course keys of the courses to check. All courses are checked if none are given.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            course_keys = [CourseKey.from_string(course_key) for course_key in options['course_keys']]
+        except InvalidKeyError as error:
+            raise CommandError(f'Invalid course key: {error}') from error
+
+        cache = CourseStructureCache()
+        if cache.cache is None:
+            raise CommandError('The course_structure_cache is not configured.')
+
+        split_modulestore = modulestore()._get_modulestore_by_type(  # pylint: disable=protected-access
+            ModuleStoreEnum.Type.split
+        )
+        db_connection = split_modulestore.db_connection
+        uncacheable = 0
+        for course_index in db_connection.find_matching_course_indexes(course_keys=course_keys or None):
+            course_key = split_modulestore.make_course_key(
+                course_index['org'], course_index['course'], course_index['run'],
+            )
+            for branch, version in sorted(course_index['versions'].items()):
+                if cache.get(version, course_key) is not None:
+                    continue
+                # Unlike get_structure, find_structures_by_id doesn't cache the structure.
+                for structure in db_connection.find_structures_by_id([version], course_key):
+                    data_size = len(cache.serialize(structure))
+                    num_chunks = cache.num_chunks(data_size)
+                    if num_chunks <= cache.MAX_CHUNKS:
+                        continue
+
+                    uncacheable += 1
+                    self.stdout.write(
+                        f'{course_key} {branch} {version}: {round(data_size / (1024 * 1024), 2)} MB compressed, '
+                        f'{num_chunks} chunks, exceeds the maximum number of chunks'
+                    )
+
+        self.stdout.write(f'The number of course structure versions which can\'t be cached is: {uncacheable}')
@@ -0,0 +1,95 @@
+"""
+Tests for the report_uncacheable_course_structures management command
+"""
+
+
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from opaque_keys.edx.locator import CourseLocator
+
+from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
+from xmodule.modulestore.split_mongo.mongo_connection import CourseStructureCache  # lint-amnesty, pylint: disable=wrong-import-order
+
+
+class TestReportUncacheableCourseStructures(CacheIsolationTestCase):
+    """
+    Tests for the report_uncacheable_course_structures management command
+    """
+    ENABLED_CACHES = ['default']
+
+    def setUp(self):
+        super().setUp()
+        self.structures = {
+            'small_version': {'blocks': {}},
+            'large_version': {'blocks': {str(index): 'block' * index for index in range(200)}},
+        }
+        split_modulestore = mock.Mock()
+        split_modulestore.make_course_key.side_effect = CourseLocator
+        split_modulestore.db_connection.find_matching_course_indexes.return_value = [{
+            'org': 'org',
+            'course': 'course',
+            'run': 'run',
+            'versions': {'draft-branch': 'large_version', 'published-branch': 'small_version'},
+        }]
+        split_modulestore.db_connection.find_structures_by_id.side_effect = lambda versions, course_key: [
+            self.structures[version] for version in versions
+        ]
+        self.split_modulestore = split_modulestore
+        mock_modulestore = mock.Mock()
+        mock_modulestore._get_modulestore_by_type.return_value = split_modulestore  # pylint: disable=protected-access
+        for patcher in (
+            mock.patch(
+                'cms.djangoapps.contentstore.management.commands.report_uncacheable_course_structures.modulestore',
+                return_value=mock_modulestore,
+            ),
+            mock.patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache', return_value=caches['default']),
+            mock.patch.object(CourseStructureCache, 'CHUNK_SIZE', 100),
+            mock.patch.object(CourseStructureCache, 'MAX_CHUNKS', 3),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _call_command(self, *args):
+        out = StringIO()
+        call_command('report_uncacheable_course_structures', *args, stdout=out)
+        return out.getvalue()
+
+    def test_report(self):
+        output = self._call_command()
+        assert 'course-v1:org+course+run draft-branch large_version' in output
+        assert 'exceeds the maximum number of chunks' in output
+        assert 'small_version' not in output
+        assert output.endswith('can\'t be cached is: 1\n')
+
+    def test_not_written(self):
+        with mock.patch.object(CourseStructureCache, 'serialize', wraps=CourseStructureCache.serialize) as serialize:
+            self._call_command()
+        assert serialize.call_count == 2
+        assert CourseStructureCache().get('small_version') is None
+        self.split_modulestore.db_connection.get_structure.assert_not_called()
+
+    def test_cached(self):
+        CourseStructureCache().set('small_version', self.structures['small_version'])
+        with mock.patch.object(CourseStructureCache, 'MAX_CHUNKS', 100):
+            assert self._call_command().endswith('can\'t be cached is: 0\n')
+        self.split_modulestore.db_connection.find_structures_by_id.assert_called_once_with(
+            ['large_version'], mock.ANY,
+        )
+
+    def test_course_keys(self):
+        self._call_command('course-v1:org+course+run')
+        self.split_modulestore.db_connection.find_matching_course_indexes.assert_called_once_with(
+            course_keys=[CourseLocator('org', 'course', 'run')],
+        )
+
+    def test_invalid_course_key(self):
+        with self.assertRaisesRegex(CommandError, 'Invalid course key'):
+            self._call_command('invalid')
+
+    @mock.patch.object(CourseStructureCache, '__init__', lambda cache: setattr(cache, 'cache', None))
+    def test_not_configured(self):
+        with self.assertRaisesRegex(CommandError, 'not configured'):
+            self._call_command()
@@ -8,7 +8,7 @@ import os
 import shutil
 import tarfile
 from datetime import datetime
-from tempfile import NamedTemporaryFile, mkdtemp
+from tempfile import NamedTemporaryFile
 
 import olxcleaner
 import pkg_resources
@@ -72,7 +72,7 @@ from xmodule.exceptions import SerializationError
 from xmodule.modulestore import COURSE_ROOT, LIBRARY_ROOT, ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import DuplicateCourseError, InvalidProctoringProvider, ItemNotFoundError
-from xmodule.modulestore.xml_exporter import export_course_to_xml, export_library_to_xml
+from xmodule.modulestore.xml_exporter import export_course_to_tar, export_library_to_tar
 from xmodule.modulestore.xml_importer import CourseImportException, import_course_from_xml, import_library_from_xml
 from .outlines import update_outline_from_modulestore
 from .outlines_regenerate import CourseOutlineRegenerate
@@ -355,20 +355,25 @@ def create_export_tarball(course_block, course_key, context, status=None):
     name = course_block.url_name
     export_file = NamedTemporaryFile(prefix=name + '.',
                                      suffix=".tar.gz")  # lint-amnesty, pylint: disable=consider-using-with
-    root_dir = path(mkdtemp())
 
     try:
-        if isinstance(course_key, LibraryLocator):
-            export_library_to_xml(modulestore(), contentstore(), course_key, root_dir, name)
-        else:
-            export_course_to_xml(modulestore(), contentstore(), course_block.id, root_dir, name)
-
-        if status:
-            status.set_state('Compressing')
-            status.increment_completed_steps()
         LOGGER.debug('tar file being generated at %s', export_file.name)
+        # The export is written straight into the compressed archive, without staging it on disk.
         with tarfile.open(name=export_file.name, mode='w:gz') as tar_file:
-            tar_file.add(root_dir / name, arcname=name)
+            if isinstance(course_key, LibraryLocator):
+                export_library_to_tar(
+                    modulestore(), contentstore(), course_key, tar_file, name,
+                    asset_workers=settings.COURSE_EXPORT_ASSET_WORKERS,
+                )
+            else:
+                export_course_to_tar(
+                    modulestore(), contentstore(), course_block.id, tar_file, name,
+                    asset_workers=settings.COURSE_EXPORT_ASSET_WORKERS,
+                )
+
+            if status:
+                status.set_state('Compressing')
+                status.increment_completed_steps()
 
     except SerializationError as exc:
         LOGGER.exception('There was an error exporting %s', course_key, exc_info=True)
@@ -401,9 +406,6 @@ def create_export_tarball(course_block, course_key, context, status=None):
         if status:
             status.fail(json.dumps({'raw_error_msg': context['raw_err_msg']}))
         raise
-    finally:
-        if os.path.exists(root_dir / name):
-            shutil.rmtree(root_dir / name)
 
     return export_file
 
@@ -570,6 +572,12 @@ def import_olx(self, user_id, course_key_string, archive_path, archive_name, lan
             return
         return dirpath
 
+    phase_timings = {}
+
+    def record_phase_timing(phase, seconds):
+        """Record the duration of a phase of the import of the courselike."""
+        phase_timings[phase] = round(seconds, 3)
+
     user = validate_user()
     if not user:
         return
@@ -680,6 +688,8 @@ def import_olx(self, user_id, course_key_string, archive_path, archive_name, lan
             static_content_store=contentstore(),
             target_id=courselike_key,
             verbose=True,
+            static_content_workers=settings.COURSE_IMPORT_STATIC_CONTENT_WORKERS,
+            phase_callback=record_phase_timing,
         )
 
         new_location = courselike_items[0].location
@@ -696,6 +706,9 @@ def import_olx(self, user_id, course_key_string, archive_path, archive_name, lan
             shutil.rmtree(course_dir)
             LOGGER.info(f'{log_prefix}: Temp data cleared')
 
+        if phase_timings:
+            save_import_phase_timings(phase_timings, self.status)
+
         if self.status.state == 'Updating' and is_course:
             # Reload the course so we have the latest state
             course = modulestore().get_course(courselike_key)
@@ -811,6 +824,18 @@ def validate_course_olx(courselike_key, course_dir, status):
     return False
 
 
+def save_import_phase_timings(phase_timings, status):
+    """
+    Record the number of seconds taken by each completed phase of an import as a task artifact.
+    """
+    text = json.dumps(phase_timings)
+    # .. custom_attribute_name: course_import_phase_timings
+    # .. custom_attribute_description: A JSON object of the number of seconds taken by each
+    #   completed phase of the import of the course, such as static and children.
+    set_custom_attribute('course_import_phase_timings', text)
+    UserTaskArtifact.objects.create(status=status, name='PHASE_TIMINGS', text=text)
+
+
 def log_errors_to_artifact(errorstore, status):
     """Log errors as a task artifact."""
 
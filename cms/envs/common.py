@@ -155,6 +155,18 @@ BLOCK_STRUCTURES_SETTINGS = dict(
 
     # Maximum number of retries per task.
     TASK_MAX_RETRIES=5,
+
+    # Maximum total size, in bytes of serialized data, of the collected
+    # block structures kept in the process-local cache.  0 disables it.
+    PROCESS_CACHE_MAX_SIZE=0,
+
+    # Time, in seconds, for which a collected block structure is kept
+    # in the process-local cache.
+    PROCESS_CACHE_TIMEOUT=300,
+
+    # Minimum number of blocks of a collected block structure for it to
+    # be loaded into the compact, array-backed representation.  0 disables it.
+    COMPACT_MIN_BLOCKS=0,
 )
 
 ############################ FEATURE CONFIGURATION #############################
@@ -1118,6 +1130,19 @@ MODULESTORE = {
     }
 }
 
+# .. setting_name: COURSE_STRUCTURE_FILE_CACHE_DIR
+# .. setting_default: None
+# .. setting_description: A host-local directory in which the split modulestore keeps a file of each
+#     course structure it reads, which all processes of the host unpickle instead of reading the
+#     structure from the course_structure_cache or Mongo. Unpickling a file can run arbitrary code, so
+#     the directory must only be writable by the user running the processes. The cache is disabled if None.
+COURSE_STRUCTURE_FILE_CACHE_DIR = None
+# .. setting_name: COURSE_STRUCTURE_FILE_CACHE_MAX_SIZE
+# .. setting_default: 2147483648
+# .. setting_description: The total size in bytes of the files in COURSE_STRUCTURE_FILE_CACHE_DIR
+#     above which the least recently used files are removed. There is no limit if None.
+COURSE_STRUCTURE_FILE_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
 # Modulestore-level field override providers. These field override providers don't
 # require student context.
 MODULESTORE_FIELD_OVERRIDE_PROVIDERS = ()
@@ -1201,6 +1226,19 @@ CODE_JAIL = {
 
 COURSES_WITH_UNSAFE_CODE = []
 
+# .. setting_name: SAFE_EXEC_RESULT_CACHE
+# .. setting_default: {'MAX_SIZE': 32 * 1024 * 1024, 'PATH': None, 'MAX_DISK_SIZE': 1024 * 1024 * 1024}
+# .. setting_description: The store of the results of the Python code of problems kept by each process, which is
+#   looked up before the Django cache. MAX_SIZE is the total size, in bytes of JSON, of the results kept in memory.
+#   PATH is the path of a SQLite file on local disk in which the results are also persisted, shared by the
+#   processes of the host, or None; MAX_DISK_SIZE is the total size of the results persisted in it. Set the setting
+#   to None to only cache the results in the Django cache.
+SAFE_EXEC_RESULT_CACHE = {
+    'MAX_SIZE': 32 * 1024 * 1024,
+    'PATH': None,
+    'MAX_DISK_SIZE': 1024 * 1024 * 1024,
+}
+
 # Cojail REST service
 ENABLE_CODEJAIL_REST_SERVICE = False
 # .. setting_name: CODE_JAIL_REST_SERVICE_REMOTE_EXEC
@@ -1243,6 +1281,13 @@ ROOT_URLCONF = 'cms.urls'
 COURSE_IMPORT_EXPORT_BUCKET = ''
 COURSE_METADATA_EXPORT_BUCKET = ''
 
+# .. setting_name: COURSE_IMPORT_STATIC_CONTENT_WORKERS
+# .. setting_default: 8
+# .. setting_description: The number of static content files of a course or library imported by the
+#   import_olx task concurrently, on threads. When greater than 1, the static content is also imported
+#   while the blocks of the course are imported, rather than before them. 1 imports the files one at a time.
+COURSE_IMPORT_STATIC_CONTENT_WORKERS = 8
+
 ALTERNATE_WORKER_QUEUES = 'lms'
 
 STATIC_URL_BASE = '/static/'
@@ -2507,6 +2552,13 @@ add_plugins(__name__, ProjectType.CMS, SettingsType.COMMON)
 # See: https://docs.python.org/2/library/wsgiref.html#wsgiref.util.FileWrapper
 COURSE_EXPORT_DOWNLOAD_CHUNK_SIZE = 8192
 
+# .. setting_name: COURSE_EXPORT_ASSET_WORKERS
+# .. setting_default: 8
+# .. setting_description: The number of static assets of a course or library read from the contentstore
+#   concurrently by the export_olx task, ahead of writing them into the export archive. Assets larger
+#   than a few megabytes are streamed into the archive rather than read ahead.
+COURSE_EXPORT_ASSET_WORKERS = 8
+
 # E-Commerce API Configuration
 ECOMMERCE_PUBLIC_URL_ROOT = 'http://localhost:8002'
 ECOMMERCE_API_URL = 'http://localhost:8002/api/v2'
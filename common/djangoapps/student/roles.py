@@ -8,8 +8,11 @@ from collections import defaultdict
 import logging
 from abc import ABCMeta, abstractmethod
 from contextlib import contextmanager
+from uuid import uuid4
 
 from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imported-auth-user
+from django.core.cache import cache
+from django.db import transaction
 from opaque_keys.edx.django.models import CourseKeyField
 
 from openedx.core.lib.cache_utils import get_cache
@@ -26,6 +29,9 @@ ACCESS_ROLES_INHERITANCE = {}
 # The key used to store roles for a user in the cache that do not belong to a course or do not have a course id.
 ROLE_CACHE_UNGROUPED_ROLES__KEY = 'ungrouped'
 
+# The number of seconds the roles of a user are kept in the django cache across requests.
+ROLE_CACHE_TIMEOUT = 60 * 60
+
 
 def register_access_role(cls):
     """
@@ -94,22 +100,37 @@ class BulkRoleCache:  # lint-amnesty, pylint: disable=missing-class-docstring
     CACHE_KEY = 'roles_by_user'
 
     @classmethod
-    def prefetch(cls, users):  # lint-amnesty, pylint: disable=missing-function-docstring
+    def prefetch(cls, users):
+        """
+        Load the roles of the users into the RequestCache, from the cross-request
+        cache of RoleCache when they are there and in one query otherwise.
+        """
         roles_by_user = defaultdict(lambda: defaultdict(set))
         get_cache(cls.CACHE_NAMESPACE)[cls.CACHE_KEY] = roles_by_user
 
-        for role in CourseAccessRole.objects.filter(user__in=users).select_related('user'):
-            user_id = role.user.id
+        cached_roles_by_user, versions = RoleCache.get_cached_roles([user.id for user in users])
+        roles_by_user.update(cached_roles_by_user)
+        uncached_users = [user for user in users if user.id not in cached_roles_by_user]
+        if not uncached_users:
+            return
+
+        for role in CourseAccessRole.objects.filter(user__in=uncached_users):
+            user_id = role.user_id
             course_id = get_role_cache_key_for_course(role.course_id)
 
             # Add role to the set in roles_by_user[user_id][course_id]
             user_roles_set_for_course = roles_by_user[user_id][course_id]
             user_roles_set_for_course.add(role)
 
-        users_without_roles = [u for u in users if u.id not in roles_by_user]
+        users_without_roles = [u for u in uncached_users if u.id not in roles_by_user]
         for user in users_without_roles:
             roles_by_user[user.id] = {}
 
+        RoleCache.set_cached_roles(
+            {user.id: dict(roles_by_user[user.id]) for user in uncached_users},
+            versions,
+        )
+
     @classmethod
     def get_user_roles(cls, user):
         return get_cache(cls.CACHE_NAMESPACE)[cls.CACHE_KEY][user.id]
@@ -128,22 +149,102 @@ class RoleCache:
         lookups and collected from _roles_by_course_id on initialization
         so that it doesn't need to be recalculated.
 
+    The _roles_by_course_id of each user are also kept in the django cache across
+    requests, along with the version of the roles of the user they were read at.
+    The version of a user is invalidated whenever their CourseAccessRoles change,
+    by add_users and remove_users and by the post_save and post_delete signals
+    of CourseAccessRole, so that the previous roles are never read again.  Roles
+    are only kept once the transaction they were read in is committed, as they
+    may include changes of the transaction which are rolled back.
     """
+    CACHE_KEY_PREFIX = 'student.roles.RoleCache'
+
     def __init__(self, user):
         try:
             self._roles_by_course_id = BulkRoleCache.get_user_roles(user)
         except KeyError:
-            self._roles_by_course_id = {}
-            roles = CourseAccessRole.objects.filter(user=user).all()
-            for role in roles:
-                course_id = get_role_cache_key_for_course(role.course_id)
-                if not self._roles_by_course_id.get(course_id):
-                    self._roles_by_course_id[course_id] = set()
-                self._roles_by_course_id[course_id].add(role)
+            cached_roles_by_user, versions = self.get_cached_roles([user.id])
+            if user.id in cached_roles_by_user:
+                self._roles_by_course_id = cached_roles_by_user[user.id]
+            else:
+                self._roles_by_course_id = {}
+                roles = CourseAccessRole.objects.filter(user=user).all()
+                for role in roles:
+                    course_id = get_role_cache_key_for_course(role.course_id)
+                    if not self._roles_by_course_id.get(course_id):
+                        self._roles_by_course_id[course_id] = set()
+                    self._roles_by_course_id[course_id].add(role)
+                self.set_cached_roles({user.id: self._roles_by_course_id}, versions)
         self._roles = set()
         for roles_for_course in self._roles_by_course_id.values():
             self._roles.update(roles_for_course)
 
+    @classmethod
+    def _version_cache_key(cls, user_id):
+        return f'{cls.CACHE_KEY_PREFIX}.version.{user_id}'
+
+    @classmethod
+    def _roles_cache_key(cls, user_id):
+        return f'{cls.CACHE_KEY_PREFIX}.roles.{user_id}'
+
+    @classmethod
+    def get_cached_roles(cls, user_ids):
+        """
+        Return the roles by course id of the users which are in the cross-request
+        cache for their current version, by user id, and the current versions of
+        the roles of all of the users, to pass to set_cached_roles.
+
+        Users without a version are given a new one, which must be done before
+        their roles are read from the database.
+        """
+        user_ids = [user_id for user_id in user_ids if user_id is not None]
+        cached = cache.get_many(
+            [cls._version_cache_key(user_id) for user_id in user_ids] +
+            [cls._roles_cache_key(user_id) for user_id in user_ids]
+        )
+        roles_by_user, versions, new_versions = {}, {}, {}
+        for user_id in user_ids:
+            version = cached.get(cls._version_cache_key(user_id))
+            if version is None:
+                version = new_versions[cls._version_cache_key(user_id)] = uuid4().hex
+            else:
+                cached_roles = cached.get(cls._roles_cache_key(user_id))
+                if cached_roles is not None and cached_roles[0] == version:
+                    roles_by_user[user_id] = cached_roles[1]
+            versions[user_id] = version
+        if new_versions:
+            cache.set_many(new_versions, ROLE_CACHE_TIMEOUT)
+        return roles_by_user, versions
+
+    @classmethod
+    def set_cached_roles(cls, roles_by_user, versions):
+        """
+        Keep the roles by course id of the users in the cross-request cache, for the
+        versions returned by get_cached_roles before the roles were read, once the
+        current transaction is committed.
+        """
+        cached_roles = {
+            cls._roles_cache_key(user_id): (versions[user_id], roles_by_course_id)
+            for user_id, roles_by_course_id in roles_by_user.items()
+            if user_id in versions
+        }
+        if cached_roles:
+            transaction.on_commit(lambda: cache.set_many(cached_roles, ROLE_CACHE_TIMEOUT))
+
+    @classmethod
+    def invalidate(cls, *user_ids):
+        """
+        Invalidate the roles of the users kept in the cross-request cache.
+
+        The roles are invalidated again once the current transaction is committed,
+        as other requests may have read the previous roles from the database until then.
+        """
+        version_keys = [cls._version_cache_key(user_id) for user_id in user_ids if user_id is not None]
+        if not version_keys:
+            return
+        cache.delete_many(version_keys)
+        transaction.on_commit(lambda: cache.delete_many(version_keys))
+
     @staticmethod
     def get_roles(role):
         """
@@ -281,6 +382,7 @@ class RoleBase(AccessRole):
                 CourseAccessRole.objects.get_or_create(
                     user=user, role=self._role_name, course_id=self.course_key, org=self.org
                 )
+                RoleCache.invalidate(user.id)
                 if hasattr(user, '_roles'):
                     del user._roles
 
@@ -292,6 +394,7 @@ class RoleBase(AccessRole):
             user__in=users, role=self._role_name, org=self.org, course_id=self.course_key
         )
         entries.delete()
+        RoleCache.invalidate(*[user.id for user in users])
         for user in users:
             if hasattr(user, '_roles'):
                 del user._roles
@@ -522,6 +625,7 @@ class UserBasedRole:
             for course_key in course_keys:
                 entry = CourseAccessRole(user=self.user, role=self.role, course_id=course_key, org=course_key.org)
                 entry.save()
+            RoleCache.invalidate(self.user.id)
             if hasattr(self.user, '_roles'):
                 del self.user._roles
         else:
@@ -533,6 +637,7 @@ class UserBasedRole:
         """
         entries = CourseAccessRole.objects.filter(user=self.user, role=self.role, course_id__in=course_keys)
         entries.delete()
+        RoleCache.invalidate(self.user.id)
         if hasattr(self.user, '_roles'):
             del self.user._roles
 
@@ -23,6 +23,7 @@ from common.djangoapps.student.models import (
     is_username_retired
 )
 from common.djangoapps.student.models_api import confirm_name_change
+from common.djangoapps.student.roles import RoleCache
 from common.djangoapps.student.signals import (
     emit_course_access_role_added,
     emit_course_access_role_removed,
@@ -115,6 +116,15 @@ def listen_for_course_access_role_removed(sender, instance, **kwargs):
     emit_course_access_role_removed(user, instance.course_id, instance.org, instance.role)
 
 
+@receiver(post_save, sender=CourseAccessRole)
+@receiver(post_delete, sender=CourseAccessRole)
+def invalidate_role_cache(sender, instance, **kwargs):
+    """
+    Invalidate the roles of the user kept across requests when one of their CourseAccessRoles changes
+    """
+    RoleCache.invalidate(instance.user_id)
+
+
 def listen_for_verified_name_approved(sender, user_id, profile_name, **kwargs):
     """
     If the user has a pending name change that corresponds to an approved verified name, confirm it.
@@ -4,11 +4,16 @@ Tests of student.roles
 
 
 import ddt
-from django.test import TestCase
+import pytest
+from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imported-auth-user
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from edx_django_utils.cache import RequestCache
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import LibraryLocator
 
 from common.djangoapps.student.roles import (
+    BulkRoleCache,
     CourseAccessRole,
     CourseBetaTesterRole,
     CourseInstructorRole,
@@ -29,6 +34,7 @@ from common.djangoapps.student.roles import (
 )
 from common.djangoapps.student.role_helpers import get_course_roles, has_staff_roles
 from common.djangoapps.student.tests.factories import AnonymousUserFactory, InstructorFactory, StaffFactory, UserFactory
+from openedx.core.djangolib.testing.utils import CacheIsolationMixin, CacheIsolationTestCase
 
 
 class RolesTestCase(TestCase):
@@ -309,3 +315,104 @@ class RoleCacheTestCase(TestCase):  # lint-amnesty, pylint: disable=missing-clas
         assert roles_dict.get('library-v1:edX+quizzes').pop().course_id.course == 'quizzes'
         assert roles_dict.get('course-v1:edX+toy+2012_Summer').pop().course_id.course == 'toy'
         assert roles_dict.get('course-v1:edX+toy2+2013_Fall').pop().course_id.course == 'toy2'
+
+
+class RoleCacheAcrossRequestsTestCase(CacheIsolationTestCase):
+    """
+    Tests of the roles of users kept by RoleCache across requests.
+    """
+    ENABLED_CACHES = ['default']
+
+    def setUp(self):
+        super().setUp()
+        self.course_key = CourseKey.from_string('course-v1:edX+toy+2012_Fall')
+        self.user = UserFactory()
+        CourseStaffRole(self.course_key).add_users(self.user)
+
+    def _new_request_user(self):
+        """
+        Returns the user as loaded by a new request.
+        """
+        RequestCache.clear_all_namespaces()
+        return User.objects.get(id=self.user.id)
+
+    def _role_cache(self, user):
+        """
+        Returns the RoleCache of the user, read in a transaction which is committed.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            return RoleCache(user)
+
+    def test_cached_across_requests(self):
+        with self.assertNumQueries(1):
+            assert self._role_cache(self.user).has_role('staff', self.course_key, 'edX')
+
+        user = self._new_request_user()
+        with self.assertNumQueries(0):
+            assert RoleCache(user).has_role('staff', self.course_key, 'edX')
+            assert CourseStaffRole(self.course_key).has_user(user)
+
+    def test_not_cached_before_commit(self):
+        RoleCache(self.user)
+        user = self._new_request_user()
+        with self.assertNumQueries(1):
+            RoleCache(user)
+
+    def test_invalidated_by_add_and_remove_users(self):
+        self._role_cache(self.user)
+        CourseInstructorRole(self.course_key).add_users(self.user)
+        assert self._role_cache(self._new_request_user()).has_role('instructor', self.course_key, 'edX')
+
+        CourseInstructorRole(self.course_key).remove_users(self.user)
+        assert not self._role_cache(self._new_request_user()).has_role('instructor', self.course_key, 'edX')
+
+    def test_invalidated_by_course_access_role_changes(self):
+        self._role_cache(self.user)
+        role = CourseAccessRole.objects.create(
+            user=self.user, role='instructor', course_id=self.course_key, org=self.course_key.org,
+        )
+        assert self._role_cache(self._new_request_user()).has_role('instructor', self.course_key, 'edX')
+
+        role.delete()
+        assert not self._role_cache(self._new_request_user()).has_role('instructor', self.course_key, 'edX')
+
+        CourseAccessRole.objects.filter(user=self.user).delete()
+        assert not self._role_cache(self._new_request_user()).all_roles_set
+
+    def test_bulk_role_cache_prefetch(self):
+        self._role_cache(self.user)
+        users = [self._new_request_user(), UserFactory()]
+
+        # Only the roles of the users which aren't cached yet are queried.
+        with self.assertNumQueries(1):
+            with self.captureOnCommitCallbacks(execute=True):
+                BulkRoleCache.prefetch(users)
+        with self.assertNumQueries(0):
+            assert RoleCache(users[0]).has_role('staff', self.course_key, 'edX')
+            assert not RoleCache(users[1]).all_roles_set
+
+        RequestCache.clear_all_namespaces()
+        with self.assertNumQueries(0):
+            BulkRoleCache.prefetch(users)
+            assert CourseStaffRole(self.course_key).has_user(users[0])
+
+
+class RoleCacheRollbackTestCase(CacheIsolationMixin, TransactionTestCase):
+    """
+    Tests of the roles kept by RoleCache across requests when transactions are rolled back.
+    """
+    ENABLED_CACHES = ['default']
+
+    def test_rolled_back_role_not_cached(self):
+        course_key = CourseKey.from_string('course-v1:edX+toy+2012_Fall')
+        user = UserFactory()
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                CourseStaffRole(course_key).add_users(user)
+                assert CourseStaffRole(course_key).has_user(user)
+                raise ValueError
+
+        RequestCache.clear_all_namespaces()
+        user = User.objects.get(id=user.id)
+        assert not CourseAccessRole.objects.filter(user=user).exists()
+        assert not CourseStaffRole(course_key).has_user(user)
@@ -1,12 +1,14 @@
 """
 Utility library for working with the edx-milestones app
 """
+from collections import defaultdict
+
 from django.conf import settings
 from django.utils.translation import gettext as _
 from edx_toggles.toggles import SettingDictToggle
 from milestones import api as milestones_api
 from milestones.exceptions import InvalidMilestoneRelationshipTypeException, InvalidUserException
-from milestones.models import MilestoneRelationshipType
+from milestones.models import MilestoneRelationshipType, UserMilestone
 from milestones.services import MilestonesService
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
@@ -380,6 +382,34 @@ def get_course_content_milestones(course_id, content_id=None, relationship='requ
     return [m for m in request_cache_dict[user_id][relationship] if m['content_id'] == str(content_id)]
 
 
+def get_course_content_milestones_for_users(course_id, user_ids, relationship='requires'):
+    """
+    Client API operation adapter/wrapper
+    Returns the content milestones of a course for each of the given user ids, as
+    get_course_content_milestones does for one user, in two queries for all of them.
+    """
+    if not ENABLE_MILESTONES_APP.is_enabled():
+        return {user_id: [] for user_id in user_ids}
+
+    course_content_milestones = milestones_api.get_course_content_milestones(course_id, None, relationship)
+
+    # Only the milestones a content requires are filtered by the users who have fulfilled them.
+    fulfilled_milestone_ids = defaultdict(set)
+    if course_content_milestones and relationship == 'requires':
+        user_milestones = UserMilestone.objects.filter(
+            user_id__in=[user_id for user_id in user_ids if user_id is not None],
+            milestone_id__in={milestone['id'] for milestone in course_content_milestones},
+            active=True,
+        ).values_list('user_id', 'milestone_id')
+        for user_id, milestone_id in user_milestones:
+            fulfilled_milestone_ids[user_id].add(milestone_id)
+
+    return {
+        user_id: [m for m in course_content_milestones if m['id'] not in fulfilled_milestone_ids[user_id]]
+        for user_id in user_ids
+    }
+
+
 def remove_course_content_user_milestones(course_key, content_key, user, relationship):
     """
     Removes the specified User-Milestone link from the system for the specified course content module.
@@ -102,6 +102,10 @@ class MilestonesHelpersTestCase(ModuleStoreTestCase):
         )
         assert len(response) == 0
 
+    def test_get_course_content_milestones_for_users_returns_none_when_app_disabled(self):
+        response = milestones_helpers.get_course_content_milestones_for_users(str(self.course.id), [1, 2])
+        assert response == {1: [], 2: []}
+
     def test_remove_content_references_returns_none_when_app_disabled(self):
         response = milestones_helpers.remove_content_references("i4x://any/content/id/will/do")
         assert response is None
@@ -137,6 +141,20 @@ class MilestonesHelpersTestCase(ModuleStoreTestCase):
         with pytest.raises(InvalidUserException):
             milestones_helpers.any_unfulfilled_milestones(self.course.id, None)
 
+    @patch.dict(settings.FEATURES, {'MILESTONES_APP': True})
+    def test_get_course_content_milestones_for_users(self):
+        content_id = str(self.course.id.make_usage_key('sequential', 'test'))
+        milestones_helpers.add_course_content_milestone(str(self.course.id), content_id, 'requires', self.milestone)
+        milestones_helpers.add_user_milestone({'id': 1}, self.milestone)
+
+        response = milestones_helpers.get_course_content_milestones_for_users(str(self.course.id), [1, 2, None])
+        for user_id in (1, 2, None):
+            assert response[user_id] == milestones_helpers.get_course_content_milestones(
+                str(self.course.id), None, 'requires', user_id
+            )
+        assert response[1] == []
+        assert [milestone['content_id'] for milestone in response[2]] == [content_id]
+
     @patch.dict(settings.FEATURES, {'MILESTONES_APP': True})
     def test_get_required_content_with_anonymous_user(self):
         course = CourseFactory()
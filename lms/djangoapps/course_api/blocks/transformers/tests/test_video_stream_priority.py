@@ -3,9 +3,13 @@ Tests for VideoBlockStreamPriorityTransformer.
 """
 
 
-from unittest import mock
+from copy import deepcopy
+from unittest import TestCase, mock
+
+from opaque_keys.edx.locator import CourseLocator
 
 from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from openedx.core.djangoapps.content.block_structure.block_structure import BlockStructureBlockData
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase  # lint-amnesty, pylint: disable=wrong-import-order
 from xmodule.modulestore.tests.factories import ToyCourseFactory  # lint-amnesty, pylint: disable=wrong-import-order
 
@@ -200,3 +204,42 @@ class TestVideoBlockStreamPriorityTransformer(ModuleStoreTestCase):
         self.collect_and_transform()
         post_transform_data = self.get_post_transform_data(video_block_key)
         self.assertDictEqual(pre_transform_data, post_transform_data)
+
+
+class TestVideoBlockStreamPriorityTransformerSharedData(TestCase):
+    """
+    Test that VideoBlockStreamPriorityTransformer doesn't modify the student view data of the
+    collected block structure it transforms an overlay of.
+    """
+
+    @mock.patch('openedx.core.djangoapps.waffle_utils.CourseWaffleFlag.is_enabled', mock.Mock(return_value=False))
+    def test_collected_data_unmodified(self):
+        video_key = CourseLocator('org', 'course', 'run').make_usage_key('video', 'sample_video')
+        collected = BlockStructureBlockData(video_key)
+        collected._add_block(collected._block_relations, video_key)  # pylint: disable=protected-access
+        student_view_data = {
+            'encoded_videos': {
+                'mobile_low': {
+                    'url': 'https://1234abcd.cloudfront.net/ABCD1234abcd.mp4',
+                    'file_size': 0
+                }
+            },
+            'only_on_web': False
+        }
+        collected.set_transformer_block_field(
+            video_key, StudentViewTransformer, StudentViewTransformer.STUDENT_VIEW_DATA, deepcopy(student_view_data)
+        )
+
+        for _ in range(2):
+            block_structure = BlockStructureFactory.create_overlay(collected)
+            VideoBlockStreamPriorityTransformer().transform(
+                usage_info=mock.Mock(), block_structure=block_structure
+            )
+            post_transform_data = block_structure.get_transformer_block_field(
+                video_key, StudentViewTransformer, StudentViewTransformer.STUDENT_VIEW_DATA
+            )
+            assert post_transform_data['encoded_videos']['mobile_low']['stream_priority'] == 2
+
+        assert collected.get_transformer_block_field(
+            video_key, StudentViewTransformer, StudentViewTransformer.STUDENT_VIEW_DATA
+        ) == student_view_data
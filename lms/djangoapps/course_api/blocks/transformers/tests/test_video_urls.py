@@ -3,9 +3,13 @@ Tests for VideoBlockURLTransformer.
 """
 
 
-from unittest import mock
+from copy import deepcopy
+from unittest import TestCase, mock
+
+from opaque_keys.edx.locator import CourseLocator
 
 from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from openedx.core.djangoapps.content.block_structure.block_structure import BlockStructureBlockData
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase  # lint-amnesty, pylint: disable=wrong-import-order
 from xmodule.modulestore.tests.factories import ToyCourseFactory  # lint-amnesty, pylint: disable=wrong-import-order
 
@@ -137,3 +141,41 @@ class TestVideoBlockURLTransformer(ModuleStoreTestCase):
         self.collect_and_transform()
         post_transform_data = self.get_post_transform_data(video_block_key)
         self.assertDictEqual(pre_transform_data, post_transform_data)
+
+
+class TestVideoBlockURLTransformerSharedData(TestCase):
+    """
+    Test that VideoBlockURLTransformer doesn't modify the student view data of the
+    collected block structure it transforms an overlay of.
+    """
+
+    def test_collected_data_unmodified(self):
+        video_key = CourseLocator('org', 'course', 'run').make_usage_key('video', 'sample_video')
+        collected = BlockStructureBlockData(video_key)
+        collected._add_block(collected._block_relations, video_key)  # pylint: disable=protected-access
+        student_view_data = {
+            'encoded_videos': {
+                'mobile_low': {
+                    'url': 'https://1234abcd.cloudfront.net/ABCD1234abcd.mp4',
+                    'file_size': 0
+                }
+            },
+            'only_on_web': False
+        }
+        collected.set_transformer_block_field(
+            video_key, StudentViewTransformer, StudentViewTransformer.STUDENT_VIEW_DATA, deepcopy(student_view_data)
+        )
+
+        for _ in range(2):
+            block_structure = BlockStructureFactory.create_overlay(collected)
+            VideoBlockURLTransformer().transform(usage_info=None, block_structure=block_structure)
+            post_transform_data = block_structure.get_transformer_block_field(
+                video_key, StudentViewTransformer, StudentViewTransformer.STUDENT_VIEW_DATA
+            )
+            assert post_transform_data['encoded_videos']['mobile_low']['url'] == (
+                'https://edx-video.net/ABCD1234abcd.mp4'
+            )
+
+        assert collected.get_transformer_block_field(
+            video_key, StudentViewTransformer, StudentViewTransformer.STUDENT_VIEW_DATA
+        ) == student_view_data
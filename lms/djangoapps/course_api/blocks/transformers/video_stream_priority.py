@@ -2,6 +2,8 @@
 Video block stream priority Transformer
 """
 
+from copy import deepcopy
+
 from openedx.core.djangoapps.content.block_structure.transformer import BlockStructureTransformer
 from openedx.core.djangoapps.video_pipeline.config.waffle import DEPRECATE_YOUTUBE
 
@@ -67,9 +69,15 @@ class VideoBlockStreamPriorityTransformer(BlockStructureTransformer):
             only_on_web = student_view_data.get('only_on_web')
             if only_on_web:
                 continue
+            # The collected student view data is shared with the collected
+            # block structure, so a copy of it is modified.
+            student_view_data = deepcopy(student_view_data)
             encoded_videos = student_view_data.get('encoded_videos')
             for video_format, video_data in encoded_videos.items():
                 if DEPRECATE_YOUTUBE.is_enabled(usage_info.course_key):
                     video_data['stream_priority'] = self.DEPRECATE_YOUTUBE_VIDEO_STREAM_PRIORITY.get(video_format, -1)
                 else:
                     video_data['stream_priority'] = self.DEFAULT_VIDEO_STREAM_PRIORITY.get(video_format, -1)
+            block_structure.set_transformer_block_field(
+                block_key, StudentViewTransformer, StudentViewTransformer.STUDENT_VIEW_DATA, student_view_data
+            )
@@ -5,14 +5,20 @@ get_course_blocks function.
 
 
 from django.conf import settings
-from edx_when import field_data
 
 from lms.djangoapps.course_api.blocks.transformers.block_completion import BlockCompletionTransformer
 from openedx.core.djangoapps.content.block_structure.api import get_block_structure_manager
 from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
 from openedx.features.content_type_gating.block_transformers import ContentTypeGateTransformer
 
-from .transformers import library_content, load_override_data, start_date, user_partitions, visibility
+from .transformers import (
+    library_content,
+    load_date_data,
+    load_override_data,
+    start_date,
+    user_partitions,
+    visibility
+)
 from .usage_info import CourseUsageInfo
 
 INDIVIDUAL_STUDENT_OVERRIDE_PROVIDER = (
@@ -45,7 +51,7 @@ def get_course_block_access_transformers(user):
         ContentTypeGateTransformer(),
         user_partitions.UserPartitionTransformer(),
         visibility.VisibilityTransformer(),
-        field_data.DateOverrideTransformer(user),
+        load_date_data.DateOverrideTransformer(user),
     ]
 
     if has_individual_student_override_provider():
@@ -109,3 +115,151 @@ def get_course_blocks(
         starting_block_usage_key,
         collected_block_structure,
     )
+
+
+def get_course_blocks_for_users(
+        users,
+        starting_block_usage_key,
+        transformers=None,
+        collected_block_structure=None,
+        allow_start_dates_in_future=False,
+        include_completion=False,
+        include_has_scheduled_content=False,
+):
+    """
+    Batch version of get_course_blocks, yielding a (user, transformed
+    block structure) tuple for each of the given users.
+
+    The collected block structure is retrieved once, and it is
+    transformed once for each group of users for whom the transformers
+    return equal transform signatures (for example, learners with the
+    same access, cohort and enrollment track), rather than once per
+    user.  See SharedCourseBlocks.
+
+    Arguments:
+        users (iterable of django.contrib.auth.models.User) - Users
+            for which the block structure is to be transformed.
+
+        Other arguments are as for get_course_blocks, except that
+            transformers, if given, must not hold any user-specific
+            state as they are used for all the users.
+    """
+    shared_course_blocks = SharedCourseBlocks(
+        starting_block_usage_key,
+        transformers,
+        collected_block_structure,
+        allow_start_dates_in_future,
+        include_completion,
+        include_has_scheduled_content,
+    )
+    for user in users:
+        yield user, shared_course_blocks.get(user)
+
+
+class SharedCourseBlocks:
+    """
+    Gets the transformed block structures of many users in a course,
+    sharing the result of the transformers among users for whom they
+    return equal transform signatures.
+
+    Each user gets their own copy of the shared result, which is cheap
+    when copy-on-write transforms are enabled.  Users for whom any
+    transformer's result is specific (for example, users with library
+    content selections or individual due date overrides) are
+    transformed individually, as by get_course_blocks.
+    """
+    def __init__(
+            self,
+            starting_block_usage_key,
+            transformers=None,
+            collected_block_structure=None,
+            allow_start_dates_in_future=False,
+            include_completion=False,
+            include_has_scheduled_content=False,
+    ):
+        """
+        Arguments are as for get_course_blocks_for_users.
+        """
+        if transformers and include_completion:
+            transformers += [BlockCompletionTransformer()]
+        self.starting_block_usage_key = starting_block_usage_key
+        self._transformers = transformers
+        self._allow_start_dates_in_future = allow_start_dates_in_future
+        self._include_completion = include_completion
+        self._include_has_scheduled_content = include_has_scheduled_content
+
+        course_key = starting_block_usage_key.course_key
+        self._manager = get_block_structure_manager(course_key)
+        self._collected_block_structure = collected_block_structure or self._manager.get_collected()
+
+        # Map of transform signatures to the transformed block structure
+        # shared by the users with that signature, which is never
+        # modified after being transformed.
+        # dict {tuple: BlockStructureBlockData}
+        self._transformed_by_signature = {}
+
+    def get(self, user):
+        """
+        Returns the transformed block structure for the given user, as
+        get_course_blocks would.
+        """
+        signature, block_structure = self.get_with_signature(user)
+        return block_structure.copy() if signature is not None else block_structure
+
+    def get_with_signature(self, user):
+        """
+        Returns a tuple of the transform signature of the given user and
+        their transformed block structure.
+
+        Unlike the structure returned by get, the structure of a user with
+        a signature is the one shared by all users with that signature, so
+        it must only be read.  The signature is None for users who are
+        transformed individually.
+        """
+        transformers = self._get_transformers(user)
+        signature = transformers.transform_signature(self._collected_block_structure)
+        if signature is None:
+            return None, self._transform(transformers)
+
+        block_structure = self._transformed_by_signature.get(signature)
+        if block_structure is None:
+            block_structure = self._transformed_by_signature[signature] = self._transform(transformers)
+        return signature, block_structure
+
+    @property
+    def num_shared_transforms(self):
+        """
+        Returns the number of transformed block structures shared among
+        the users so far.
+        """
+        return len(self._transformed_by_signature)
+
+    def _get_transformers(self, user):
+        """
+        Returns the transformers for the given user, with their
+        usage_info set.
+        """
+        if self._transformers:
+            transformers = self._transformers
+        else:
+            transformers = BlockStructureTransformers(get_course_block_access_transformers(user))
+            if self._include_completion:
+                transformers += [BlockCompletionTransformer()]
+        transformers.usage_info = CourseUsageInfo(
+            self.starting_block_usage_key.course_key,
+            user,
+            self._allow_start_dates_in_future,
+            self._include_has_scheduled_content,
+        )
+        return transformers
+
+    def _transform(self, transformers):
+        """
+        Returns the collected block structure transformed by the given
+        transformers.
+        """
+        return self._manager.get_transformed(
+            transformers,
+            self.starting_block_usage_key,
+            self._collected_block_structure,
+        )
@@ -0,0 +1,144 @@
+"""
+Benchmark of transforming a large course for many users, with deep
+copies and with copy-on-write overlays of the collected block structure.
+"""
+# pylint: disable=protected-access
+
+
+import logging
+import time
+import tracemalloc
+from unittest.mock import Mock
+
+import ddt
+from django.test import TestCase
+from edx_toggles.toggles.testutils import override_waffle_switch
+
+from openedx.core.djangoapps.content.block_structure.config import COPY_ON_WRITE_TRANSFORMS
+from openedx.core.djangoapps.content.block_structure.manager import BlockStructureManager
+from openedx.core.djangoapps.content.block_structure.perf_tests.utils import (
+    create_synthetic_course,
+    skip_unless_perf_tests_enabled
+)
+from openedx.core.djangoapps.content.block_structure.tests.helpers import mock_registered_transformers
+from openedx.core.djangoapps.content.block_structure.transformer import (
+    BlockStructureTransformer,
+    FilteringTransformerMixin
+)
+from openedx.core.djangoapps.content.block_structure.transformers import BlockStructureTransformers
+
+from ..transformers.visibility import VisibilityTransformer
+from ..usage_info import CourseUsageInfo
+
+log = logging.getLogger(__name__)
+
+# Number of simulated users to transform the course for.
+NUM_USERS = 1000
+
+# Approximate number of blocks in each synthetic course.
+COURSE_SIZES = (2000, 5000)
+
+# Number of content groups that sequentials are restricted to.
+NUM_GROUPS = 4
+
+
+class SimulatedGroupTransformer(FilteringTransformerMixin, BlockStructureTransformer):
+    """
+    Simulates the per-user work of the user_partitions and
+    DateOverrideTransformer transformers without database access:
+    removes sequentials restricted to other groups than the user's and
+    overrides the due date of the first sequential.
+    """
+    WRITE_VERSION = 1
+    READ_VERSION = 1
+    GROUP = 'group'
+
+    @classmethod
+    def name(cls):
+        return 'simulated_group'
+
+    @classmethod
+    def collect(cls, block_structure):
+        """
+        Restricts every other sequential to one of the groups.
+        """
+        for index, block_key in enumerate(block_structure.topological_traversal(
+            filter_func=lambda block_key: block_key.block_type == 'sequential',
+            yield_descendants_of_unyielded=True,
+        )):
+            if index % 2:
+                block_structure.set_transformer_block_field(block_key, cls, cls.GROUP, index % NUM_GROUPS)
+
+    def transform_block_filters(self, usage_info, block_structure):
+        user_group = usage_info.user.id % NUM_GROUPS
+        first_chapter = block_structure.get_children(block_structure.root_block_usage_key)[0]
+        first_sequential = block_structure.get_children(first_chapter)[0]
+        block_structure.override_xblock_field(first_sequential, 'due', usage_info.user.id)
+        return [
+            block_structure.create_removal_filter(
+                lambda block_key: block_structure.get_transformer_block_field(
+                    block_key, self, self.GROUP, user_group,
+                ) != user_group,
+            )
+        ]
+
+
+def _collect(num_blocks):
+    """
+    Returns a collected synthetic course of approximately num_blocks
+    blocks, with some of its chapters visible to staff only.
+    """
+    block_structure = create_synthetic_course(num_blocks)
+    for transformer in (VisibilityTransformer, SimulatedGroupTransformer):
+        block_structure._add_transformer(transformer)
+    for index, block_key in enumerate(block_structure.get_children(block_structure.root_block_usage_key)):
+        block_structure.set_transformer_block_field(
+            block_key, VisibilityTransformer, VisibilityTransformer.MERGED_VISIBLE_TO_STAFF_ONLY, index % 10 == 0,
+        )
+    SimulatedGroupTransformer.collect(block_structure)
+    return block_structure
+
+
+@skip_unless_perf_tests_enabled
+@ddt.ddt
+class TransformPerfTest(TestCase):
+    """
+    Compares the time and allocated memory of transforming a collected
+    course for NUM_USERS users.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*COURSE_SIZES)
+    def test_transform_for_users(self, num_blocks):
+        collected = _collect(num_blocks)
+        registered_transformers = [VisibilityTransformer(), SimulatedGroupTransformer()]
+        manager = BlockStructureManager(collected.root_block_usage_key, modulestore=None, cache=None)
+
+        def transform(user_id):
+            """
+            Returns the course transformed for the simulated user.
+            """
+            transformers = BlockStructureTransformers(registered_transformers)
+            transformers.usage_info = CourseUsageInfo(collected.root_block_usage_key.course_key, Mock(id=user_id))
+            transformers.usage_info._has_staff_access = False
+            return manager.get_transformed(transformers, collected_block_structure=collected)
+
+        for copy_on_write in (False, True):
+            with mock_registered_transformers(registered_transformers), \
+                    override_waffle_switch(COPY_ON_WRITE_TRANSFORMS, active=copy_on_write):
+                start = time.perf_counter()
+                num_blocks_transformed = sum(len(transform(user_id)) for user_id in range(NUM_USERS))
+                elapsed = time.perf_counter() - start
+
+                tracemalloc.start()
+                transform(NUM_USERS)
+                _, peak_size = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            log.info(
+                '%d blocks, %d users, copy_on_write=%s: %.1f s total, %.1f ms and %.0f KB peak allocation '
+                'per user, %.0f blocks per transformed structure',
+                len(collected), NUM_USERS, copy_on_write, elapsed, elapsed * 1000 / NUM_USERS,
+                peak_size / 1024, num_blocks_transformed / NUM_USERS,
+            )
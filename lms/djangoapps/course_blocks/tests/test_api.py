@@ -0,0 +1,72 @@
+"""
+Tests for the course_blocks api.
+"""
+
+
+from datetime import timedelta
+
+from django.utils.timezone import now
+
+from common.djangoapps.student.tests.factories import BetaTesterFactory, UserFactory
+from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
+from xmodule.modulestore.tests.factories import BlockFactory, CourseFactory
+
+from ..api import SharedCourseBlocks, get_course_blocks, get_course_blocks_for_users
+
+
+class GetCourseBlocksForUsersTestCase(SharedModuleStoreTestCase):
+    """
+    Tests for get_course_blocks_for_users and SharedCourseBlocks.
+    """
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.course = CourseFactory.create(days_early_for_beta=10)
+        cls.released_chapter = BlockFactory.create(parent=cls.course, category='chapter')
+        cls.staff_only_chapter = BlockFactory.create(
+            parent=cls.course, category='chapter', visible_to_staff_only=True,
+        )
+        cls.beta_chapter = BlockFactory.create(
+            parent=cls.course, category='chapter', start=now() + timedelta(days=5),
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.staff = UserFactory.create(is_staff=True)
+        self.students = [UserFactory.create() for _ in range(3)]
+        self.beta_tester = BetaTesterFactory(course_key=self.course.id)
+        self.users = [self.staff, *self.students, self.beta_tester]
+
+    def get_chapters(self, block_structure):
+        """
+        Returns the set of chapters in the given block structure.
+        """
+        return set(block_structure.get_children(self.course.location))
+
+    def test_same_as_get_course_blocks(self):
+        results = list(get_course_blocks_for_users(self.users, self.course.location))
+        assert [user for user, _ in results] == self.users
+        for user, block_structure in results:
+            assert self.get_chapters(block_structure) == self.get_chapters(
+                get_course_blocks(user, self.course.location)
+            )
+
+        chapters = {user: self.get_chapters(block_structure) for user, block_structure in results}
+        assert chapters[self.staff] == {
+            self.released_chapter.location, self.staff_only_chapter.location, self.beta_chapter.location,
+        }
+        assert chapters[self.students[0]] == {self.released_chapter.location}
+        assert chapters[self.beta_tester] == {self.released_chapter.location, self.beta_chapter.location}
+
+    def test_transforms_shared(self):
+        shared_course_blocks = SharedCourseBlocks(self.course.location)
+        block_structures = [shared_course_blocks.get(user) for user in self.users]
+
+        # Staff, students and beta testers each share a transform.
+        assert shared_course_blocks.num_shared_transforms == 3
+
+        # Users get their own copies of shared transforms.
+        student_structure, other_student_structure = block_structures[1:3]
+        assert student_structure is not other_student_structure
+        student_structure.remove_block(self.released_chapter.location, keep_descendants=False)
+        assert self.released_chapter.location in other_student_structure
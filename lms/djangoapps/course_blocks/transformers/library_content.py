@@ -22,6 +22,18 @@ from ..utils import get_student_module_as_dict
 logger = logging.getLogger(__name__)
 
 
+def _library_content_signature(block_structure):
+    """
+    Returns the transform signature of the library content transformers
+    for the given block structure.  Selections of library content are
+    made and stored for each user, so only structures without library
+    content can be shared.
+    """
+    if any(block_key.block_type == 'library_content' for block_key in block_structure):
+        return None
+    return ()
+
+
 class ContentLibraryTransformer(FilteringTransformerMixin, BlockStructureTransformer):
     """
     A transformer that manipulates the block structure by removing all
@@ -73,6 +85,9 @@ class ContentLibraryTransformer(FilteringTransformerMixin, BlockStructureTransfo
                 summary = summarize_block(child_key)
                 block_structure.set_transformer_block_field(child_key, cls, 'block_analytics_summary', summary)
 
+    def transform_signature(self, usage_info, block_structure):
+        return _library_content_signature(block_structure)
+
     def transform_block_filters(self, usage_info, block_structure):
         all_library_children = set()
         all_selected_children = set()
@@ -213,6 +228,9 @@ class ContentLibraryOrderTransformer(BlockStructureTransformer):
         # There is nothing to collect
         pass  # pylint:disable=unnecessary-pass
 
+    def transform_signature(self, usage_info, block_structure):
+        return _library_content_signature(block_structure)
+
     def transform(self, usage_info, block_structure):
         """
         Transforms the order of the children of the randomized content block
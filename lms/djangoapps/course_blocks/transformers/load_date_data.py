@@ -0,0 +1,20 @@
+"""
+Load Date Data Transformer
+"""
+
+
+from edx_when import api, field_data
+
+
+class DateOverrideTransformer(field_data.DateOverrideTransformer):
+    """
+    The DateOverrideTransformer from edx-when, which loads the user's
+    dates into blocks, with a transform signature so that users with
+    the same dates can share transformed block structures.
+    """
+    def transform_signature(self, usage_info, block_structure):
+        """
+        Returns the user's dates, which are the only user data the
+        transform depends on.
+        """
+        return frozenset(api.get_dates_for_course(usage_info.course_key, self.user).items())
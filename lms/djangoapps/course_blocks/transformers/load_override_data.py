@@ -80,6 +80,18 @@ class OverrideDataTransformer(BlockStructureTransformer):
         # collect basic xblock fields
         block_structure.request_xblock_fields(*REQUESTED_FIELDS)
 
+    def transform_signature(self, usage_info, block_structure):
+        """
+        Users without any overrides in the course share the unmodified
+        block fields.
+        """
+        has_overrides = StudentFieldOverride.objects.filter(
+            course_id=usage_info.course_key,
+            field__in=REQUESTED_FIELDS,
+            student__id=self.user.id,
+        ).exists()
+        return None if has_overrides else ()
+
     def transform(self, usage_info, block_structure):
         """
         loads override data into blocks
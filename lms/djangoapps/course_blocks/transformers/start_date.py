@@ -6,7 +6,9 @@ from datetime import datetime
 
 from pytz import UTC
 
+from common.djangoapps.student.roles import CourseBetaTesterRole
 from lms.djangoapps.courseware.access_utils import check_start_date
+from lms.djangoapps.courseware.masquerade import is_masquerading
 from openedx.core.djangoapps.content.block_structure.transformer import (
     BlockStructureTransformer,
     FilteringTransformerMixin
@@ -89,6 +91,19 @@ class StartDateTransformer(FilteringTransformerMixin, BlockStructureTransformer)
             func_merge_ancestors=max,
         )
 
+    def transform_signature(self, usage_info, block_structure):
+        if usage_info.has_staff_access or usage_info.allow_start_dates_in_future:
+            return ()
+
+        # Start dates are not enforced for masquerading users.
+        if is_masquerading(usage_info.user, usage_info.course_key):
+            return None
+
+        return (
+            CourseBetaTesterRole(usage_info.course_key).has_user(usage_info.user),
+            usage_info.include_has_scheduled_content,
+        )
+
     def transform_block_filters(self, usage_info, block_structure):
         # Users with staff access bypass the Start Date check.
         if usage_info.has_staff_access or usage_info.allow_start_dates_in_future:
@@ -75,6 +75,23 @@ class UserPartitionTransformer(BlockStructureTransformer):
             merged_group_access = _MergedGroupAccess(user_partitions, xblock, merged_parent_access_list)
             block_structure.set_transformer_block_field(block_key, cls, 'merged_group_access', merged_group_access)
 
+    def transform_signature(self, usage_info, block_structure):
+        """
+        Returns the user's staff access and groups in the course's
+        partitions.  The access denied messages of partitions depend on
+        the user's group and the request only.
+        """
+        user = usage_info.user
+        if has_access(user, 'staff', usage_info.course_key):
+            return (True, ())
+
+        user_partitions = block_structure.get_transformer_data(self, 'user_partitions')
+        if not user_partitions:
+            return (False, ())
+
+        user_groups = get_user_partition_groups(usage_info.course_key, user_partitions, user, 'id')
+        return (False, tuple(sorted((partition_id, group.id) for partition_id, group in user_groups.items())))
+
     def transform(self, usage_info, block_structure):
         user = usage_info.user
         SplitTestTransformer().transform(usage_info, block_structure)
@@ -13,6 +13,8 @@ Note: The access control logic in this file does NOT check for enrollment in
 
 
 import logging
+import threading
+from contextlib import contextmanager
 
 from django.conf import settings  # pylint: disable=unused-import
 from django.contrib.auth.models import AnonymousUser
@@ -132,8 +134,13 @@ def has_access(user, action, obj, course_key=None):
     if not user:
         user = AnonymousUser()
 
+    batch = _get_block_access_batch(user, course_key)
+
     # Preview mode is only accessible by staff.
-    if in_preview_mode() and course_key:
+    if batch is not None:
+        if batch.preview_mode_denied:
+            return ACCESS_DENIED
+    elif in_preview_mode() and course_key:
         if not has_staff_access_to_preview_mode(user, course_key):
             return ACCESS_DENIED
 
@@ -150,7 +157,7 @@ def has_access(user, action, obj, course_key=None):
 
     # NOTE: any block access checkers need to go above this
     if isinstance(obj, XBlock):
-        return _has_access_to_block(user, action, obj, course_key)
+        return _has_access_to_block(user, action, obj, course_key, batch)
 
     if isinstance(obj, CourseKey):
         return _has_access_course_key(user, action, obj)
@@ -167,6 +174,123 @@ def has_access(user, action, obj, course_key=None):
                     .format(type(obj)))
 
 
+def has_access_to_blocks(user, action, blocks, course_key):
+    """
+    Check whether a user has the access to do action on each of the blocks of a course.
+
+    This is equivalent to calling has_access for each block, except that the role,
+    masquerade, preview mode and partition groups of the user in the course are
+    only loaded once for all of the blocks.
+
+    Returns a list of the AccessResponse objects of the blocks, in order.
+    """
+    with batched_block_access(user, course_key):
+        return [has_access(user, action, block, course_key) for block in blocks]
+
+
+@contextmanager
+def batched_block_access(user, course_key):
+    """
+    Context manager within which the access checks of the blocks of the course
+    share the data of the user which doesn't depend on the block.
+
+    The courseware renders a sequence or a unit with all of its descendants
+    within this context, so that has_access loads the role of the user, their
+    staff access and their group in each user partition once instead of for
+    each of the blocks. Only the calls to has_access for the same user object
+    and course key use the batch: the masquerade of a user is set on the user
+    object, so the views start the batch with the user the blocks are bound to,
+    after setting up the masquerade.
+    """
+    previous_batch = getattr(_block_access_batches, 'batch', None)
+    _block_access_batches.batch = _BlockAccessBatch(user, course_key)
+    try:
+        yield
+    finally:
+        _block_access_batches.batch = previous_batch
+
+
+_block_access_batches = threading.local()
+
+
+def _get_block_access_batch(user, course_key):
+    """
+    Returns the active _BlockAccessBatch of the user in the course, if any.
+    """
+    batch = getattr(_block_access_batches, 'batch', None)
+    if batch is not None and batch.user is user and course_key and batch.course_key == course_key:
+        return batch
+    return None
+
+
+class _BlockAccessBatch:
+    """
+    Lazily loaded data of a user in a course which is shared by the access checks of its blocks.
+    """
+    def __init__(self, user, course_key):
+        self.user = user
+        self.course_key = course_key
+        self._preview_mode_denied = None
+        self._user_role = None
+        self._course_access = {}
+        self._course_partitions = None
+        self._user_groups = {}
+
+    @property
+    def preview_mode_denied(self):
+        """
+        Whether the access is denied because preview mode is only accessible by staff.
+        """
+        if self._preview_mode_denied is None:
+            self._preview_mode_denied = bool(
+                in_preview_mode() and not has_staff_access_to_preview_mode(self.user, self.course_key)
+            )
+        return self._preview_mode_denied
+
+    @property
+    def user_role(self):
+        """
+        The role of the user in the course, as returned by get_user_role.
+        """
+        if self._user_role is None:
+            self._user_role = get_user_role(self.user, self.course_key)
+        return self._user_role
+
+    def access_to_course(self, access_level):
+        """
+        Returns the AccessResponse of _has_access_to_course for the access level.
+        """
+        if access_level not in self._course_access:
+            self._course_access[access_level] = _has_access_to_course(self.user, access_level, self.course_key)
+        return self._course_access[access_level]
+
+    def get_user_partition(self, block, partition_id):
+        """
+        Returns the partition of the course with the given id, as block._get_user_partition.
+        """
+        if self._course_partitions is None:
+            self._course_partitions = {
+                partition.id: partition
+                for partition in block.runtime.service(block, 'partitions').course_partitions
+            }
+        try:
+            return self._course_partitions[partition_id]
+        except KeyError:
+            raise NoSuchUserPartitionError(  # lint-amnesty, pylint: disable=raise-missing-from
+                f"could not find a UserPartition with ID [{partition_id}]"
+            )
+
+    def get_group_for_user(self, partition):
+        """
+        Returns the group of the user in the partition.
+        """
+        if partition.id not in self._user_groups:
+            self._user_groups[partition.id] = partition.scheme.get_group_for_user(
+                self.course_key, self.user, partition,
+            )
+        return self._user_groups[partition.id]
+
+
 def has_staff_access_to_preview_mode(user, course_key):
     """
     Checks if given user can access course in preview mode.
@@ -444,13 +568,16 @@ def _has_access_error_block(user, action, block, course_key):
     return _dispatch(checkers, action, user, block)
 
 
-def _has_group_access(block, user, course_key):
+def _has_group_access(block, user, course_key, batch=None):
     """
     This function returns a boolean indicating whether or not `user` has
     sufficient group memberships to "load" a block
+
+    `batch` is the _BlockAccessBatch of the user in the course, if any.
     """
     # Allow staff and instructors roles group access, as they are not masquerading as a student.
-    if get_user_role(user, course_key) in ['staff', 'instructor']:
+    user_role = batch.user_role if batch is not None else get_user_role(user, course_key)
+    if user_role in ['staff', 'instructor']:
         return ACCESS_GRANTED
 
     # use merged_group_access which takes group access on the block's
@@ -465,7 +592,10 @@ def _has_group_access(block, user, course_key):
     partitions = []
     for partition_id, group_ids in merged_access.items():
         try:
-            partition = block._get_user_partition(partition_id)  # pylint: disable=protected-access
+            if batch is not None:
+                partition = batch.get_user_partition(block, partition_id)
+            else:
+                partition = block._get_user_partition(partition_id)  # pylint: disable=protected-access
 
             # check for False in merged_access, which indicates that at least one
             # partition's group list excludes all students.
@@ -511,11 +641,14 @@ def _has_group_access(block, user, course_key):
     missing_groups = []
     block_key = block.scope_ids.usage_id
     for partition, groups in partition_groups:
-        user_group = partition.scheme.get_group_for_user(
-            course_key,
-            user,
-            partition,
-        )
+        if batch is not None:
+            user_group = batch.get_group_for_user(partition)
+        else:
+            user_group = partition.scheme.get_group_for_user(
+                course_key,
+                user,
+                partition,
+            )
         if user_group not in groups:
             missing_groups.append((
                 partition,
@@ -542,7 +675,7 @@ def _has_group_access(block, user, course_key):
     return ACCESS_GRANTED
 
 
-def _has_access_to_block(user, action, block, course_key=None):
+def _has_access_to_block(user, action, block, course_key=None, batch=None):
     """
     Check if user has access to this block.
 
@@ -553,7 +686,19 @@ def _has_access_to_block(user, action, block, course_key=None):
     NOTE: This is the fallback logic for blocks that don't have custom policy
     (e.g. courses).  If you call this method directly instead of going through
     has_access(), it will not do the right thing.
+
+    `batch` is the _BlockAccessBatch of the user in the course, if any.
     """
+    def staff_access():
+        if batch is not None:
+            return batch.access_to_course('staff')
+        return _has_staff_access_to_block(user, block, course_key)
+
+    def instructor_access():
+        if batch is not None:
+            return batch.access_to_course('instructor')
+        return _has_instructor_access_to_block(user, block, course_key)
+
     def can_load():
         """
         NOTE: This does not check that the student is enrolled in the course
@@ -565,12 +710,12 @@ def _has_access_to_block(user, action, block, course_key=None):
         # access to this content, then deny access. The problem with calling _has_staff_access_to_block
         # before this method is that _has_staff_access_to_block short-circuits and returns True
         # for staff users in preview mode.
-        group_access_response = _has_group_access(block, user, course_key)
+        group_access_response = _has_group_access(block, user, course_key, batch)
         if not group_access_response:
             return group_access_response
 
         # If the user has staff access, they can load the block and checks below are not needed.
-        staff_access_response = _has_staff_access_to_block(user, block, course_key)
+        staff_access_response = staff_access()
         if staff_access_response:
             return staff_access_response
 
@@ -590,8 +735,8 @@ def _has_access_to_block(user, action, block, course_key=None):
 
     checkers = {
         'load': can_load,
-        'staff': lambda: _has_staff_access_to_block(user, block, course_key),
-        'instructor': lambda: _has_instructor_access_to_block(user, block, course_key)
+        'staff': staff_access,
+        'instructor': instructor_access,
     }
 
     return _dispatch(checkers, action, user, block)
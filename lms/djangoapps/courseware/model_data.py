@@ -334,11 +334,11 @@ class UserStateCache:
     """
     Cache for Scope.user_state xblock field data.
     """
-    def __init__(self, user, course_id):
+    def __init__(self, user, course_id, user_state_client=None):
         self._cache = defaultdict(dict)
         self.course_id = course_id
         self.user = user
-        self._client = DjangoXBlockUserStateClient(self.user)
+        self._client = user_state_client or DjangoXBlockUserStateClient(self.user)
 
     def cache_fields(self, fields, xblocks, aside_types):  # pylint: disable=unused-argument
         """
@@ -665,7 +665,7 @@ class FieldDataCache:
     A cache of django model objects needed to supply the data
     for a block and its descendants
     """
-    def __init__(self, blocks, course_id, user, asides=None, read_only=False):
+    def __init__(self, blocks, course_id, user, asides=None, read_only=False, user_state_client=None):
         """
         Find any courseware.models objects that are needed by any block
         in blocks. Attempts to minimize the number of queries to the database.
@@ -678,6 +678,8 @@ class FieldDataCache:
         user: The user for which to cache data
         asides: The list of aside types to load, or None to prefetch no asides.
         read_only: We should not perform writes (they become a no-op).
+        user_state_client: The XBlockUserStateClient to load and store Scope.user_state
+            data with, or None to use a DjangoXBlockUserStateClient for the user.
         """
         if asides is None:
             self.asides = []
@@ -693,6 +695,7 @@ class FieldDataCache:
             Scope.user_state: UserStateCache(
                 self.user,
                 self.course_id,
+                user_state_client,
             ),
             Scope.user_info: UserInfoCache(
                 self.user,
@@ -762,7 +765,7 @@ class FieldDataCache:
     @classmethod
     def cache_for_block_descendents(cls, course_id, user, block, depth=None,
                                     block_filter=lambda block: True,
-                                    asides=None, read_only=False):
+                                    asides=None, read_only=False, user_state_client=None):
         """
         course_id: the course in the context of which we want StudentModules.
         user: the django user for whom to load modules.
@@ -771,8 +774,12 @@ class FieldDataCache:
             the supplied block. If depth is None, load all descendant StudentModules
         block_filter is a function that accepts a block and return whether the field data
             should be cached
+        user_state_client: the XBlockUserStateClient to use for Scope.user_state data, if not
+            the default one.
         """
-        cache = FieldDataCache([], course_id, user, asides=asides, read_only=read_only)
+        cache = FieldDataCache(
+            [], course_id, user, asides=asides, read_only=read_only, user_state_client=user_state_client,
+        )
         cache.add_block_descendents(block, depth, block_filter)
         return cache
 
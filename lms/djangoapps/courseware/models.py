@@ -275,6 +275,75 @@ class BaseStudentModuleHistory(models.Model):
             request_cache.setdefault(request_cache_key, {})
             request_cache.data[request_cache_key][student_module.id] = history_entry.id
 
+    @staticmethod
+    def save_history_entries(student_modules, history_model_cls, request_cache_key):
+        """
+        When many StudentModule instances are updated in bulk (without post_save signals), save
+        their changes in the corresponding activity history table with as few queries as possible.
+
+        This follows save_history_entry: history records already created for a student module
+        during the request are updated rather than duplicated.
+        """
+        student_modules = [
+            student_module for student_module in student_modules
+            if student_module.module_type in history_model_cls.HISTORY_SAVING_TYPES
+        ]
+        if not student_modules:
+            return
+
+        request_cache = RequestCache('studentmodulehistory')
+        request_cache.setdefault(request_cache_key, {})
+        request_smh_cache = request_cache.data[request_cache_key]
+        cached_entries = history_model_cls.objects.in_bulk([
+            request_smh_cache[student_module.id]
+            for student_module in student_modules
+            if student_module.id in request_smh_cache
+        ])
+
+        new_entries = []
+        updated_entries = []
+        for student_module in student_modules:
+            history_entry = cached_entries.get(request_smh_cache.get(student_module.id))
+            if history_entry is None:
+                history_entry = history_model_cls(student_module=student_module, version=None)
+                new_entries.append(history_entry)
+            else:
+                updated_entries.append(history_entry)
+
+            history_entry.created = student_module.modified
+            history_entry.state = student_module.state
+            history_entry.grade = student_module.grade
+            history_entry.max_grade = student_module.max_grade
+
+        history_model_cls.objects.bulk_update(updated_entries, ['created', 'state', 'grade', 'max_grade'])
+        history_model_cls.objects.bulk_create(new_entries)
+
+        # Databases that don't return the ids of bulk inserted rows (MySQL) leave them unset, in
+        # which case a later save in the request creates another history record.
+        for history_entry in new_entries:
+            if history_entry.id is not None:
+                request_smh_cache[history_entry.student_module_id] = history_entry.id
+
+    @staticmethod
+    def save_history_in_bulk(student_modules):
+        """
+        Save the history of many StudentModule instances updated in bulk in the history table
+        that the post_save signal handlers of StudentModule write to.
+        """
+        if settings.FEATURES.get('ENABLE_CSMH_EXTENDED'):
+            from lms.djangoapps.coursewarehistoryextended.models import StudentModuleHistoryExtended
+            BaseStudentModuleHistory.save_history_entries(
+                student_modules,
+                StudentModuleHistoryExtended,
+                "lms.djangoapps.coursewarehistoryextended.models.student_module_history_extended_map"
+            )
+        else:
+            BaseStudentModuleHistory.save_history_entries(
+                student_modules,
+                StudentModuleHistory,
+                "lms.djangoapps.courseware.models.student_module_history_map"
+            )
+
 
 class StudentModuleHistory(BaseStudentModuleHistory):
     """Keeps a complete history of state changes for a given XModule for a given
@@ -4,9 +4,10 @@ Test the access control framework
 
 
 import datetime
+import functools
 import itertools
 
-from unittest.mock import Mock, patch
+from unittest.mock import Mock, PropertyMock, patch
 import pytest
 import ddt
 import pytz
@@ -19,6 +20,7 @@ from django.test.utils import override_settings
 from django.urls import reverse
 from milestones.tests.utils import MilestonesTestCaseMixin
 from opaque_keys.edx.locator import CourseLocator
+from xblock.core import XBlock
 
 import lms.djangoapps.courseware.access as access
 import lms.djangoapps.courseware.access_response as access_response
@@ -26,6 +28,7 @@ from lms.djangoapps.courseware.masquerade import CourseMasquerade
 from lms.djangoapps.courseware.tests.helpers import LoginEnrollmentTestCase, masquerade_as_group_member
 from lms.djangoapps.courseware.toggles import course_is_invitation_only
 from lms.djangoapps.ccx.models import CustomCourseForEdX
+from lms.djangoapps.lms_xblock.mixin import LmsBlockMixin
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.content.course_overviews.tests.factories import CourseOverviewFactory
 from openedx.core.djangoapps.waffle_utils.testutils import WAFFLE_TABLES
@@ -761,6 +764,108 @@ class UserRoleTestCase(TestCase):
         assert 'student' == access.get_user_role(self.anonymous_user, self.course_key)
 
 
+class BatchedBlockAccessTestCase(TestCase):
+    """
+    Tests of the access checks of the blocks of a course batched for a user.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.course_key = CourseLocator('edX', 'toy', '2012_Fall')
+        self.student = UserFactory()
+        self.course_staff = StaffFactory(course_key=self.course_key)
+        self.groups = [
+            Group(MINIMUM_UNUSED_PARTITION_ID + 1, 'Group 1'),
+            Group(MINIMUM_UNUSED_PARTITION_ID + 2, 'Group 2'),
+        ]
+        self.scheme = Mock()
+        self.scheme.get_group_for_user.return_value = self.groups[0]
+        user_partition = UserPartition(
+            MINIMUM_UNUSED_PARTITION_ID, 'Test User Partition', '', self.groups, scheme=self.scheme,
+        )
+        self.partitions_service = Mock()
+        self.course_partitions = PropertyMock(return_value=[user_partition])
+        type(self.partitions_service).course_partitions = self.course_partitions
+
+    def _create_unit_blocks(self, count):
+        """
+        Returns the blocks of a unit, alternately restricted to each of the groups of the partition.
+        """
+        blocks = []
+        for index in range(count):
+            block = Mock(spec=XBlock)
+            block.location = self.course_key.make_usage_key('html', f'html_{index}')
+            block.scope_ids = Mock(usage_id=block.location)
+            block.runtime = Mock()
+            block.runtime.service.return_value = self.partitions_service
+            block._get_user_partition = functools.partial(LmsBlockMixin._get_user_partition, block)
+            block.merged_group_access = {MINIMUM_UNUSED_PARTITION_ID: [self.groups[index % 2].id]}
+            block.visible_to_staff_only = False
+            block.days_early_for_beta = None
+            block.start = datetime.datetime.now(pytz.utc) - datetime.timedelta(days=1)
+            block._class_tags = set()
+            blocks.append(block)
+        return blocks
+
+    def test_has_access_to_blocks(self):
+        blocks = self._create_unit_blocks(4)
+
+        responses = access.has_access_to_blocks(self.student, 'load', blocks, self.course_key)
+        assert [bool(response) for response in responses] == [True, False, True, False]
+        assert isinstance(responses[1], access_response.IncorrectPartitionGroupError)
+        assert responses == [access.has_access(self.student, 'load', block, self.course_key) for block in blocks]
+
+        assert all(access.has_access_to_blocks(self.course_staff, 'load', blocks, self.course_key))
+        assert all(access.has_access_to_blocks(self.course_staff, 'staff', blocks, self.course_key))
+        assert not any(access.has_access_to_blocks(self.student, 'staff', blocks, self.course_key))
+
+    def test_unit_page_benchmark(self):
+        """
+        The access checks of the 200 blocks of a unit page load the role, partitions and
+        group of the user once when they are batched, instead of once per block.
+        """
+        blocks = self._create_unit_blocks(200)
+
+        with patch('lms.djangoapps.courseware.access.get_user_role', wraps=access.get_user_role) as mock_role:
+            unbatched_responses = [access.has_access(self.student, 'load', block, self.course_key) for block in blocks]
+        assert mock_role.call_count == 200
+        assert self.course_partitions.call_count == 200
+        assert self.scheme.get_group_for_user.call_count == 200
+
+        self.course_partitions.reset_mock()
+        self.scheme.get_group_for_user.reset_mock()
+        with patch('lms.djangoapps.courseware.access.get_user_role', wraps=access.get_user_role) as mock_role:
+            with self.assertNumQueries(0):
+                batched_responses = access.has_access_to_blocks(self.student, 'load', blocks, self.course_key)
+        assert mock_role.call_count == 1
+        assert self.course_partitions.call_count == 1
+        assert self.scheme.get_group_for_user.call_count == 1
+        assert batched_responses == unbatched_responses
+
+    def test_batched_block_access_scope(self):
+        block = self._create_unit_blocks(1)[0]
+
+        with access.batched_block_access(self.student, self.course_key):
+            assert access.has_access(self.student, 'load', block, self.course_key)
+            assert access.has_access(self.student, 'load', block, self.course_key)
+            assert self.scheme.get_group_for_user.call_count == 1
+
+            # Other users, other courses and nested batches don't share the batch.
+            assert access.has_access(self.course_staff, 'load', block, self.course_key)
+            other_course_key = CourseLocator('edX', 'toy', 'other_run')
+            access.has_access(self.student, 'load', block, other_course_key)
+            assert self.scheme.get_group_for_user.call_count == 2
+            with access.batched_block_access(self.course_staff, self.course_key):
+                access.has_access(self.student, 'load', block, self.course_key)
+            assert self.scheme.get_group_for_user.call_count == 3
+
+            access.has_access(self.student, 'load', block, self.course_key)
+            assert self.scheme.get_group_for_user.call_count == 3
+
+        access.has_access(self.student, 'load', block, self.course_key)
+        assert self.scheme.get_group_for_user.call_count == 4
+
+
 @ddt.ddt
 class CourseOverviewAccessTestCase(ModuleStoreTestCase):
     """
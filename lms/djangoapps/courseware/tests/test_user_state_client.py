@@ -10,6 +10,7 @@ from datetime import datetime
 from unittest import TestCase
 from collections import defaultdict
 from django.db import connections
+from django.test.utils import CaptureQueriesContext, override_settings
 
 from common.djangoapps.student.tests.factories import UserFactory
 from lms.djangoapps.courseware.user_state_client import (
@@ -140,6 +141,42 @@ class _UserStateClientTestUtils(TestCase):
             scope=self.scope,
         )
 
+    def get_many_for_users(self, users, blocks, fields=None):
+        """
+        Get the state for the specified users and blocks.
+
+        This wraps :meth:`~XBlockUserStateClient.get_many_for_users`
+        to take indexes rather than actual values to make tests easier
+        to write concisely.
+        """
+        return self.client.get_many_for_users(
+            usernames=[self._user(user) for user in users],
+            block_keys=[self._block(block) for block in blocks],
+            scope=self.scope,
+            fields=fields,
+        )
+
+    def set_many_for_users(self, user_to_block_to_state):
+        """
+        Set the state for the specified users and blocks.
+
+        This wraps :meth:`~XBlockUserStateClient.set_many_for_users`
+        to take indexes rather than actual values to make tests easier
+        to write concisely.
+        """
+        return self.client.set_many_for_users(
+            usernames_to_block_states={
+                self._user(user): {
+                    self._block(block): state
+                    for block, state
+                    in list(block_to_state.items())
+                }
+                for user, block_to_state
+                in list(user_to_block_to_state.items())
+            },
+            scope=self.scope,
+        )
+
     def delete_many(self, user, blocks, fields=None):
         """
         Delete the state for the specified user and blocks.
@@ -458,6 +495,84 @@ class _UserStateClientTestHistory(_UserStateClientTestUtils):
         )
 
 
+class _UserStateClientTestBulk(_UserStateClientTestUtils):
+    """
+    Blackbox tests of XBlockUserStateClient functionality across many users.
+    """
+
+    __test__ = False
+
+    def test_set_many_for_users_get(self):
+        self.set_many_for_users({
+            0: {0: {'a': 0}, 1: {'b': 1}},
+            1: {0: {'a': 10}},
+        })
+        self.assertEqual(self.get(user=0, block=0).state, {'a': 0})
+        self.assertEqual(self.get(user=0, block=1).state, {'b': 1})
+        self.assertEqual(self.get(user=1, block=0).state, {'a': 10})
+        with self.assertRaises(self.client.DoesNotExist):
+            self.get(user=1, block=1)
+
+    def test_set_many_for_users_overlay(self):
+        self.set(user=0, block=0, state={'a': 0, 'b': 1})
+        self.set(user=1, block=0, state={'a': 10})
+        self.set_many_for_users({
+            0: {0: {'b': 2, 'c': 3}},
+            1: {0: {'a': 11}, 1: {'a': 12}},
+        })
+        self.assertEqual(self.get(user=0, block=0).state, {'a': 0, 'b': 2, 'c': 3})
+        self.assertEqual(self.get(user=1, block=0).state, {'a': 11})
+        self.assertEqual(self.get(user=1, block=1).state, {'a': 12})
+
+    def test_get_many_for_users(self):
+        self.set(user=0, block=0, state={'a': 0})
+        self.set(user=0, block=1001, state={'a': 1})
+        self.set(user=1, block=1, state={'a': 2})
+        self.set(user=2, block=0, state={'a': 3})
+        self.assertCountEqual(
+            [
+                (entry.username, entry.block_key, entry.state)
+                for entry in self.get_many_for_users(users=[0, 1, 3], blocks=[0, 1, 1001])
+            ],
+            [
+                (self._user(0), self._block(0), {'a': 0}),
+                (self._user(0), self._block(1001), {'a': 1}),
+                (self._user(1), self._block(1), {'a': 2}),
+            ]
+        )
+
+    def test_get_many_for_users_fields(self):
+        self.set(user=0, block=0, state={'a': 0, 'b': 1})
+        self.set(user=1, block=0, state={'b': 2})
+        self.assertCountEqual(
+            [
+                (entry.username, entry.state)
+                for entry in self.get_many_for_users(users=[0, 1], blocks=[0], fields=['a'])
+            ],
+            [(self._user(0), {'a': 0}), (self._user(1), {})]
+        )
+
+    def test_get_many_for_users_deleted_block(self):
+        self.set(user=0, block=0, state={'a': 0})
+        self.set(user=1, block=0, state={'a': 1})
+        self.delete(user=0, block=0)
+        self.assertEqual(
+            [entry.username for entry in self.get_many_for_users(users=[0, 1], blocks=[0])],
+            [self._user(1)]
+        )
+
+    def test_set_many_for_users_with_history(self):
+        self.set_many_for_users({0: {0: {'a': 1}}, 1: {0: {'a': 2}}})
+        self.assertEqual(
+            [history.state for history in self.get_history(user=0, block=0)],
+            [{'a': 1}]
+        )
+        self.assertEqual(
+            [history.state for history in self.get_history(user=1, block=0)],
+            [{'a': 2}]
+        )
+
+
 class _UserStateClientTestIterAll(_UserStateClientTestUtils):
     """
     Blackbox tests of basic XBlockUserStateClient global iteration functionality.
@@ -586,6 +701,7 @@ class _UserStateClientTestIterAll(_UserStateClientTestUtils):
 
 class UserStateClientTestBase(_UserStateClientTestCRUD,
                               _UserStateClientTestHistory,
+                              _UserStateClientTestBulk,
                               _UserStateClientTestIterAll):
     """
     Blackbox tests for XBlockUserStateClient implementations.
@@ -757,3 +873,30 @@ class TestDjangoUserStateClient(UserStateClientTestBase, ModuleStoreTestCase):
             2. Update the test in the other repo to align with the new functionality
             3. Remove this override to re-enable the working test
         """
+
+    def test_bulk_queries(self):
+        """
+        The bulk methods make as many queries for many users as for a few.
+        """
+        for user in range(7):
+            self._user(user)
+
+        def count_queries(users):
+            with CaptureQueriesContext(connections['default']) as queries:
+                self.set_many_for_users({user: {0: {'a': user}, 1: {'b': user}} for user in users})
+                list(self.get_many_for_users(users, blocks=[0, 1]))
+            return len(queries)
+
+        assert count_queries([0, 1]) == count_queries([2, 3, 4, 5, 6])
+
+    @override_settings(USER_STATE_BATCH_SIZE=2)
+    def test_iter_all_in_batches(self):
+        for user in range(5):
+            self.set(user=user, block=0, state={'a': user})
+        self.delete(user=2, block=0)
+        expected = [(self._user(user), self._block(0), {'a': user}) for user in (0, 1, 3, 4)]
+        for entries in (self.iter_all_for_block(block=0), self.iter_all_for_course(course=0, block_type='problem')):
+            self.assertCountEqual(
+                [(entry.username, entry.block_key, entry.state) for entry in entries],
+                expected
+            )
@@ -2,7 +2,7 @@
 Tests courseware views.py
 """
 
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
 import html
 import itertools
 import json
@@ -17,11 +17,12 @@ from completion.test_utils import CompletionWaffleTestMixin
 from crum import set_current_request
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.db import connection
 from django.http import Http404, HttpResponse, HttpResponseBadRequest
 from django.http.request import QueryDict
 from django.test import RequestFactory, TestCase
 from django.test.client import Client
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import reverse, reverse_lazy
 from edx_django_utils.cache.utils import RequestCache
 from edx_toggles.toggles.testutils import override_waffle_flag
@@ -41,6 +42,7 @@ from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.tests.django_utils import CourseUserType, ModuleStoreTestCase, SharedModuleStoreTestCase
 from xmodule.modulestore.tests.factories import CourseFactory, BlockFactory, check_mongo_calls
+from xmodule.partitions.partitions import MINIMUM_UNUSED_PARTITION_ID, Group, UserPartition
 
 import lms.djangoapps.courseware.views.views as views
 from common.djangoapps.course_modes.models import CourseMode
@@ -53,6 +55,7 @@ from common.djangoapps.student.tests.factories import (
     CourseEnrollmentFactory,
     GlobalStaffFactory,
     RequestFactoryNoCsrf,
+    StaffFactory,
     UserFactory
 )
 from common.djangoapps.util.tests.test_date_utils import fake_pgettext, fake_ugettext
@@ -94,6 +97,10 @@ from lms.djangoapps.verify_student.services import IDVerificationService
 from openedx.core.djangoapps.catalog.tests.factories import CourseFactory as CatalogCourseFactory
 from openedx.core.djangoapps.catalog.tests.factories import CourseRunFactory, ProgramFactory
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from openedx.core.djangoapps.course_groups.cohorts import set_course_cohorted
+from openedx.core.djangoapps.course_groups.partition_scheme import CohortPartitionScheme
+from openedx.core.djangoapps.course_groups.tests.helpers import CohortFactory
+from openedx.core.djangoapps.course_groups.views import link_cohort_to_partition_group
 from openedx.core.djangoapps.crawlers.models import CrawlersConfig
 from openedx.core.djangoapps.credit.api import set_credit_requirements
 from openedx.core.djangoapps.credit.models import CreditCourse, CreditProvider
@@ -3016,6 +3023,79 @@ class TestRenderXBlock(RenderXBlockTestMixin, ModuleStoreTestCase, CompletionWaf
         assert response.status_code == expected_response
 
 
+class TestRenderXBlockBatchedAccess(MasqueradeMixin, ModuleStoreTestCase):
+    """
+    Tests that the access checks of the children of a unit rendered by render_xblock are batched.
+    """
+    NUM_CHILDREN = 6
+
+    def setUp(self):
+        super().setUp()
+        self.user_partition = UserPartition(
+            MINIMUM_UNUSED_PARTITION_ID, 'Content Groups', '',
+            [Group(1, 'Group 1'), Group(2, 'Group 2')],
+            scheme_id='cohort',
+        )
+        self.course = CourseFactory.create(user_partitions=[self.user_partition])
+        chapter = BlockFactory.create(parent=self.course, category='chapter')
+        sequential = BlockFactory.create(parent=chapter, category='sequential')
+        self.vertical = BlockFactory.create(parent=sequential, category='vertical')
+        for index in range(self.NUM_CHILDREN):
+            BlockFactory.create(
+                parent=self.vertical,
+                category='html',
+                data=f'<p>Group {index % 2 + 1} content {index}</p>',
+                group_access={MINIMUM_UNUSED_PARTITION_ID: [index % 2 + 1]},
+            )
+        CourseOverview.load_from_module_store(self.course.id)
+
+        set_course_cohorted(self.course.id, True)
+        self.student = UserFactory()
+        CourseEnrollmentFactory(user=self.student, course_id=self.course.id)
+        cohort = CohortFactory(course_id=self.course.id, users=[self.student])
+        link_cohort_to_partition_group(cohort, MINIMUM_UNUSED_PARTITION_ID, 1)
+
+    def _render_unit(self):
+        """
+        Renders the unit, and returns the number of queries and of the group lookups of the render.
+        """
+        url = reverse('render_xblock', kwargs={'usage_key_string': str(self.vertical.location)})
+        with patch.object(
+            CohortPartitionScheme, 'get_group_for_user', wraps=CohortPartitionScheme.get_group_for_user,
+        ) as mock_get_group_for_user:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+        assert response.status_code == 200
+        self.assertContains(response, 'Group 1 content 0')
+        self.assertNotContains(response, 'Group 2 content 1')
+        return len(queries), mock_get_group_for_user.call_count
+
+    def _assert_access_checks_batched(self):
+        """
+        Verifies that rendering the unit looks the group of the user up once for all of
+        the children instead of once per child, without more queries than without batching.
+        """
+        self._render_unit()
+        batched_num_queries, batched_num_lookups = self._render_unit()
+        with patch.object(views, 'batched_block_access', lambda user, course_key: nullcontext()):
+            unbatched_num_queries, unbatched_num_lookups = self._render_unit()
+
+        # Each child is looked up without the batch, and only the first one with it.
+        assert unbatched_num_lookups - batched_num_lookups == self.NUM_CHILDREN - 1
+        assert batched_num_queries <= unbatched_num_queries
+
+    def test_student(self):
+        self.client.login(username=self.student.username, password=TEST_PASSWORD)
+        self._assert_access_checks_batched()
+
+    @patch.dict('django.conf.settings.FEATURES', {'ENABLE_MASQUERADE': True})
+    def test_staff_masquerading_as_student(self):
+        staff = StaffFactory(course_key=self.course.id)
+        self.client.login(username=staff.username, password=TEST_PASSWORD)
+        self.update_masquerade(username=self.student.username)
+        self._assert_access_checks_batched()
+
+
 class TestBasePublicVideoXBlock(ModuleStoreTestCase):
     """
     Tests for public video xblock.
@@ -6,6 +6,7 @@ data in a Django ORM model.
 
 import itertools
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from operator import attrgetter
 from time import time
 
@@ -14,13 +15,13 @@ from collections import namedtuple
 
 from django.conf import settings
 from django.contrib.auth.models import User  # lint-amnesty, pylint: disable=imported-auth-user
-from django.core.paginator import Paginator
 from django.db import transaction
 from django.db.utils import IntegrityError
+from django.utils import timezone
 from edx_django_utils import monitoring as monitoring_utils
 from xblock.fields import Scope
 
-from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule
+from lms.djangoapps.courseware.models import BaseStudentModuleHistory, StudentModule, chunks
 
 try:
     import simplejson as json
@@ -30,6 +31,11 @@ except ImportError:
 
 log = logging.getLogger(__name__)
 
+# The number of users, and of blocks, to query the state of at once in the
+# bulk methods. The queries of both are chunked so as to stay within the
+# limits on the number of parameters of a query.
+BULK_CHUNK_SIZE = 250
+
 
 class XBlockUserState(namedtuple('_XBlockUserState', ['username', 'block_key', 'state', 'updated', 'scope'])):
     """
@@ -187,6 +193,35 @@ class XBlockUserStateClient():
         """
         raise NotImplementedError()
 
+    def get_many_for_users(self, usernames, block_keys, scope=Scope.user_state, fields=None):
+        """
+        Retrieve the stored XBlock state of many users for many xblock usages.
+
+        Arguments:
+            usernames: A list of the names of the users whose state should be retrieved
+            block_keys: A list of keys identifying which xblock states to load.
+            scope (Scope): The scope to load data from
+            fields: A list of field values to retrieve. If None, retrieve all stored fields.
+
+        Yields:
+            XBlockUserState tuples for each specified user and key in block_keys,
+            in no particular order.
+        """
+        for username in usernames:
+            yield from self.get_many(username, block_keys, scope, fields=fields)
+
+    def set_many_for_users(self, usernames_to_block_states, scope=Scope.user_state):
+        """
+        Set fields for XBlocks of many users.
+
+        Arguments:
+            usernames_to_block_states (dict): A dict mapping usernames to dicts that map
+                keys to state dicts, as the ``block_keys_to_state`` of :meth:`set_many`.
+            scope (Scope): The scope to store data to
+        """
+        for username, block_keys_to_state in usernames_to_block_states.items():
+            self.set_many(username, block_keys_to_state, scope)
+
     def get_history(self, username, block_key, scope=Scope.user_state):
         """
         Retrieve history of state changes for a given block for a given
@@ -293,6 +328,48 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
                 usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
                 yield (student_module, usage_key)
 
+    def _get_user_ids(self, usernames):
+        """
+        Return a dict mapping the supplied ``usernames`` to the ids of their users.
+        Usernames of users that don't exist are left out.
+        """
+        user_ids = {}
+        for usernames_chunk in chunks(usernames, BULK_CHUNK_SIZE):
+            user_ids.update(
+                User.objects.filter(username__in=usernames_chunk).values_list('username', 'id')
+            )
+        return user_ids
+
+    def _get_student_modules_for_users(self, user_ids, block_keys):
+        """
+        Retrieve the :class:`~StudentModule`s for the supplied ``user_ids`` and ``block_keys``,
+        chunking the queries on both the users and the blocks.
+
+        Arguments:
+            user_ids (list of int): The ids of the users to load `StudentModule`s for.
+            block_keys (list of :class:`~UsageKey`): The set of XBlocks to load data for.
+        """
+        course_key_func = attrgetter('course_key')
+        by_course = itertools.groupby(
+            sorted(block_keys, key=course_key_func),
+            course_key_func,
+        )
+
+        for course_key, usage_keys in by_course:
+            usage_keys = list(usage_keys)
+            for user_ids_chunk in chunks(user_ids, BULK_CHUNK_SIZE):
+                query = StudentModule.objects.chunked_filter(
+                    'module_state_key__in',
+                    usage_keys,
+                    student_id__in=user_ids_chunk,
+                    course_id=course_key,
+                    chunk_size=BULK_CHUNK_SIZE,
+                )
+
+                for student_module in query:
+                    usage_key = student_module.module_state_key.map_into_course(student_module.course_id)
+                    yield (student_module, usage_key)
+
     def _nr_attribute_name(self, function_name, stat_name, block_type=None):
         """
         Return an attribute name (string) representing the provided blocks.
@@ -498,6 +575,146 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         duration = (finish_time - evt_time) * 1000  # milliseconds
         self._nr_stat_accumulate('set_many', 'duration', duration)
 
+    def get_many_for_users(self, usernames, block_keys, scope=Scope.user_state, fields=None):
+        """
+        Retrieve the stored XBlock state of many users for the specified XBlock usages,
+        with queries chunked on both the users and the blocks.
+
+        Arguments:
+            usernames: A list of the names of the users whose state should be retrieved
+            block_keys ([UsageKey]): A list of UsageKeys identifying which xblock states to load.
+            scope (Scope): The scope to load data from
+            fields: A list of field values to retrieve. If None, retrieve all stored fields.
+
+        Yields:
+            XBlockUserState tuples for each specified user and UsageKey in block_keys,
+            in no particular order.
+        """
+        if scope != Scope.user_state:
+            raise ValueError(f"Only Scope.user_state is supported, not {scope}")
+
+        evt_time = time()
+
+        # count how many times this function gets called
+        self._nr_stat_increment('get_many_for_users', 'calls')
+
+        # keep track of users and blocks requested
+        self._nr_stat_accumulate('get_many_for_users', 'users_requested', len(usernames))
+        self._nr_stat_accumulate('get_many_for_users', 'blocks_requested', len(block_keys))
+
+        usernames_by_id = {user_id: username for username, user_id in self._get_user_ids(usernames).items()}
+        modules = self._get_student_modules_for_users(list(usernames_by_id), block_keys)
+        for module, usage_key in modules:
+            if module.state is None:
+                continue
+
+            state = json.loads(module.state)
+
+            # If the state is the empty dict, then it has been deleted, and so
+            # conformant UserStateClients should treat it as if it doesn't exist.
+            if state == {}:
+                continue
+
+            self._nr_block_stat_increment('get_many_for_users', usage_key.block_type, 'blocks_out')
+
+            # filter state on fields
+            if fields is not None:
+                state = {
+                    field: state[field]
+                    for field in fields
+                    if field in state
+                }
+            yield XBlockUserState(usernames_by_id[module.student_id], usage_key, state, module.modified, scope)
+
+        finish_time = time()
+        duration = (finish_time - evt_time) * 1000  # milliseconds
+        self._nr_stat_accumulate('get_many_for_users', 'duration', duration)
+
+    def set_many_for_users(self, usernames_to_block_states, scope=Scope.user_state):
+        """
+        Set fields for XBlocks of many users in bulk.
+
+        The existing StudentModules are read in chunked queries and their changed states
+        are written with batched updates, new StudentModules are batch inserted, and the
+        StudentModuleHistory of both is then written in bulk.
+
+        Arguments:
+            usernames_to_block_states (dict): A dict mapping usernames to dicts that map
+                UsageKeys to state dicts. These state dicts are overlaid over the stored
+                state, as in :meth:`set_many`.
+            scope (Scope): The scope to store data to
+        """
+        if scope != Scope.user_state:
+            raise ValueError("Only Scope.user_state is supported")
+
+        # count how many times this function gets called
+        self._nr_stat_increment('set_many_for_users', 'calls')
+
+        evt_time = time()
+
+        user_ids = self._get_user_ids(list(usernames_to_block_states))
+        for username in usernames_to_block_states:
+            if username not in user_ids:
+                log.warning("set_many_for_users: No user with username %s", username)
+
+        block_keys = {
+            usage_key
+            for block_keys_to_state in usernames_to_block_states.values()
+            for usage_key in block_keys_to_state
+        }
+        student_modules = {
+            (student_module.student_id, usage_key): student_module
+            for student_module, usage_key in self._get_student_modules_for_users(list(user_ids.values()), block_keys)
+        }
+
+        modified = timezone.now()
+        updated_modules = []
+        new_modules = []
+        for username, block_keys_to_state in usernames_to_block_states.items():
+            if username not in user_ids:
+                continue
+            for usage_key, state in block_keys_to_state.items():
+                student_module = student_modules.get((user_ids[username], usage_key))
+                if student_module is None:
+                    new_modules.append(StudentModule(
+                        student_id=user_ids[username],
+                        course_id=usage_key.context_key,
+                        module_state_key=usage_key,
+                        module_type=usage_key.block_type,
+                        state=json.dumps(state),
+                    ))
+                    self._nr_block_stat_increment('set_many_for_users', usage_key.block_type, 'blocks_created')
+                else:
+                    current_state = json.loads(student_module.state) if student_module.state else {}
+                    current_state.update(state)
+                    student_module.state = json.dumps(current_state)
+                    student_module.modified = modified
+                    updated_modules.append(student_module)
+                    self._nr_block_stat_increment('set_many_for_users', usage_key.block_type, 'blocks_updated')
+
+        with transaction.atomic():
+            # Only the state is written, so that scores set meanwhile aren't overwritten.
+            StudentModule.objects.bulk_update(updated_modules, ['state', 'modified'], batch_size=BULK_CHUNK_SIZE)
+            # As in set_many, rows created concurrently by another process are left as they are.
+            StudentModule.objects.bulk_create(new_modules, batch_size=BULK_CHUNK_SIZE, ignore_conflicts=True)
+
+        if new_modules:
+            # Read the inserted modules back, as their ids aren't set by bulk_create.
+            new_keys = {(student_module.student_id, student_module.module_state_key) for student_module in new_modules}
+            updated_modules.extend(
+                student_module
+                for student_module, usage_key in self._get_student_modules_for_users(
+                    list({user_id for user_id, _ in new_keys}),
+                    list({usage_key for _, usage_key in new_keys}),
+                )
+                if (student_module.student_id, usage_key) in new_keys
+            )
+        BaseStudentModuleHistory.save_history_in_bulk(updated_modules)
+
+        finish_time = time()
+        duration = (finish_time - evt_time) * 1000  # milliseconds
+        self._nr_stat_accumulate('set_many_for_users', 'duration', duration)
+
     def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
         """
         Delete the stored XBlock state for a many xblock usages.
@@ -582,6 +799,51 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
 
             yield XBlockUserState(username, block_key, state, history_entry.created, scope)
 
+    def _iter_user_states(self, function_name, student_modules, scope):
+        """
+        Stream the states of the supplied ``student_modules`` as :class:`~XBlockUserState` objects.
+
+        The rows are read in batches of ``settings.USER_STATE_BATCH_SIZE``, using keyset pagination
+        on the id (rather than offsets, which get slower the further a query pages), so an index
+        on the filtered columns (which includes the primary key) serves every batch.  The states of
+        each batch are decoded on a worker thread while the next batch is read, so that no more than
+        a few batches are held in memory at once.
+
+        Arguments:
+            function_name (str): The name of the calling method, for custom attributes.
+            student_modules (QuerySet): The StudentModules to stream the state of.
+            scope (Scope): The scope of the state.
+        """
+        batch_size = settings.USER_STATE_BATCH_SIZE
+        rows = student_modules.order_by('id').values_list(
+            'id', 'student__username', 'module_state_key', 'state', 'modified',
+        )
+
+        def read_batch(last_id):
+            return list(rows.filter(id__gt=last_id)[:batch_size])
+
+        evt_time = time()
+        row_count = 0
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                batch = read_batch(0)
+                while batch:
+                    user_states = executor.submit(_decode_user_states, batch, scope)
+                    next_batch = read_batch(batch[-1][0]) if len(batch) == batch_size else []
+                    yield from user_states.result()
+                    row_count += len(batch)
+                    batch = next_batch
+        finally:
+            # Report custom attributes, also when the caller stops iterating early.
+            duration = time() - evt_time
+            self._nr_stat_accumulate(function_name, 'rows', row_count)
+            self._nr_stat_accumulate(function_name, 'duration', duration * 1000)  # milliseconds
+            if duration > 0:
+                monitoring_utils.set_custom_attribute(
+                    self._nr_attribute_name(function_name, 'rows_per_second'),
+                    row_count / duration,
+                )
+
     def iter_all_for_block(self, block_key, scope=Scope.user_state):
         """
         Return an iterator over the data stored in the block (e.g. a problem block).
@@ -600,19 +862,11 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
-        results = StudentModule.objects.order_by('id').filter(module_state_key=block_key).select_related('student')
-        p = Paginator(results, settings.USER_STATE_BATCH_SIZE)
-
-        for page_number in p.page_range:
-            page = p.page(page_number)
-
-            for sm in page.object_list:
-                state = json.loads(sm.state)
-
-                if state == {}:
-                    continue
-
-                yield XBlockUserState(sm.student.username, sm.module_state_key, state, sm.modified, scope)
+        yield from self._iter_user_states(
+            'iter_all_for_block',
+            StudentModule.objects.filter(module_state_key=block_key),
+            scope,
+        )
 
     def iter_all_for_course(self, course_key, block_type=None, scope=Scope.user_state):
         """
@@ -632,19 +886,31 @@ class DjangoXBlockUserStateClient(XBlockUserStateClient):
         if scope != Scope.user_state:
             raise ValueError("Only Scope.user_state is supported")
 
-        results = StudentModule.objects.order_by('id').filter(course_id=course_key)
+        # The course's rows are paged through on the (course_id, id) index, with the
+        # block type filtered in the same queries.
+        results = StudentModule.objects.filter(course_id=course_key)
         if block_type:
             results = results.filter(module_type=block_type)
 
-        p = Paginator(results, settings.USER_STATE_BATCH_SIZE)
+        yield from self._iter_user_states('iter_all_for_course', results, scope)
 
-        for page_number in p.page_range:
-            page = p.page(page_number)
 
-            for sm in page.object_list:
-                state = json.loads(sm.state)
+def _decode_user_states(rows, scope):
+    """
+    Return the :class:`~XBlockUserState` objects of the supplied StudentModule rows of
+    (id, username, module_state_key, state, modified), leaving out rows without state.
+    """
+    user_states = []
+    for _, username, block_key, state, modified in rows:
+        if state is None:
+            continue
+
+        state = json.loads(state)
 
-                if state == {}:
-                    continue
+        # If the state is the empty dict, then it has been deleted, and so
+        # conformant UserStateClients should treat it as if it doesn't exist.
+        if state == {}:
+            continue
 
-                yield XBlockUserState(sm.student.username, sm.module_state_key, state, sm.modified, scope)
+        user_states.append(XBlockUserState(username, block_key, state, modified, scope))
+    return user_states
@@ -50,7 +50,7 @@ from openedx.features.course_experience.url_helpers import make_learning_mfe_cou
 from openedx.features.course_experience.views.course_sock import CourseSockFragmentView
 from openedx.features.enterprise_support.api import data_sharing_consent_required
 
-from ..access import has_access
+from ..access import batched_block_access, has_access
 from ..access_utils import check_public_access
 from ..courses import get_course_with_access, get_current_child, get_studio_url
 from ..entrance_exams import (
@@ -476,7 +476,8 @@ class CoursewareIndex(View):
                 table_of_contents['previous_of_active_section'],
                 table_of_contents['next_of_active_section'],
             )
-            courseware_context['fragment'] = self.section.render(self.view, section_context)
+            with batched_block_access(self.effective_user, self.course_key):
+                courseware_context['fragment'] = self.section.render(self.view, section_context)
 
             if self.section.position and self.section.has_children:
                 self._add_sequence_title_to_context(courseware_context)
@@ -0,0 +1,498 @@
+"""
+Bulk Course Grade Engine
+
+Computes the course grades of batches of users at once.  Rather than
+building SubsectionGrade objects and aggregating ProblemScores of each
+user in Python, the engine:
+
+    1. compiles the graded content of each distinct transformed course
+       structure into arrays of (subsection, problem) entries, once for
+       all the users sharing the structure (see SharedCourseBlocks),
+    2. loads the scores of a whole batch of users from StudentModule,
+       the Submissions API's tables and the subsection grade overrides,
+       into arrays indexed by (user, scorable block), and
+    3. computes subsection, assignment type and course percentages for
+       all the users of a structure with NumPy operations.
+
+The results are the same as those of CourseGrade.update for subsection
+grades updated from the users' scores (i.e. force_update_subsections),
+to the last bit: sums are accumulated in the same order as the Python
+implementation, and lowest scores are dropped as AssignmentFormatGrader
+drops them, as floating point addition is not associative.
+"""
+
+
+from collections import defaultdict
+from itertools import islice
+from logging import getLogger
+
+import numpy as np
+from django.conf import settings
+from django.db.models import CharField
+from django.db.models.functions import Cast
+from opaque_keys.edx.keys import UsageKey
+from submissions.models import ScoreSummary
+
+from common.djangoapps.student.models import AnonymousUserId, anonymous_id_for_user
+from lms.djangoapps.courseware.models import StudentModule
+from xmodule.graders import AssignmentFormatGrader, WeightedSubsectionsGrader  # lint-amnesty, pylint: disable=wrong-import-order
+
+from .course_data import CourseData
+from .course_grade import CourseGrade, CourseGradeBase, _uniqueify_and_keep_order
+from .models import PersistentSubsectionGradeOverride
+from .scores import possibly_scored
+from .transformer import GradesTransformer
+
+log = getLogger(__name__)
+
+
+class BulkCourseGradeEngine:
+    """
+    Computes the CourseGrades of many users in a course, in batches.
+
+    The grades are computed from the users' scores, as CourseGradeFactory.update
+    computes them with force_update_subsections, but are neither persisted nor
+    signaled.  The returned CourseGrade objects are otherwise as those read by
+    CourseGradeFactory.read.
+    """
+    # Number of users whose scores are loaded and graded together.
+    BATCH_SIZE = 100
+
+    def __init__(self, course_data):
+        """
+        Arguments:
+            course_data (CourseData): Data of the course, not specific to any user.
+
+        Raises ValueError if the course's grader can't be computed in bulk.
+        """
+        self.course_data = course_data
+        course = CourseGradeBase._prep_course_for_grading(course_data.course)  # pylint: disable=protected-access
+        self._subgraders = _get_subgraders(course.grader)
+        self._grade_cutoffs = course.grade_cutoffs
+
+        # Map of scorable usage keys, without version and branch, to their
+        # column in the score arrays of a batch of users.
+        # dict {UsageKey: int}
+        self._columns = {}
+
+        # Map of the string of each scorable usage key to its column, for
+        # the scores of the Submissions API.
+        # dict {str: int}
+        self._columns_by_item_id = {}
+
+        # Map of transform signatures to the compiled grading of the course
+        # structure shared by the users with the signature.
+        # dict {tuple: _CompiledGrading}
+        self._compiled_by_signature = {}
+
+    def iter(self, users):
+        """
+        Yields a (user, course_grade, error) tuple for each of the given users.
+
+        If an error occurred, course_grade is None and error is the exception.
+        """
+        users = iter(users)
+        while True:
+            batch = list(islice(users, self.BATCH_SIZE))
+            if not batch:
+                return
+            try:
+                yield from self._grade_batch(batch)
+            except Exception:  # pylint: disable=broad-except
+                # Grade the users of the failed batch separately so that
+                # only those whose grade can't be computed get errors.
+                for user in batch:
+                    yield from self._iter_one(user)
+
+    def _iter_one(self, user):
+        """
+        Yields the (user, course_grade, error) tuple for the given user.
+        """
+        try:
+            yield from self._grade_batch([user])
+        except Exception as exc:  # pylint: disable=broad-except
+            log.exception(
+                'Cannot grade student %s in course %s because of exception: %s',
+                user.id,
+                self.course_data.course_key,
+                str(exc)
+            )
+            yield user, None, exc
+
+    def _grade_batch(self, users):
+        """
+        Returns a list of (user, course_grade, None) tuples for the given users.
+        """
+        users_course_data = []
+        rows_by_compiled = defaultdict(list)
+        for row, user in enumerate(users):
+            signature, structure = self.course_data.shared_course_blocks.get_with_signature(user)
+            if signature is None:
+                compiled = _CompiledGrading(structure, self)
+                users_course_data.append(CourseData(
+                    user,
+                    course=self.course_data.course,
+                    collected_block_structure=self.course_data.collected_structure,
+                    structure=structure,
+                    course_key=self.course_data.course_key,
+                ))
+            else:
+                compiled = self._compiled_by_signature.get(signature)
+                if compiled is None:
+                    compiled = self._compiled_by_signature[signature] = _CompiledGrading(structure, self)
+                users_course_data.append(_SharedStructureCourseData(user, self.course_data, structure))
+            rows_by_compiled[compiled].append(row)
+
+        scores = _BatchScores(users, self)
+        percents = np.zeros(len(users))
+        for compiled, rows in rows_by_compiled.items():
+            percents[rows] = compiled.grader_percents(scores, rows, self._subgraders)
+
+        results = []
+        for user, course_data, grader_percent in zip(users, users_course_data, percents):
+            percent = CourseGrade._compute_percent({'percent': float(grader_percent)})  # pylint: disable=protected-access
+            course_grade = CourseGrade(
+                user,
+                course_data,
+                percent,
+                CourseGrade._compute_letter_grade(self._grade_cutoffs, percent),  # pylint: disable=protected-access
+                CourseGrade._compute_passed(self._grade_cutoffs, percent),  # pylint: disable=protected-access
+            )
+            results.append((user, course_grade, None))
+        return results
+
+    def _column(self, usage_key):
+        """
+        Returns the column of the given scorable block in the score arrays.
+        """
+        location = usage_key.replace(version=None, branch=None)
+        column = self._columns.get(location)
+        if column is None:
+            column = self._columns[location] = len(self._columns)
+            self._columns_by_item_id[str(usage_key)] = column
+        return column
+
+
+class _SharedStructureCourseData(CourseData):
+    """
+    CourseData of a user whose transformed course structure is shared with
+    other users.  The structure is copied for the user only if accessed.
+    """
+    def __init__(self, user, course_data, shared_structure):
+        super().__init__(
+            user,
+            course=course_data.course,
+            collected_block_structure=course_data.collected_structure,
+            course_key=course_data.course_key,
+        )
+        self._shared_structure = shared_structure
+
+    @property
+    def structure(self):
+        if self._structure is None:
+            self._structure = self._shared_structure.copy()
+        return self._structure
+
+
+class _CompiledGrading:
+    """
+    The graded content of a transformed course structure, as arrays of the
+    scorable blocks of each of its graded subsections:
+
+        columns - the columns of the blocks' scores.
+        weights, max_scores - the blocks' weight and max_score, or nan if None.
+        explicitly_graded - whether the blocks' grading is not explicitly disabled.
+        valid - whether the entry is a block, as subsections have up to
+            max_blocks entries.
+
+    Subsections are in the order of the course, and blocks in the order of
+    CreateSubsectionGrade's traversal.
+    """
+    def __init__(self, structure, engine):
+        self.subsection_keys = []
+        self.subsection_formats = []
+        subsection_entries = []
+        for chapter_key in structure.get_children(structure.root_block_usage_key):
+            for subsection_key in _uniqueify_and_keep_order(structure.get_children(chapter_key)):
+                if subsection_key in self.subsection_keys or not structure.get_xblock_field(subsection_key, 'graded'):
+                    continue
+                self.subsection_keys.append(subsection_key)
+                self.subsection_formats.append(structure.get_xblock_field(subsection_key, 'format', ''))
+                subsection_entries.append([
+                    (
+                        engine._column(block_key),  # pylint: disable=protected-access
+                        structure.get_xblock_field(block_key, 'weight'),
+                        structure.get_transformer_block_field(block_key, GradesTransformer, 'max_score'),
+                        structure.get_transformer_block_field(
+                            block_key, GradesTransformer, GradesTransformer.EXPLICIT_GRADED_FIELD_NAME,
+                        ) is not False,
+                    )
+                    for block_key in structure.post_order_traversal(
+                        filter_func=possibly_scored,
+                        start_node=subsection_key,
+                    )
+                    if structure.get_xblock_field(block_key, 'has_score', False)
+                ])
+
+        shape = (len(subsection_entries), max((len(entries) for entries in subsection_entries), default=0))
+        self.columns = np.zeros(shape, dtype=np.intp)
+        self.weights = np.full(shape, np.nan)
+        self.max_scores = np.full(shape, np.nan)
+        self.explicitly_graded = np.zeros(shape, dtype=bool)
+        self.valid = np.zeros(shape, dtype=bool)
+        for index, entries in enumerate(subsection_entries):
+            for position, (column, weight, max_score, explicitly_graded) in enumerate(entries):
+                self.columns[index, position] = column
+                self.weights[index, position] = np.nan if weight is None else weight
+                self.max_scores[index, position] = np.nan if max_score is None else max_score
+                self.explicitly_graded[index, position] = explicitly_graded
+                self.valid[index, position] = True
+
+    def grader_percents(self, scores, rows, subgraders):
+        """
+        Returns the array of the (unrounded) percents computed by the
+        course's grader for the given rows of the batch's scores.
+        """
+        earned, possible = self._graded_totals(scores, rows)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percents = np.where(possible > 0, np.around(earned / possible, decimals=2), 0.0)
+
+        total_percents = np.zeros(len(rows))
+        for subgrader, weight in subgraders:
+            indices = [
+                index for index, subsection_format in enumerate(self.subsection_formats)
+                if subsection_format == subgrader.type
+            ]
+            total_percents += _assignment_type_percents(
+                percents[:, indices], possible[:, indices] > 0, subgrader,
+            ) * weight
+        return total_percents
+
+    def _graded_totals(self, scores, rows):
+        """
+        Returns the arrays of the graded earned and possible totals of
+        each subsection for the given rows of the batch's scores.
+        """
+        earned, possible, graded = self._problem_scores(scores, rows)
+
+        # Accumulate in the blocks' order, as aggregate_scores does.
+        graded_earned = np.zeros(earned.shape[:2])
+        graded_possible = np.zeros(earned.shape[:2])
+        for position in range(earned.shape[2]):
+            graded_earned += np.where(graded[:, :, position], earned[:, :, position], 0.0)
+            graded_possible += np.where(graded[:, :, position], possible[:, :, position], 0.0)
+
+        # Overrides replace the computed totals, as when the grades are persisted.
+        earned_overrides, possible_overrides = scores.overrides(rows, self.subsection_keys)
+        graded_earned = np.where(np.isnan(earned_overrides), graded_earned, earned_overrides)
+        graded_possible = np.where(np.isnan(possible_overrides), graded_possible, possible_overrides)
+        return graded_earned, graded_possible
+
+    def _problem_scores(self, scores, rows):
+        """
+        Returns the arrays of the weighted earned and possible scores of
+        each block entry, and of whether they are graded, for the given
+        rows of the batch's scores, as get_score computes them.
+        """
+        rows = np.asarray(rows)[:, np.newaxis, np.newaxis]
+        columns = self.columns[np.newaxis]
+        has_weight = ~np.isnan(self.weights)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Scores of the Submissions API are already weighted.
+            submitted = scores.submitted[rows, columns]
+
+            # Scores in StudentModule are weighted unless there's no weight
+            # or possible score.
+            in_csm = scores.in_csm[rows, columns]
+            csm_earned = np.where(np.isnan(scores.csm_correct), 0.0, scores.csm_correct)[rows, columns]
+            csm_possible = scores.csm_total[rows, columns]
+            csm_weighted = has_weight & (csm_possible != 0)
+
+            # Unattempted blocks score zero out of their max_score, if any.
+            latest_weighted = has_weight & (self.max_scores != 0)
+
+            earned = np.where(
+                submitted,
+                scores.submitted_earned[rows, columns],
+                np.where(
+                    in_csm,
+                    np.where(csm_weighted, csm_earned * self.weights / csm_possible, csm_earned),
+                    np.where(latest_weighted, 0.0 * self.weights / self.max_scores, 0.0),
+                ),
+            )
+            possible = np.where(
+                submitted,
+                scores.submitted_possible[rows, columns],
+                np.where(
+                    in_csm,
+                    np.where(csm_weighted, self.weights, csm_possible),
+                    np.where(latest_weighted, self.weights, self.max_scores),
+                ),
+            )
+            scored = self.valid & (submitted | in_csm | ~np.isnan(self.max_scores))
+            graded = scored & self.explicitly_graded & (possible > 0.0)
+        return earned, possible, graded
+
+
+class _BatchScores:
+    """
+    The scores of a batch of users, in arrays indexed by (user, column) of
+    the scorable blocks:
+
+        submitted, submitted_earned, submitted_possible - whether the block has
+            a score in the Submissions API, and its points.
+        in_csm, csm_correct, csm_total - whether the block has a score in
+            StudentModule with a max_grade, and its grade (or nan) and max_grade.
+
+    along with the users' subsection grade overrides.
+    """
+    def __init__(self, users, engine):
+        course_key = engine.course_data.course_key
+        self._rows = {user.id: row for row, user in enumerate(users)}
+        shape = (len(users), len(engine._columns))  # pylint: disable=protected-access
+
+        self.in_csm = np.zeros(shape, dtype=bool)
+        self.csm_correct = np.full(shape, np.nan)
+        self.csm_total = np.full(shape, np.nan)
+        # Locations are read as strings, since parsing a usage key for each
+        # score is relatively expensive.  Only those that aren't the string
+        # of a block's usage key (e.g. old mongo locations, without runs) are
+        # parsed and mapped into the course, as in ScoresClient.
+        scores = StudentModule.objects.filter(
+            course_id=course_key,
+            student_id__in=list(self._rows),
+            module_state_key__in=list(engine._columns),  # pylint: disable=protected-access
+            max_grade__isnull=False,
+        ).annotate(
+            location=Cast('module_state_key', CharField()),
+        ).values_list('student_id', 'location', 'grade', 'max_grade')
+        for user_id, location, grade, max_grade in scores:
+            column = engine._columns_by_item_id.get(location)  # pylint: disable=protected-access
+            if column is None:
+                usage_key = UsageKey.from_string(location).map_into_course(course_key)
+                column = engine._columns.get(usage_key)  # pylint: disable=protected-access
+            if column is not None:
+                row = self._rows[user_id]
+                self.in_csm[row, column] = True
+                self.csm_correct[row, column] = np.nan if grade is None else grade
+                self.csm_total[row, column] = max_grade
+
+        self.submitted = np.zeros(shape, dtype=bool)
+        self.submitted_earned = np.zeros(shape)
+        self.submitted_possible = np.zeros(shape)
+        rows_by_anonymous_id = {
+            anonymous_user_id: self._rows[user.id]
+            for user, anonymous_user_id in _anonymous_user_ids(users, course_key)
+        }
+        score_summaries = ScoreSummary.objects.filter(
+            student_item__course_id=str(course_key),
+            student_item__student_id__in=list(rows_by_anonymous_id),
+        ).select_related('latest', 'student_item')
+        for summary in score_summaries:
+            column = engine._columns_by_item_id.get(summary.student_item.item_id)  # pylint: disable=protected-access
+            if column is not None and not summary.latest.is_hidden():
+                row = rows_by_anonymous_id[summary.student_item.student_id]
+                self.submitted[row, column] = True
+                self.submitted_earned[row, column] = summary.latest.points_earned
+                self.submitted_possible[row, column] = summary.latest.points_possible
+
+        # Map of (user id, subsection usage key) to the graded earned and
+        # possible overrides of the user's subsection grade.
+        # dict {(int, UsageKey): (float or None, float or None)}
+        self._overrides = {
+            (override.grade.user_id, override.grade.full_usage_key): (
+                override.earned_graded_override, override.possible_graded_override,
+            )
+            for override in PersistentSubsectionGradeOverride.objects.filter(
+                grade__course_id=course_key,
+                grade__user_id__in=list(self._rows),
+            ).select_related('grade')
+        }
+        self._user_ids = [user.id for user in users]
+
+    def overrides(self, rows, subsection_keys):
+        """
+        Returns the arrays of the graded earned and possible overrides of
+        the given subsections for the given rows, with nan where there is
+        no override.
+        """
+        earned = np.full((len(rows), len(subsection_keys)), np.nan)
+        possible = np.full((len(rows), len(subsection_keys)), np.nan)
+        if self._overrides:
+            for index, row in enumerate(rows):
+                for position, subsection_key in enumerate(subsection_keys):
+                    override = self._overrides.get((self._user_ids[row], subsection_key))
+                    if override is not None:
+                        earned_override, possible_override = override
+                        earned[index, position] = np.nan if earned_override is None else earned_override
+                        possible[index, position] = np.nan if possible_override is None else possible_override
+        return earned, possible
+
+
+def _assignment_type_percents(percents, included, subgrader):
+    """
+    Returns the array of the percents computed by the given AssignmentFormatGrader
+    for users with the given subsection percents, of which only those marked as
+    included are in the users' grade sheets.
+
+    As in AssignmentFormatGrader, the included subsections are followed by
+    placeholder zero scores up to the grader's min_count, and the lowest
+    drop_count scores (the last ones among equal scores) are dropped.
+    """
+    min_count = int(float(subgrader.min_count))
+    num_users = percents.shape[0]
+    num_included = included.sum(axis=1)
+    num_placeholders = np.maximum(min_count - num_included, 0)
+
+    percents = np.hstack([percents, np.zeros((num_users, min_count))])
+    present = np.hstack([included, np.arange(min_count)[np.newaxis] < num_placeholders[:, np.newaxis]])
+
+    kept = present.copy()
+    if subgrader.drop_count > 0:
+        # A stable sort by descending percent, with the entries that aren't
+        # present first so that they are never dropped.
+        order = np.argsort(np.where(present, -percents, -np.inf), axis=1, kind='stable')
+        np.put_along_axis(kept, order[:, -subgrader.drop_count:], False, axis=1)
+
+    # Accumulate in the entries' order, as total_with_drops does.
+    total = np.zeros(num_users)
+    for position in range(percents.shape[1]):
+        total += np.where(kept[:, position], percents[:, position], 0.0)
+
+    num_kept = np.maximum(min_count, num_included) - subgrader.drop_count
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(num_kept > 0, total / num_kept, total)
+
+
+def _get_subgraders(grader):
+    """
+    Returns a list of the (AssignmentFormatGrader, weight) tuples of the
+    given course grader.
+
+    Raises ValueError if the grader isn't supported.
+    """
+    if settings.GENERATE_PROFILE_SCORES:
+        raise ValueError('Random profile scores are not supported.')
+    if not isinstance(grader, WeightedSubsectionsGrader) or not all(
+        isinstance(subgrader, AssignmentFormatGrader) for subgrader, _, _ in grader.subgraders
+    ):
+        raise ValueError(f'Unsupported course grader: {grader}')
+    return [(subgrader, weight) for subgrader, _, weight in grader.subgraders]
+
+
+def _anonymous_user_ids(users, course_key):
+    """
+    Yields a (user, anonymous user id) tuple for each of the given users in
+    the course, as anonymous_id_for_user, with a single query for the users
+    who already have one.
+    """
+    anonymous_user_ids = dict(
+        AnonymousUserId.objects.filter(
+            user_id__in=[user.id for user in users],
+            course_id=course_key,
+        ).order_by('id').values_list('user_id', 'anonymous_user_id')
+    )
+    for user in users:
+        anonymous_user_id = anonymous_user_ids.get(user.id)
+        yield user, anonymous_user_id or anonymous_id_for_user(user, course_key)
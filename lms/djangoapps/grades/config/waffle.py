@@ -72,6 +72,35 @@ WRITABLE_GRADEBOOK = CourseWaffleFlag(f'{WAFFLE_NAMESPACE}.writable_gradebook',
 # .. toggle_tickets: https://github.com/openedx/edx-platform/pull/21389
 BULK_MANAGEMENT = CourseWaffleFlag(f'{WAFFLE_NAMESPACE}.bulk_management', __name__, LOG_PREFIX)
 
+# .. toggle_name: grades.incremental_course_grade_updates
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, a learner's course grade is updated incrementally when one of their subsection
+#   grades changes, from the cached graded totals of their other subsections, instead of reading all of their
+#   subsection grades again. The course grade is still fully computed when the course content, the grading policy or
+#   the learner's visible blocks changed since the totals were cached.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-17
+# .. toggle_target_removal_date: 2027-04-01
+# .. toggle_warning: The graded totals are kept in the default cache, which should be shared by the LMS workers that
+#   update grades.
+INCREMENTAL_COURSE_GRADE_UPDATES = CourseWaffleFlag(
+    f'{WAFFLE_NAMESPACE}.incremental_course_grade_updates', __name__, LOG_PREFIX
+)
+
+# .. toggle_name: grades.compute_grades_in_bulk
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, the course grades of the grade reports and of the gradebook are computed from
+#   the learners' scores in batches (see BulkCourseGradeEngine), instead of being read one learner at a time. Grades
+#   of courses whose grading can't be computed in bulk, or whose grades are frozen, are still read.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-17
+# .. toggle_target_removal_date: 2027-04-01
+# .. toggle_warning: Grades computed in bulk are neither persisted nor signaled. They may differ from the persisted
+#   grades of learners whose grades were not updated since the course content or grading policy changed.
+COMPUTE_GRADES_IN_BULK = CourseWaffleFlag(f'{WAFFLE_NAMESPACE}.compute_grades_in_bulk', __name__, LOG_PREFIX)
+
 
 def is_writable_gradebook_enabled(course_key):
     """
@@ -85,3 +114,17 @@ def gradebook_bulk_management_enabled(course_key):
     Returns whether bulk management features should be specially enabled for a given course.
     """
     return BULK_MANAGEMENT.is_enabled(course_key)
+
+
+def incremental_course_grade_updates_enabled(course_key):
+    """
+    Returns whether course grades are updated incrementally from changed subsection grades for the given course.
+    """
+    return INCREMENTAL_COURSE_GRADE_UPDATES.is_enabled(course_key)
+
+
+def compute_grades_in_bulk_enabled(course_key):
+    """
+    Returns whether course grades are computed in bulk for reports for the given course.
+    """
+    return COMPUTE_GRADES_IN_BULK.is_enabled(course_key)
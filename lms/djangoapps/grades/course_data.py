@@ -3,7 +3,7 @@ Code used to get and cache the requested course-data
 """
 
 
-from lms.djangoapps.course_blocks.api import get_course_blocks
+from lms.djangoapps.course_blocks.api import SharedCourseBlocks, get_course_blocks
 from openedx.core.djangoapps.content.block_structure.api import get_block_structure_manager
 from xmodule.modulestore.django import modulestore  # lint-amnesty, pylint: disable=wrong-import-order
 
@@ -30,6 +30,7 @@ class CourseData:
         self._course = course
         self._course_key = course_key
         self._location = None
+        self._shared_course_blocks = None
 
     @property
     def course_key(self):  # lint-amnesty, pylint: disable=missing-function-docstring
@@ -69,6 +70,19 @@ class CourseData:
             self._collected_block_structure = get_block_structure_manager(self.course_key).get_collected()
         return self._collected_block_structure
 
+    @property
+    def shared_course_blocks(self):
+        """
+        Returns a SharedCourseBlocks for getting the structures of many
+        users of the course, using the same collected structure.
+        """
+        if self._shared_course_blocks is None:
+            self._shared_course_blocks = SharedCourseBlocks(
+                self.location,
+                collected_block_structure=self.collected_structure,
+            )
+        return self._shared_course_blocks
+
     @property
     def course(self):
         if not self._course:
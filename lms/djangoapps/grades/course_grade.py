@@ -298,6 +298,22 @@ class CourseGrade(CourseGradeBase):
         self.passed = self._compute_passed(grade_cutoffs, self.percent)
         return self
 
+    def update_from_aggregates(self, aggregates):
+        """
+        Updates the grade for the course from the given CourseGradeAggregates
+        of the user's subsection grades, instead of the subsection grades.
+        """
+        grade_cutoffs = self.course_data.course.grade_cutoffs
+        course = self._prep_course_for_grading(self.course_data.course)
+        grader_result = course.grader.grade(
+            aggregates.graded_subsections_by_format(),
+            generate_random_scores=settings.GENERATE_PROFILE_SCORES,
+        )
+        self.percent = self._compute_percent(grader_result)
+        self.letter_grade = self._compute_letter_grade(grade_cutoffs, self.percent)
+        self.passed = self._compute_passed(grade_cutoffs, self.percent)
+        return self
+
     @lazy
     def attempted(self):  # lint-amnesty, pylint: disable=invalid-overridden-method
         """
@@ -0,0 +1,175 @@
+"""
+Stored aggregates of users' course grades, used to update a course grade
+incrementally when one of its subsection grades changes.
+
+A course grade is computed by the course's grader from the graded totals
+of all of the user's subsections.  Rather than reading (or computing)
+every subsection grade again whenever a single problem score changes,
+the graded totals used by the last full computation of the course grade
+are kept in the cache, so only the changed subsection needs to be
+recomputed.
+
+The aggregates are only valid for the version of the course's content,
+grading policy and the user's visible blocks they were computed with.
+Any change to those requires a full computation of the course grade.
+"""
+
+
+from collections import OrderedDict, defaultdict, namedtuple
+from hashlib import sha1
+
+from django.core.cache import cache
+
+from xmodule.graders import AggregatedScore  # lint-amnesty, pylint: disable=wrong-import-order
+
+from .scores import compute_percent
+
+# Number of seconds the aggregates of a user's course grade are kept.
+AGGREGATES_CACHE_TIMEOUT_SECONDS = 60 * 60 * 24 * 7
+
+
+class SubsectionAggregate(namedtuple('SubsectionAggregate', ['format', 'display_name', 'earned', 'possible'])):
+    """
+    The graded totals of a user's subsection grade, with the properties
+    of subsection grades that are used by the course's grader.
+    """
+    @classmethod
+    def from_subsection_grade(cls, subsection_grade):
+        return cls(
+            subsection_grade.format,
+            subsection_grade.display_name,
+            subsection_grade.graded_total.earned,
+            subsection_grade.graded_total.possible,
+        )
+
+    @property
+    def graded_total(self):
+        return AggregatedScore(self.earned, self.possible, graded=True, first_attempted=None)
+
+    @property
+    def percent_graded(self):
+        return compute_percent(self.earned, self.possible)
+
+
+class CourseGradeAggregates:
+    """
+    The SubsectionAggregates of a user's graded subsections in a course.
+
+    Each subsection's aggregate is cached separately, so that concurrent
+    updates of different subsections of the same user don't overwrite
+    each other's changes.
+    """
+    def __init__(self, user_id, course_data, subsections):
+        self.user_id = user_id
+        self.course_data = course_data
+
+        # Map of the usage keys of the user's graded subsections, in the
+        # order of the course, to their aggregates.
+        # OrderedDict {UsageKey: SubsectionAggregate}
+        self._subsections = subsections
+
+    @classmethod
+    def from_course_grade(cls, course_grade):
+        """
+        Returns the aggregates of the subsection grades of the given
+        (updated) CourseGrade.
+        """
+        subsections = OrderedDict()
+        for chapter in course_grade.chapter_grades.values():
+            for subsection_grade in chapter['sections']:
+                if subsection_grade.graded and subsection_grade.location not in subsections:
+                    subsections[subsection_grade.location] = SubsectionAggregate.from_subsection_grade(
+                        subsection_grade
+                    )
+        return cls(course_grade.user.id, course_grade.course_data, subsections)
+
+    @classmethod
+    def read(cls, user_id, course_data):
+        """
+        Returns the stored aggregates of the user's course grade, or None
+        if they aren't stored or are out of date.
+        """
+        stored = cache.get(cls._cache_key(user_id, course_data.course_key))
+        if stored is None:
+            return None
+        version, subsection_keys = stored
+        if version != cls._version(course_data):
+            return None
+
+        cache_keys = {cls._subsection_cache_key(user_id, key): key for key in subsection_keys}
+        stored_subsections = cache.get_many(list(cache_keys))
+        if len(stored_subsections) != len(cache_keys):
+            return None
+        return cls(user_id, course_data, OrderedDict(
+            (subsection_key, stored_subsections[cache_key])
+            for cache_key, subsection_key in cache_keys.items()
+        ))
+
+    def save(self):
+        """
+        Stores these aggregates.
+        """
+        values = {
+            self._subsection_cache_key(self.user_id, subsection_key): subsection
+            for subsection_key, subsection in self._subsections.items()
+        }
+        values[self._cache_key(self.user_id, self.course_data.course_key)] = (
+            self._version(self.course_data), list(self._subsections),
+        )
+        cache.set_many(values, AGGREGATES_CACHE_TIMEOUT_SECONDS)
+
+    def update(self, subsection_grade):
+        """
+        Replaces and stores the aggregate of the given updated subsection
+        grade.  Returns False if the subsection's aggregate can't be
+        updated incrementally, as it isn't one of the aggregated graded
+        subsections.
+        """
+        if not subsection_grade.graded:
+            return True
+        if subsection_grade.location not in self._subsections:
+            return False
+        subsection = self._subsections[subsection_grade.location] = SubsectionAggregate.from_subsection_grade(
+            subsection_grade
+        )
+        cache.set(
+            self._subsection_cache_key(self.user_id, subsection_grade.location),
+            subsection,
+            AGGREGATES_CACHE_TIMEOUT_SECONDS,
+        )
+        return True
+
+    def graded_subsections_by_format(self):
+        """
+        Returns the aggregates of the subsections to grade in a dict keyed
+        by subsection format types, as CourseGrade.graded_subsections_by_format.
+        """
+        subsections_by_format = defaultdict(OrderedDict)
+        for subsection_key, subsection in self._subsections.items():
+            if subsection.possible > 0:
+                subsections_by_format[subsection.format][subsection_key] = subsection
+        return subsections_by_format
+
+    @staticmethod
+    def _version(course_data):
+        """
+        Returns the version of the course's content, grading policy and
+        the user's visible blocks.
+        """
+        visible_blocks_hash = sha1()
+        for block_key in course_data.structure.topological_traversal():
+            visible_blocks_hash.update(str(block_key).encode('utf-8'))
+        return (
+            course_data.version,
+            course_data.edited_on,
+            course_data.grading_policy_hash,
+            visible_blocks_hash.hexdigest(),
+        )
+
+    @staticmethod
+    def _cache_key(user_id, course_key):
+        return f'grades.course_grade_aggregates.{user_id}.{course_key}'
+
+    @staticmethod
+    def _subsection_cache_key(user_id, subsection_key):
+        return f'grades.course_grade_aggregates.{user_id}.{subsection_key}'
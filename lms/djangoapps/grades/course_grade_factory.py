@@ -9,8 +9,12 @@ from openedx.core.djangoapps.signals.signals import (
     COURSE_GRADE_NOW_FAILED,
     COURSE_GRADE_NOW_PASSED
 )
+from .bulk_grade_engine import BulkCourseGradeEngine
+from .config.waffle import compute_grades_in_bulk_enabled, incremental_course_grade_updates_enabled
 from .course_data import CourseData
 from .course_grade import CourseGrade, ZeroCourseGrade
+from .course_grade_aggregates import CourseGradeAggregates
+from .grade_utils import are_grades_frozen
 from .models import PersistentCourseGrade
 from .models_api import prefetch_grade_overrides_and_visible_blocks
 
@@ -53,6 +57,7 @@ class CourseGradeFactory:
             course_structure=None,
             course_key=None,
             force_update_subsections=False,
+            updated_subsection_grade=None,
     ):
         """
         Computes, updates, and returns the CourseGrade for the given
@@ -60,12 +65,17 @@ class CourseGradeFactory:
 
         At least one of course, collected_block_structure, course_structure,
         or course_key should be provided.
+
+        If updated_subsection_grade is the only subsection grade of the user
+        that changed since their course grade was last updated, the course
+        grade may be updated incrementally (see CourseGradeAggregates).
         """
         course_data = CourseData(user, course, collected_block_structure, course_structure, course_key)
         return self._update(
             user,
             course_data,
-            force_update_subsections=force_update_subsections
+            force_update_subsections=force_update_subsections,
+            updated_subsection_grade=updated_subsection_grade,
         )
 
     def iter(
@@ -75,6 +85,8 @@ class CourseGradeFactory:
             collected_block_structure=None,
             course_key=None,
             force_update=False,
+            share_course_blocks=False,
+            compute_in_bulk=False,
     ):
         """
         Given a course and an iterable of students (User), yield a GradeResult
@@ -84,6 +96,18 @@ class CourseGradeFactory:
 
         If an error occurred, course_grade will be None and err_msg will be an
         exception message. If there was no error, err_msg is an empty string.
+
+        If share_course_blocks is True, each student's course structure is
+        computed up front, transforming the course once for each group of
+        students with the same access to it (see SharedCourseBlocks).  Use it
+        when the structure is needed anyway, as in grade reports and updates.
+
+        If compute_in_bulk is True and the grades.compute_grades_in_bulk flag
+        is enabled for the course, the grades are computed from the students'
+        scores in batches (see BulkCourseGradeEngine), as force_update would
+        compute them, but are neither persisted nor signaled.  Use it to report
+        the grades of many students.  It is ignored if the course's grading
+        can't be computed in bulk or its grades are frozen.
         """
         # Pre-fetch the collected course_structure (in _iter_grade_result) so:
         # 1. Correctness: the same version of the course is used to
@@ -93,10 +117,29 @@ class CourseGradeFactory:
         course_data = CourseData(
             user=None, course=course, collected_block_structure=collected_block_structure, course_key=course_key,
         )
+        engine = self._bulk_engine(course_data) if compute_in_bulk else None
+        if engine is not None:
+            for result in engine.iter(users):
+                yield self.GradeResult(*result)
+            return
         for user in users:
-            yield self._iter_grade_result(user, course_data, force_update)
+            yield self._iter_grade_result(user, course_data, force_update, share_course_blocks)
+
+    @staticmethod
+    def _bulk_engine(course_data):
+        """
+        Returns a BulkCourseGradeEngine for the course if its grades are to be
+        computed in bulk, else None.
+        """
+        if not compute_grades_in_bulk_enabled(course_data.course_key) or are_grades_frozen(course_data.course_key):
+            return None
+        try:
+            return BulkCourseGradeEngine(course_data)
+        except ValueError as exc:
+            log.info('Grades: Not computing grades of course %s in bulk: %s', course_data.course_key, exc)
+            return None
 
-    def _iter_grade_result(self, user, course_data, force_update):  # lint-amnesty, pylint: disable=missing-function-docstring
+    def _iter_grade_result(self, user, course_data, force_update, share_course_blocks=False):  # lint-amnesty, pylint: disable=missing-function-docstring
         try:
             kwargs = {
                 'user': user,
@@ -104,6 +147,8 @@ class CourseGradeFactory:
                 'collected_block_structure': course_data.collected_structure,
                 'course_key': course_data.course_key,
             }
+            if share_course_blocks:
+                kwargs['course_structure'] = course_data.shared_course_blocks.get(user)
             if force_update:
                 kwargs['force_update_subsections'] = True
 
@@ -148,7 +193,7 @@ class CourseGradeFactory:
         )
 
     @staticmethod
-    def _update(user, course_data, force_update_subsections=False):
+    def _update(user, course_data, force_update_subsections=False, updated_subsection_grade=None):
         """
         Computes, saves, and returns a CourseGrade object for the
         given user and course.
@@ -164,7 +209,20 @@ class CourseGradeFactory:
             course_data,
             force_update_subsections=force_update_subsections
         )
-        course_grade = course_grade.update()
+
+        incremental = incremental_course_grade_updates_enabled(course_data.course_key)
+        aggregates = None
+        if incremental and updated_subsection_grade is not None and not force_update_subsections:
+            aggregates = CourseGradeAggregates.read(user.id, course_data)
+            if aggregates is not None and not aggregates.update(updated_subsection_grade):
+                aggregates = None
+
+        if aggregates is not None:
+            course_grade = course_grade.update_from_aggregates(aggregates)
+        else:
+            course_grade = course_grade.update()
+            if incremental:
+                CourseGradeAggregates.from_course_grade(course_grade).save()
 
         should_persist = course_grade.attempted
         if should_persist:
@@ -202,8 +260,8 @@ class CourseGradeFactory:
             )
 
         log.info(
-            'Grades: Update, %s, User: %s, %s, persisted: %s',
-            course_data.full_string(), user.id, course_grade, should_persist,
+            'Grades: Update, %s, User: %s, %s, persisted: %s, incremental: %s',
+            course_data.full_string(), user.id, course_grade, should_persist, aggregates is not None,
         )
 
         return course_grade
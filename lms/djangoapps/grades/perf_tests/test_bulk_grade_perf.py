@@ -0,0 +1,113 @@
+"""
+Benchmark of computing the course grades of many users of a large course,
+one user at a time and with the BulkCourseGradeEngine.
+"""
+
+
+import logging
+import time
+from unittest.mock import Mock, patch
+
+from django.db import connections
+from django.test import TestCase
+
+from common.djangoapps.student.tests.factories import UserFactory
+from lms.djangoapps.course_blocks.api import SharedCourseBlocks
+from lms.djangoapps.courseware.models import StudentModule
+from openedx.core.djangoapps.content.block_structure.perf_tests.utils import (
+    create_synthetic_course,
+    skip_unless_perf_tests_enabled
+)
+from xmodule.graders import grader_from_conf  # lint-amnesty, pylint: disable=wrong-import-order
+
+from ..bulk_grade_engine import BulkCourseGradeEngine
+from ..course_data import CourseData
+from ..course_grade import CourseGrade
+from ..transformer import GradesTransformer
+
+log = logging.getLogger(__name__)
+
+# Number of users to grade.
+NUM_USERS = 200
+
+# Approximate number of blocks in the synthetic course.
+NUM_BLOCKS = 5000
+
+GRADING_POLICY = [
+    {'type': 'Homework', 'min_count': 12, 'drop_count': 2, 'short_label': 'HW', 'weight': 0.4},
+    {'type': 'Exam', 'min_count': 1, 'drop_count': 0, 'short_label': 'Exam', 'weight': 0.6},
+]
+
+
+def _graded_course():
+    """
+    Returns a synthetic course whose sequentials are graded homeworks and
+    exams of scored problems.
+    """
+    block_structure = create_synthetic_course(NUM_BLOCKS)
+    for index, block_key in enumerate(block_structure.topological_traversal()):
+        block_structure.override_xblock_field(block_key, 'self_paced', False)
+        if block_key.block_type == 'sequential':
+            block_structure.override_xblock_field(block_key, 'graded', True)
+            block_structure.override_xblock_field(block_key, 'format', 'Exam' if index % 10 == 0 else 'Homework')
+        elif block_key.block_type == 'problem':
+            block_structure.override_xblock_field(block_key, 'has_score', True)
+            block_structure.set_transformer_block_field(block_key, GradesTransformer, 'max_score', 1 + index % 3)
+    return block_structure
+
+
+@skip_unless_perf_tests_enabled
+class BulkGradePerfTest(TestCase):
+    """
+    Compares the time taken to compute the course grades of NUM_USERS users.
+    """
+    databases = set(connections)
+
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def test_grade_users(self):
+        structure = _graded_course()
+        course_key = structure.root_block_usage_key.course_key
+        course = Mock(id=course_key, grader=grader_from_conf(GRADING_POLICY), grade_cutoffs={'Pass': 0.5})
+        problems = [block_key for block_key in structure if block_key.block_type == 'problem']
+        users = UserFactory.create_batch(NUM_USERS)
+        StudentModule.objects.bulk_create([
+            StudentModule(
+                student=user,
+                course_id=course_key,
+                module_state_key=problem,
+                module_type='problem',
+                grade=(user.id + index) % 3,
+                max_grade=2,
+            )
+            for user in users
+            for index, problem in enumerate(problems)
+            if (user.id + index) % 4
+        ])
+
+        start = time.perf_counter()
+        expected = [
+            CourseGrade(
+                user,
+                CourseData(user, course=course, structure=structure, course_key=course_key),
+                force_update_subsections=True,
+            ).update().percent
+            for user in users
+        ]
+        per_user_elapsed = time.perf_counter() - start
+
+        course_data = CourseData(None, course=course, collected_block_structure=structure, course_key=course_key)
+        with patch('lms.djangoapps.course_blocks.api.get_block_structure_manager'), patch.object(
+            SharedCourseBlocks, 'get_with_signature', return_value=(('signature',), structure),
+        ):
+            start = time.perf_counter()
+            results = list(BulkCourseGradeEngine(course_data).iter(users))
+            bulk_elapsed = time.perf_counter() - start
+
+        assert [course_grade.percent for _, course_grade, _ in results] == expected
+        log.info(
+            '%d blocks, %d problems, %d users: %.1f ms per user one at a time, %.1f ms per user in bulk',
+            len(structure), len(problems), NUM_USERS,
+            per_user_elapsed * 1000 / NUM_USERS, bulk_elapsed * 1000 / NUM_USERS,
+        )
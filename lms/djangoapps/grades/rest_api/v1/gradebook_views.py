@@ -661,7 +661,10 @@ class GradebookView(GradeViewMixin, PaginatedAPIView):
 
             with bulk_gradebook_view_context(course_key, users):
                 for user, course_grade, exc in CourseGradeFactory().iter(
-                    users, course_key=course_key, collected_block_structure=course_data.collected_structure
+                    users,
+                    course_key=course_key,
+                    collected_block_structure=course_data.collected_structure,
+                    compute_in_bulk=True,
                 ):
                     if not exc:
                         entry = self._gradebook_entry(user, course, graded_subsections, course_grade)
@@ -0,0 +1,201 @@
+"""
+Tests for the BulkCourseGradeEngine.
+"""
+
+
+from unittest.mock import patch
+
+import ddt
+import pytest
+from django.db import connections
+from django.test import TestCase
+from django.test.utils import override_settings
+from edx_toggles.toggles.testutils import override_waffle_flag
+from submissions import api as submissions_api
+
+from common.djangoapps.student.models import anonymous_id_for_user
+from common.djangoapps.student.tests.factories import UserFactory
+from lms.djangoapps.course_blocks.api import SharedCourseBlocks
+from xmodule.graders import grader_from_conf  # lint-amnesty, pylint: disable=wrong-import-order
+
+from ..bulk_grade_engine import BulkCourseGradeEngine
+from ..config.waffle import COMPUTE_GRADES_IN_BULK
+from ..course_data import CourseData
+from ..course_grade import CourseGrade
+from ..course_grade_factory import CourseGradeFactory
+from ..models import PersistentSubsectionGrade, PersistentSubsectionGradeOverride
+from .utils import SYNTHETIC_GRADING_POLICY, SyntheticCourseMixin
+
+
+@ddt.ddt
+class BulkCourseGradeEngineTest(SyntheticCourseMixin, TestCase):
+    """
+    Tests that the BulkCourseGradeEngine computes the grades CourseGrade.update computes.
+    """
+    databases = set(connections)
+
+    def setUp(self):
+        super().setUp()
+        self.course_data = CourseData(
+            None, course=self.course, collected_block_structure=self.structure, course_key=self.course_key,
+        )
+        for patcher in (
+            patch('lms.djangoapps.course_blocks.api.get_block_structure_manager'),
+            patch.object(
+                SharedCourseBlocks, 'get_with_signature', side_effect=lambda user: (('signature',), self.structure),
+            ),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _expected_grade(self, user):
+        """
+        Returns the grade of the user computed by CourseGrade.update.
+        """
+        course_data = CourseData(user, course=self.course, structure=self.structure, course_key=self.course_key)
+        return CourseGrade(user, course_data, force_update_subsections=True).update()
+
+    def _submit(self, user, problem_index, points_earned, points_possible):
+        """
+        Records the user's score of the problem with the Submissions API.
+        """
+        submission = submissions_api.create_submission(
+            {
+                'student_id': anonymous_id_for_user(user, self.course_key),
+                'course_id': str(self.course_key),
+                'item_id': str(self.problems[problem_index]),
+                'item_type': 'problem',
+            },
+            'answer',
+        )
+        with patch('submissions.api.score_set'):
+            submissions_api.set_score(submission['uuid'], points_earned, points_possible)
+
+    def assert_grades_equal(self, users):
+        """
+        Verifies the engine computes the same grades as CourseGrade.update for the users.
+        """
+        results = list(BulkCourseGradeEngine(self.course_data).iter(users))
+        assert [result[0] for result in results] == users
+        for user, course_grade, error in results:
+            assert error is None
+            expected = self._expected_grade(user)
+            assert (course_grade.percent, course_grade.letter_grade, course_grade.passed) == (
+                expected.percent, expected.letter_grade, expected.passed,
+            )
+            assert course_grade.course_data.structure is not self.structure
+
+    def test_no_scores(self):
+        self.assert_grades_equal([UserFactory.create()])
+
+    def test_scores(self):
+        users = UserFactory.create_batch(4)
+        scores = [
+            (0, 1, 1), (1, 2, 3), (2, 1, 2), (3, None, 2), (5, 3, 4), (6, 2, 2),
+            (8, 1, 2), (9, 1, 1), (10, 2, 4), (11, 5, 6), (12, 1, 2), (7, 2, 5),
+        ]
+        for index, user in enumerate(users):
+            for problem_index, grade, max_grade in scores[index::2]:
+                self.answer_synthetic_problem(user, problem_index, grade, max_grade)
+        self.answer_synthetic_problem(users[2], 4, 1, None)
+        self._submit(users[3], 11, 3, 4)
+        self._submit(users[3], 2, 0, 5)
+        self.assert_grades_equal(users)
+
+    def test_drops_equal_scores(self):
+        user = UserFactory.create()
+        self.answer_synthetic_problem(user, 3, 1, 1)
+        self.answer_synthetic_problem(user, 5, 4, 4)
+        self.assert_grades_equal([user])
+
+    def test_overrides(self):
+        user = UserFactory.create()
+        self.answer_synthetic_problem(user, 0, 1, 1)
+        self._expected_grade(user)
+        for index, (earned, possible) in ((0, (0.5, None)), (1, (3, 4)), (4, (None, 0))):
+            PersistentSubsectionGradeOverride.objects.create(
+                grade=PersistentSubsectionGrade.read_grade(
+                    user.id, self.subsection_key(index),
+                ),
+                earned_graded_override=earned,
+                possible_graded_override=possible,
+            )
+        self.assert_grades_equal([user])
+
+    @ddt.data(1, 3)
+    def test_batches(self, batch_size):
+        users = UserFactory.create_batch(5)
+        for index, user in enumerate(users):
+            self.answer_synthetic_problem(user, index, 1, 1)
+        with patch.object(BulkCourseGradeEngine, 'BATCH_SIZE', batch_size):
+            self.assert_grades_equal(users)
+
+    @ddt.data(1, 3)
+    def test_errors(self, batch_size):
+        users = UserFactory.create_batch(3)
+        engine = BulkCourseGradeEngine(self.course_data)
+        grade_batch = engine._grade_batch  # pylint: disable=protected-access
+
+        def fail_for_second_user(batch):
+            if users[1] in batch:
+                raise ValueError('fail')
+            return grade_batch(batch)
+
+        with patch.object(BulkCourseGradeEngine, 'BATCH_SIZE', batch_size):
+            with patch.object(engine, '_grade_batch', side_effect=fail_for_second_user):
+                results = list(engine.iter(users))
+        assert [(user, course_grade is None, str(error)) for user, course_grade, error in results] == [
+            (users[0], False, 'None'), (users[1], True, 'fail'), (users[2], False, 'None'),
+        ]
+
+    def test_unsupported(self):
+        with override_settings(GENERATE_PROFILE_SCORES=True):
+            with pytest.raises(ValueError):
+                BulkCourseGradeEngine(self.course_data)
+        self.course.grader = grader_from_conf(SYNTHETIC_GRADING_POLICY).subgraders[0][0]
+        with pytest.raises(ValueError):
+            BulkCourseGradeEngine(self.course_data)
+
+    def _iter_course_grades(self, users):
+        """
+        Returns the results of CourseGradeFactory.iter for the users, as the grade reports get them.
+        """
+        return list(CourseGradeFactory().iter(
+            users,
+            course=self.course,
+            collected_block_structure=self.structure,
+            course_key=self.course_key,
+            share_course_blocks=True,
+            compute_in_bulk=True,
+        ))
+
+    def test_course_grade_factory_iter(self):
+        users = UserFactory.create_batch(3)
+        for index, user in enumerate(users):
+            self.answer_synthetic_problem(user, index, 1, 2)
+        with override_waffle_flag(COMPUTE_GRADES_IN_BULK, active=True):
+            results = self._iter_course_grades(users)
+        assert [result.student for result in results] == users
+        for user, course_grade, error in results:
+            assert error is None
+            expected = self._expected_grade(user)
+            assert (course_grade.percent, course_grade.letter_grade, course_grade.passed) == (
+                expected.percent, expected.letter_grade, expected.passed,
+            )
+
+    @ddt.data(
+        (False, False, False),
+        (True, True, False),
+        (True, False, True),
+    )
+    @ddt.unpack
+    def test_course_grade_factory_iter_not_in_bulk(self, flag_active, grades_frozen, profile_scores):
+        user = UserFactory.create()
+        with override_waffle_flag(COMPUTE_GRADES_IN_BULK, active=flag_active), \
+                override_settings(GENERATE_PROFILE_SCORES=profile_scores), \
+                patch('lms.djangoapps.grades.course_grade_factory.are_grades_frozen', return_value=grades_frozen), \
+                patch.object(BulkCourseGradeEngine, 'iter') as mock_bulk_iter, \
+                patch.object(CourseGradeFactory, '_iter_grade_result') as mock_iter_grade_result:
+            mock_iter_grade_result.return_value = CourseGradeFactory.GradeResult(user, None, None)
+            assert self._iter_course_grades([user]) == [(user, None, None)]
+        mock_bulk_iter.assert_not_called()
@@ -0,0 +1,124 @@
+"""
+Tests for incremental course grade updates from CourseGradeAggregates.
+"""
+
+
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connections
+from edx_toggles.toggles.testutils import override_waffle_flag
+
+from common.djangoapps.student.tests.factories import UserFactory
+from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
+
+from ..config.waffle import INCREMENTAL_COURSE_GRADE_UPDATES
+from ..course_data import CourseData
+from ..course_grade import CourseGrade
+from ..course_grade_aggregates import CourseGradeAggregates
+from ..course_grade_factory import CourseGradeFactory
+from ..models import PersistentCourseGrade
+from ..subsection_grade_factory import SubsectionGradeFactory
+from .utils import SyntheticCourseMixin
+
+
+class CourseGradeAggregatesTest(SyntheticCourseMixin, CacheIsolationTestCase):
+    """
+    Tests that course grades updated from CourseGradeAggregates are those
+    computed from all the subsection grades.
+    """
+    databases = set(connections)
+    ENABLED_CACHES = ['default']
+
+    def setUp(self):
+        super().setUp()
+        self.user = UserFactory.create()
+
+    def _course_data(self, structure=None):
+        return CourseData(
+            self.user, course=self.course, structure=structure or self.structure, course_key=self.course_key,
+        )
+
+    def _update_subsection_grade(self, index):
+        """
+        Returns the updated grade of the user's subsection at the given index.
+        """
+        return SubsectionGradeFactory(self.user, course_data=self._course_data()).update(
+            self.structure[self.subsection_key(index)],
+        )
+
+    def _save_aggregates(self):
+        """
+        Computes the user's course grade and stores its aggregates.
+        """
+        CourseGradeAggregates.from_course_grade(CourseGrade(self.user, self._course_data()).update()).save()
+
+    def assert_incremental_update(self, problem_index, subsection_index):
+        """
+        Verifies that the course grade updated from the stored aggregates
+        after a new score of the problem equals the fully computed grade.
+        """
+        self.answer_synthetic_problem(self.user, problem_index, 2, 3)
+        aggregates = CourseGradeAggregates.read(self.user.id, self._course_data())
+        assert aggregates.update(self._update_subsection_grade(subsection_index))
+        incremental_grade = CourseGrade(self.user, self._course_data()).update_from_aggregates(aggregates)
+        full_grade = CourseGrade(self.user, self._course_data()).update()
+        assert incremental_grade.percent > 0
+        assert (incremental_grade.percent, incremental_grade.letter_grade, incremental_grade.passed) == (
+            full_grade.percent, full_grade.letter_grade, full_grade.passed,
+        )
+
+    def test_incremental_updates(self):
+        self._save_aggregates()
+        self.assert_incremental_update(0, 0)
+        self.assert_incremental_update(9, 4)
+        self.assert_incremental_update(5, 2)
+
+    def test_not_stored(self):
+        assert CourseGradeAggregates.read(self.user.id, self._course_data()) is None
+
+    def test_visible_blocks_changed(self):
+        self._save_aggregates()
+        structure = self.structure.copy()
+        structure.remove_block(self.problems[1], keep_descendants=False)
+        assert CourseGradeAggregates.read(self.user.id, self._course_data(structure)) is None
+
+    def test_grading_policy_changed(self):
+        self._save_aggregates()
+        with patch.object(CourseData, 'grading_policy_hash', 'changed'):
+            assert CourseGradeAggregates.read(self.user.id, self._course_data()) is None
+
+    def test_subsection_evicted(self):
+        self._save_aggregates()
+        cache.delete(CourseGradeAggregates._subsection_cache_key(  # pylint: disable=protected-access
+            self.user.id, self.subsection_key(3),
+        ))
+        assert CourseGradeAggregates.read(self.user.id, self._course_data()) is None
+
+    def test_unknown_subsection(self):
+        self._save_aggregates()
+        aggregates = CourseGradeAggregates.read(self.user.id, self._course_data())
+        aggregates._subsections.pop(self.subsection_key(1))  # pylint: disable=protected-access
+        assert not aggregates.update(self._update_subsection_grade(1))
+        assert aggregates.update(self._update_subsection_grade(5))
+
+    @patch('lms.djangoapps.grades.course_grade_factory.COURSE_GRADE_CHANGED')
+    @patch('lms.djangoapps.grades.course_grade_factory.COURSE_GRADE_NOW_PASSED')
+    @patch('lms.djangoapps.grades.course_grade_factory.COURSE_GRADE_NOW_FAILED')
+    def test_factory_update(self, *signals):  # pylint: disable=unused-argument
+        with override_waffle_flag(INCREMENTAL_COURSE_GRADE_UPDATES, active=True):
+            CourseGradeFactory().update(self.user, course=self.course, course_structure=self.structure)
+            self.answer_synthetic_problem(self.user, 3, 1, 1)
+            subsection_grade = self._update_subsection_grade(1)
+            with patch.object(CourseGrade, 'update') as mock_update:
+                course_grade = CourseGradeFactory().update(
+                    self.user,
+                    course=self.course,
+                    course_structure=self.structure,
+                    updated_subsection_grade=subsection_grade,
+                )
+            assert not mock_update.called
+
+        full_grade = CourseGrade(self.user, self._course_data()).update()
+        assert course_grade.percent == full_grade.percent > 0
+        assert PersistentCourseGrade.read(self.user.id, self.course_key).percent_grade == full_grade.percent
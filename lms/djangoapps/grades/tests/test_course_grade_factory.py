@@ -8,6 +8,7 @@ import ddt
 from common.djangoapps.student.tests.factories import UserFactory
 from lms.djangoapps.courseware.access import has_access
 from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from openedx.core.djangoapps.content.block_structure.manager import BlockStructureManager
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase  # lint-amnesty, pylint: disable=wrong-import-order
 from xmodule.modulestore.tests.factories import CourseFactory  # lint-amnesty, pylint: disable=wrong-import-order
 
@@ -268,6 +269,25 @@ class TestGradeIteration(SharedModuleStoreTestCase):
             assert course_grade.letter_grade is None
             assert course_grade.percent == 0.0
 
+    def test_share_course_blocks(self):
+        """
+        Students with the same access to the course share a single
+        transform of the course structure.
+        """
+        with patch.object(
+            BlockStructureManager,
+            'get_transformed',
+            autospec=True,
+            side_effect=BlockStructureManager.get_transformed,
+        ) as mock_get_transformed:
+            grade_results = list(CourseGradeFactory().iter(self.students, self.course, share_course_blocks=True))
+            assert mock_get_transformed.call_count == 1
+
+        assert [student for student, _, _ in grade_results] == self.students
+        for _, course_grade, error in grade_results:
+            assert error is None
+            assert course_grade.percent == 0.0
+
     @patch('lms.djangoapps.grades.course_grade_factory.CourseGradeFactory.read')
     def test_grading_exception(self, mock_course_grade):
         """Test that we correctly capture exception messages that bubble up from
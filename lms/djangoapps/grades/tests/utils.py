@@ -5,13 +5,35 @@ Utilities for grades related tests
 
 from contextlib import contextmanager
 from datetime import datetime
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 import pytz
+from opaque_keys.edx.locator import CourseLocator
 
 from lms.djangoapps.courseware.model_data import FieldDataCache
 from lms.djangoapps.courseware.block_render import get_block
-from xmodule.graders import ProblemScore  # lint-amnesty, pylint: disable=wrong-import-order
+from lms.djangoapps.courseware.tests.factories import StudentModuleFactory
+from openedx.core.djangoapps.content.block_structure.block_structure import BlockStructureBlockData
+from xmodule.graders import ProblemScore, grader_from_conf  # lint-amnesty, pylint: disable=wrong-import-order
+
+from ..transformer import GradesTransformer
+
+SYNTHETIC_GRADING_POLICY = [
+    {'type': 'Homework', 'min_count': 4, 'drop_count': 1, 'short_label': 'HW', 'weight': 0.3},
+    {'type': 'Lab', 'min_count': 1, 'drop_count': 0, 'short_label': 'Lab', 'weight': 0.2},
+    {'type': 'Exam', 'min_count': 1, 'drop_count': 0, 'short_label': 'Exam', 'weight': 0.5},
+]
+
+# Format and problems of each subsection of the synthetic course, as
+# (weight, max_score, explicitly graded) tuples.
+SYNTHETIC_SUBSECTIONS = [
+    ('Homework', [(None, 1, None), (2, 3, None), (None, 2, False)]),
+    ('Homework', [(1.5, 1, None), (None, None, None)]),
+    ('Homework', [(None, 4, None)]),
+    ('Lab', [(0, 2, None), (3, 0, None), (None, 5, None)]),
+    ('Exam', [(10, 4, None), (None, 6, None), (5, 2, None)]),
+    ('Ungraded', [(None, 1, None)]),
+]
 
 
 @contextmanager
@@ -86,3 +108,78 @@ def answer_problem(course, request, problem, score=1, max_value=1):
         field_data_cache,
     )
     block.runtime.publish(problem, 'grade', grade_dict)
+
+
+class SyntheticCourseMixin:
+    """
+    Creates a collected course structure of SYNTHETIC_SUBSECTIONS, with
+    GradesTransformer data, and a mock course graded by SYNTHETIC_GRADING_POLICY,
+    for grading tests that don't need the modulestore.
+    """
+    def setUp(self):
+        super().setUp()
+        self.course_key = CourseLocator('org', 'synthetic', 'run')
+        self.structure = self._create_synthetic_structure()
+        self.course = Mock(
+            id=self.course_key,
+            grader=grader_from_conf(SYNTHETIC_GRADING_POLICY),
+            grade_cutoffs={'A': 0.8, 'B': 0.5, 'C': 0.3},
+        )
+        self.problems = [
+            block_key for block_key in self.structure.topological_traversal()
+            if block_key.block_type == 'problem'
+        ]
+
+    def subsection_key(self, index):
+        """
+        Returns the usage key of the subsection at the given index of SYNTHETIC_SUBSECTIONS.
+        """
+        return self.course_key.make_usage_key('sequential', f'subsection_{index}')
+
+    def answer_synthetic_problem(self, user, problem_index, grade, max_grade):
+        """
+        Records the user's score of the problem in StudentModule.
+        """
+        StudentModuleFactory.create(
+            student=user,
+            course_id=self.course_key,
+            module_state_key=self.problems[problem_index],
+            grade=grade,
+            max_grade=max_grade,
+        )
+
+    def _create_synthetic_structure(self):
+        """
+        Returns a course structure with the chapters, subsections and problems of SYNTHETIC_SUBSECTIONS.
+        """
+        root_key = self.course_key.make_usage_key('course', 'course')
+        structure = BlockStructureBlockData(root_key)
+        self._add_synthetic_block(structure, root_key)
+        structure.set_transformer_block_field(root_key, GradesTransformer, 'grading_policy_hash', 'synthetic')
+        for index, (subsection_format, problems) in enumerate(SYNTHETIC_SUBSECTIONS):
+            chapter_key = self.course_key.make_usage_key('chapter', f'chapter_{index // 2}')
+            if chapter_key not in structure:
+                self._add_synthetic_block(structure, chapter_key, root_key)
+            subsection_key = self.subsection_key(index)
+            self._add_synthetic_block(structure, subsection_key, chapter_key, graded=subsection_format != 'Ungraded')
+            structure.override_xblock_field(subsection_key, 'format', subsection_format)
+            vertical_key = self.course_key.make_usage_key('vertical', f'vertical_{index}')
+            self._add_synthetic_block(structure, vertical_key, subsection_key)
+            for position, (weight, max_score, explicitly_graded) in enumerate(problems):
+                problem_key = self.course_key.make_usage_key('problem', f'problem_{index}_{position}')
+                self._add_synthetic_block(structure, problem_key, vertical_key, has_score=True, weight=weight)
+                structure.set_transformer_block_field(problem_key, GradesTransformer, 'max_score', max_score)
+                structure.set_transformer_block_field(
+                    problem_key, GradesTransformer, GradesTransformer.EXPLICIT_GRADED_FIELD_NAME, explicitly_graded,
+                )
+        return structure
+
+    @staticmethod
+    def _add_synthetic_block(structure, block_key, parent_key=None, **fields):
+        """
+        Adds the block with the given fields to the structure.
+        """
+        if parent_key:
+            structure._add_relation(parent_key, block_key)  # pylint: disable=protected-access
+        for name, value in dict(fields, display_name=block_key.block_id, self_paced=False).items():
+            structure.override_xblock_field(block_key, name, value)
@@ -36,6 +36,19 @@ USE_ON_DISK_GRADE_REPORTING = CourseWaffleFlag(
     f'{WAFFLE_NAMESPACE}.use_on_disk_grade_reporting', __name__
 )
 
+# .. toggle_name: instructor_task.shard_course_grade_reports
+# .. toggle_implementation: CourseWaffleFlag
+# .. toggle_default: False
+# .. toggle_description: When enabled, course grade reports of courses with more than
+#   GRADE_REPORT_LEARNERS_PER_SHARD learners are generated by parallel subtasks that each grade a
+#   range of the learners, and whose partial CSVs are then merged into the report.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-17
+# .. toggle_target_removal_date: 2027-01-17
+SHARD_COURSE_GRADE_REPORTS = CourseWaffleFlag(
+    f'{WAFFLE_NAMESPACE}.shard_course_grade_reports', __name__
+)
+
 
 def optimize_get_learners_switch_enabled():
     """
@@ -69,3 +82,11 @@ def use_on_disk_grade_reporting(course_id):
     False otherwise.
     """
     return USE_ON_DISK_GRADE_REPORTING.is_enabled(course_id)
+
+
+def shard_course_grade_reports(course_id):
+    """
+    Returns True if course grade reports should be generated
+    by parallel subtasks for the given course, False otherwise.
+    """
+    return SHARD_COURSE_GRADE_REPORTS.is_enabled(course_id)
@@ -31,7 +31,12 @@ from lms.djangoapps.bulk_email.tasks import perform_delegate_email_batches
 from lms.djangoapps.instructor_task.tasks_base import BaseInstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import upload_may_enroll_csv, upload_students_csv
-from lms.djangoapps.instructor_task.tasks_helper.grades import CourseGradeReport, ProblemGradeReport, ProblemResponses
+from lms.djangoapps.instructor_task.tasks_helper.grades import (
+    CourseGradeReport,
+    ProblemGradeReport,
+    ProblemResponses,
+    ShardedCourseGradeReport
+)
 from lms.djangoapps.instructor_task.tasks_helper.misc import (
     cohort_students_and_upload,
     upload_course_survey_report,
@@ -193,10 +198,35 @@ def calculate_grades_csv(entry_id, xblock_instance_args):
         xblock_instance_args.get('task_id'), entry_id, action_name
     )
 
-    task_fn = partial(CourseGradeReport.generate, xblock_instance_args)
+    task_fn = partial(
+        CourseGradeReport.generate,
+        xblock_instance_args,
+        shard_task=calculate_grades_csv_shard,
+    )
     return run_main_task(entry_id, task_fn, action_name)
 
 
+@shared_task
+@set_code_owner_attribute
+def calculate_grades_csv_shard(entry_id, xblock_instance_args, shard_input, subtask_status_dict):
+    """
+    Grade a shard of the learners of a course into partial CSVs of its grade report.
+    """
+    return ShardedCourseGradeReport.generate_shard(
+        entry_id, xblock_instance_args, shard_input, subtask_status_dict, merge_grades_csv_shards
+    )
+
+
+@shared_task(base=BaseInstructorTask)
+@set_code_owner_attribute
+def merge_grades_csv_shards(entry_id, xblock_instance_args, shard_input):
+    """
+    Merge the partial CSVs of all shards of a course's grade report and push
+    the result to an S3 bucket for download.
+    """
+    return ShardedCourseGradeReport.merge_shards(entry_id, xblock_instance_args, shard_input)
+
+
 @shared_task(base=BaseInstructorTask)
 @set_code_owner_attribute
 def calculate_problem_grade_report(entry_id, xblock_instance_args):
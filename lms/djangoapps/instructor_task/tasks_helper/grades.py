@@ -2,18 +2,26 @@
 Functionality for generating grade reports.
 """
 
+import codecs
 import csv
+import json
 import logging
+import os
 import re
 from collections import OrderedDict, defaultdict
+from contextlib import closing
 from datetime import datetime
 from itertools import chain
 from tempfile import TemporaryFile
 
 from time import time
+from uuid import uuid4
 
+from celery.states import FAILURE, SUCCESS
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import DatabaseError
 from lazy import lazy
 from opaque_keys.edx.keys import UsageKey
 from pytz import UTC
@@ -22,6 +30,7 @@ from six.moves import zip_longest
 from common.djangoapps.course_modes.models import CourseMode
 from common.djangoapps.student.models import CourseEnrollment
 from common.djangoapps.student.roles import BulkRoleCache
+from common.djangoapps.util.db import outer_atomic
 from lms.djangoapps.certificates import api as certs_api
 from lms.djangoapps.certificates.models import GeneratedCertificate
 from lms.djangoapps.course_blocks.api import get_course_blocks
@@ -34,8 +43,17 @@ from lms.djangoapps.instructor_analytics.csvs import format_dictlist
 from lms.djangoapps.instructor_task.config.waffle import (
     course_grade_report_verified_only,
     problem_grade_report_verified_only,
+    shard_course_grade_reports,
     use_on_disk_grade_reporting,
 )
+from lms.djangoapps.instructor_task.exceptions import DuplicateTaskException
+from lms.djangoapps.instructor_task.models import InstructorTask, ReportStore
+from lms.djangoapps.instructor_task.subtasks import (
+    SubtaskStatus,
+    check_subtask_is_valid,
+    initialize_subtask_info,
+    update_subtask_status
+)
 from lms.djangoapps.teams.models import CourseTeamMembership
 from lms.djangoapps.verify_student.services import IDVerificationService
 from openedx.core.djangoapps.content.block_structure.api import get_course_in_cache
@@ -451,18 +469,12 @@ class GradeReportBase:
             args = [iter(iterable)] * chunk_size
             return zip_longest(*args, fillvalue=fillvalue)
 
-        def get_enrolled_learners_for_course(course_id, verified_only=False):
+        def get_enrolled_learners_for_course(filter_kwargs):
             """
             Get all the enrolled users in a course chunk by chunk.
             This generator method fetches & loads the enrolled user objects on demand which in chunk
             size defined. This method is a workaround to avoid out-of-memory errors.
             """
-            filter_kwargs = {
-                'courseenrollment__course_id': course_id,
-            }
-            if verified_only:
-                filter_kwargs['courseenrollment__mode'] = CourseMode.VERIFIED
-
             user_ids_list = get_user_model().objects.filter(**filter_kwargs).values_list('id', flat=True).order_by('id')
             user_chunks = grouper(user_ids_list)
             for user_ids in user_chunks:
@@ -477,10 +489,18 @@ class GradeReportBase:
 
                 yield users
 
-        return get_enrolled_learners_for_course(
-            course_id=self.context.course_id,
-            verified_only=self.context.report_for_verified_only
-        )
+        return get_enrolled_learners_for_course(self._enrolled_learners_filter())
+
+    def _enrolled_learners_filter(self):
+        """
+        Returns the filter kwargs of the User queryset of the learners included in this report.
+        """
+        filter_kwargs = {
+            'courseenrollment__course_id': self.context.course_id,
+        }
+        if self.context.report_for_verified_only:
+            filter_kwargs['courseenrollment__mode'] = CourseMode.VERIFIED
+        return filter_kwargs
 
     def log_additional_info_for_testing(self, message):
         """
@@ -513,12 +533,19 @@ class CourseGradeReport(GradeReportBase):
     USER_BATCH_SIZE = 100
 
     @classmethod
-    def generate(cls, _xblock_instance_args, _entry_id, course_id, _task_input, action_name):
+    def generate(cls, _xblock_instance_args, _entry_id, course_id, _task_input, action_name, shard_task=None):
         """
         Public method to generate a grade report.
+
+        When sharding is enabled for the course and the celery task that grades a shard
+        is given, the learners are graded by parallel subtasks instead.
         """
         with modulestore().bulk_operations(course_id):
             context = _CourseGradeReportContext(_xblock_instance_args, _entry_id, course_id, _task_input, action_name)
+            if shard_task and shard_course_grade_reports(course_id):
+                progress = ShardedCourseGradeReport(context).queue_shards(_xblock_instance_args, _entry_id, shard_task)
+                if progress is not None:
+                    return progress
             if use_on_disk_grade_reporting(course_id):  # AU-926
                 return TempFileCourseGradeReport(context)._generate()  # pylint: disable=protected-access
             else:
@@ -570,6 +597,8 @@ class CourseGradeReport(GradeReportBase):
                 course=self.context.course,
                 collected_block_structure=self.context.course_structure,
                 course_key=self.context.course_id,
+                share_course_blocks=True,
+                compute_in_bulk=True,
             ):
                 if not course_grade:
                     # An empty gradeset means we failed to grade a student.
@@ -706,6 +735,255 @@ class TempFileCourseGradeReport(CourseGradeReport, TemporaryFileReportMixin):
     """ Course Grade Report that writes file iteratively to a TempFile to then be uploaded """
 
 
+class ShardedCourseGradeReport(TempFileCourseGradeReport):
+    """
+    Course Grade Report whose learners are graded in ranges of user ids (shards) by parallel
+    subtasks, each of which writes its rows to partial CSVs that are merged into the report
+    once all shards are graded.
+    """
+    # Directory of the partial CSVs, relative to the course's report directory.
+    SHARDS_DIR = 'grade_report_shards'
+
+    def __init__(self, context, shard_input=None):
+        super().__init__(context)
+        # The shard graded by this report, as queued by queue_shards, or None when the report
+        # is not restricted to a shard.
+        self.shard_input = shard_input
+
+    def _enrolled_learners_filter(self):
+        filter_kwargs = super()._enrolled_learners_filter()
+        if self.shard_input is not None:
+            filter_kwargs['id__range'] = (self.shard_input['min_user_id'], self.shard_input['max_user_id'])
+        return filter_kwargs
+
+    def queue_shards(self, xblock_instance_args, entry_id, shard_task):
+        """
+        Queues a `shard_task` subtask for each shard of the course's learners.  The last shard
+        to be graded queues the subtask that merges their partial reports.
+
+        Returns the task progress as stored in the InstructorTask, or None if all of the
+        course's learners fit in a single shard, in which case nothing is queued.
+        """
+        learners_per_shard = settings.GRADE_REPORT_LEARNERS_PER_SHARD
+        user_ids = list(
+            get_user_model().objects.filter(
+                **self._enrolled_learners_filter()
+            ).values_list('id', flat=True).order_by('id')
+        )
+        if len(user_ids) <= learners_per_shard:
+            return None
+
+        shard_user_ids = [
+            user_ids[start:start + learners_per_shard] for start in range(0, len(user_ids), learners_per_shard)
+        ]
+        shard_task_ids = [str(uuid4()) for _ in shard_user_ids]
+        merge_task_id = str(uuid4())
+
+        # Make sure the subtasks are committed to the database before handing them off to celery.
+        entry = InstructorTask.objects.get(pk=entry_id)
+        with outer_atomic():
+            progress = initialize_subtask_info(
+                entry, self.context.action_name, len(user_ids), shard_task_ids + [merge_task_id]
+            )
+
+        self.context.update_status(f'ShardedCourseGradeReport - 1: Queueing {len(shard_user_ids)} shards')
+        for index, (ids, shard_task_id) in enumerate(zip(shard_user_ids, shard_task_ids)):
+            shard_input = {
+                'index': index,
+                'min_user_id': ids[0],
+                'max_user_id': ids[-1],
+                'num_shards': len(shard_user_ids),
+                'merge_task_id': merge_task_id,
+                'action_name': self.context.action_name,
+            }
+            shard_task.apply_async(
+                args=(entry_id, xblock_instance_args, shard_input, SubtaskStatus.create(shard_task_id).to_dict()),
+                task_id=shard_task_id,
+            )
+        return progress
+
+    @classmethod
+    def generate_shard(cls, entry_id, xblock_instance_args, shard_input, subtask_status_dict, merge_task):
+        """
+        Grades the learners of the given shard into partial CSVs, and queues `merge_task`
+        if this is the last shard to be graded.
+
+        Returns the subtask's status as a dict.
+        """
+        subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+        current_task_id = subtask_status.task_id
+        check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+        try:
+            context = cls._context_for_entry(entry_id, xblock_instance_args, shard_input['action_name'])
+            with modulestore().bulk_operations(context.course_id):
+                cls(context, shard_input)._generate_shard(entry_id)  # pylint: disable=protected-access
+            subtask_status.increment(
+                succeeded=context.task_progress.succeeded,
+                failed=context.task_progress.failed,
+                state=SUCCESS,
+            )
+        except Exception:  # pylint: disable=broad-except
+            TASK_LOG.exception(
+                'Task: %s, InstructorTask ID: %s, Failed to grade shard %s of %s',
+                current_task_id, entry_id, shard_input['index'], shard_input['num_shards'],
+            )
+            subtask_status.increment(state=FAILURE)
+
+        try:
+            num_remaining = update_subtask_status(entry_id, current_task_id, subtask_status)
+        except DatabaseError:
+            # The status of this shard is lost, so no shard may see itself as the last
+            # one: queue the merge subtask anyway, which fails the report.
+            cls._queue_merge(entry_id, xblock_instance_args, shard_input, merge_task)
+            raise
+
+        # Only the merge subtask remains once every shard is done.
+        if num_remaining <= 1:
+            cls._queue_merge(entry_id, xblock_instance_args, shard_input, merge_task)
+        return subtask_status.to_dict()
+
+    @staticmethod
+    def _queue_merge(entry_id, xblock_instance_args, shard_input, merge_task):
+        """
+        Queues the merge subtask of the report.  Its task id is fixed, so only the
+        first one queued merges the shards.
+        """
+        merge_task.apply_async(
+            args=(entry_id, xblock_instance_args, shard_input),
+            task_id=shard_input['merge_task_id'],
+        )
+
+    @classmethod
+    def merge_shards(cls, entry_id, xblock_instance_args, shard_input):
+        """
+        Merges the partial CSVs of all shards into the grade report, and records the
+        task's progress aggregated from all shards.
+
+        Raises if any of the shards failed.
+        """
+        subtask_status = SubtaskStatus.create(shard_input['merge_task_id'])
+        try:
+            check_subtask_is_valid(entry_id, subtask_status.task_id, subtask_status)
+        except DuplicateTaskException:
+            return None
+
+        context = cls._context_for_entry(entry_id, xblock_instance_args, shard_input['action_name'])
+        report = cls(context)
+        try:
+            entry = InstructorTask.objects.get(pk=entry_id)
+            subtasks = json.loads(entry.subtasks)
+            num_failed_shards = subtasks['failed']
+            if num_failed_shards:
+                raise ValueError(f'{num_failed_shards} of {shard_input["num_shards"]} grade report shards failed')
+            num_incomplete_shards = shard_input['num_shards'] - subtasks['succeeded']
+            if num_incomplete_shards:
+                raise ValueError(
+                    f'{num_incomplete_shards} of {shard_input["num_shards"]} grade report shards did not complete'
+                )
+            context.update_status('ShardedCourseGradeReport - 2: Merging shards')
+            report._merge_shards(entry_id, shard_input['num_shards'])  # pylint: disable=protected-access
+        except Exception:
+            subtask_status.increment(state=FAILURE)
+            update_subtask_status(entry_id, subtask_status.task_id, subtask_status)
+            raise
+        finally:
+            report._delete_shards(entry_id, shard_input['num_shards'])  # pylint: disable=protected-access
+
+        task_output = json.loads(entry.task_output)
+        for statname in ('attempted', 'succeeded', 'failed', 'skipped', 'total'):
+            setattr(context.task_progress, statname, task_output[statname])
+        context.task_progress.start_time = task_output['start_time']
+
+        subtask_status.increment(state=SUCCESS)
+        update_subtask_status(entry_id, subtask_status.task_id, subtask_status)
+        return context.update_status('ShardedCourseGradeReport - 3: Completed grades')
+
+    @staticmethod
+    def _context_for_entry(entry_id, xblock_instance_args, action_name):
+        """
+        Returns the report context of the given InstructorTask.
+        """
+        entry = InstructorTask.objects.get(pk=entry_id)
+        return _CourseGradeReportContext(
+            xblock_instance_args, entry_id, entry.course_id, json.loads(entry.task_input), action_name
+        )
+
+    def _shard_paths(self, report_store, entry_id, index):
+        """
+        Returns the storage paths of the success and error CSVs of the given shard.
+        """
+        shards_dir = os.path.join(report_store.path_to(self.context.course_id), self.SHARDS_DIR, str(entry_id))
+        return (
+            report_store.path_to(self.context.course_id, f'{index}.csv', shards_dir),
+            report_store.path_to(self.context.course_id, f'{index}_err.csv', shards_dir),
+        )
+
+    def _generate_shard(self, entry_id):
+        """
+        Writes the rows of this report's shard to its partial CSVs in the report store.
+        """
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        self.context.update_status(f'ShardedCourseGradeReport - 1: Grading shard {self.shard_input["index"]}')
+        with TemporaryFile('r+') as success_file, TemporaryFile('r+') as error_file:
+            has_errors = self.iter_and_write_batched_rows(self._batched_rows(), success_file, error_file)
+            for path, part_file, has_rows in zip(
+                self._shard_paths(report_store, entry_id, self.shard_input['index']),
+                (success_file, error_file),
+                (True, has_errors),
+            ):
+                # A retried shard replaces its earlier partial CSVs.
+                if report_store.storage.exists(path):
+                    report_store.storage.delete(path)
+                if has_rows:
+                    part_file.seek(0)
+                    report_store.storage.save(path, ContentFile(part_file.read().encode('utf-8')))
+
+    def _merge_shards(self, entry_id, num_shards):
+        """
+        Streams the rows of the partial CSVs of all shards, in order, into the grade report
+        and its error report.
+        """
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        shard_paths = [self._shard_paths(report_store, entry_id, index) for index in range(num_shards)]
+        with TemporaryFile('r+') as success_file, TemporaryFile('r+') as error_file:
+            self._merge_csvs(report_store, [paths[0] for paths in shard_paths], success_file)
+            has_errors = self._merge_csvs(report_store, [paths[1] for paths in shard_paths], error_file)
+            self.upload_temp_files(success_file, error_file, has_errors)
+
+    @staticmethod
+    def _merge_csvs(report_store, paths, merged_file):
+        """
+        Writes the rows of the CSVs at the given paths to `merged_file`, keeping only the
+        header of the first one.  Returns whether any rows were written.
+        """
+        writer = csv.writer(merged_file)
+        header_written, has_rows = False, False
+        for path in paths:
+            if not report_store.storage.exists(path):
+                continue
+            with report_store.storage.open(path, 'rb') as part_file:
+                reader = csv.reader(codecs.iterdecode(part_file, 'utf-8'))
+                header = next(reader, None)
+                if header is not None and not header_written:
+                    writer.writerow(header)
+                    header_written = True
+                for row in reader:
+                    writer.writerow(row)
+                    has_rows = True
+        return has_rows
+
+    def _delete_shards(self, entry_id, num_shards):
+        """
+        Deletes the partial CSVs of all shards.
+        """
+        report_store = ReportStore.from_config('GRADES_DOWNLOAD')
+        for index in range(num_shards):
+            for path in self._shard_paths(report_store, entry_id, index):
+                if report_store.storage.exists(path):
+                    report_store.storage.delete(path)
+
+
 class ProblemGradeReport(GradeReportBase):
     """
     Class to encapsulate functionality related to generating user/row had header data for Problem Grade Reports.
@@ -755,6 +1033,8 @@ class ProblemGradeReport(GradeReportBase):
             course=self.context.course,
             collected_block_structure=self.context.course_structure,
             course_key=self.context.course_id,
+            share_course_blocks=True,
+            compute_in_bulk=True,
         ):
             if not course_grade:
                 err_msg = str(error)
@@ -904,10 +1184,13 @@ class ProblemResponses:
                     # Blocks can implement the generate_report_data method to provide their own
                     # human-readable formatting for user state.
                     if hasattr(block, 'generate_report_data'):
+                        # The user states are streamed from the database; close the stream when
+                        # the block stops reading it early (e.g. at max_count), so that it
+                        # doesn't keep its decoding thread until it's garbage collected.
                         try:
-                            user_state_iterator = user_state_client.iter_all_for_block(block_key)
-                            for username, state in block.generate_report_data(user_state_iterator, max_count):
-                                generated_report_data[username].append(state)
+                            with closing(user_state_client.iter_all_for_block(block_key)) as user_state_iterator:
+                                for username, state in block.generate_report_data(user_state_iterator, max_count):
+                                    generated_report_data[username].append(state)
                         except NotImplementedError:
                             pass
 
@@ -5,10 +5,13 @@ Instructor Tasks related to module state.
 
 import json
 import logging
+from collections import defaultdict
 from time import time
 
+from django.utils import timezone
 from django.utils.translation import gettext_noop
 from opaque_keys.edx.keys import UsageKey
+from xblock.fields import Scope
 from xblock.scorable import Score
 
 from xmodule.capa.responsetypes import LoncapaProblemError, ResponseError, StudentInputError
@@ -18,8 +21,9 @@ from common.djangoapps.track.views import task_track
 from common.djangoapps.util.db import outer_atomic
 from lms.djangoapps.courseware.courses import get_problems_in_section
 from lms.djangoapps.courseware.model_data import FieldDataCache
-from lms.djangoapps.courseware.models import StudentModule
+from lms.djangoapps.courseware.models import StudentModule, chunks
 from lms.djangoapps.courseware.block_render import get_block_for_descriptor
+from lms.djangoapps.courseware.user_state_client import DjangoXBlockUserStateClient, XBlockUserState
 from lms.djangoapps.grades.api import events as grades_events
 from openedx.core.lib.courses import get_course_by_id
 from xmodule.modulestore.django import modulestore  # lint-amnesty, pylint: disable=wrong-import-order
@@ -30,6 +34,94 @@ from .utils import UNKNOWN_TASK_ID, UPDATE_STATUS_FAILED, UPDATE_STATUS_SKIPPED,
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+# The number of StudentModules whose state is read, and written, together
+# while updating them.
+MODULE_STATE_UPDATE_BATCH_SIZE = 100
+
+
+class _BulkUserStateClient(DjangoXBlockUserStateClient):
+    """
+    A DjangoXBlockUserStateClient for a batch of StudentModules that are updated together.
+
+    The state of the batch's modules is read with get_many_for_users when the client is
+    created, and the state set for them is kept until :meth:`flush` writes it with
+    set_many_for_users.  The state of any other blocks and users is read and written
+    directly.
+    """
+    def __init__(self, student_modules):
+        super().__init__()
+        self._block_keys = {
+            student_module.module_state_key.map_into_course(student_module.course_id)
+            for student_module in student_modules
+        }
+        self._states = {student_module.student.username: {} for student_module in student_modules}
+        self._pending_states = defaultdict(dict)
+        for user_state in self.get_many_for_users(list(self._states), list(self._block_keys)):
+            self._states[user_state.username][user_state.block_key] = user_state
+
+    def _is_buffered(self, username, scope):
+        """
+        Returns whether the user's state in the scope is read from, and set in, this batch.
+        """
+        return username in self._states and scope == Scope.user_state
+
+    def get_many(self, username, block_keys, scope=Scope.user_state, fields=None):
+        if not self._is_buffered(username, scope):
+            yield from super().get_many(username, block_keys, scope, fields)
+            return
+
+        user_states = [
+            self._states[username][block_key]
+            for block_key in block_keys
+            if block_key in self._block_keys and block_key in self._states[username]
+        ]
+        other_block_keys = [block_key for block_key in block_keys if block_key not in self._block_keys]
+        if other_block_keys:
+            user_states.extend(super().get_many(username, other_block_keys, scope))
+
+        for user_state in user_states:
+            state = user_state.state
+            if fields is not None:
+                state = {field: state[field] for field in fields if field in state}
+            yield user_state._replace(state=state)
+
+    def set_many(self, username, block_keys_to_state, scope=Scope.user_state):
+        if not self._is_buffered(username, scope):
+            super().set_many(username, block_keys_to_state, scope)
+            return
+
+        other_block_keys_to_state = {
+            block_key: state
+            for block_key, state in block_keys_to_state.items()
+            if block_key not in self._block_keys
+        }
+        if other_block_keys_to_state:
+            super().set_many(username, other_block_keys_to_state, scope)
+
+        for block_key, state in block_keys_to_state.items():
+            if block_key in self._block_keys:
+                self._pending_states[username].setdefault(block_key, {}).update(state)
+                user_state = self._states[username].get(block_key)
+                current_state = dict(user_state.state) if user_state else {}
+                current_state.update(state)
+                self._states[username][block_key] = XBlockUserState(
+                    username, block_key, current_state, timezone.now(), scope,
+                )
+
+    def delete_many(self, username, block_keys, scope=Scope.user_state, fields=None):
+        # Deletes are rare in the tasks: write the pending state, and stop buffering the user's.
+        self.flush()
+        self._states.pop(username, None)
+        super().delete_many(username, block_keys, scope, fields)
+
+    def flush(self):
+        """
+        Writes the state set for the batch's modules.
+        """
+        if self._pending_states:
+            self.set_many_for_users(self._pending_states)
+            self._pending_states = defaultdict(dict)
+
 
 def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, task_input, action_name):
     """
@@ -88,32 +180,41 @@ def perform_module_state_update(update_fcn, filter_fcn, _entry_id, course_id, ta
     task_progress = TaskProgress(action_name, len(modules_to_update), start_time)
     task_progress.update_task_state()
 
-    for module_to_update in modules_to_update:
-        task_progress.attempted += 1
-        block = problems[str(module_to_update.module_state_key)]
-        # There is no try here:  if there's an error, we let it throw, and the task will
-        # be marked as FAILED, with a stack trace.
-        update_status = update_fcn(block, module_to_update, task_input)
-        if update_status == UPDATE_STATUS_SUCCEEDED:
-            # If the update_fcn returns true, then it performed some kind of work.
-            # Logging of failures is left to the update_fcn itself.
-            task_progress.succeeded += 1
-        elif update_status == UPDATE_STATUS_FAILED:
-            task_progress.failed += 1
-        elif update_status == UPDATE_STATUS_SKIPPED:
-            task_progress.skipped += 1
-        else:
-            raise UpdateProblemModuleStateError(f"Unexpected update_status returned: {update_status}")
+    # The state of the modules is read, and written back, in bulk for each batch of modules.
+    for modules_batch in chunks(modules_to_update, MODULE_STATE_UPDATE_BATCH_SIZE):
+        user_state_client = _BulkUserStateClient(modules_batch)
+        try:
+            for module_to_update in modules_batch:
+                task_progress.attempted += 1
+                block = problems[str(module_to_update.module_state_key)]
+                # There is no try here:  if there's an error, we let it throw, and the task will
+                # be marked as FAILED, with a stack trace.
+                update_status = update_fcn(block, module_to_update, task_input, user_state_client=user_state_client)
+                if update_status == UPDATE_STATUS_SUCCEEDED:
+                    # If the update_fcn returns true, then it performed some kind of work.
+                    # Logging of failures is left to the update_fcn itself.
+                    task_progress.succeeded += 1
+                elif update_status == UPDATE_STATUS_FAILED:
+                    task_progress.failed += 1
+                elif update_status == UPDATE_STATUS_SKIPPED:
+                    task_progress.skipped += 1
+                else:
+                    raise UpdateProblemModuleStateError(f"Unexpected update_status returned: {update_status}")
+        finally:
+            # Keep the state of the modules updated before a failure, as the one by one updates did.
+            user_state_client.flush()
 
     return task_progress.update_task_state()
 
 
 @outer_atomic
-def rescore_problem_module_state(xblock_instance_args, block, student_module, task_input):
+def rescore_problem_module_state(xblock_instance_args, block, student_module, task_input, user_state_client=None):
     '''
     Takes an XBlock and a corresponding StudentModule object, and
     performs rescoring on the student's problem submission.
 
+    The XBlock's user state is read and written with `user_state_client`, if given.
+
     Throws exceptions if the rescoring is fatal and should be aborted if in a loop.
     In particular, raises UpdateProblemModuleStateError if module fails to instantiate,
     or if the module doesn't support rescoring.
@@ -137,7 +238,8 @@ def rescore_problem_module_state(xblock_instance_args, block, student_module, ta
             block,
             xblock_instance_args,
             grade_bucket_type='rescore',
-            course=course
+            course=course,
+            user_state_client=user_state_client,
         )
 
         if instance is None:
@@ -207,11 +309,13 @@ def rescore_problem_module_state(xblock_instance_args, block, student_module, ta
 
 
 @outer_atomic
-def override_score_module_state(xblock_instance_args, block, student_module, task_input):
+def override_score_module_state(xblock_instance_args, block, student_module, task_input, user_state_client=None):
     '''
     Takes an XBlock and a corresponding StudentModule object, and
     performs an override on the student's problem score.
 
+    The XBlock's user state is read and written with `user_state_client`, if given.
+
     Throws exceptions if the override is fatal and should be aborted if in a loop.
     In particular, raises UpdateProblemModuleStateError if module fails to instantiate,
     or if the module doesn't support overriding, or if the score used for override
@@ -233,7 +337,8 @@ def override_score_module_state(xblock_instance_args, block, student_module, tas
             student,
             block,
             xblock_instance_args,
-            course=course
+            course=course,
+            user_state_client=user_state_client,
         )
 
         if instance is None:
@@ -287,10 +392,12 @@ def override_score_module_state(xblock_instance_args, block, student_module, tas
 
 
 @outer_atomic
-def reset_attempts_module_state(xblock_instance_args, _block, student_module, _task_input):
+def reset_attempts_module_state(xblock_instance_args, _block, student_module, _task_input, user_state_client=None):
     """
     Resets problem attempts to zero for specified `student_module`.
 
+    The reset state is written with `user_state_client`, if given.
+
     Returns a status of UPDATE_STATUS_SUCCEEDED if a problem has non-zero attempts
     that are being reset, and UPDATE_STATUS_SKIPPED otherwise.
     """
@@ -299,10 +406,17 @@ def reset_attempts_module_state(xblock_instance_args, _block, student_module, _t
     if 'attempts' in problem_state:
         old_number_of_attempts = problem_state["attempts"]
         if old_number_of_attempts > 0:
-            problem_state["attempts"] = 0
-            # convert back to json and save
-            student_module.state = json.dumps(problem_state)
-            student_module.save()
+            if user_state_client is not None:
+                user_state_client.set(
+                    student_module.student.username,
+                    student_module.module_state_key.map_into_course(student_module.course_id),
+                    {"attempts": 0},
+                )
+            else:
+                problem_state["attempts"] = 0
+                # convert back to json and save
+                student_module.state = json.dumps(problem_state)
+                student_module.save()
             # get request-related tracking information from args passthrough,
             # and supplement with task-specific information:
             track_function = _get_track_function_for_task(student_module.student, xblock_instance_args)
@@ -314,7 +428,7 @@ def reset_attempts_module_state(xblock_instance_args, _block, student_module, _t
 
 
 @outer_atomic
-def delete_problem_module_state(xblock_instance_args, _block, student_module, _task_input):
+def delete_problem_module_state(xblock_instance_args, _block, student_module, _task_input, user_state_client=None):  # pylint: disable=unused-argument
     """
     Delete the StudentModule entry.
 
@@ -329,12 +443,13 @@ def delete_problem_module_state(xblock_instance_args, _block, student_module, _t
 
 
 def _get_module_instance_for_task(course_id, student, block, xblock_instance_args=None,
-                                  grade_bucket_type=None, course=None):
+                                  grade_bucket_type=None, course=None, user_state_client=None):
     """
     Fetches a StudentModule instance for a given `course_id`, `student` object, and `block`.
 
     `xblock_instance_args` is used to provide information for creating a track function.
     It is passed, along with `grade_bucket_type`, to get_block_for_descriptor.
+    `user_state_client` is used for the block's user state, if given.
     """
     # get request-related tracking information from args passthrough, and supplement with task-specific information:
     request_info = xblock_instance_args.get('request_info', {}) if xblock_instance_args is not None else {}
@@ -354,7 +469,9 @@ def _get_module_instance_for_task(course_id, student, block, xblock_instance_arg
         user=student,
         request=None,
         block=block,
-        field_data_cache=FieldDataCache.cache_for_block_descendents(course_id, student, block),
+        field_data_cache=FieldDataCache.cache_for_block_descendents(
+            course_id, student, block, user_state_client=user_state_client,
+        ),
         course_key=course_id,
         track_function=make_track_function(),
         grade_bucket_type=grade_bucket_type,
@@ -421,7 +538,7 @@ def _get_modules_to_update(course_id, usage_keys, student_identifier, filter_fcn
     if student:
         module_query_params['student_id'] = student.id
 
-    student_modules = StudentModule.get_state_by_params(**module_query_params)
+    student_modules = StudentModule.get_state_by_params(**module_query_params).select_related('student')
     if filter_fcn is not None:
         student_modules = filter_fcn(student_modules)
 
@@ -7,6 +7,7 @@ Unit tests for LMS instructor-initiated background tasks helper functions.
 """
 
 
+import json
 import os
 import shutil
 import tempfile
@@ -14,14 +15,20 @@ from collections import OrderedDict
 from contextlib import ExitStack, contextmanager
 from datetime import datetime, timedelta
 from unittest.mock import ANY, MagicMock, Mock, patch
+from uuid import uuid4
 
 import ddt
 import pytest
 import unicodecsv
+from celery.states import SUCCESS
 from django.conf import settings
+from django.db import DatabaseError, connections
+from django.test import TestCase
 from django.test.utils import override_settings
 from edx_django_utils.cache import RequestCache
+from edx_toggles.toggles.testutils import override_waffle_flag
 from freezegun import freeze_time
+from opaque_keys.edx.keys import CourseKey
 from pytz import UTC
 
 import openedx.core.djangoapps.user_api.course_tag.api as course_tag_api
@@ -38,6 +45,7 @@ from lms.djangoapps.grades.models import PersistentCourseGrade, PersistentSubsec
 from lms.djangoapps.grades.subsection_grade import CreateSubsectionGrade
 from lms.djangoapps.grades.transformer import GradesTransformer
 from lms.djangoapps.instructor_analytics.basic import UNAVAILABLE, list_problem_responses
+from lms.djangoapps.instructor_task.config.waffle import SHARD_COURSE_GRADE_REPORTS
 from lms.djangoapps.instructor_task.tasks_helper.certs import generate_students_certificates
 from lms.djangoapps.instructor_task.tasks_helper.enrollments import upload_may_enroll_csv, upload_students_csv
 from lms.djangoapps.instructor_task.tasks_helper.grades import (
@@ -46,6 +54,7 @@ from lms.djangoapps.instructor_task.tasks_helper.grades import (
     CourseGradeReport,
     ProblemGradeReport,
     ProblemResponses,
+    ShardedCourseGradeReport,
 )
 from lms.djangoapps.instructor_task.tasks_helper.misc import (
     cohort_students_and_upload,
@@ -54,11 +63,16 @@ from lms.djangoapps.instructor_task.tasks_helper.misc import (
     upload_ora2_submission_files,
     upload_ora2_summary
 )
+from lms.djangoapps.instructor_task.tasks_helper.module_state import (
+    _BulkUserStateClient,
+    reset_attempts_module_state
+)
 from lms.djangoapps.instructor_task.tests.test_base import (
     InstructorTaskCourseTestCase,
     InstructorTaskModuleTestCase,
     TestReportMixin
 )
+from lms.djangoapps.instructor_task.tests.factories import InstructorTaskFactory
 from lms.djangoapps.survey.models import SurveyAnswer, SurveyForm
 from lms.djangoapps.teams.tests.factories import CourseTeamFactory, CourseTeamMembershipFactory
 from lms.djangoapps.verify_student.tests.factories import SoftwareSecurePhotoVerificationFactory
@@ -431,6 +445,71 @@ class TestInstructorGradeReport(InstructorGradeReportTestCase):
             {'attempted': expected_students, 'succeeded': expected_students, 'failed': 0}, result
         )
 
+    @override_settings(GRADE_REPORT_LEARNERS_PER_SHARD=2)
+    @override_waffle_flag(SHARD_COURSE_GRADE_REPORTS, active=True)
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_sharded_report(self, _mock_current_task):
+        """
+        Test that the learners of a sharded report are graded in shards whose
+        partial reports are merged into a single report.
+        """
+        for i in range(3):
+            self.create_student(f'student{i}', f'student{i}@example.com')
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_id=str(uuid4()))
+
+        # Run the subtasks synchronously, as they are queued.
+        merge_task = Mock()
+        merge_task.apply_async.side_effect = lambda args, task_id: ShardedCourseGradeReport.merge_shards(*args)
+        shard_task = Mock()
+        shard_task.apply_async.side_effect = lambda args, task_id: ShardedCourseGradeReport.generate_shard(
+            *args, merge_task=merge_task
+        )
+
+        CourseGradeReport.generate(None, entry.id, self.course.id, {}, 'graded', shard_task=shard_task)
+        assert shard_task.apply_async.call_count == 2
+        assert merge_task.apply_async.call_count == 1
+
+        entry.refresh_from_db()
+        assert entry.task_state == SUCCESS
+        self.assertDictContainsSubset({'attempted': 3, 'succeeded': 3, 'failed': 0}, json.loads(entry.task_output))
+        self.verify_rows_in_csv(
+            [{'Username': f'student{i}'} for i in range(3)],
+            ignore_other_columns=True,
+        )
+        report_store = ReportStore.from_config(config_name='GRADES_DOWNLOAD')
+        assert len(report_store.links_for(self.course.id)) == 1
+        shards_dir = os.path.join(report_store.path_to(self.course.id), ShardedCourseGradeReport.SHARDS_DIR)
+        assert report_store.storage.listdir(os.path.join(shards_dir, str(entry.id)))[1] == []
+
+    @override_settings(GRADE_REPORT_LEARNERS_PER_SHARD=2)
+    @override_waffle_flag(SHARD_COURSE_GRADE_REPORTS, active=True)
+    @patch('lms.djangoapps.instructor_task.tasks_helper.runner._get_current_task')
+    def test_sharded_report_lost_shard_status(self, _mock_current_task):
+        """
+        Test that the merge subtask of a sharded report is queued, and fails the
+        report, when the status of a shard could not be recorded.
+        """
+        for i in range(3):
+            self.create_student(f'student{i}', f'student{i}@example.com')
+        entry = InstructorTaskFactory.create(course_id=self.course.id, task_id=str(uuid4()))
+
+        def generate_shard(args, task_id):  # pylint: disable=unused-argument
+            with pytest.raises(DatabaseError):
+                ShardedCourseGradeReport.generate_shard(*args, merge_task=merge_task)
+
+        merge_task = Mock()
+        shard_task = Mock()
+        shard_task.apply_async.side_effect = generate_shard
+        with patch(
+            'lms.djangoapps.instructor_task.tasks_helper.grades.update_subtask_status',
+            side_effect=DatabaseError,
+        ):
+            CourseGradeReport.generate(None, entry.id, self.course.id, {}, 'graded', shard_task=shard_task)
+        assert merge_task.apply_async.call_count == 2
+
+        with pytest.raises(ValueError, match='2 of 2 grade report shards did not complete'):
+            ShardedCourseGradeReport.merge_shards(*merge_task.apply_async.call_args.kwargs['args'])
+
 
 @ddt.ddt
 class TestTeamGradeReport(InstructorGradeReportTestCase):
@@ -2716,3 +2795,64 @@ class TestInstructorOra2AttachmentsExport(SharedModuleStoreTestCase):
             mock_store.assert_called_once()
 
             assert response == UPDATE_STATUS_SUCCEEDED
+
+
+class TestBulkUserStateClient(TestCase):
+    """
+    Tests of the user state client for a batch of StudentModules updated together.
+    """
+    # Tell Django to clean out all databases, not just default
+    databases = set(connections)
+
+    def setUp(self):
+        super().setUp()
+        self.course_key = CourseKey.from_string('course-v1:org+course+run')
+        self.problem_key = self.course_key.make_usage_key('problem', 'problem')
+        self.other_key = self.course_key.make_usage_key('problem', 'other')
+        self.users = UserFactory.create_batch(3)
+        self.student_modules = [
+            StudentModule.objects.create(
+                student=user,
+                course_id=self.course_key,
+                module_state_key=self.problem_key,
+                module_type='problem',
+                state=json.dumps({'attempts': index + 1, 'seed': index}),
+            )
+            for index, user in enumerate(self.users)
+        ]
+
+    def _stored_state(self, user, usage_key):
+        return json.loads(StudentModule.objects.get(student=user, module_state_key=usage_key).state)
+
+    def test_buffered_state(self):
+        client = _BulkUserStateClient(self.student_modules)
+        with self.assertNumQueries(0):
+            assert client.get(self.users[1].username, self.problem_key).state == {'attempts': 2, 'seed': 1}
+            client.set(self.users[1].username, self.problem_key, {'attempts': 0})
+            client.set(self.users[2].username, self.problem_key, {'score': 1})
+            assert client.get(self.users[1].username, self.problem_key, fields=['attempts']).state == {
+                'attempts': 0,
+            }
+        assert self._stored_state(self.users[1], self.problem_key)['attempts'] == 2
+
+        client.flush()
+        assert self._stored_state(self.users[0], self.problem_key) == {'attempts': 1, 'seed': 0}
+        assert self._stored_state(self.users[1], self.problem_key) == {'attempts': 0, 'seed': 1}
+        assert self._stored_state(self.users[2], self.problem_key) == {'attempts': 3, 'seed': 2, 'score': 1}
+
+    def test_unbuffered_state(self):
+        client = _BulkUserStateClient(self.student_modules[:1])
+        client.set(self.users[0].username, self.other_key, {'attempts': 5})
+        client.set(self.users[1].username, self.problem_key, {'attempts': 6})
+        assert self._stored_state(self.users[0], self.other_key) == {'attempts': 5}
+        assert self._stored_state(self.users[1], self.problem_key) == {'attempts': 6, 'seed': 1}
+
+    def test_reset_attempts(self):
+        client = _BulkUserStateClient(self.student_modules)
+        for student_module in self.student_modules:
+            assert reset_attempts_module_state(
+                None, None, student_module, {}, user_state_client=client
+            ) == UPDATE_STATUS_SUCCEEDED
+        client.flush()
+        for index, user in enumerate(self.users):
+            assert self._stored_state(user, self.problem_key) == {'attempts': 0, 'seed': index}
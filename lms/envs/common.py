@@ -1767,6 +1767,20 @@ MODULESTORE = {
 }
 
 
+# .. setting_name: COURSE_STRUCTURE_FILE_CACHE_DIR
+# .. setting_default: None
+# .. setting_description: A host-local directory in which the split modulestore keeps a file of each
+#     course structure it reads, which all processes of the host unpickle instead of reading the
+#     structure from the course_structure_cache or Mongo. Unpickling a file can run arbitrary code, so
+#     the directory must only be writable by the user running the processes. The cache is disabled if None.
+COURSE_STRUCTURE_FILE_CACHE_DIR = None
+# .. setting_name: COURSE_STRUCTURE_FILE_CACHE_MAX_SIZE
+# .. setting_default: 2147483648
+# .. setting_description: The total size in bytes of the files in COURSE_STRUCTURE_FILE_CACHE_DIR
+#     above which the least recently used files are removed. There is no limit if None.
+COURSE_STRUCTURE_FILE_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
+
 DATABASES = {
     # edxapp's edxapp-migrate scripts and the edxapp_migrate play
     # will ensure that any DB not named read_replica will be migrated
@@ -1845,6 +1859,19 @@ CODE_JAIL = {
 #   ]
 COURSES_WITH_UNSAFE_CODE = []
 
+# .. setting_name: SAFE_EXEC_RESULT_CACHE
+# .. setting_default: {'MAX_SIZE': 32 * 1024 * 1024, 'PATH': None, 'MAX_DISK_SIZE': 1024 * 1024 * 1024}
+# .. setting_description: The store of the results of the Python code of problems kept by each process, which is
+#   looked up before the Django cache. MAX_SIZE is the total size, in bytes of JSON, of the results kept in memory.
+#   PATH is the path of a SQLite file on local disk in which the results are also persisted, shared by the
+#   processes of the host, or None; MAX_DISK_SIZE is the total size of the results persisted in it. Set the setting
+#   to None to only cache the results in the Django cache.
+SAFE_EXEC_RESULT_CACHE = {
+    'MAX_SIZE': 32 * 1024 * 1024,
+    'PATH': None,
+    'MAX_DISK_SIZE': 1024 * 1024 * 1024,
+}
+
 # Code jail REST service
 ENABLE_CODEJAIL_REST_SERVICE = False
 # .. setting_name: CODE_JAIL_REST_SERVICE_REMOTE_EXEC
@@ -2975,6 +3002,28 @@ BLOCK_STRUCTURES_SETTINGS = dict(
     #   For more information, check https://github.com/openedx/edx-platform/pull/13388 and
     #   https://github.com/openedx/edx-platform/pull/14571.
     TASK_MAX_RETRIES=5,
+
+    # .. setting_name: BLOCK_STRUCTURES_SETTINGS['PROCESS_CACHE_MAX_SIZE']
+    # .. setting_default: 0
+    # .. setting_description: Maximum total size, in bytes of serialized data, of the collected
+    #   block structures kept in the process-local cache in front of the block structure cache.
+    #   Cached structures are shared by all requests served by the process, which avoids fetching
+    #   and deserializing them from the cache on every request. Set to 0 to disable this cache.
+    PROCESS_CACHE_MAX_SIZE=0,
+
+    # .. setting_name: BLOCK_STRUCTURES_SETTINGS['PROCESS_CACHE_TIMEOUT']
+    # .. setting_default: 300
+    # .. setting_description: Time, in seconds, for which a collected block structure is kept in the
+    #   process-local cache. Every process checks the stored version of a structure each time it is
+    #   read, so entries are not used once the structure is collected again after a publish.
+    PROCESS_CACHE_TIMEOUT=300,
+
+    # .. setting_name: BLOCK_STRUCTURES_SETTINGS['COMPACT_MIN_BLOCKS']
+    # .. setting_default: 0
+    # .. setting_description: Minimum number of blocks of a collected block structure for it to be
+    #   loaded into the compact, array-backed representation in block_structure/compact.py, which
+    #   uses less memory and is faster to copy for very large courses. Set to 0 to disable.
+    COMPACT_MIN_BLOCKS=0,
 )
 
 ################################ Bulk Email ###################################
@@ -3761,6 +3810,12 @@ CERT_NAME_LONG = "Certificate of Achievement"
 # the ones that contain information other than grades.
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# .. setting_name: GRADE_REPORT_LEARNERS_PER_SHARD
+# .. setting_default: 10000
+# .. setting_description: Maximum number of learners graded by each subtask of a course grade
+#   report, when the instructor_task.shard_course_grade_reports flag is enabled for the course.
+GRADE_REPORT_LEARNERS_PER_SHARD = 10000
+
 POLICY_CHANGE_GRADES_ROUTING_KEY = 'edx.lms.core.default'
 
 SINGLE_LEARNER_COURSE_REGRADE_ROUTING_KEY = 'edx.lms.core.default'
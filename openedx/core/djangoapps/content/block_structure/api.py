@@ -8,6 +8,7 @@ from django.core.cache import cache
 from xmodule.modulestore.django import modulestore
 
 from .manager import BlockStructureManager
+from .store import BlockStructureStore
 
 
 def get_course_in_cache(course_key):
@@ -46,6 +47,14 @@ def clear_course_from_cache(course_key):
     get_block_structure_manager(course_key).clear()
 
 
+def clear_course_from_process_cache(course_key):
+    """
+    Clears the collected block structure of the given course from the
+    process-local cache in front of the block structure cache.
+    """
+    BlockStructureStore.clear_process_cache(course_key)
+
+
 def get_block_structure_manager(course_key):
     """
     Returns the manager for managing Block Structures for the given course.
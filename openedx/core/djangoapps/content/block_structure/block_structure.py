@@ -32,6 +32,8 @@ class _BlockRelations:
     Data structure to encapsulate relationships for a single block,
     including its children and parents.
     """
+    __slots__ = ('parents', 'children')
+
     def __init__(self):
 
         # List of usage keys of this block's parents.
@@ -42,6 +44,15 @@ class _BlockRelations:
         # list [UsageKey]
         self.children = []
 
+    def __getstate__(self):
+        return {'parents': self.parents, 'children': self.children}
+
+    def __setstate__(self, state):
+        # Also accepts the state of instances pickled before __slots__
+        # was introduced, which is the same dict.
+        self.parents = state['parents']
+        self.children = state['children']
+
 
 class BlockStructure:
     """
@@ -94,7 +105,8 @@ class BlockStructure:
         Returns:
             [UsageKey] - A list of usage keys of the block's parents.
         """
-        return self._block_relations[usage_key].parents if usage_key in self else []
+        block_relations = self._block_relations.get(usage_key)
+        return block_relations.parents if block_relations is not None else []
 
     def get_children(self, usage_key):
         """
@@ -108,7 +120,8 @@ class BlockStructure:
         Returns:
             [UsageKey] - A list of usage keys of the block's children.
         """
-        return self._block_relations[usage_key].children if usage_key in self else []
+        block_relations = self._block_relations.get(usage_key)
+        return block_relations.children if block_relations is not None else []
 
     def set_root_block(self, usage_key):
         """
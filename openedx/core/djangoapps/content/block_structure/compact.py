@@ -0,0 +1,661 @@
+"""
+Compact, array-backed representation of collected block structures.
+
+For courses with tens of thousands of blocks, the per-block
+_BlockRelations lists and dict-backed BlockData objects dominate the
+memory of a collected block structure and make copying it slow.  The
+classes in this module instead assign each block an integer index and
+keep:
+
+    CompactBlockRelations - CSR-style arrays of parent and child indices.
+    CompactBlockDataMap - a column (list indexed by block index) per
+        xBlock field and per transformer field.
+
+The block index and CSR arrays are shared, unmodified, across copies of
+a structure, while the columns are deep copied, as BlockData objects
+are, since their values may be mutable.  Modifying a block's relations
+materializes a regular _BlockRelations for just that block, and
+BlockData is exposed through lightweight views, so the public
+BlockStructureBlockData API and existing transformers keep working.
+"""
+# pylint: disable=protected-access
+
+
+from array import array
+from collections.abc import MutableMapping
+from copy import deepcopy
+
+from .block_structure import BlockData, BlockStructureBlockData, _BlockRelations
+
+# Typecode of the arrays used for block indices.
+_INDEX_TYPECODE = 'I'
+
+
+class _Missing:
+    """
+    Marker for a block without a value in a column.
+    """
+    def __repr__(self):
+        return '<missing>'
+
+    def __reduce__(self):
+        return '_MISSING'
+
+
+_MISSING = _Missing()
+
+
+class _BlockIndex:
+    """
+    Immutable mapping between usage keys and integer block indices,
+    shared by all copies of a compact block structure.
+    """
+    __slots__ = ('keys', 'indices')
+
+    def __init__(self, keys):
+        # list [UsageKey]
+        self.keys = list(keys)
+
+        # dict {UsageKey: int}
+        self.indices = {key: index for index, key in enumerate(self.keys)}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class _CSR:
+    """
+    Compressed sparse row encoding of a relation (children or parents)
+    of every block in a _BlockIndex.
+    """
+    __slots__ = ('offsets', 'indices')
+
+    def __init__(self, related_lists):
+        self.offsets = array(_INDEX_TYPECODE, [0])
+        self.indices = array(_INDEX_TYPECODE)
+        for related in related_lists:
+            self.indices.extend(related)
+            self.offsets.append(len(self.indices))
+
+    def related(self, index):
+        """
+        Returns the list of indices related to the block at the given index.
+        """
+        return self.indices[self.offsets[index]:self.offsets[index + 1]].tolist()
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+class CompactBlockRelations(MutableMapping):
+    """
+    A mapping of usage keys to _BlockRelations, backed by CSR arrays.
+
+    Reading relations through children_of and parents_of does not
+    allocate per-block objects.  Accessing an item materializes (and
+    keeps) a regular _BlockRelations for the block so it can be
+    modified in place, as BlockStructure does.
+    """
+    def __init__(self, block_index, children, parents):
+        # _BlockIndex
+        self._block_index = block_index
+
+        # _CSR
+        self._children = children
+        self._parents = parents
+
+        # Indices of blocks that have been removed.
+        # bytearray
+        self._removed = bytearray(len(block_index))
+
+        # Map of usage key to relations that supersede the CSR arrays,
+        # including blocks added after creation.
+        # dict {UsageKey: _BlockRelations}
+        self._materialized = {}
+
+    @classmethod
+    def from_block_relations(cls, block_index, block_relations):
+        """
+        Returns a new CompactBlockRelations for the given map of usage
+        keys to _BlockRelations, all of which must be in block_index.
+        """
+        indices = block_index.indices
+
+        def related_lists(attribute):
+            """
+            Yields the related indices of each block for the given attribute.
+            """
+            for key in block_index.keys:
+                yield (indices[related] for related in getattr(block_relations[key], attribute))
+
+        return cls(block_index, _CSR(related_lists('children')), _CSR(related_lists('parents')))
+
+    def children_of(self, usage_key):
+        """
+        Returns the list of usage keys of the children of the given block.
+        """
+        return self._related(usage_key, 'children', self._children)
+
+    def parents_of(self, usage_key):
+        """
+        Returns the list of usage keys of the parents of the given block.
+        """
+        return self._related(usage_key, 'parents', self._parents)
+
+    def __getitem__(self, usage_key):
+        try:
+            return self._materialized[usage_key]
+        except KeyError:
+            index = self._present_index(usage_key)
+
+        block_relations = _BlockRelations()
+        keys = self._block_index.keys
+        block_relations.children = [keys[related] for related in self._children.related(index)]
+        block_relations.parents = [keys[related] for related in self._parents.related(index)]
+        self._materialized[usage_key] = block_relations
+        return block_relations
+
+    def __setitem__(self, usage_key, block_relations):
+        self._materialized[usage_key] = block_relations
+        index = self._block_index.indices.get(usage_key)
+        if index is not None:
+            self._removed[index] = 0
+
+    def __delitem__(self, usage_key):
+        if self._materialized.pop(usage_key, None) is None:
+            self._removed[self._present_index(usage_key)] = 1
+        else:
+            index = self._block_index.indices.get(usage_key)
+            if index is not None:
+                self._removed[index] = 1
+
+    def __contains__(self, usage_key):
+        if usage_key in self._materialized:
+            return True
+        index = self._block_index.indices.get(usage_key)
+        return index is not None and not self._removed[index]
+
+    def __iter__(self):
+        removed = self._removed
+        for index, key in enumerate(self._block_index.keys):
+            if not removed[index]:
+                yield key
+        indices = self._block_index.indices
+        for key in list(self._materialized):
+            if key not in indices:
+                yield key
+
+    def __len__(self):
+        indices = self._block_index.indices
+        num_added = sum(1 for key in self._materialized if key not in indices)
+        return len(self._removed) - self._removed.count(1) + num_added
+
+    def __deepcopy__(self, memo):
+        block_relations_copy = self.__class__.__new__(self.__class__)
+        block_relations_copy._block_index = self._block_index
+        block_relations_copy._children = self._children
+        block_relations_copy._parents = self._parents
+        block_relations_copy._removed = bytearray(self._removed)
+        block_relations_copy._materialized = deepcopy(self._materialized, memo)
+        return block_relations_copy
+
+    def _related(self, usage_key, attribute, csr):
+        """
+        Returns the list of related usage keys of the given block for the
+        given attribute, or an empty list if the block is not present.
+        """
+        block_relations = self._materialized.get(usage_key)
+        if block_relations is not None:
+            return getattr(block_relations, attribute)
+        index = self._block_index.indices.get(usage_key)
+        if index is None or self._removed[index]:
+            return []
+        keys = self._block_index.keys
+        return [keys[related] for related in csr.related(index)]
+
+    def _present_index(self, usage_key):
+        """
+        Returns the index of the given block from the CSR arrays.
+
+        Raises:
+            KeyError if the block is not present.
+        """
+        index = self._block_index.indices.get(usage_key)
+        if index is None or self._removed[index]:
+            raise KeyError(usage_key)
+        return index
+
+
+class CompactBlockDataMap(MutableMapping):
+    """
+    A mapping of usage keys to BlockData, backed by a column per xBlock
+    field and per transformer field.  Items are returned as views that
+    read from and write to the columns.
+
+    Blocks that are not in the _BlockIndex are kept as regular
+    BlockData objects.
+    """
+    def __init__(self, block_index):
+        # _BlockIndex
+        self._block_index = block_index
+
+        # Indices of blocks that have data.
+        # bytearray
+        self._present = bytearray(len(block_index))
+
+        # Map of xBlock field name to its values, indexed by block index.
+        # dict {string: list}
+        self._columns = {}
+
+        # Map of transformer name to the indices of blocks that have data
+        # for the transformer and a map of its field names to values.
+        # dict {string: (bytearray, dict {string: list})}
+        self._transformer_columns = {}
+
+        # Map of usage key to the BlockData of blocks not in the index.
+        # dict {UsageKey: BlockData}
+        self._extra = {}
+
+    @classmethod
+    def from_block_data_map(cls, block_index, block_data_map):
+        """
+        Returns a new CompactBlockDataMap with the data of the given map
+        of usage keys to BlockData.
+        """
+        compact_map = cls(block_index)
+        for usage_key, block_data in block_data_map.items():
+            compact_map[usage_key] = block_data
+        return compact_map
+
+    def get_or_create(self, usage_key):
+        """
+        Returns the BlockData associated with the given usage_key,
+        creating an empty one if not found.
+        """
+        index = self._block_index.indices.get(usage_key)
+        if index is None:
+            return self._extra.setdefault(usage_key, BlockData(usage_key))
+        self._present[index] = 1
+        return _BlockDataView(self, index)
+
+    def __getitem__(self, usage_key):
+        index = self._block_index.indices.get(usage_key)
+        if index is None:
+            return self._extra[usage_key]
+        if not self._present[index]:
+            raise KeyError(usage_key)
+        return _BlockDataView(self, index)
+
+    def __setitem__(self, usage_key, block_data):
+        index = self._block_index.indices.get(usage_key)
+        if index is None:
+            self._extra[usage_key] = block_data
+            return
+        if isinstance(block_data, _BlockDataView) and block_data._data_map is self and block_data._index == index:
+            return
+
+        self._clear(index)
+        self._present[index] = 1
+        for field_name, value in block_data.fields.items():
+            self._set_field(index, field_name, value)
+        for transformer_name, transformer_data in block_data.transformer_data.items():
+            self._create_transformer_data(index, transformer_name)
+            for field_name, value in transformer_data.fields.items():
+                self._set_transformer_field(index, transformer_name, field_name, value)
+
+    def __delitem__(self, usage_key):
+        index = self._block_index.indices.get(usage_key)
+        if index is None:
+            del self._extra[usage_key]
+            return
+        if not self._present[index]:
+            raise KeyError(usage_key)
+        self._clear(index)
+
+    def __contains__(self, usage_key):
+        index = self._block_index.indices.get(usage_key)
+        if index is None:
+            return usage_key in self._extra
+        return bool(self._present[index])
+
+    def __iter__(self):
+        present = self._present
+        for index, key in enumerate(self._block_index.keys):
+            if present[index]:
+                yield key
+        yield from list(self._extra)
+
+    def __len__(self):
+        return self._present.count(1) + len(self._extra)
+
+    def __deepcopy__(self, memo):
+        data_map_copy = self.__class__.__new__(self.__class__)
+        data_map_copy._block_index = self._block_index
+        data_map_copy._present = bytearray(self._present)
+        data_map_copy._columns = deepcopy(self._columns, memo)
+        data_map_copy._transformer_columns = deepcopy(self._transformer_columns, memo)
+        data_map_copy._extra = deepcopy(self._extra, memo)
+        return data_map_copy
+
+    #--- Column access methods used by the views ---#
+
+    def _get_field(self, index, field_name):
+        """
+        Returns the value of the given field of the block at the given
+        index, or _MISSING.
+        """
+        column = self._columns.get(field_name)
+        return _MISSING if column is None else column[index]
+
+    def _set_field(self, index, field_name, value):
+        """
+        Sets the value of the given field of the block at the given index.
+        """
+        column = self._columns.get(field_name)
+        if column is None:
+            column = self._columns[field_name] = [_MISSING] * len(self._block_index)
+        column[index] = value
+
+    def _fields(self, index):
+        """
+        Returns a dict of the xBlock fields of the block at the given index.
+        """
+        return _column_values(self._columns, index)
+
+    def _has_transformer_data(self, index, transformer_name):
+        """
+        Returns whether the block at the given index has data for the
+        given transformer.
+        """
+        entry = self._transformer_columns.get(transformer_name)
+        return entry is not None and bool(entry[0][index])
+
+    def _create_transformer_data(self, index, transformer_name):
+        """
+        Records that the block at the given index has data for the given
+        transformer.
+        """
+        entry = self._transformer_columns.get(transformer_name)
+        if entry is None:
+            entry = self._transformer_columns[transformer_name] = (bytearray(len(self._block_index)), {})
+        entry[0][index] = 1
+
+    def _transformer_names(self, index):
+        """
+        Returns the names of the transformers with data for the block at
+        the given index.
+        """
+        return [name for name, (present, _) in self._transformer_columns.items() if present[index]]
+
+    def _get_transformer_field(self, index, transformer_name, field_name):
+        """
+        Returns the value of the given transformer field of the block at
+        the given index, or _MISSING.
+        """
+        column = self._transformer_columns[transformer_name][1].get(field_name)
+        return _MISSING if column is None else column[index]
+
+    def _set_transformer_field(self, index, transformer_name, field_name, value):
+        """
+        Sets the value of the given transformer field of the block at the
+        given index.
+        """
+        columns = self._transformer_columns[transformer_name][1]
+        column = columns.get(field_name)
+        if column is None:
+            column = columns[field_name] = [_MISSING] * len(self._block_index)
+        column[index] = value
+
+    def _transformer_fields(self, index, transformer_name):
+        """
+        Returns a dict of the given transformer's fields of the block at
+        the given index.
+        """
+        return _column_values(self._transformer_columns[transformer_name][1], index)
+
+    def _clear(self, index):
+        """
+        Removes all data of the block at the given index.
+        """
+        self._present[index] = 0
+        for column in self._columns.values():
+            column[index] = _MISSING
+        for present, columns in self._transformer_columns.values():
+            present[index] = 0
+            for column in columns.values():
+                column[index] = _MISSING
+
+
+class _BlockDataView:
+    """
+    A view of a single block's data in a CompactBlockDataMap, with the
+    same interface as BlockData.
+    """
+    __slots__ = ('_data_map', '_index')
+
+    def __init__(self, data_map, index):
+        object.__setattr__(self, '_data_map', data_map)
+        object.__setattr__(self, '_index', index)
+
+    @property
+    def location(self):
+        return self._data_map._block_index.keys[self._index]
+
+    @property
+    def fields(self):
+        """
+        Returns a dict of this block's xBlock fields.
+        """
+        return self._data_map._fields(self._index)
+
+    @property
+    def transformer_data(self):
+        """
+        Returns a TransformerDataMap-like view of this block's transformer data.
+        """
+        return _TransformerDataMapView(self._data_map, self._index)
+
+    def to_block_data(self):
+        """
+        Returns a regular BlockData with a copy of this block's data.
+        """
+        block_data = BlockData(self.location)
+        block_data.fields.update(self.fields)
+        for transformer_name, transformer_data in self.transformer_data.items():
+            block_data.transformer_data.get_or_create(transformer_name).fields.update(transformer_data.fields)
+        return block_data
+
+    def __getattr__(self, field_name):
+        value = self._data_map._get_field(self._index, field_name)
+        if value is _MISSING:
+            raise AttributeError(f"Field {field_name} does not exist")
+        return value
+
+    def __setattr__(self, field_name, field_value):
+        self._data_map._set_field(self._index, field_name, field_value)
+
+    def __delattr__(self, field_name):
+        if self._data_map._get_field(self._index, field_name) is _MISSING:
+            raise AttributeError(f"Field {field_name} does not exist")
+        self._data_map._set_field(self._index, field_name, _MISSING)
+
+    def __reduce__(self):
+        return self.to_block_data().__reduce__()
+
+
+class _TransformerDataMapView:
+    """
+    A view of a single block's transformer data in a CompactBlockDataMap,
+    with the same interface as TransformerDataMap.
+    """
+    __slots__ = ('_data_map', '_index')
+
+    def __init__(self, data_map, index):
+        self._data_map = data_map
+        self._index = index
+
+    def __getitem__(self, key):
+        transformer_name = _transformer_name(key)
+        if not self._data_map._has_transformer_data(self._index, transformer_name):
+            raise KeyError(key)
+        return _TransformerDataView(self._data_map, self._index, transformer_name)
+
+    def __contains__(self, key):
+        return self._data_map._has_transformer_data(self._index, _transformer_name(key))
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def get_or_create(self, key):
+        """
+        Returns the transformer data view for the given key, creating
+        the transformer's data for this block if not found.
+        """
+        transformer_name = _transformer_name(key)
+        self._data_map._create_transformer_data(self._index, transformer_name)
+        return _TransformerDataView(self._data_map, self._index, transformer_name)
+
+    def keys(self):
+        return self._data_map._transformer_names(self._index)
+
+    def items(self):
+        return [(name, self[name]) for name in self.keys()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+
+class _TransformerDataView:
+    """
+    A view of a single transformer's data for a single block in a
+    CompactBlockDataMap, with the same interface as TransformerData.
+    """
+    __slots__ = ('_data_map', '_index', '_transformer_name')
+
+    def __init__(self, data_map, index, transformer_name):
+        object.__setattr__(self, '_data_map', data_map)
+        object.__setattr__(self, '_index', index)
+        object.__setattr__(self, '_transformer_name', transformer_name)
+
+    @property
+    def fields(self):
+        """
+        Returns a dict of this transformer's fields for the block.
+        """
+        return self._data_map._transformer_fields(self._index, self._transformer_name)
+
+    def __getattr__(self, field_name):
+        value = self._data_map._get_transformer_field(self._index, self._transformer_name, field_name)
+        if value is _MISSING:
+            raise AttributeError(f"Field {field_name} does not exist")
+        return value
+
+    def __setattr__(self, field_name, field_value):
+        self._data_map._set_transformer_field(self._index, self._transformer_name, field_name, field_value)
+
+    def __delattr__(self, field_name):
+        if self._data_map._get_transformer_field(self._index, self._transformer_name, field_name) is _MISSING:
+            raise AttributeError(f"Field {field_name} does not exist")
+        self._data_map._set_transformer_field(self._index, self._transformer_name, field_name, _MISSING)
+
+
+class CompactBlockStructureBlockData(BlockStructureBlockData):
+    """
+    Subclass of BlockStructureBlockData that keeps its relations and
+    block data in the compact, array-backed representations above.
+    Create instances with BlockStructureFactory.create_compact.
+    """
+    def __init__(self, root_block_usage_key, block_index=None):
+        super().__init__(root_block_usage_key)
+        block_index = block_index or _BlockIndex([root_block_usage_key])
+        self._block_relations = CompactBlockRelations.from_block_relations(
+            block_index,
+            {key: _BlockRelations() for key in block_index.keys},
+        )
+        self._block_data_map = CompactBlockDataMap(block_index)
+
+    @classmethod
+    def from_block_structure(cls, block_structure):
+        """
+        Returns a new compact block structure with the contents of the
+        given block structure.  Mutable values are shared, not copied.
+        """
+        block_index = _BlockIndex(block_structure._block_relations.keys())
+        compact_structure = cls.__new__(cls)
+        compact_structure.root_block_usage_key = block_structure.root_block_usage_key
+        compact_structure._block_relations = CompactBlockRelations.from_block_relations(
+            block_index, block_structure._block_relations,
+        )
+        compact_structure.transformer_data = block_structure.transformer_data
+        compact_structure._block_data_map = CompactBlockDataMap.from_block_data_map(
+            block_index, block_structure._block_data_map,
+        )
+        return compact_structure
+
+    def get_parents(self, usage_key):
+        return self._block_relations.parents_of(usage_key)
+
+    def get_children(self, usage_key):
+        return self._block_relations.children_of(usage_key)
+
+    def copy(self):
+        """
+        Returns a new instance of CompactBlockStructureBlockData with a
+        deep-copy of this instance's contents.  The block index and
+        relation arrays, which are never modified, are shared.
+        """
+        structure_copy = self.__class__.__new__(self.__class__)
+        structure_copy.root_block_usage_key = self.root_block_usage_key
+        structure_copy._block_relations = deepcopy(self._block_relations)
+        structure_copy.transformer_data = deepcopy(self.transformer_data)
+        structure_copy._block_data_map = deepcopy(self._block_data_map)
+        return structure_copy
+
+    def _prune_unreachable(self):
+        """
+        Mutates this block structure by removing any unreachable blocks,
+        without rebuilding the relations of the reachable ones.
+        """
+        reachable = set(self.post_order_traversal())
+        for block_key in [block_key for block_key in self._block_relations if block_key not in reachable]:
+            del self._block_relations[block_key]
+        for block_key in reachable:
+            parents = self.get_parents(block_key)
+            if any(parent not in reachable for parent in parents):
+                self._block_relations[block_key].parents = [parent for parent in parents if parent in reachable]
+
+    def _get_or_create_block(self, usage_key):
+        return self._block_data_map.get_or_create(usage_key)
+
+
+def _transformer_name(key):
+    """
+    Returns the name of the transformer for the given key, which may be
+    either the transformer's class or its name, as in TransformerDataMap.
+    """
+    try:
+        return key.name()
+    except AttributeError:
+        return key
+
+
+def _column_values(columns, index):
+    """
+    Returns a dict of the non-missing values at the given index of the
+    given columns.
+    """
+    values = {}
+    for field_name, column in columns.items():
+        value = column[index]
+        if value is not _MISSING:
+            values[field_name] = value
+    return values
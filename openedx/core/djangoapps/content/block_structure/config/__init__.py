@@ -31,6 +31,37 @@ STORAGE_BACKING_FOR_CACHE = WaffleSwitch(
     "block_structure.storage_backing_for_cache", __name__
 )
 
+# .. toggle_name: block_structure.compact_serialization
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, block structures are written to the cache and storage using
+#   the compact binary layout in block_structure/serialization.py instead of a single zpickle. The
+#   compact layout lets readers decode each block's data only when it is accessed, which reduces the
+#   load time and memory of requests that only touch part of a large course. Data stored in either
+#   layout can always be read, regardless of the value of this switch.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-17
+# .. toggle_target_removal_date: 2027-01-17
+COMPACT_SERIALIZATION = WaffleSwitch(
+    "block_structure.compact_serialization", __name__
+)
+
+# .. toggle_name: block_structure.copy_on_write_transforms
+# .. toggle_implementation: WaffleSwitch
+# .. toggle_default: False
+# .. toggle_description: When enabled, BlockStructureManager.get_transformed transforms a copy-on-write
+#   overlay of the collected block structure instead of a deep copy of it. Transformers' removals and
+#   overrides are recorded on top of the unmodified collected structure, so the per-user cost of copying
+#   scales with the number of changes rather than with the size of the course.
+# .. toggle_warning: Values of unmodified blocks are shared with the collected block structure, so code
+#   that modifies values read from a transformed block structure in place must copy them first.
+# .. toggle_use_cases: temporary
+# .. toggle_creation_date: 2026-10-17
+# .. toggle_target_removal_date: 2027-01-17
+COPY_ON_WRITE_TRANSFORMS = WaffleSwitch(
+    "block_structure.copy_on_write_transforms", __name__
+)
+
 
 def enable_storage_backing_for_cache_in_request():
     """
@@ -2,6 +2,8 @@
 Module for factory class for BlockStructure objects.
 """
 from .block_structure import BlockStructureBlockData, BlockStructureModulestoreData
+from .compact import CompactBlockStructureBlockData
+from .overlay import OverlayBlockStructureBlockData
 
 
 class BlockStructureFactory:
@@ -66,6 +68,9 @@ class BlockStructureFactory:
         The given root_block_usage_key must equate the root_block_usage_key
         previously passed to serialize_to_cache.
 
+        If the structure was stored in the compact layout, the data of
+        each block is only decoded once it is accessed.
+
         Arguments:
             root_block_usage_key (UsageKey) - The usage_key for the root
                 of the block structure that is to be deserialized from
@@ -95,3 +100,23 @@ class BlockStructureFactory:
         block_structure.transformer_data = transformer_data
         block_structure._block_data_map = block_data_map  # pylint: disable=protected-access
         return block_structure
+
+    @classmethod
+    def create_compact(cls, block_structure):
+        """
+        Returns a new compact, array-backed block structure with the
+        contents of the given block structure.  See compact.py.
+
+        Note: Mutable values in the given block structure are shared
+        with the returned one, not copied.
+        """
+        return CompactBlockStructureBlockData.from_block_structure(block_structure)
+
+    @classmethod
+    def create_overlay(cls, block_structure):
+        """
+        Returns a new block structure that records its changes on top of
+        the given block structure, which is left unmodified.  See
+        overlay.py.
+        """
+        return OverlayBlockStructureBlockData(block_structure)
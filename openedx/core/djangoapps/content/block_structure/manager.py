@@ -6,6 +6,7 @@ BlockStructures.
 
 from contextlib import contextmanager
 
+from . import config
 from .exceptions import BlockStructureNotFound, TransformerDataIncompatible, UsageKeyNotInBlockStructure
 from .factory import BlockStructureFactory
 from .store import BlockStructureStore
@@ -61,7 +62,14 @@ class BlockStructureManager:
             BlockStructureBlockData - A transformed block structure,
                 starting at starting_block_usage_key.
         """
-        block_structure = collected_block_structure.copy() if collected_block_structure else self.get_collected()
+        # Collected block structures may be shared across requests by the
+        # store's process-local cache, so always transform a copy or an
+        # overlay of it.
+        collected_block_structure = collected_block_structure or self.get_collected()
+        if config.COPY_ON_WRITE_TRANSFORMS.is_enabled():
+            block_structure = BlockStructureFactory.create_overlay(collected_block_structure)
+        else:
+            block_structure = collected_block_structure.copy()
 
         if starting_block_usage_key:
             # Override the root_block_usage_key so traversals start at the
@@ -82,6 +90,10 @@ class BlockStructureManager:
         Returns the collected Block Structure for the root_block_usage_key,
         getting block data from the cache and modulestore, as needed.
 
+        Note: The returned block structure may be shared with other
+        requests and must not be modified.  Use get_transformed to get
+        a transformed copy of it.
+
         Details: The cache is updated if needed (if outdated or empty),
         the modulestore is accessed if needed (at cache miss), and the
         transformers data is collected if needed.
@@ -0,0 +1,322 @@
+"""
+Copy-on-write overlay of collected block structures.
+
+Transforming a block structure for a user used to require a deep copy
+of the entire collected structure, so that the transformers' removals
+and overrides would not leak into the (cached and shared) collected
+structure.  The classes in this module instead layer a structure's
+changes on top of its unmodified base:
+
+    OverlayBlockRelations - relations of added, removed and modified
+        blocks, falling back to the relations of the base structure.
+    OverlayBlockDataMap - data of added, removed and modified blocks,
+        falling back to the block data of the base structure.
+
+A block's relations or data are copied from the base only when the
+block is first modified, so the cost of transforming a structure for a
+user scales with the number of changes rather than the size of the
+course.
+"""
+# pylint: disable=protected-access
+
+
+from collections.abc import MutableMapping
+from copy import deepcopy
+
+from .block_structure import BlockData, BlockStructureBlockData, TransformerDataMap, _BlockRelations
+
+
+# Value of a block in an overlay's changes when the block has been
+# removed from the base.  Removals are kept with the other changes so
+# that reading a block takes a single lookup, as hashing usage keys is
+# relatively expensive.
+_REMOVED = None
+
+# Default for lookups in an overlay's changes.
+_UNCHANGED = object()
+
+
+class OverlayBlockRelations(MutableMapping):
+    """
+    A mapping of usage keys to _BlockRelations layered on top of the
+    relations of a base block structure, which are never modified.
+
+    Reading relations through children_of and parents_of returns new
+    lists without copying any per-block objects.  Accessing an item
+    copies (and keeps) the block's relations from the base so it can be
+    modified in place, as BlockStructure does.
+    """
+    def __init__(self, base_structure):
+        # The block structure whose relations are overlaid.
+        # BlockStructure
+        self._base_structure = base_structure
+
+        # Map of usage key to relations that supersede the base
+        # structure's, including blocks added to the overlay, or to
+        # _REMOVED for removed blocks.
+        # dict {UsageKey: _BlockRelations or None}
+        self._changed = {}
+
+        # Number of blocks added to the overlay, less those removed.
+        # int
+        self._num_added = 0
+
+    def children_of(self, usage_key):
+        """
+        Returns the list of usage keys of the children of the given block.
+        """
+        block_relations = self._changed.get(usage_key, _UNCHANGED)
+        if block_relations is _UNCHANGED:
+            return list(self._base_structure.get_children(usage_key))
+        return block_relations.children if block_relations is not _REMOVED else []
+
+    def parents_of(self, usage_key):
+        """
+        Returns the list of usage keys of the parents of the given block.
+        """
+        block_relations = self._changed.get(usage_key, _UNCHANGED)
+        if block_relations is _UNCHANGED:
+            return list(self._base_structure.get_parents(usage_key))
+        return block_relations.parents if block_relations is not _REMOVED else []
+
+    @property
+    def num_changed(self):
+        """
+        Returns the number of blocks whose relations have been copied,
+        added or removed.
+        """
+        return len(self._changed)
+
+    def __getitem__(self, usage_key):
+        block_relations = self._changed.get(usage_key, _UNCHANGED)
+        if block_relations is _REMOVED or (
+            block_relations is _UNCHANGED and usage_key not in self._base_structure
+        ):
+            raise KeyError(usage_key)
+        if block_relations is _UNCHANGED:
+            block_relations = _BlockRelations()
+            block_relations.children = list(self._base_structure.get_children(usage_key))
+            block_relations.parents = list(self._base_structure.get_parents(usage_key))
+            self._changed[usage_key] = block_relations
+        return block_relations
+
+    def __setitem__(self, usage_key, block_relations):
+        if usage_key not in self:
+            self._num_added += 1
+        self._changed[usage_key] = block_relations
+
+    def __delitem__(self, usage_key):
+        if usage_key not in self:
+            raise KeyError(usage_key)
+        self._num_added -= 1
+        self._changed[usage_key] = _REMOVED
+
+    def __contains__(self, usage_key):
+        block_relations = self._changed.get(usage_key, _UNCHANGED)
+        if block_relations is _UNCHANGED:
+            return usage_key in self._base_structure
+        return block_relations is not _REMOVED
+
+    def __iter__(self):
+        changed = self._changed
+        for usage_key in self._base_structure:
+            if changed.get(usage_key, _UNCHANGED) is not _REMOVED:
+                yield usage_key
+        base_structure = self._base_structure
+        for usage_key, block_relations in list(changed.items()):
+            if block_relations is not _REMOVED and usage_key not in base_structure:
+                yield usage_key
+
+    def __len__(self):
+        return len(self._base_structure) + self._num_added
+
+    def __deepcopy__(self, memo):
+        block_relations_copy = self.__class__.__new__(self.__class__)
+        block_relations_copy._base_structure = self._base_structure
+        block_relations_copy._changed = deepcopy(self._changed, memo)
+        block_relations_copy._num_added = self._num_added
+        return block_relations_copy
+
+
+class OverlayBlockDataMap(MutableMapping):
+    """
+    A mapping of usage keys to BlockData layered on top of the block
+    data map of a base block structure, which is never modified.
+
+    Items of unmodified blocks are the base's BlockData and must only be
+    read.  Use get_or_create to get a block's data for modification.
+    """
+    def __init__(self, base_data_map):
+        # The block data map that is overlaid.
+        # dict {UsageKey: BlockData}
+        self._base_data_map = base_data_map
+
+        # Map of usage key to data that supersedes the base's, including
+        # blocks added to the overlay, or to _REMOVED for removed blocks.
+        # dict {UsageKey: BlockData or None}
+        self._changed = {}
+
+        # Number of blocks added to the overlay, less those removed.
+        # int
+        self._num_added = 0
+
+    def get_or_create(self, usage_key):
+        """
+        Returns the modifiable BlockData associated with the given
+        usage_key, copying it from the base or creating an empty one if
+        not found.
+        """
+        block_data = self._changed.get(usage_key, _UNCHANGED)
+        if block_data is not _UNCHANGED and block_data is not _REMOVED:
+            return block_data
+
+        base_block_data = self._base_data_map.get(usage_key) if block_data is _UNCHANGED else None
+        block_data = BlockData(usage_key)
+        if base_block_data is not None:
+            block_data.fields.update(base_block_data.fields)
+            block_data.transformer_data = _copy_transformer_data(base_block_data.transformer_data)
+        else:
+            self._num_added += 1
+        self._changed[usage_key] = block_data
+        return block_data
+
+    @property
+    def num_changed(self):
+        """
+        Returns the number of blocks whose data has been copied, added or
+        removed.
+        """
+        return len(self._changed)
+
+    def __getitem__(self, usage_key):
+        block_data = self._changed.get(usage_key, _UNCHANGED)
+        if block_data is _UNCHANGED:
+            return self._base_data_map[usage_key]
+        if block_data is _REMOVED:
+            raise KeyError(usage_key)
+        return block_data
+
+    def __setitem__(self, usage_key, block_data):
+        if usage_key not in self:
+            self._num_added += 1
+        self._changed[usage_key] = block_data
+
+    def __delitem__(self, usage_key):
+        if usage_key not in self:
+            raise KeyError(usage_key)
+        self._num_added -= 1
+        self._changed[usage_key] = _REMOVED
+
+    def __contains__(self, usage_key):
+        block_data = self._changed.get(usage_key, _UNCHANGED)
+        if block_data is _UNCHANGED:
+            return usage_key in self._base_data_map
+        return block_data is not _REMOVED
+
+    def __iter__(self):
+        changed = self._changed
+        for usage_key in list(self._base_data_map):
+            if changed.get(usage_key, _UNCHANGED) is not _REMOVED:
+                yield usage_key
+        base_data_map = self._base_data_map
+        for usage_key, block_data in list(changed.items()):
+            if block_data is not _REMOVED and usage_key not in base_data_map:
+                yield usage_key
+
+    def __len__(self):
+        return len(self._base_data_map) + self._num_added
+
+    def __deepcopy__(self, memo):
+        data_map_copy = self.__class__.__new__(self.__class__)
+        data_map_copy._base_data_map = self._base_data_map
+        data_map_copy._changed = deepcopy(self._changed, memo)
+        data_map_copy._num_added = self._num_added
+        return data_map_copy
+
+
+class OverlayBlockStructureBlockData(BlockStructureBlockData):
+    """
+    Subclass of BlockStructureBlockData that records its changes on top
+    of a shared base block structure instead of copying it.
+    Create instances with BlockStructureFactory.create_overlay.
+
+    Note: As with the base structure's block data, values returned by
+    get_xblock_field and get_transformer_block_field for unmodified
+    blocks are shared and must not be modified in place.
+    """
+    def __init__(self, base_structure):
+        super().__init__(base_structure.root_block_usage_key)
+
+        # The collected block structure that is overlaid.
+        # BlockStructureBlockData
+        self._base_structure = base_structure
+
+        self._block_relations = OverlayBlockRelations(base_structure)
+        self._block_data_map = OverlayBlockDataMap(base_structure._block_data_map)
+
+        # Structure-wide transformer data is small, so it is copied.
+        self.transformer_data = deepcopy(base_structure.transformer_data)
+
+    @property
+    def num_changed_blocks(self):
+        """
+        Returns the number of blocks whose relations or data have been
+        changed relative to the base structure.
+        """
+        return self._block_relations.num_changed + self._block_data_map.num_changed
+
+    def get_parents(self, usage_key):
+        return self._block_relations.parents_of(usage_key)
+
+    def get_children(self, usage_key):
+        return self._block_relations.children_of(usage_key)
+
+    def copy(self):
+        """
+        Returns a new instance of OverlayBlockStructureBlockData over the
+        same base structure with a deep-copy of this instance's changes.
+        """
+        structure_copy = self.__class__.__new__(self.__class__)
+        structure_copy._base_structure = self._base_structure
+        structure_copy.root_block_usage_key = self.root_block_usage_key
+        structure_copy._block_relations = deepcopy(self._block_relations)
+        structure_copy._block_data_map = deepcopy(self._block_data_map)
+        structure_copy.transformer_data = deepcopy(self.transformer_data)
+        return structure_copy
+
+    def remove_transformer_block_field(self, usage_key, transformer, key):
+        if usage_key in self._block_data_map:
+            self._block_data_map.get_or_create(usage_key)
+        super().remove_transformer_block_field(usage_key, transformer, key)
+
+    def _prune_unreachable(self):
+        """
+        Mutates this block structure by removing any unreachable blocks,
+        copying only the relations of reachable blocks that had
+        unreachable parents.
+        """
+        reachable = set(self.post_order_traversal())
+        if len(reachable) == len(self._block_relations):
+            return
+        for block_key in [block_key for block_key in self._block_relations if block_key not in reachable]:
+            children = self.get_children(block_key)
+            del self._block_relations[block_key]
+            for child in children:
+                if child in reachable:
+                    self._block_relations[child].parents = [
+                        parent for parent in self.get_parents(child) if parent in reachable
+                    ]
+
+    def _get_or_create_block(self, usage_key):
+        return self._block_data_map.get_or_create(usage_key)
+
+
+def _copy_transformer_data(transformer_data):
+    """
+    Returns a copy of the given block's TransformerDataMap (or view of
+    one) whose TransformerData can be modified without affecting it.
+    """
+    transformer_data_copy = TransformerDataMap()
+    for transformer_name, block_transformer_data in transformer_data.items():
+        transformer_data_copy.get_or_create(transformer_name).fields.update(block_transformer_data.fields)
+    return transformer_data_copy
@@ -0,0 +1,89 @@
+"""
+Memory and traversal comparison of regular and compact block structures
+on large synthetic courses.
+"""
+
+
+import logging
+import time
+import tracemalloc
+from unittest import TestCase
+
+import ddt
+
+from ..factory import BlockStructureFactory
+from .utils import create_synthetic_course, skip_unless_perf_tests_enabled
+
+# Approximate number of blocks in each synthetic course.
+COURSE_SIZES = (5000, 20000, 50000)
+
+log = logging.getLogger(__name__)
+
+
+def _regular(block_structure):
+    """
+    Returns a regular copy of the given collected block structure.
+    """
+    return block_structure.copy()
+
+
+def _compact(block_structure):
+    """
+    Returns a compact copy of the given collected block structure.
+    """
+    return BlockStructureFactory.create_compact(block_structure.copy())
+
+
+def _allocated_size(create, block_structure):
+    """
+    Returns the result of create(block_structure) and the number of
+    bytes allocated for it.
+    """
+    tracemalloc.start()
+    try:
+        result = create(block_structure)
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def _timed(func, *args):
+    """
+    Returns the number of milliseconds taken by calling func(*args).
+    """
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def _traverse(block_structure):
+    """
+    Traverses the structure reading a field of every block, as
+    transformers do.
+    """
+    for block_key in block_structure.topological_traversal():
+        block_structure.get_xblock_field(block_key, 'start')
+
+
+@skip_unless_perf_tests_enabled
+@ddt.ddt
+class CompactBlockStructurePerfTest(TestCase):
+    """
+    Compares memory, copy time and traversal time of regular and
+    compact block structures.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*COURSE_SIZES)
+    def test_memory_and_traversal(self, num_blocks):
+        collected = create_synthetic_course(num_blocks)
+
+        for name, create in (('regular', _regular), ('compact', _compact)):
+            block_structure, size = _allocated_size(create, collected)
+            log.info(
+                '%d blocks, %s: %.0f KB, copy %.1f ms, traversal %.1f ms',
+                len(block_structure), name, size / 1024,
+                _timed(block_structure.copy), _timed(_traverse, block_structure),
+            )
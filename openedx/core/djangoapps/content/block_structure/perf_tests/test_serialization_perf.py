@@ -0,0 +1,84 @@
+"""
+Performance comparison of the zpickle and compact block structure
+serializations on large synthetic courses.
+"""
+# pylint: disable=protected-access
+
+
+import logging
+from unittest import TestCase
+
+import ddt
+
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+from .. import serialization
+from ..factory import BlockStructureFactory
+from .utils import create_synthetic_course, measure, skip_unless_perf_tests_enabled
+
+log = logging.getLogger(__name__)
+
+# Approximate number of blocks in each synthetic course.
+COURSE_SIZES = (1000, 5000, 20000)
+
+
+def _load_zpickle(serialized_data, root_key, num_blocks_to_read):
+    """
+    Loads the zpickled data and reads the data of the given number of blocks.
+    """
+    block_structure = BlockStructureFactory.create_new(root_key, *zunpickle(serialized_data))
+    return _read_blocks(block_structure, num_blocks_to_read)
+
+
+def _load_compact(serialized_data, root_key, num_blocks_to_read):
+    """
+    Loads the compact data and reads the data of the given number of blocks.
+    """
+    block_structure = BlockStructureFactory.create_new(root_key, *serialization.deserialize(serialized_data))
+    return _read_blocks(block_structure, num_blocks_to_read)
+
+
+def _read_blocks(block_structure, num_blocks_to_read):
+    """
+    Reads a field of the first num_blocks_to_read blocks of the given
+    structure in topological order, as the outline APIs do.
+    """
+    num_read = 0
+    for block_key in block_structure.topological_traversal():
+        if num_read == num_blocks_to_read:
+            break
+        block_structure.get_xblock_field(block_key, 'display_name')
+        num_read += 1
+    return num_read
+
+
+@skip_unless_perf_tests_enabled
+@ddt.ddt
+class BlockStructureSerializationPerfTest(TestCase):
+    """
+    Compares load time and peak RSS of the zpickle and compact
+    serializations when reading a single chapter or the whole course.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @ddt.data(*COURSE_SIZES)
+    def test_load(self, num_blocks):
+        block_structure = create_synthetic_course(num_blocks)
+        data = (block_structure._block_relations, block_structure.transformer_data, block_structure._block_data_map)
+        serialized = {
+            'zpickle': (zpickle(data), _load_zpickle),
+            'compact': (serialization.serialize(*data), _load_compact),
+        }
+        num_chapter_blocks = len(block_structure) // 20
+
+        for name, (serialized_data, load) in serialized.items():
+            for description, num_blocks_to_read in (('chapter', num_chapter_blocks), ('course', None)):
+                elapsed, peak_rss_increase, num_read = measure(
+                    load, serialized_data, block_structure.root_block_usage_key, num_blocks_to_read,
+                )
+                log.info(
+                    '%d blocks, %s (%d bytes), read %s (%d blocks): %.1f ms, peak RSS +%d KB',
+                    len(block_structure), name, len(serialized_data), description, num_read,
+                    elapsed * 1000, peak_rss_increase,
+                )
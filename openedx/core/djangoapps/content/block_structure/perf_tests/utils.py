@@ -0,0 +1,88 @@
+"""
+Utilities for block structure performance tests.
+"""
+# pylint: disable=protected-access
+
+
+import multiprocessing
+import resource
+import time
+from datetime import datetime, timezone
+
+from opaque_keys.edx.locator import BlockUsageLocator, CourseLocator
+from xmodule.tests.helpers import skip_unless_perf_tests_enabled  # pylint: disable=unused-import
+
+from ..block_structure import BlockStructureModulestoreData
+from ..tests.helpers import MockTransformer
+
+# Number of children of each block type in a synthetic course.
+SYNTHETIC_COURSE_SHAPE = (
+    ('chapter', 20),
+    ('sequential', 10),
+    ('vertical', 5),
+)
+
+
+def create_synthetic_course(num_blocks, course_key=None):
+    """
+    Returns a collected block structure of a synthetic course with
+    approximately num_blocks blocks, structured as
+    course > chapter > sequential > vertical > problem, with typical
+    xBlock fields and transformer data set on every block.
+    """
+    course_key = course_key or CourseLocator('PerfX', 'BlockStructure', f'{num_blocks}_blocks')
+    root_key = course_key.make_usage_key('course', 'course')
+    block_structure = BlockStructureModulestoreData(root_key)
+    block_structure._add_transformer(MockTransformer)
+
+    num_containers = 1
+    for _, num_children in SYNTHETIC_COURSE_SHAPE:
+        num_containers *= num_children
+    problems_per_vertical = max(1, (num_blocks - num_containers) // num_containers)
+
+    def add_block(block_key, parent_key):
+        """
+        Adds the given block with collected data under the given parent.
+        """
+        if parent_key:
+            block_structure._add_relation(parent_key, block_key)
+        block_structure.override_xblock_field(block_key, 'display_name', f'Block {block_key.block_id}')
+        block_structure.override_xblock_field(block_key, 'start', datetime(2026, 1, 1, tzinfo=timezone.utc))
+        block_structure.override_xblock_field(block_key, 'graded', block_key.block_type == 'problem')
+        block_structure.override_xblock_field(block_key, 'weight', 1.0)
+        block_structure.set_transformer_block_field(block_key, MockTransformer, 'merged_group_access', {})
+
+    add_block(root_key, None)
+    parents = [root_key]
+    for block_type, num_children in SYNTHETIC_COURSE_SHAPE + (('problem', problems_per_vertical),):
+        children = []
+        for parent_key in parents:
+            for index in range(num_children):
+                child_key = BlockUsageLocator(course_key, block_type, f'{parent_key.block_id}_{index}')
+                add_block(child_key, parent_key)
+                children.append(child_key)
+        parents = children
+    return block_structure
+
+
+def measure(func, *args):
+    """
+    Runs the given function in a forked process and returns a tuple of
+    (elapsed seconds, increase in peak RSS in KB, function result).
+    """
+    context = multiprocessing.get_context('fork')
+    with context.Pool(1) as pool:
+        return pool.apply(_measure_in_process, (func,) + args)
+
+
+def _measure_in_process(func, *args):
+    """
+    Returns the elapsed time and increase in peak RSS of calling the
+    given function in the current process, along with its result.
+    """
+    starting_peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak_rss_increase = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - starting_peak_rss
+    return elapsed, peak_rss_increase, result
@@ -0,0 +1,413 @@
+"""
+Compact, versioned binary serialization of BlockStructure data.
+
+Unlike the legacy layout, which zpickles the entire
+(block_relations, transformer_data, block_data_map) tuple, this layout
+keeps each block's data in its own independently compressed record and
+places an offset table in front of the records.  Deserialized block
+structures can therefore decode a block's data only when it is first
+accessed, instead of paying for every block of the course up front.
+
+Layout (all integers are unsigned and big-endian):
+
+    header          - magic, format version, number of keys, number of
+                      related keys and the length of each section below.
+    keys            - zlib compressed JSON of the root's course key and,
+                      for each block, its [block_type, block_id] in that
+                      course, or its serialized usage key otherwise.
+    relations       - zlib compressed CSR arrays of child and parent
+                      indices for the related keys.
+    transformer     - zpickle of the structure-wide transformer data.
+    dictionary      - preset zlib dictionary shared by all records.
+    offset table    - (number of keys + 1) 64-bit offsets into records.
+    records         - concatenated records of each block's xBlock and
+                      transformer fields, each compressed with the preset
+                      dictionary.  An empty record denotes a block
+                      without data.
+
+Note: Records are pickled field dicts since collected field values may
+be arbitrary picklable objects (e.g. UserPartitions).  Only the
+containing layout, which is what allows random access, is not a pickle.
+"""
+
+
+import json
+import pickle
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import MutableMapping
+from copy import deepcopy
+
+from opaque_keys.edx.keys import LearningContextKey, UsageKey
+
+from openedx.core.lib.cache_utils import zpickle, zunpickle
+
+from .block_structure import BlockData, TransformerData, _BlockRelations
+
+# Leading bytes that identify data serialized in this layout.
+MAGIC = b'BSBF'
+
+# Incrementally update this value whenever the layout changes.
+FORMAT_VERSION = 2
+
+# magic, format version, number of keys, number of related keys,
+# length of keys, relations, transformer data and dictionary sections.
+_HEADER = struct.Struct('!4sHIIIIII')
+
+# Typecodes used for the CSR and offset arrays.
+_INDEX_TYPECODE = 'I'
+_OFFSET_TYPECODE = 'Q'
+
+# Maximum size of the preset zlib dictionary (the size of zlib's window)
+# and the number of leading records sampled to build it.
+_MAX_DICTIONARY_SIZE = 32 * 1024
+_NUM_DICTIONARY_SAMPLES = 64
+
+
+def is_compact(serialized_data):
+    """
+    Returns whether the given serialized data uses the compact layout.
+    """
+    return serialized_data[:len(MAGIC)] == MAGIC
+
+
+def serialize(block_relations, transformer_data, block_data_map):
+    """
+    Returns the compact serialization of the given block structure data.
+
+    Arguments:
+        block_relations (dict {UsageKey: _BlockRelations}) - The
+            structure's block relations.
+
+        transformer_data (TransformerDataMap) - The structure's
+            non-block-specific transformer data.
+
+        block_data_map (dict {UsageKey: BlockData}) - The structure's
+            block data, which may be a LazyBlockDataMap.
+    """
+    related_keys = list(block_relations)
+    data_only_keys = [key for key in block_data_map if key not in block_relations]
+    all_keys = related_keys + data_only_keys
+    index_of_key = {key: index for index, key in enumerate(all_keys)}
+
+    keys_section = zlib.compress(_encode_keys(all_keys))
+    relations_section = zlib.compress(_encode_relations(related_keys, block_relations, index_of_key))
+    transformer_section = zpickle(transformer_data)
+
+    raw_records = [_encode_record(block_data_map, key) for key in all_keys]
+    dictionary = b''.join(raw_records[:_NUM_DICTIONARY_SAMPLES])[-_MAX_DICTIONARY_SIZE:]
+    records = [_compress_record(raw_record, dictionary) for raw_record in raw_records]
+
+    offsets = array(_OFFSET_TYPECODE, [0])
+    for record in records:
+        offsets.append(offsets[-1] + len(record))
+    if _is_little_endian():
+        offsets.byteswap()
+
+    header = _HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        len(all_keys),
+        len(related_keys),
+        len(keys_section),
+        len(relations_section),
+        len(transformer_section),
+        len(dictionary),
+    )
+    return b''.join(
+        [header, keys_section, relations_section, transformer_section, dictionary, offsets.tobytes()] + records
+    )
+
+
+def deserialize(serialized_data):
+    """
+    Returns a (block_relations, transformer_data, block_data_map) tuple
+    for the given compact serialization.  Block relations and transformer
+    data are decoded eagerly, while the returned block_data_map decodes
+    each block's data on first access.
+
+    Raises:
+        ValueError if the data is not in a supported compact layout.
+    """
+    (
+        magic, version, num_keys, num_related,
+        keys_length, relations_length, transformer_length, dictionary_length,
+    ) = _HEADER.unpack_from(serialized_data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f'Unsupported block structure layout: {magic!r} v{version}')
+
+    sections = []
+    position = _HEADER.size
+    for length in (keys_length, relations_length, transformer_length, dictionary_length):
+        sections.append(serialized_data[position:position + length])
+        position += length
+    keys_section, relations_section, transformer_section, dictionary = sections
+
+    offsets = array(_OFFSET_TYPECODE)
+    offsets_length = (num_keys + 1) * offsets.itemsize
+    offsets.frombytes(serialized_data[position:position + offsets_length])
+    if _is_little_endian():
+        offsets.byteswap()
+    position += offsets_length
+
+    all_keys = _decode_keys(zlib.decompress(keys_section))
+    block_relations = _decode_relations(zlib.decompress(relations_section), all_keys[:num_related])
+    transformer_data = zunpickle(transformer_section)
+    block_data_map = LazyBlockDataMap(serialized_data, position, all_keys, offsets, dictionary)
+    return block_relations, transformer_data, block_data_map
+
+
+class LazyBlockDataMap(MutableMapping):
+    """
+    A mapping of usage keys to BlockData that decodes each block's
+    record from the compact serialization on first access.
+
+    Membership checks and len() never decode records.  Iterating over
+    values or items decodes every remaining record.  Copies share the
+    serialized data and only duplicate the blocks decoded so far.
+    """
+    def __init__(self, serialized_data, records_start, keys, offsets, dictionary):
+        # The complete serialized data, shared by all copies of this map.
+        # bytes
+        self._serialized_data = serialized_data
+
+        # Position of the first record within the serialized data.
+        # int
+        self._records_start = records_start
+
+        # Offsets of each record, relative to records_start.
+        # array('Q')
+        self._offsets = offsets
+
+        # The preset zlib dictionary of the records.
+        # bytes
+        self._dictionary = dictionary
+
+        # Usage keys of the records and the map of usage key to index,
+        # shared by all copies of this map.
+        # list [UsageKey], dict {UsageKey: int}
+        self._keys = keys
+        self._index_of_key = {key: index for index, key in enumerate(keys)}
+
+        # Whether the record at each index is yet to be decoded.
+        # bytearray
+        self._pending = bytearray(
+            1 if offsets[index + 1] > offsets[index] else 0 for index in range(len(keys))
+        )
+
+        # Map of usage key to its decoded (or newly set) BlockData.
+        # dict {UsageKey: BlockData}
+        self._decoded = {}
+
+    def __getitem__(self, usage_key):
+        try:
+            return self._decoded[usage_key]
+        except KeyError:
+            index = self._pending_index(usage_key)
+
+        # Since collected block structures may be shared, publish the
+        # decoded data before clearing the pending flag so the key is
+        # always present in one of the two.
+        block_data = self._decoded.setdefault(usage_key, self._decode_record(index, usage_key))
+        self._pending[index] = 0
+        return block_data
+
+    def __setitem__(self, usage_key, block_data):
+        self._decoded[usage_key] = block_data
+        self._clear_pending(usage_key)
+
+    def __delitem__(self, usage_key):
+        if self._decoded.pop(usage_key, None) is None:
+            self._pending_index(usage_key)
+        self._clear_pending(usage_key)
+
+    def __contains__(self, usage_key):
+        if usage_key in self._decoded:
+            return True
+        index = self._index_of_key.get(usage_key)
+        return index is not None and bool(self._pending[index])
+
+    def __iter__(self):
+        # Snapshot the keys since iterating values decodes pending records.
+        decoded = list(self._decoded)
+        pending = bytes(self._pending)
+        return iter(decoded + [key for key, is_pending in zip(self._keys, pending) if is_pending])
+
+    def __len__(self):
+        return len(self._decoded) + self._pending.count(1)
+
+    def __deepcopy__(self, memo):
+        data_map_copy = self.__class__.__new__(self.__class__)
+        data_map_copy.__dict__.update(self.__dict__)
+        data_map_copy._pending = bytearray(self._pending)  # pylint: disable=protected-access
+        data_map_copy._decoded = deepcopy(self._decoded, memo)  # pylint: disable=protected-access
+        return data_map_copy
+
+    @property
+    def num_decoded(self):
+        """
+        Returns the number of blocks whose data has been decoded or set.
+        """
+        return len(self._decoded)
+
+    def _pending_index(self, usage_key):
+        """
+        Returns the index of the given block's pending record.
+
+        Raises:
+            KeyError if the block has no pending record.
+        """
+        index = self._index_of_key.get(usage_key)
+        if index is None or not self._pending[index]:
+            raise KeyError(usage_key)
+        return index
+
+    def _clear_pending(self, usage_key):
+        """
+        Marks the given block's record, if any, as no longer pending.
+        """
+        index = self._index_of_key.get(usage_key)
+        if index is not None:
+            self._pending[index] = 0
+
+    def _decode_record(self, index, usage_key):
+        """
+        Returns the BlockData decoded from the record at the given index.
+        """
+        start = self._records_start + self._offsets[index]
+        end = self._records_start + self._offsets[index + 1]
+        decompressor = zlib.decompressobj(zdict=self._dictionary)
+        fields, transformer_fields = pickle.loads(decompressor.decompress(self._serialized_data[start:end]))
+
+        block_data = BlockData(usage_key)
+        block_data.fields = fields
+        for transformer_name, transformer_block_fields in transformer_fields.items():
+            transformer_data = TransformerData()
+            transformer_data.fields = transformer_block_fields
+            block_data.transformer_data[transformer_name] = transformer_data
+        return block_data
+
+
+def _encode_keys(all_keys):
+    """
+    Returns the JSON encoding of the given usage keys.  Keys in the course
+    of the first (root) key are encoded by block type and id only, which
+    is much faster to decode than parsing each serialized key.
+    """
+    course_key = getattr(all_keys[0], 'course_key', None) if all_keys else None
+    encoded_keys = []
+    for key in all_keys:
+        if course_key is not None and _make_usage_key(course_key, key) == key:
+            encoded_keys.append([key.block_type, key.block_id])
+        else:
+            encoded_keys.append(str(key))
+    return json.dumps({
+        'course_key': str(course_key) if course_key is not None else None,
+        'keys': encoded_keys,
+    }).encode('utf-8')
+
+
+def _decode_keys(encoded):
+    """
+    Returns the list of usage keys decoded from the given bytes.
+    See _encode_keys.
+    """
+    decoded = json.loads(encoded)
+    course_key = decoded['course_key'] and LearningContextKey.from_string(decoded['course_key'])
+    return [
+        UsageKey.from_string(key) if isinstance(key, str) else course_key.make_usage_key(*key)
+        for key in decoded['keys']
+    ]
+
+
+def _make_usage_key(course_key, usage_key):
+    """
+    Returns the key of the given block type and id in the given course,
+    or None if the given key has no block type and id.
+    """
+    try:
+        return course_key.make_usage_key(usage_key.block_type, usage_key.block_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def _encode_record(block_data_map, usage_key):
+    """
+    Returns the uncompressed record of the given block's data, or an
+    empty record if the block has no data.
+    """
+    try:
+        block_data = block_data_map[usage_key]
+    except KeyError:
+        return b''
+    transformer_fields = {
+        transformer_name: transformer_data.fields
+        for transformer_name, transformer_data in block_data.transformer_data.items()
+    }
+    return pickle.dumps((block_data.fields, transformer_fields), pickle.HIGHEST_PROTOCOL)
+
+
+def _compress_record(raw_record, dictionary):
+    """
+    Returns the given record compressed with the given preset dictionary.
+    """
+    if not raw_record:
+        return raw_record
+    compressor = zlib.compressobj(zdict=dictionary)
+    return compressor.compress(raw_record) + compressor.flush()
+
+
+def _encode_relations(related_keys, block_relations, index_of_key):
+    """
+    Returns bytes of the CSR encoded children and parents of the given
+    related keys, in that order.  Each CSR section consists of
+    (number of keys + 1) offsets followed by the concatenated indices.
+    """
+    encoded = array(_INDEX_TYPECODE)
+    for attribute in ('children', 'parents'):
+        offsets = array(_INDEX_TYPECODE, [0])
+        indices = array(_INDEX_TYPECODE)
+        for key in related_keys:
+            indices.extend(index_of_key[related] for related in getattr(block_relations[key], attribute))
+            offsets.append(len(indices))
+        encoded.extend(offsets)
+        encoded.extend(indices)
+    if _is_little_endian():
+        encoded.byteswap()
+    return encoded.tobytes()
+
+
+def _decode_relations(encoded, related_keys):
+    """
+    Returns the block relations map decoded from the given bytes.
+    See _encode_relations.
+    """
+    values = array(_INDEX_TYPECODE)
+    values.frombytes(encoded)
+    if _is_little_endian():
+        values.byteswap()
+
+    relations_list = [_BlockRelations() for _ in related_keys]
+    num_related = len(related_keys)
+    position = 0
+    for attribute in ('children', 'parents'):
+        offsets = values[position:position + num_related + 1]
+        position += num_related + 1
+        for index, relations in enumerate(relations_list):
+            setattr(
+                relations,
+                attribute,
+                [related_keys[related] for related in values[position + offsets[index]:position + offsets[index + 1]]],
+            )
+        position += offsets[num_related]
+    return dict(zip(related_keys, relations_list))
+
+
+def _is_little_endian():
+    """
+    Returns whether arrays use little-endian byte order on this platform.
+    The serialized layout is always big-endian.
+    """
+    return sys.byteorder == 'little'
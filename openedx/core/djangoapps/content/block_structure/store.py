@@ -4,12 +4,18 @@ Module for the Storage of BlockStructure objects.
 # pylint: disable=protected-access
 
 
+import threading
+from collections import OrderedDict
 from logging import getLogger
+from time import monotonic
+from uuid import uuid4
 
+from django.conf import settings
+from edx_django_utils.monitoring import increment
 
 from openedx.core.lib.cache_utils import zpickle, zunpickle
 
-from . import config
+from . import config, serialization
 from .block_structure import BlockStructureBlockData
 from .exceptions import BlockStructureNotFound
 from .factory import BlockStructureFactory
@@ -39,6 +45,112 @@ class StubModel:
         pass  # lint-amnesty, pylint: disable=unnecessary-pass
 
 
+class _CollectedStructureCache:
+    """
+    Process-local, size-bounded LRU cache of deserialized collected
+    block structures, keyed by (root usage key, structure version).
+
+    Cached block structures are shared across requests and must be
+    treated as read-only; BlockStructureManager.get_transformed copies
+    them before transforming.
+
+    The version of a structure is looked up on every get, from its
+    BlockStructureModel with storage backing and from a version marker
+    stored next to its serialized data in the cache otherwise, so all
+    processes stop using a structure as soon as it is collected again.
+
+    The size of an entry is approximated by the size of its serialized
+    data.  The maximum total size and entry lifetime are configured by
+    BLOCK_STRUCTURES_SETTINGS['PROCESS_CACHE_MAX_SIZE'] and
+    BLOCK_STRUCTURES_SETTINGS['PROCESS_CACHE_TIMEOUT'].
+    """
+    def __init__(self):
+        # Map of (root usage key, version) to (block structure, size, expiration).
+        # OrderedDict {(UsageKey, string): (BlockStructureBlockData, int, float)}
+        self._entries = OrderedDict()
+        self._total_size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def max_size():
+        """
+        Returns the maximum total size, in bytes, of the cached entries.
+        A value of 0 disables the cache.
+        """
+        return settings.BLOCK_STRUCTURES_SETTINGS.get('PROCESS_CACHE_MAX_SIZE', 0)
+
+    def get(self, root_block_usage_key, version):
+        """
+        Returns the cached block structure for the given key and version,
+        or None if not found or expired.
+        """
+        key = (root_block_usage_key, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            block_structure, _, expiration = entry
+            if expiration < monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return block_structure
+
+    def set(self, root_block_usage_key, version, block_structure, size):
+        """
+        Caches the given block structure, evicting the least recently
+        used entries as needed to stay within the maximum size.
+        """
+        max_size = self.max_size()
+        if size > max_size:
+            return
+
+        key = (root_block_usage_key, version)
+        expiration = monotonic() + settings.BLOCK_STRUCTURES_SETTINGS.get('PROCESS_CACHE_TIMEOUT', 300)
+        with self._lock:
+            # Only a single version per root is useful; drop any others.
+            self._remove_matching(lambda entry_key: entry_key[0] == root_block_usage_key)
+            self._entries[key] = (block_structure, size, expiration)
+            self._total_size += size
+            while self._total_size > max_size:
+                self._remove(next(iter(self._entries)))
+
+    def remove(self, root_block_usage_key):
+        """
+        Removes all cached versions of the block structure for the given root.
+        """
+        with self._lock:
+            self._remove_matching(lambda entry_key: entry_key[0] == root_block_usage_key)
+
+    def invalidate(self, course_key=None):
+        """
+        Removes all cached block structures of the given course, or of
+        all courses if course_key is None.
+        """
+        with self._lock:
+            self._remove_matching(
+                lambda entry_key: course_key is None or getattr(entry_key[0], 'course_key', None) == course_key
+            )
+
+    def _remove_matching(self, predicate):
+        """
+        Removes the entries whose keys satisfy the given predicate.
+        Must be called with the lock held.
+        """
+        for key in [entry_key for entry_key in self._entries if predicate(entry_key)]:
+            self._remove(key)
+
+    def _remove(self, key):
+        """
+        Removes the entry for the given key. Must be called with the lock held.
+        """
+        _, size, _ = self._entries.pop(key)
+        self._total_size -= size
+
+
+_collected_structures = _CollectedStructureCache()
+
+
 class BlockStructureStore:
     """
     Storage for BlockStructure objects.
@@ -69,6 +181,7 @@ class BlockStructureStore:
 
         bs_model = self._update_or_create_model(block_structure, serialized_data)
         self._add_to_cache(serialized_data, bs_model)
+        _collected_structures.remove(block_structure.root_block_usage_key)
 
     def get(self, root_block_usage_key):
         """
@@ -78,6 +191,10 @@ class BlockStructureStore:
         The given root_block_usage_key must equate the
         root_block_usage_key previously passed to the `add` method.
 
+        Block structures are first looked up in the process-local
+        cache, in which case the returned block structure is shared
+        and must not be modified.
+
         Arguments:
             root_block_usage_key (UsageKey) - The usage_key for the
                 root of the block structure that is to be retrieved
@@ -92,6 +209,14 @@ class BlockStructureStore:
             found.
         """
         bs_model = self._get_model(root_block_usage_key)
+        version = self._get_version(bs_model)
+
+        if version is not None:
+            block_structure = _collected_structures.get(root_block_usage_key, version)
+            if block_structure is not None:
+                increment('block_structure.process_cache.hit')
+                return block_structure
+        increment('block_structure.process_cache.miss')
 
         try:
             serialized_data = self._get_from_cache(bs_model)
@@ -99,7 +224,10 @@ class BlockStructureStore:
             serialized_data = self._get_from_store(bs_model)
             self._add_to_cache(serialized_data, bs_model)
 
-        return self._deserialize(serialized_data, root_block_usage_key)
+        block_structure = self._deserialize(serialized_data, root_block_usage_key)
+        if version is not None:
+            _collected_structures.set(root_block_usage_key, version, block_structure, len(serialized_data))
+        return block_structure
 
     def delete(self, root_block_usage_key):
         """
@@ -111,8 +239,9 @@ class BlockStructureStore:
                 of the block structure that is to be removed.
         """
         bs_model = self._get_model(root_block_usage_key)
-        self._cache.delete(self._encode_root_cache_key(bs_model))
+        self._cache.delete_many([self._encode_root_cache_key(bs_model), self._encode_version_cache_key(bs_model)])
         bs_model.delete()
+        _collected_structures.remove(root_block_usage_key)
         logger.info("BlockStructure: Deleted from cache and store; %s.", bs_model)
 
     def is_up_to_date(self, root_block_usage_key, modulestore):
@@ -162,8 +291,28 @@ class BlockStructureStore:
         """
         cache_key = self._encode_root_cache_key(bs_model)
         self._cache.set(cache_key, serialized_data, timeout=config.cache_timeout_in_seconds())
+        if _collected_structures.max_size() and not config.STORAGE_BACKING_FOR_CACHE.is_enabled():
+            # Without storage backing, the cache key doesn't change when the
+            # structure is collected again, so a new version marker is set
+            # once the data is in place.
+            self._cache.set(
+                self._encode_version_cache_key(bs_model), uuid4().hex, timeout=config.cache_timeout_in_seconds()
+            )
         logger.info("BlockStructure: Added to cache; %s, size: %d", bs_model, len(serialized_data))
 
+    def _get_version(self, bs_model):
+        """
+        Returns the current version of the block structure for the given
+        BlockStructureModel or StubModel, under which it is kept in the
+        process-local cache, or None if it isn't known.
+        """
+        if not _collected_structures.max_size():
+            return None
+        if config.STORAGE_BACKING_FOR_CACHE.is_enabled():
+            # The cache key of a model includes its version fields.
+            return self._encode_root_cache_key(bs_model)
+        return self._cache.get(self._encode_version_cache_key(bs_model))
+
     def _get_from_cache(self, bs_model):
         """
         Returns the serialized data for the given BlockStructureModel
@@ -200,27 +349,51 @@ class BlockStructureStore:
             block_structure.transformer_data,
             block_structure._block_data_map,
         )
+        if config.COMPACT_SERIALIZATION.is_enabled():
+            return serialization.serialize(*data_to_cache)
         return zpickle(data_to_cache)
 
     def _deserialize(self, serialized_data, root_block_usage_key):
         """
         Deserializes the given data and returns the parsed block_structure.
+
+        Data in the compact layout is decoded lazily, block by block, as
+        it is accessed.  Otherwise, the data is assumed to be zpickled.
+
+        Block structures with at least
+        BLOCK_STRUCTURES_SETTINGS['COMPACT_MIN_BLOCKS'] blocks are
+        converted to the array-backed CompactBlockStructureBlockData.
         """
 
         try:
-            block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
+            if serialization.is_compact(serialized_data):
+                block_relations, transformer_data, block_data_map = serialization.deserialize(serialized_data)
+            else:
+                block_relations, transformer_data, block_data_map = zunpickle(serialized_data)
         except Exception:
             # Somehow failed to de-serialized the data, assume it's corrupt.
             bs_model = self._get_model(root_block_usage_key)
             logger.exception("BlockStructure: Failed to load data from cache for %s", bs_model)
             raise BlockStructureNotFound(bs_model.data_usage_key)  # lint-amnesty, pylint: disable=raise-missing-from
 
-        return BlockStructureFactory.create_new(
+        block_structure = BlockStructureFactory.create_new(
             root_block_usage_key,
             block_relations,
             transformer_data,
             block_data_map,
         )
+        compact_min_blocks = settings.BLOCK_STRUCTURES_SETTINGS.get('COMPACT_MIN_BLOCKS', 0)
+        if compact_min_blocks and len(block_structure) >= compact_min_blocks:
+            block_structure = BlockStructureFactory.create_compact(block_structure)
+        return block_structure
+
+    @staticmethod
+    def clear_process_cache(course_key=None):
+        """
+        Removes the block structures of the given course, or of all
+        courses if course_key is None, from the process-local cache.
+        """
+        _collected_structures.invalidate(course_key)
 
     @staticmethod
     def _encode_root_cache_key(bs_model):
@@ -235,6 +408,14 @@ class BlockStructureStore:
             root_usage_key=str(bs_model.data_usage_key),
         )
 
+    @classmethod
+    def _encode_version_cache_key(cls, bs_model):
+        """
+        Returns the cache key of the version marker of the given
+        StubModel, used when storage backing is disabled.
+        """
+        return f"{cls._encode_root_cache_key(bs_model)}.version"
+
     @staticmethod
     def _version_data_of_block(root_block):
         """
@@ -0,0 +1,107 @@
+"""
+Tests for block_structure/compact.py
+"""
+# pylint: disable=protected-access
+
+
+import pickle
+from copy import deepcopy
+from unittest import TestCase
+
+import ddt
+
+from ..block_structure import BlockStructureBlockData
+from ..compact import CompactBlockStructureBlockData
+from ..factory import BlockStructureFactory
+from .helpers import ChildrenMapTestMixin, MockTransformer
+from .test_block_structure import TestBlockStructureData
+
+
+class CompactStructureTestMixin(ChildrenMapTestMixin):
+    """
+    Creates compact block structures from children maps.
+    """
+    def create_block_structure(self, children_map, block_structure_cls=BlockStructureBlockData):
+        block_structure = super().create_block_structure(children_map, block_structure_cls)
+        compact_structure = BlockStructureFactory.create_compact(block_structure)
+        assert isinstance(compact_structure, CompactBlockStructureBlockData)
+        return compact_structure
+
+
+class TestCompactBlockStructureData(CompactStructureTestMixin, TestBlockStructureData):
+    """
+    Runs the BlockStructureBlockData tests against compact block structures.
+    """
+
+
+@ddt.ddt
+class TestCompactBlockStructure(CompactStructureTestMixin, TestCase):
+    """
+    Tests specific to CompactBlockStructureBlockData
+    """
+    def create_collected_structure(self, children_map):
+        """
+        Returns a block structure with block and transformer data,
+        before and after converting it to a compact structure.
+        """
+        block_structure = ChildrenMapTestMixin.create_block_structure(self, children_map)
+        for block_key in range(len(children_map)):
+            block_structure.override_xblock_field(block_key, 'display_name', f'Block {block_key}')
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'key', {'value': block_key})
+        return block_structure, BlockStructureFactory.create_compact(block_structure)
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_relations(self, children_map):
+        block_structure, compact_structure = self.create_collected_structure(children_map)
+        self.assert_block_structure(compact_structure, children_map)
+        assert len(compact_structure) == len(block_structure)
+        assert list(compact_structure) == list(block_structure)
+        assert list(compact_structure.topological_traversal()) == list(block_structure.topological_traversal())
+
+    def test_block_data(self):
+        block_structure, compact_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        for block_key in block_structure:
+            assert compact_structure.get_xblock_field(block_key, 'display_name') == f'Block {block_key}'
+            assert compact_structure.get_xblock_field(block_key, 'missing', 'default') == 'default'
+            assert compact_structure[block_key].location == block_key
+            assert compact_structure[block_key].fields == block_structure[block_key].fields
+            assert compact_structure.get_transformer_block_field(block_key, MockTransformer, 'key') == {
+                'value': block_key,
+            }
+            transformer_data = compact_structure[block_key].transformer_data
+            assert transformer_data.get(MockTransformer.name()).fields == {'key': {'value': block_key}}
+            assert transformer_data.get('other') is None
+
+        compact_structure.remove_transformer_block_field(0, MockTransformer, 'key')
+        assert compact_structure.get_transformer_block_field(0, MockTransformer, 'key') is None
+        assert dict(compact_structure.iteritems()).keys() == dict(block_structure.iteritems()).keys()
+
+    def test_copy_shares_arrays(self):
+        _, compact_structure = self.create_collected_structure(self.DAG_CHILDREN_MAP)
+        structure_copy = compact_structure.copy()
+        assert structure_copy._block_relations._children is compact_structure._block_relations._children
+        assert structure_copy._block_data_map._block_index is compact_structure._block_data_map._block_index
+
+        structure_copy.get_transformer_block_field(3, MockTransformer, 'key')['value'] = 'changed'
+        assert compact_structure.get_transformer_block_field(3, MockTransformer, 'key') == {'value': 3}
+
+    def test_new_blocks(self):
+        _, compact_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        compact_structure._add_relation(4, 5)
+        compact_structure.override_xblock_field(5, 'display_name', 'Block 5')
+        assert compact_structure.get_children(4) == [5]
+        assert compact_structure.get_parents(5) == [4]
+        assert compact_structure.get_xblock_field(5, 'display_name') == 'Block 5'
+        assert len(compact_structure) == len(self.SIMPLE_CHILDREN_MAP) + 1
+
+    def test_pickle(self):
+        _, compact_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        compact_structure.remove_block(2, keep_descendants=False)
+        restored = pickle.loads(pickle.dumps(deepcopy(compact_structure)))
+        self.assert_block_structure(restored, [[1], [3, 4], [], [], []], missing_blocks=[2])
+        assert restored.get_xblock_field(4, 'display_name') == 'Block 4'
+        assert restored.get_xblock_field(2, 'display_name') is None
@@ -8,7 +8,7 @@ from django.test import TestCase
 from edx_toggles.toggles.testutils import override_waffle_switch
 
 from ..block_structure import BlockStructureBlockData
-from ..config import STORAGE_BACKING_FOR_CACHE
+from ..config import COPY_ON_WRITE_TRANSFORMS, STORAGE_BACKING_FOR_CACHE
 from ..exceptions import UsageKeyNotInBlockStructure
 from ..manager import BlockStructureManager
 from ..transformers import BlockStructureTransformers
@@ -149,7 +149,8 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
         TestTransformer1.assert_collected(block_structure)
         TestTransformer1.assert_transformed(block_structure)
 
-    def test_get_transformed_with_collected(self):
+    @ddt.data(True, False)
+    def test_get_transformed_with_collected(self, copy_on_write):
         with mock_registered_transformers(self.registered_transformers):
             collected_block_structure = self.bs_manager.get_collected()
 
@@ -160,12 +161,17 @@ class TestBlockStructureManager(UsageKeyFactoryMixin, ChildrenMapTestMixin, Test
                 (1, [[], [3, 4], [], [], []], [0, 2]),
                 (2, [[], [], [], [], []], [0, 1, 3, 4]),
         ]:
-            block_structure = self.bs_manager.get_transformed(
-                self.transformers,
-                starting_block_usage_key=self.block_key_factory(starting_block),
-                collected_block_structure=collected_block_structure,
-            )
+            with override_waffle_switch(COPY_ON_WRITE_TRANSFORMS, active=copy_on_write):
+                block_structure = self.bs_manager.get_transformed(
+                    self.transformers,
+                    starting_block_usage_key=self.block_key_factory(starting_block),
+                    collected_block_structure=collected_block_structure,
+                )
             self.assert_block_structure(block_structure, expected_structure, missing_blocks=expected_missing_blocks)
+            assert block_structure is not collected_block_structure
+
+        # the collected block structure is left unmodified
+        self.assert_block_structure(collected_block_structure, self.children_map)
 
     def test_get_transformed_with_nonexistent_starting_block(self):
         with mock_registered_transformers(self.registered_transformers):
@@ -0,0 +1,130 @@
+"""
+Tests for block_structure/overlay.py
+"""
+# pylint: disable=protected-access
+
+
+import pickle
+from unittest import TestCase
+
+import ddt
+
+from ..block_structure import BlockStructureBlockData
+from ..factory import BlockStructureFactory
+from ..overlay import OverlayBlockStructureBlockData
+from .helpers import ChildrenMapTestMixin, MockTransformer
+from .test_block_structure import TestBlockStructureData
+
+
+class OverlayStructureTestMixin(ChildrenMapTestMixin):
+    """
+    Creates overlays of block structures created from children maps.
+    """
+    def create_block_structure(self, children_map, block_structure_cls=BlockStructureBlockData):
+        block_structure = super().create_block_structure(children_map, block_structure_cls)
+        overlay_structure = BlockStructureFactory.create_overlay(block_structure)
+        assert isinstance(overlay_structure, OverlayBlockStructureBlockData)
+        return overlay_structure
+
+
+class TestOverlayBlockStructureData(OverlayStructureTestMixin, TestBlockStructureData):  # pylint: disable=test-inherits-tests
+    """
+    Runs the BlockStructureBlockData tests against overlay block structures.
+    """
+
+
+@ddt.ddt
+class TestOverlayBlockStructure(ChildrenMapTestMixin, TestCase):
+    """
+    Tests specific to OverlayBlockStructureBlockData
+    """
+    def create_collected_structure(self, children_map, compact=False):
+        """
+        Returns a block structure with block and transformer data.
+        """
+        block_structure = self.create_block_structure(children_map)
+        for block_key in range(len(children_map)):
+            block_structure.override_xblock_field(block_key, 'display_name', f'Block {block_key}')
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'key', {'value': block_key})
+        if compact:
+            block_structure = BlockStructureFactory.create_compact(block_structure)
+        return block_structure
+
+    def assert_unmodified(self, block_structure, children_map):
+        """
+        Verifies the given collected block structure still has the
+        contents created by create_collected_structure.
+        """
+        self.assert_block_structure(block_structure, children_map)
+        for block_key in range(len(children_map)):
+            assert block_structure.get_xblock_field(block_key, 'display_name') == f'Block {block_key}'
+            assert block_structure.get_transformer_block_field(block_key, MockTransformer, 'key') == {
+                'value': block_key,
+            }
+
+    @ddt.data(True, False)
+    def test_base_unmodified(self, compact):
+        children_map = self.SIMPLE_CHILDREN_MAP
+        collected = self.create_collected_structure(children_map, compact)
+        overlay_structure = BlockStructureFactory.create_overlay(collected)
+
+        overlay_structure.override_xblock_field(1, 'display_name', 'Changed')
+        overlay_structure.set_transformer_block_field(3, MockTransformer, 'key', 'changed')
+        overlay_structure.remove_transformer_block_field(4, MockTransformer, 'key')
+        overlay_structure.remove_block(2, keep_descendants=False)
+        overlay_structure._prune_unreachable()
+
+        self.assert_block_structure(overlay_structure, [[1], [3, 4], [], [], []], missing_blocks=[2])
+        assert overlay_structure.get_xblock_field(1, 'display_name') == 'Changed'
+        assert overlay_structure.get_transformer_block_field(3, MockTransformer, 'key') == 'changed'
+        assert overlay_structure.get_transformer_block_field(4, MockTransformer, 'key') is None
+        self.assert_unmodified(collected, children_map)
+
+    def test_set_root_block(self):
+        collected = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        overlay_structure = BlockStructureFactory.create_overlay(collected)
+        overlay_structure.set_root_block(1)
+        overlay_structure._prune_unreachable()
+
+        assert list(overlay_structure.topological_traversal()) == [1, 3, 4]
+        assert overlay_structure.get_parents(1) == []
+        assert 0 not in overlay_structure
+        self.assert_unmodified(collected, self.SIMPLE_CHILDREN_MAP)
+
+    def test_changes_only_copied(self):
+        collected = self.create_collected_structure(self.LINEAR_CHILDREN_MAP)
+        overlay_structure = BlockStructureFactory.create_overlay(collected)
+        assert list(overlay_structure.topological_traversal()) == list(collected.topological_traversal())
+        assert overlay_structure.num_changed_blocks == 0
+
+        overlay_structure.override_xblock_field(2, 'display_name', 'Changed')
+        assert overlay_structure.num_changed_blocks == 1
+        assert overlay_structure[1] is collected[1]
+
+    def test_returned_relations_not_shared(self):
+        collected = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        overlay_structure = BlockStructureFactory.create_overlay(collected)
+        overlay_structure.get_children(0).append(5)
+        assert collected.get_children(0) == [1, 2]
+
+    def test_copy(self):
+        collected = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        overlay_structure = BlockStructureFactory.create_overlay(collected)
+        overlay_structure.override_xblock_field(1, 'display_name', 'Changed')
+
+        structure_copy = overlay_structure.copy()
+        assert structure_copy._base_structure is collected
+        structure_copy.override_xblock_field(1, 'display_name', 'Changed again')
+        structure_copy.remove_block(2, keep_descendants=False)
+
+        assert overlay_structure.get_xblock_field(1, 'display_name') == 'Changed'
+        assert 2 in overlay_structure
+        self.assert_unmodified(collected, self.SIMPLE_CHILDREN_MAP)
+
+    def test_pickle(self):
+        collected = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        overlay_structure = BlockStructureFactory.create_overlay(collected)
+        overlay_structure.remove_block(2, keep_descendants=False)
+        restored = pickle.loads(pickle.dumps(overlay_structure))
+        self.assert_block_structure(restored, [[1], [3, 4], [], [], []], missing_blocks=[2])
+        assert restored.get_xblock_field(4, 'display_name') == 'Block 4'
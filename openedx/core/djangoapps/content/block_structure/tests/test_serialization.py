@@ -0,0 +1,101 @@
+"""
+Tests for block_structure/serialization.py
+"""
+# pylint: disable=protected-access
+
+
+from copy import deepcopy
+from unittest import TestCase
+
+import ddt
+
+from .. import serialization
+from ..block_structure import BlockStructureBlockData
+from .helpers import ChildrenMapTestMixin, MockTransformer, UsageKeyFactoryMixin
+
+
+@ddt.ddt
+class TestCompactSerialization(UsageKeyFactoryMixin, ChildrenMapTestMixin, TestCase):
+    """
+    Tests for the compact block structure serialization.
+    """
+
+    def create_collected_structure(self, children_map):
+        """
+        Returns a block structure for the given children_map with
+        block and transformer data set on every block.
+        """
+        block_structure = self.create_block_structure(children_map)
+        block_structure._add_transformer(MockTransformer)
+        for block_id in range(len(children_map)):
+            block_key = self.block_key_factory(block_id)
+            block_structure.override_xblock_field(block_key, 'display_name', f'Block {block_id}')
+            block_structure.set_transformer_block_field(block_key, MockTransformer, 'test', block_id)
+        return block_structure
+
+    def round_trip(self, block_structure):
+        """
+        Serializes and deserializes the given block structure's data.
+        """
+        serialized_data = serialization.serialize(
+            block_structure._block_relations,
+            block_structure.transformer_data,
+            block_structure._block_data_map,
+        )
+        assert serialization.is_compact(serialized_data)
+        return serialization.deserialize(serialized_data)
+
+    @ddt.data(
+        ChildrenMapTestMixin.SIMPLE_CHILDREN_MAP,
+        ChildrenMapTestMixin.LINEAR_CHILDREN_MAP,
+        ChildrenMapTestMixin.DAG_CHILDREN_MAP,
+    )
+    def test_round_trip(self, children_map):
+        block_structure = self.create_collected_structure(children_map)
+        block_relations, transformer_data, block_data_map = self.round_trip(block_structure)
+
+        restored = BlockStructureBlockData(block_structure.root_block_usage_key)
+        restored._block_relations = block_relations
+        restored.transformer_data = transformer_data
+        restored._block_data_map = block_data_map
+
+        self.assert_block_structure(restored, children_map)
+        assert restored._get_transformer_data_version(MockTransformer) == MockTransformer.WRITE_VERSION
+        for block_id in range(len(children_map)):
+            block_key = self.block_key_factory(block_id)
+            assert restored.get_xblock_field(block_key, 'display_name') == f'Block {block_id}'
+            assert restored.get_transformer_block_field(block_key, MockTransformer, 'test') == block_id
+
+    def test_parent_order_preserved(self):
+        block_structure = self.create_collected_structure(self.DAG_CHILDREN_MAP)
+        block_relations, _, _ = self.round_trip(block_structure)
+        for block_key, relations in block_structure._block_relations.items():
+            assert block_relations[block_key].children == relations.children
+            assert block_relations[block_key].parents == relations.parents
+
+    def test_lazy_decoding(self):
+        block_structure = self.create_collected_structure(self.SIMPLE_CHILDREN_MAP)
+        _, _, block_data_map = self.round_trip(block_structure)
+        block_key = self.block_key_factory(3)
+
+        assert len(block_data_map) == len(self.SIMPLE_CHILDREN_MAP)
+        assert block_key in block_data_map
+        assert block_data_map.num_decoded == 0
+
+        assert block_data_map[block_key].display_name == 'Block 3'
+        assert block_data_map.num_decoded == 1
+
+        copied_map = deepcopy(block_data_map)
+        del copied_map[block_key]
+        assert block_key not in copied_map
+        assert block_key in block_data_map
+
+        assert dict(block_data_map.items()).keys() == block_structure._block_data_map.keys()
+        assert block_data_map.num_decoded == len(self.SIMPLE_CHILDREN_MAP)
+
+    def test_blocks_without_data(self):
+        block_structure = self.create_block_structure(self.SIMPLE_CHILDREN_MAP)
+        block_relations, _, block_data_map = self.round_trip(block_structure)
+        assert len(block_relations) == len(self.SIMPLE_CHILDREN_MAP)
+        assert len(block_data_map) == 0
+        assert block_data_map.get(self.block_key_factory(0)) is None
@@ -2,16 +2,20 @@
 Tests for block_structure/cache.py
 """
 
+import itertools
+
 import pytest
 import ddt
+from django.conf import settings
+from django.test.utils import override_settings
 from edx_toggles.toggles.testutils import override_waffle_switch
 
 from openedx.core.djangolib.testing.utils import CacheIsolationTestCase
 
-from ..config import STORAGE_BACKING_FOR_CACHE
+from ..config import COMPACT_SERIALIZATION, STORAGE_BACKING_FOR_CACHE
 from ..config.models import BlockStructureConfiguration
 from ..exceptions import BlockStructureNotFound
-from ..store import BlockStructureStore
+from ..store import BlockStructureStore, StubModel
 from .helpers import ChildrenMapTestMixin, MockCache, MockTransformer, UsageKeyFactoryMixin
 
 
@@ -31,6 +35,8 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
 
         self.mock_cache = MockCache()
         self.store = BlockStructureStore(self.mock_cache)
+        BlockStructureStore.clear_process_cache()
+        self.addCleanup(BlockStructureStore.clear_process_cache)
 
     def add_transformers(self):
         """
@@ -68,6 +74,18 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
             with pytest.raises(BlockStructureNotFound):
                 self.store.get(self.block_structure.root_block_usage_key)
 
+    @ddt.data(*itertools.product((True, False), repeat=2))
+    @ddt.unpack
+    def test_compact_serialization(self, compact_on_write, compact_on_read):
+        with override_waffle_switch(COMPACT_SERIALIZATION, active=compact_on_write):
+            self.store.add(self.block_structure)
+        with override_waffle_switch(COMPACT_SERIALIZATION, active=compact_on_read):
+            stored_value = self.store.get(self.block_structure.root_block_usage_key)
+        self.assert_block_structure(stored_value, self.children_map)
+        assert stored_value.get_transformer_block_field(
+            self.block_key_factory(0), MockTransformer, 'test',
+        ) == f'{MockTransformer.name()} val'
+
     def test_uncached_without_storage(self):
         self.store.add(self.block_structure)
         self.mock_cache.map.clear()
@@ -91,3 +109,81 @@ class TestBlockStructureStore(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheI
         assert self.mock_cache.timeout_from_last_call == 0
         self.store.add(self.block_structure)
         assert self.mock_cache.timeout_from_last_call == timeout
+
+
+@ddt.ddt
+class TestBlockStructureStoreProcessCache(UsageKeyFactoryMixin, ChildrenMapTestMixin, CacheIsolationTestCase):
+    """
+    Tests for the process-local cache of BlockStructureStore
+    """
+    def setUp(self):
+        super().setUp()
+        self.children_map = self.SIMPLE_CHILDREN_MAP
+        self.block_structure = self.create_block_structure(self.children_map)
+        self.root_key = self.block_structure.root_block_usage_key
+
+        self.mock_cache = MockCache()
+        self.store = BlockStructureStore(self.mock_cache)
+        BlockStructureStore.clear_process_cache()
+        self.addCleanup(BlockStructureStore.clear_process_cache)
+
+    def process_cache_settings(self, max_size=10 ** 6, timeout=300):
+        """
+        Returns an override of BLOCK_STRUCTURES_SETTINGS enabling the process cache.
+        """
+        return override_settings(BLOCK_STRUCTURES_SETTINGS=dict(
+            settings.BLOCK_STRUCTURES_SETTINGS,
+            PROCESS_CACHE_MAX_SIZE=max_size,
+            PROCESS_CACHE_TIMEOUT=timeout,
+        ))
+
+    def test_disabled_by_default(self):
+        self.store.add(self.block_structure)
+        assert self.store.get(self.root_key) is not self.store.get(self.root_key)
+
+    def test_shared_across_gets(self):
+        with self.process_cache_settings():
+            self.store.add(self.block_structure)
+            stored_value = self.store.get(self.root_key)
+            del self.mock_cache.map[self.store._encode_root_cache_key(StubModel(self.root_key))]
+            assert self.store.get(self.root_key) is stored_value
+            self.assert_block_structure(stored_value, self.children_map)
+
+    def test_collected_by_other_process(self):
+        with self.process_cache_settings():
+            self.store.add(self.block_structure)
+            stored_value = self.store.get(self.root_key)
+            # Collecting the structure in another process doesn't clear
+            # the process cache of this one.
+            other_store = BlockStructureStore(self.mock_cache)
+            other_store._add_to_cache(other_store._serialize(self.block_structure), StubModel(self.root_key))
+            assert self.store.get(self.root_key) is not stored_value
+
+    @ddt.data(True, False)
+    def test_invalidation(self, clear_course):
+        with self.process_cache_settings():
+            self.store.add(self.block_structure)
+            stored_value = self.store.get(self.root_key)
+            if clear_course:
+                BlockStructureStore.clear_process_cache(self.course_key)
+            else:
+                self.store.add(self.block_structure)
+            assert self.store.get(self.root_key) is not stored_value
+
+    def test_delete(self):
+        with self.process_cache_settings():
+            self.store.add(self.block_structure)
+            self.store.get(self.root_key)
+            self.store.delete(self.root_key)
+            with pytest.raises(BlockStructureNotFound):
+                self.store.get(self.root_key)
+
+    def test_expiration(self):
+        with self.process_cache_settings(timeout=-1):
+            self.store.add(self.block_structure)
+            assert self.store.get(self.root_key) is not self.store.get(self.root_key)
+
+    def test_size_bound(self):
+        with self.process_cache_settings(max_size=1):
+            self.store.add(self.block_structure)
+            assert self.store.get(self.root_key) is not self.store.get(self.root_key)
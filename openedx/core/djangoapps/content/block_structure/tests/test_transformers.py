@@ -75,3 +75,18 @@ class TestBlockStructureTransformers(ChildrenMapTestMixin, TestCase):
                 self.transformers.verify_versions(block_structure)
             self.transformers.collect(block_structure)
             assert self.transformers.verify_versions(block_structure)
+
+    def test_transform_signature(self):
+        self.add_mock_transformer()
+        block_structure = MagicMock()
+        assert self.transformers.transform_signature(block_structure) is None
+
+        with patch.object(MockTransformer, 'transform_signature', return_value=('user',)), \
+                patch.object(MockFilteringTransformer, 'transform_signature', return_value=False):
+            assert self.transformers.transform_signature(block_structure) == (
+                ('MockFilteringTransformer', False),
+                ('MockTransformer', ('user',)),
+            )
+
+        with patch.object(MockTransformer, 'transform_signature', return_value=('user',)):
+            assert self.transformers.transform_signature(block_structure) is None
@@ -157,6 +157,30 @@ class BlockStructureTransformer:
         """
         raise NotImplementedError
 
+    def transform_signature(self, usage_info, block_structure):
+        """
+        Returns a hashable value that identifies the result of this
+        transformer's transform for the given usage_info, or None if
+        the result is specific to the usage_info.
+
+        Block structures may be transformed once for all usage_infos
+        (for example, all users of a course) whose transformers return
+        equal signatures, and the result shared among them.  So the
+        signature must capture everything about the usage_info that
+        the transform depends on, such as the user's access or group
+        memberships.  Transformers whose transform depends on or
+        modifies individual user state return None, which is the
+        default.
+
+        Arguments:
+            usage_info (any negotiated type) - As in transform.
+
+            block_structure (BlockStructureBlockData) - The collected
+                block structure that is to be transformed.  It must
+                not be modified.
+        """
+        return None
+
 
 class FilteringTransformerMixin(BlockStructureTransformer):
     """
@@ -103,6 +103,24 @@ class BlockStructureTransformers:
             )
         return True
 
+    def transform_signature(self, block_structure):
+        """
+        Returns a hashable signature of the result of transforming the
+        given collected block structure for this collection's
+        usage_info, or None if any of the transformers' results is
+        specific to it.  See BlockStructureTransformer.transform_signature.
+        """
+        signature = []
+        for transformer in self._transformers['supports_filter'] + self._transformers['no_filter']:
+            # Transformers from other packages may not extend
+            # BlockStructureTransformer.
+            get_signature = getattr(transformer, 'transform_signature', None)
+            transformer_signature = get_signature(self.usage_info, block_structure) if get_signature else None
+            if transformer_signature is None:
+                return None
+            signature.append((transformer.name(), transformer_signature))
+        return tuple(signature)
+
     def transform(self, block_structure):
         """
         The given block structure is transformed by each transformer in the
@@ -0,0 +1,167 @@
+"""
+Course outlines compiled into bitsets, to evaluate user outlines with set operations on integers.
+
+A CompiledCourseOutline numbers the sections and sequences of a version of a
+CourseOutlineData, and precomputes the bitsets of the items hidden by their
+visibility and of the items restricted to each user partition group. The
+OutlineProcessors which remove content based on the groups of a user then only
+need to combine a few bitsets, and the outlines trimmed of the removed content
+are cached by the set of removed items, which is shared by all of the users in
+the same groups.
+"""
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Dict, FrozenSet, Iterable, Optional
+
+from opaque_keys.edx.keys import UsageKey
+
+from ..data import CourseOutlineData
+
+# The number of compiled course outlines kept by each process.
+COMPILED_OUTLINE_CACHE_SIZE = 100
+
+# The number of trimmed outlines kept by each compiled course outline.
+TRIMMED_OUTLINE_CACHE_SIZE = 64
+
+
+class CompiledCourseOutline:
+    """
+    A CourseOutlineData whose sections and sequences are indexed by the bits of integers.
+
+    The bitsets ("masks") of a compiled outline only refer to its own items. A
+    section removed from an outline removes all of its sequences as well.
+    """
+    def __init__(self, outline: CourseOutlineData):
+        self.outline = outline
+        self._usage_keys = []
+        self._bits = {}
+        # Pairs of the bit of each section and of the mask of its sequences.
+        self._sections = []
+        # Mask of the items hidden by their VisibilityData.
+        self.hidden = 0
+        # Mask of the items with user partition groups.
+        self.partitioned = 0
+        # Masks of the items restricted to groups of each partition, and of the items allowed to each group.
+        self._restricted = defaultdict(int)
+        self._allowed = defaultdict(int)
+
+        for section in outline.sections:
+            section_bit = self._add(section)
+            sequences_mask = 0
+            for sequence in section.sequences:
+                sequences_mask |= self._add(sequence)
+            self._sections.append((section_bit, sequences_mask))
+
+        self._trimmed_outlines = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _add(self, item):
+        """
+        Returns the bit of a new section or sequence, after recording its visibility and partition groups.
+        """
+        bit = 1 << len(self._usage_keys)
+        self._usage_keys.append(item.usage_key)
+        self._bits[item.usage_key] = bit
+        if item.visibility.hide_from_toc or item.visibility.visible_to_staff_only:
+            self.hidden |= bit
+        if item.user_partition_groups:
+            self.partitioned |= bit
+            for partition_id, group_ids in item.user_partition_groups.items():
+                if group_ids:
+                    self._restricted[partition_id] |= bit
+                for group_id in group_ids:
+                    self._allowed[partition_id, group_id] |= bit
+        return bit
+
+    def mask(self, usage_keys: Iterable[UsageKey]) -> int:
+        """
+        Returns the mask of the usage keys, ignoring those which aren't in the outline.
+        """
+        mask = 0
+        for usage_key in usage_keys:
+            mask |= self._bits.get(usage_key, 0)
+        return mask
+
+    def usage_keys(self, mask: int) -> FrozenSet[UsageKey]:
+        """
+        Returns the usage keys of the items of the mask.
+        """
+        usage_keys = []
+        while mask:
+            lowest_bit = mask & -mask
+            usage_keys.append(self._usage_keys[lowest_bit.bit_length() - 1])
+            mask ^= lowest_bit
+        return frozenset(usage_keys)
+
+    def with_sequences(self, mask: int) -> int:
+        """
+        Returns the mask with the sequences of each of its sections.
+        """
+        for section_bit, sequences_mask in self._sections:
+            if mask & section_bit:
+                mask |= sequences_mask
+        return mask
+
+    def excluded_from_group(self, partition_id: int, group_id: Optional[int]) -> int:
+        """
+        Returns the mask of the items restricted to groups of the partition other than the given group,
+        or to any group of the partition if the group is None, and of their sequences.
+        """
+        excluded = self._restricted.get(partition_id, 0)
+        if group_id is not None:
+            excluded &= ~self._allowed.get((partition_id, group_id), 0)
+        return self.with_sequences(excluded)
+
+    def excluded_from_groups(self, group_ids: Dict[int, int]) -> int:
+        """
+        Returns the mask of the items with user partition groups which allow none of the groups of
+        the partitions given by their ids, and of their sequences.
+        """
+        allowed = 0
+        for partition_id, group_id in group_ids.items():
+            allowed |= self._allowed.get((partition_id, group_id), 0)
+        return self.with_sequences(self.partitioned & ~allowed)
+
+    def remove(self, mask: int) -> CourseOutlineData:
+        """
+        Returns the outline without the items of the mask, as CourseOutlineData.remove.
+
+        The trimmed outlines are cached by mask, so that all of the users from whom the same
+        items are removed share the same trimmed outline.
+        """
+        with self._lock:
+            trimmed_outline = self._trimmed_outlines.get(mask)
+            if trimmed_outline is not None:
+                self._trimmed_outlines.move_to_end(mask)
+                return trimmed_outline
+        trimmed_outline = self.outline.remove(self.usage_keys(mask))
+        with self._lock:
+            self._trimmed_outlines[mask] = trimmed_outline
+            while len(self._trimmed_outlines) > TRIMMED_OUTLINE_CACHE_SIZE:
+                self._trimmed_outlines.popitem(last=False)
+        return trimmed_outline
+
+
+_compiled_outlines = OrderedDict()
+_compiled_outlines_lock = threading.Lock()
+
+
+def compile_course_outline(outline: CourseOutlineData) -> CompiledCourseOutline:
+    """
+    Returns the CompiledCourseOutline of the outline, which is kept by the process for the
+    version of its course as long as the same outline object is given.
+    """
+    cache_key = (outline.course_key, outline.published_version)
+    with _compiled_outlines_lock:
+        compiled_outline = _compiled_outlines.get(cache_key)
+        if compiled_outline is not None and compiled_outline.outline is outline:
+            _compiled_outlines.move_to_end(cache_key)
+            return compiled_outline
+
+    compiled_outline = CompiledCourseOutline(outline)
+    with _compiled_outlines_lock:
+        _compiled_outlines[cache_key] = compiled_outline
+        _compiled_outlines.move_to_end(cache_key)
+        while len(_compiled_outlines) > COMPILED_OUTLINE_CACHE_SIZE:
+            _compiled_outlines.popitem(last=False)
+    return compiled_outline
@@ -4,7 +4,9 @@ directly. Use openedx.core.djangoapps.content.learning_sequences.api -- that
 __init__.py imports from here, and is a more stable place to import from.
 """
 import logging
-from collections import defaultdict
+import threading
+import time
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 from typing import Dict, FrozenSet, List, Optional, Union
 
@@ -15,6 +17,7 @@ from edx_django_utils.monitoring import function_trace, set_custom_attribute
 from opaque_keys import OpaqueKey
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import LibraryLocator
+from common.djangoapps.student.roles import BulkRoleCache
 from openedx.core import types
 from openedx.core.djangoapps.content.learning_sequences.api.processors.team_partition_groups \
     import TeamPartitionGroupsOutlineProcessor
@@ -41,6 +44,7 @@ from ..models import (
     PublishReport,
     UserPartitionGroup
 )
+from .compiled_outline import compile_course_outline
 from .permissions import can_see_all_content
 from .processors.cohort_partition_groups import CohortPartitionGroupsOutlineProcessor
 from .processors.content_gating import ContentGatingOutlineProcessor
@@ -53,6 +57,14 @@ from .processors.visibility import VisibilityOutlineProcessor
 
 log = logging.getLogger(__name__)
 
+# Course outlines are kept by each process in front of the TieredCache, for as
+# long as in the TieredCache.
+OUTLINE_CACHE_SIZE = 100
+OUTLINE_CACHE_TIMEOUT = 300
+
+_outline_cache = OrderedDict()
+_outline_cache_lock = threading.Lock()
+
 # Public API...
 __all__ = [
     'get_content_errors',
@@ -60,6 +72,7 @@ __all__ = [
     'get_course_outline',
     'get_user_course_outline',
     'get_user_course_outline_details',
+    'get_user_course_outlines',
     'key_supports_outlines',
     'replace_course_outline',
 ]
@@ -114,14 +127,27 @@ def get_course_outline(course_key: CourseKey) -> CourseOutlineData:
     set_custom_attribute('learning_sequences.api.course_id', str(course_key))
     course_context = _get_course_context_for_outline(course_key)
 
-    # Check to see if it's in the cache.
-    cache_key = "learning_sequences.api.get_course_outline.v2.{}.{}".format(
-        course_context.learning_context.context_key, course_context.learning_context.published_version
-    )
+    # Check to see if it's in the cache of this process, then in the
+    # TieredCache. Both are keyed by the current published version, so that
+    # values are never stale. The process cache also checks when the
+    # LearningContext was last modified, since a version may be replaced.
+    learning_context = course_context.learning_context
+    context_key = learning_context.context_key
+    published_version = learning_context.published_version
+    outline_data = _get_outline_from_process_cache(learning_context)
+    if outline_data is not None:
+        set_custom_attribute('learning_sequences.api.get_course_outline.cache', 'process')
+        return outline_data
+
+    cache_key = "learning_sequences.api.get_course_outline.v2.{}.{}".format(context_key, published_version)
     outline_cache_result = TieredCache.get_cached_response(cache_key)
     if outline_cache_result.is_found:
+        set_custom_attribute('learning_sequences.api.get_course_outline.cache', 'tiered')
+        _set_outline_in_process_cache(learning_context, outline_cache_result.value)
         return outline_cache_result.value
 
+    set_custom_attribute('learning_sequences.api.get_course_outline.cache', 'miss')
+
     # Fetch model data, and remember that empty Sections should still be
     # represented (so query CourseSection explicitly instead of relying only on
     # select_related from CourseSectionSequence).
@@ -192,11 +218,59 @@ def get_course_outline(course_key: CourseKey) -> CourseOutlineData:
         self_paced=course_context.self_paced,
         course_visibility=CourseVisibility(course_context.course_visibility),
     )
-    TieredCache.set_all_tiers(cache_key, outline_data, 300)
+    TieredCache.set_all_tiers(cache_key, outline_data, OUTLINE_CACHE_TIMEOUT)
+    _set_outline_in_process_cache(learning_context, outline_data)
 
     return outline_data
 
 
+def _get_outline_from_process_cache(learning_context: LearningContext) -> Optional[CourseOutlineData]:
+    """
+    Return the CourseOutlineData of the current state of the LearningContext
+    kept by this process, or None.
+    """
+    course_key = learning_context.context_key
+    with _outline_cache_lock:
+        cached = _outline_cache.get(course_key)
+        if cached is None:
+            return None
+        expiration, modified, outline_data = cached
+        if (
+            outline_data.published_version != learning_context.published_version or
+            modified != learning_context.modified or
+            expiration < time.monotonic()
+        ):
+            del _outline_cache[course_key]
+            return None
+        _outline_cache.move_to_end(course_key)
+        return outline_data
+
+
+def _set_outline_in_process_cache(learning_context: LearningContext, outline_data: CourseOutlineData):
+    """
+    Keep the CourseOutlineData of the LearningContext in this process,
+    replacing any other version of the course.
+
+    CourseOutlineData is immutable, so the same object is returned to all callers.
+    """
+    course_key = learning_context.context_key
+    with _outline_cache_lock:
+        _outline_cache[course_key] = (
+            time.monotonic() + OUTLINE_CACHE_TIMEOUT, learning_context.modified, outline_data
+        )
+        _outline_cache.move_to_end(course_key)
+        while len(_outline_cache) > OUTLINE_CACHE_SIZE:
+            _outline_cache.popitem(last=False)
+
+
+def _clear_outline_from_process_cache(course_key: CourseKey):
+    """
+    Forget the CourseOutlineData kept by this process for the course.
+    """
+    with _outline_cache_lock:
+        _outline_cache.pop(course_key, None)
+
+
 def _get_user_partition_groups_from_qset(upg_qset) -> Dict[int, FrozenSet[int]]:
     """
     Given a QuerySet of UserPartitionGroup, return a mapping of UserPartition
@@ -272,6 +346,43 @@ def get_user_course_outline(course_key: CourseKey,
     return user_course_outline
 
 
+@function_trace('learning_sequences.api.get_user_course_outlines')
+def get_user_course_outlines(course_key: CourseKey,
+                             users: List[types.User],
+                             at_time: datetime) -> List[UserCourseOutlineData]:
+    """
+    Get the outlines customized for many users of a course at a particular time.
+
+    This returns the same outlines as get_user_course_outline would for each of
+    the `users`, in the same order. The enrollment, cohort, team and milestone
+    data of the OutlineProcessors is loaded for all of the users at once; the
+    other processors still load their data one user at a time. It is meant for
+    batch jobs which need the outlines of many learners, rather than for the
+    requesting user.
+    """
+    set_custom_attribute('learning_sequences.api.num_users', len(users))
+
+    full_course_outline = get_course_outline(course_key)
+
+    # The roles of the users decide who can see all content, and who are beta testers.
+    BulkRoleCache.prefetch([user for user in users if user.is_authenticated])
+
+    processors_by_user = [{} for _ in users]
+    for name, processor_cls in _get_outline_processor_classes():
+        processors = [processor_cls(course_key, user, at_time) for user in users]
+        with function_trace(f'learning_sequences.api.outline_processors.{name}.bulk_load_data'):
+            processor_cls.bulk_load_data(processors, full_course_outline)
+        for user_processors, processor in zip(processors_by_user, processors):
+            user_processors[name] = processor
+
+    return [
+        _get_user_course_outline_from_processors(
+            full_course_outline, user, at_time, user_processors, can_see_all_content(user, course_key)
+        )
+        for user, user_processors in zip(users, processors_by_user)
+    ]
+
+
 @function_trace('learning_sequences.api.get_user_course_outline_details')
 def get_user_course_outline_details(course_key: CourseKey,
                                     user: types.User,
@@ -319,11 +430,29 @@ def _get_user_course_outline_and_processors(course_key: CourseKey,  # lint-amnes
     full_course_outline = get_course_outline(course_key)
     user_can_see_all_content = can_see_all_content(user, course_key)
 
+    processors = {}
+    for name, processor_cls in _get_outline_processor_classes():
+        # Future optimization: This should be parallelizable (don't rely on a
+        # particular ordering).
+        processor = processor_cls(course_key, user, at_time)
+        processors[name] = processor
+        processor.load_data(full_course_outline)
+
+    user_course_outline = _get_user_course_outline_from_processors(
+        full_course_outline, user, at_time, processors, user_can_see_all_content
+    )
+    return user_course_outline, processors
+
+
+def _get_outline_processor_classes():
+    """
+    Return the (name, OutlineProcessor class) pairs run for user outlines.
+    """
     # These are processors that alter which sequences are visible to students.
     # For instance, certain sequences that are intentionally hidden or not yet
     # released. These do not need to be run for staff users. This is where we
     # would add in pluggability for OutlineProcessors down the road.
-    processor_classes = [
+    return [
         ('content_gating', ContentGatingOutlineProcessor),
         ('milestones', MilestonesOutlineProcessor),
         ('schedule', ScheduleOutlineProcessor),
@@ -335,30 +464,35 @@ def _get_user_course_outline_and_processors(course_key: CourseKey,  # lint-amnes
         ('teams_partitions', TeamPartitionGroupsOutlineProcessor),
     ]
 
+
+def _get_user_course_outline_from_processors(full_course_outline: CourseOutlineData,
+                                             user: types.User,
+                                             at_time: datetime,
+                                             processors: Dict,
+                                             user_can_see_all_content: bool) -> UserCourseOutlineData:
+    """
+    Trim the full outline with outline processors that have loaded their data.
+    """
     # Run each OutlineProcessor in order to figure out what items we have to
-    # remove from the CourseOutline.
-    processors = {}
-    usage_keys_to_remove = set()
+    # remove from the CourseOutline. The items to remove are combined as a
+    # bitset of the compiled outline, by which the trimmed outlines are cached.
+    compiled_outline = compile_course_outline(full_course_outline)
+    usage_keys_to_remove = 0
     inaccessible_sequences = set()
-    for name, processor_cls in processor_classes:
-        # Future optimization: This should be parallelizable (don't rely on a
-        # particular ordering).
-        processor = processor_cls(course_key, user, at_time)
-        processors[name] = processor
-        processor.load_data(full_course_outline)
-        if not user_can_see_all_content:
+    if not user_can_see_all_content:
+        for name, processor in processors.items():
             # function_trace lets us see how expensive each processor is being.
             with function_trace(f'learning_sequences.api.outline_processors.{name}'):
                 processor_usage_keys_removed = processor.usage_keys_to_remove(full_course_outline)
                 processor_inaccessible_sequences = processor.inaccessible_sequences(full_course_outline)
-                usage_keys_to_remove |= processor_usage_keys_removed
+                usage_keys_to_remove |= compiled_outline.mask(processor_usage_keys_removed)
                 inaccessible_sequences |= processor_inaccessible_sequences
 
     # Open question: Does it make sense to remove a Section if it has no Sequences in it?
-    trimmed_course_outline = full_course_outline.remove(usage_keys_to_remove)
+    trimmed_course_outline = compiled_outline.remove(usage_keys_to_remove)
     accessible_sequences = frozenset(set(trimmed_course_outline.sequences) - inaccessible_sequences)
 
-    user_course_outline = UserCourseOutlineData(
+    return UserCourseOutlineData(
         base_outline=full_course_outline,
         user=user,
         at_time=at_time,
@@ -379,8 +513,6 @@ def _get_user_course_outline_and_processors(course_key: CourseKey,  # lint-amnes
         }
     )
 
-    return user_course_outline, processors
-
 
 @function_trace('learning_sequences.api.replace_course_outline')
 def replace_course_outline(course_outline: CourseOutlineData,
@@ -412,6 +544,10 @@ def replace_course_outline(course_outline: CourseOutlineData,
         _update_course_section_sequences(course_outline, course_context)
         _update_publish_report(course_outline, content_errors, course_context)
 
+    # A version may be replaced with different content, e.g. when outlines are
+    # regenerated, so this process must not keep serving the previous one.
+    _clear_outline_from_process_cache(course_outline.course_key)
+
 
 def _update_course_context(course_outline: CourseOutlineData):
     """
@@ -4,6 +4,7 @@ of adding new logic that manipulates the Course Outline for a given student.
 """
 import logging
 from datetime import datetime
+from typing import List
 
 from opaque_keys.edx.keys import CourseKey  # lint-amnesty, pylint: disable=unused-import
 from openedx.core import types
@@ -26,6 +27,11 @@ class OutlineProcessor:
         * load_data
         * inaccessible_sequences, usage_keys_to_remove (no ordering guarantee)
 
+    When the outlines of many users are requested at once, the processors of
+    all of the users are instead passed to bulk_load_data, which calls load_data
+    for each of them unless a subclass overrides it to fetch the data of all of
+    the users in a few queries.
+
     Also note that you should not assume any ordering relative to any other
     OutlineProcessor. Once async support works its way fully into Django, we'll
     likely even want to run these in parallel.
@@ -61,6 +67,19 @@ class OutlineProcessor:
         """
         pass  # lint-amnesty, pylint: disable=unnecessary-pass
 
+    @classmethod
+    def bulk_load_data(cls, processors: List['OutlineProcessor'], full_course_outline: CourseOutlineData):
+        """
+        Fetch the data of the processors of many users for the same course.
+
+        The processors were all created with the same course_key and at_time,
+        and must be left in the same state as if load_data had been called for
+        each of them. Override this to replace the per-user queries of load_data
+        with a few queries for all of the users.
+        """
+        for processor in processors:
+            processor.load_data(full_course_outline)
+
     def inaccessible_sequences(self, full_course_outline: CourseOutlineData):  # pylint: disable=unused-argument
         """
         Return a set/frozenset of Sequence UsageKeys that are not accessible.
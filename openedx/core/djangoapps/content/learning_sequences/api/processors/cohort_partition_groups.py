@@ -7,11 +7,13 @@ from opaque_keys.edx.keys import CourseKey
 
 from openedx.core import types
 from openedx.core.djangoapps.course_groups.cohorts import (
+    bulk_cache_cohorts,
     get_cohort,
     get_cohorted_user_partition_id,
     get_group_info_for_cohort,
 )
 
+from ..compiled_outline import compile_course_outline
 from .base import OutlineProcessor
 
 log = logging.getLogger(__name__)
@@ -43,6 +45,33 @@ class CohortPartitionGroupsOutlineProcessor(OutlineProcessor):
             if user_cohort:
                 self.user_cohort_group_id, _ = get_group_info_for_cohort(user_cohort)
 
+    @classmethod
+    def bulk_load_data(cls, processors, full_course_outline) -> None:
+        """
+        Load the cohorted partition id once, and the group ids of the users from
+        their cohorts, fetched in one query.
+        """
+        if not processors:
+            return
+        course_key = processors[0].course_key
+        cohorted_partition_id = get_cohorted_user_partition_id(course_key)
+        if cohorted_partition_id:
+            bulk_cache_cohorts(
+                course_key, [processor.user for processor in processors if processor.user.is_authenticated]
+            )
+
+        for processor in processors:
+            processor.cohorted_partition_id = cohorted_partition_id
+            if not cohorted_partition_id:
+                continue
+            # Users without a cohort yet are assigned one, as in load_data.
+            user_cohort = (
+                get_cohort(processor.user, course_key, use_cached=True) or
+                get_cohort(processor.user, course_key)
+            )
+            if user_cohort:
+                processor.user_cohort_group_id, _ = get_group_info_for_cohort(user_cohort, use_cached=True)
+
     def _is_user_excluded_by_partition_group(self, user_partition_groups) -> bool:
         """
         Is the user part of the group to which the block is restricting content?
@@ -72,17 +101,9 @@ class CohortPartitionGroupsOutlineProcessor(OutlineProcessor):
         if not self.cohorted_partition_id:
             return frozenset()
 
-        removed_usage_keys = set()
-        for section in full_course_outline.sections:
-            remove_all_children = False
-            if self._is_user_excluded_by_partition_group(
-                section.user_partition_groups
-            ):
-                removed_usage_keys.add(section.usage_key)
-                remove_all_children = True
-            for seq in section.sequences:
-                if remove_all_children or self._is_user_excluded_by_partition_group(
-                    seq.user_partition_groups
-                ):
-                    removed_usage_keys.add(seq.usage_key)
-        return removed_usage_keys
+        # The same items as those for which _is_user_excluded_by_partition_group
+        # is True, and their sequences, from the bitsets of the compiled outline.
+        compiled_outline = compile_course_outline(full_course_outline)
+        return compiled_outline.usage_keys(
+            compiled_outline.excluded_from_group(self.cohorted_partition_id, self.user_cohort_group_id)
+        )
@@ -12,6 +12,16 @@ class EnrollmentOutlineProcessor(OutlineProcessor):
     """
     Simple OutlineProcessor that removes items based on Enrollment and course visibility setting.
     """
+    @classmethod
+    def bulk_load_data(cls, processors, full_course_outline):
+        """
+        Pre-fetch the enrollment states of all of the users in one query.
+        """
+        if processors:
+            users = [processor.user for processor in processors if processor.user.is_authenticated]
+            CourseEnrollment.bulk_fetch_enrollment_states(users, processors[0].course_key)
+        super().bulk_load_data(processors, full_course_outline)
+
     def usage_keys_to_remove(self, full_course_outline):
         """
         Return sequences/sections to be removed
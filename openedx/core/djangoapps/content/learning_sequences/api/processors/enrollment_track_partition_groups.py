@@ -6,6 +6,8 @@ from typing import Dict
 from opaque_keys.edx.keys import CourseKey
 from openedx.core import types
 
+from common.djangoapps.student.models import CourseEnrollment
+
 from xmodule.partitions.enrollment_track_partition_generator import (  # lint-amnesty, pylint: disable=wrong-import-order
     create_enrollment_track_partition_with_course_id
 )
@@ -15,6 +17,7 @@ from xmodule.partitions.partitions import (  # lint-amnesty, pylint: disable=wro
 from xmodule.partitions.partitions_service import get_user_partition_groups  # lint-amnesty, pylint: disable=wrong-import-order
 from xmodule.partitions.partitions import Group  # lint-amnesty, pylint: disable=wrong-import-order
 
+from ..compiled_outline import compile_course_outline
 from .base import OutlineProcessor
 
 log = logging.getLogger(__name__)
@@ -47,6 +50,27 @@ class EnrollmentTrackPartitionGroupsOutlineProcessor(OutlineProcessor):
         # TODO: fix type annotation: https://github.com/openedx/tcril-engineering/issues/313
         self.user_group = self.enrollment_track_groups.get(ENROLLMENT_TRACK_PARTITION_ID)  # type: ignore
 
+    @classmethod
+    def bulk_load_data(cls, processors, full_course_outline) -> None:
+        """
+        Pull the track groups of all of the users from their enrollments, fetched in one query.
+        """
+        if not processors:
+            return
+        course_key = processors[0].course_key
+        users = [processor.user for processor in processors if processor.user.is_authenticated]
+        CourseEnrollment.bulk_fetch_enrollment_states(users, course_key)
+
+        user_partition = create_enrollment_track_partition_with_course_id(course_key)
+        for processor in processors:
+            processor.enrollment_track_groups = get_user_partition_groups(
+                course_key,
+                [user_partition],
+                processor.user,
+                partition_dict_key='id'
+            )
+            processor.user_group = processor.enrollment_track_groups.get(ENROLLMENT_TRACK_PARTITION_ID)  # type: ignore
+
     def _is_user_excluded_by_partition_group(self, user_partition_groups):
         """
         Is the user part of the group to which the block is restricting content?
@@ -74,17 +98,12 @@ class EnrollmentTrackPartitionGroupsOutlineProcessor(OutlineProcessor):
         entirely instead of making them visible-but-inaccessible (like
         ScheduleOutlineProcessor does).
         """
-        removed_usage_keys = set()
-        for section in full_course_outline.sections:
-            remove_all_children = False
-            if self._is_user_excluded_by_partition_group(
-                section.user_partition_groups
-            ):
-                removed_usage_keys.add(section.usage_key)
-                remove_all_children = True
-            for seq in section.sequences:
-                if remove_all_children or self._is_user_excluded_by_partition_group(
-                    seq.user_partition_groups
-                ):
-                    removed_usage_keys.add(seq.usage_key)
-        return removed_usage_keys
+        if not self.user_group:
+            return frozenset()
+
+        # The same items as those for which _is_user_excluded_by_partition_group
+        # is True, and their sequences, from the bitsets of the compiled outline.
+        compiled_outline = compile_course_outline(full_course_outline)
+        return compiled_outline.usage_keys(
+            compiled_outline.excluded_from_group(ENROLLMENT_TRACK_PARTITION_ID, self.user_group.id)
+        )
@@ -1,7 +1,11 @@
 # lint-amnesty, pylint: disable=missing-module-docstring
 import logging
+from datetime import datetime
 
 from django.contrib.auth import get_user_model
+from opaque_keys.edx.keys import CourseKey
+from openedx.core import types
+
 from common.djangoapps.util import milestones_helpers
 
 from .base import OutlineProcessor
@@ -17,6 +21,29 @@ class MilestonesOutlineProcessor(OutlineProcessor):
     This does not include Entrance Exams (see `ContentGatingOutlineProcessor`),
     or Special Exams (see `SpecialExamsOutlineProcessor`)
     """
+    def __init__(self, course_key: CourseKey, user: types.User, at_time: datetime):
+        super().__init__(course_key, user, at_time)
+        # The content ids with pending milestones, when fetched by bulk_load_data.
+        self.pending_milestone_content_ids = None
+
+    @classmethod
+    def bulk_load_data(cls, processors, full_course_outline):
+        """
+        Fetch the pending milestones of all of the users in two queries.
+        """
+        super().bulk_load_data(processors, full_course_outline)
+        if not processors:
+            return
+        milestones_by_user_id = milestones_helpers.get_course_content_milestones_for_users(
+            str(processors[0].course_key),
+            [processor.user.id for processor in processors],
+            'requires',
+        )
+        for processor in processors:
+            processor.pending_milestone_content_ids = frozenset(
+                milestone['content_id'] for milestone in milestones_by_user_id[processor.user.id]
+            )
+
     def inaccessible_sequences(self, full_course_outline):
         """
         Returns the set of sequence usage keys for which the
@@ -33,6 +60,8 @@ class MilestonesOutlineProcessor(OutlineProcessor):
         return inaccessible
 
     def has_pending_milestones(self, usage_key):
+        if self.pending_milestone_content_ids is not None:
+            return str(usage_key) in self.pending_milestone_content_ids
         return bool(milestones_helpers.get_course_content_milestones(
             str(self.course_key),
             str(usage_key),
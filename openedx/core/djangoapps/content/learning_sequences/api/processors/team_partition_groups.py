@@ -2,12 +2,16 @@
 Outline processors for applying team user partition groups.
 """
 import logging
+from collections import defaultdict
 from datetime import datetime
 from typing import Dict
 
 from opaque_keys.edx.keys import CourseKey
 
+from lms.djangoapps.courseware.masquerade import get_course_masquerade
+from lms.djangoapps.teams.models import CourseTeamMembership
 from openedx.core import types
+from openedx.core.djangoapps.content.learning_sequences.api.compiled_outline import compile_course_outline
 from openedx.core.djangoapps.content.learning_sequences.api.processors.base import OutlineProcessor
 from openedx.core.lib.teams_config import create_team_set_partitions_with_course_id, CONTENT_GROUPS_FOR_TEAMS
 from xmodule.partitions.partitions import Group
@@ -48,6 +52,44 @@ class TeamPartitionGroupsOutlineProcessor(OutlineProcessor):
             partition_dict_key="id",
         )
 
+    @classmethod
+    def bulk_load_data(cls, processors, full_course_outline) -> None:
+        """
+        Pull the team groups of all of the users from their team memberships, fetched in one query.
+        """
+        if not processors or not CONTENT_GROUPS_FOR_TEAMS.is_enabled(processors[0].course_key):
+            return
+
+        course_key = processors[0].course_key
+        partitions_by_team_set_id = {
+            str(partition.parameters["team_set_id"]): partition
+            for partition in create_team_set_partitions_with_course_id(course_key) or []
+        }
+
+        # Masquerading and anonymous users get their groups from the partition scheme.
+        bulk_processors = []
+        for processor in processors:
+            if processor.user.is_authenticated and not get_course_masquerade(processor.user, course_key):
+                bulk_processors.append(processor)
+            else:
+                processor.load_data(full_course_outline)
+
+        groups_by_user_id = defaultdict(dict)
+        memberships = CourseTeamMembership.objects.filter(
+            team__course_id=course_key,
+            team__topic_id__in=list(partitions_by_team_set_id),
+            user__in=[processor.user for processor in bulk_processors],
+        ).select_related('team').order_by('id')
+        for membership in memberships:
+            partition = partitions_by_team_set_id[membership.team.topic_id]
+            # A user belongs to at most one team of a team-set, as in TeamPartitionScheme.
+            groups_by_user_id[membership.user_id].setdefault(
+                partition.id, Group(membership.team.id, str(membership.team.name))
+            )
+
+        for processor in bulk_processors:
+            processor.current_user_groups = groups_by_user_id[processor.user.id]
+
     def _is_user_excluded_by_partition_group(self, user_partition_groups):
         """
         Is the user part of the group to which the block is restricting content?
@@ -83,17 +125,12 @@ class TeamPartitionGroupsOutlineProcessor(OutlineProcessor):
         removed from the course outline based on the user's team membership.
         In this context, a team within a team-set maps to a user partition group.
         """
-        removed_usage_keys = set()
-        for section in full_course_outline.sections:
-            remove_all_children = False
-            if self._is_user_excluded_by_partition_group(
-                section.user_partition_groups
-            ):
-                removed_usage_keys.add(section.usage_key)
-                remove_all_children = True
-            for seq in section.sequences:
-                if remove_all_children or self._is_user_excluded_by_partition_group(
-                    seq.user_partition_groups
-                ):
-                    removed_usage_keys.add(seq.usage_key)
-        return removed_usage_keys
+        if not CONTENT_GROUPS_FOR_TEAMS.is_enabled(self.course_key):
+            return frozenset()
+
+        # The same items as those for which _is_user_excluded_by_partition_group
+        # is True, and their sequences, from the bitsets of the compiled outline.
+        compiled_outline = compile_course_outline(full_course_outline)
+        return compiled_outline.usage_keys(compiled_outline.excluded_from_groups({
+            partition_id: group.id for partition_id, group in self.current_user_groups.items()
+        }))
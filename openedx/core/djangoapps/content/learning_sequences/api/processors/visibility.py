@@ -2,6 +2,7 @@
 Simple OutlineProcessor that removes items based on VisibilityData.
 """
 
+from ..compiled_outline import compile_course_outline
 from .base import OutlineProcessor
 
 
@@ -26,17 +27,5 @@ class VisibilityOutlineProcessor(OutlineProcessor):
         and c) it simplifies REST API clients to never have to deal with the
         concept at all.
         """
-        def should_remove(visibility):
-            return visibility.hide_from_toc or visibility.visible_to_staff_only
-
-        sections_to_remove = {
-            sec.usage_key
-            for sec in full_course_outline.sections
-            if should_remove(sec.visibility)
-        }
-        seqs_to_remove = {
-            seq.usage_key
-            for seq in full_course_outline.sequences.values()
-            if should_remove(seq.visibility)
-        }
-        return frozenset(sections_to_remove | seqs_to_remove)
+        compiled_outline = compile_course_outline(full_course_outline)
+        return compiled_outline.usage_keys(compiled_outline.hidden)
@@ -0,0 +1,115 @@
+"""
+Tests of the bitsets of compiled course outlines.
+"""
+from datetime import datetime, timezone
+from unittest import TestCase
+
+import attr
+from opaque_keys.edx.keys import CourseKey
+
+from ...data import CourseOutlineData, CourseVisibility, VisibilityData
+from ..compiled_outline import CompiledCourseOutline, compile_course_outline
+from .test_data import generate_sections
+
+
+class CompiledCourseOutlineTestCase(TestCase):
+    """
+    Tests of CompiledCourseOutline.
+    """
+    def setUp(self):
+        super().setUp()
+        self.course_key = CourseKey.from_string("course-v1:OpenEdX+Compiled+TestRun")
+        sections = generate_sections(self.course_key, [2, 2, 1, 0])
+        # Chapter 1 is restricted to group 1 of partition 50, and its second
+        # sequence to group 2 of partition 60.
+        sections[0] = attr.evolve(
+            sections[0],
+            user_partition_groups={50: frozenset([1])},
+            sequences=[
+                sections[0].sequences[0],
+                attr.evolve(sections[0].sequences[1], user_partition_groups={60: frozenset([2])}),
+            ],
+        )
+        # The first sequence of chapter 2 is restricted to groups 1 and 2 of
+        # partition 50, and the second one is hidden.
+        sections[1] = attr.evolve(
+            sections[1],
+            sequences=[
+                attr.evolve(sections[1].sequences[0], user_partition_groups={50: frozenset([1, 2])}),
+                attr.evolve(sections[1].sequences[1], visibility=VisibilityData(visible_to_staff_only=True)),
+            ],
+        )
+        sections[2] = attr.evolve(
+            sections[2], visibility=VisibilityData(hide_from_toc=True), user_partition_groups=None,
+        )
+        self.outline = CourseOutlineData(
+            course_key=self.course_key,
+            title="Compiled Test Course",
+            published_at=datetime(2026, 10, 17, tzinfo=timezone.utc),
+            published_version="6a0c4b69dd593d82fe20c0de",
+            entrance_exam_id=None,
+            days_early_for_beta=None,
+            sections=sections,
+            self_paced=False,
+            course_visibility=CourseVisibility.PRIVATE,
+        )
+        self.compiled_outline = CompiledCourseOutline(self.outline)
+
+    def _keys(self, *block_ids):
+        return frozenset(
+            self.course_key.make_usage_key('chapter' if block_id.startswith('ch') else 'sequential', block_id)
+            for block_id in block_ids
+        )
+
+    def test_mask(self):
+        usage_keys = self._keys('ch_1', 'seq_2_1', 'seq_3_0')
+        mask = self.compiled_outline.mask(usage_keys | {self.course_key.make_usage_key('sequential', 'other')})
+        assert bin(mask).count('1') == 3
+        assert self.compiled_outline.usage_keys(mask) == usage_keys
+        assert self.compiled_outline.usage_keys(0) == frozenset()
+
+    def test_hidden(self):
+        assert self.compiled_outline.usage_keys(self.compiled_outline.hidden) == self._keys('seq_2_1', 'ch_3')
+
+    def test_excluded_from_group(self):
+        def excluded(partition_id, group_id):
+            return self.compiled_outline.usage_keys(self.compiled_outline.excluded_from_group(partition_id, group_id))
+
+        assert excluded(50, 1) == frozenset()
+        assert excluded(50, 2) == self._keys('ch_1', 'seq_1_0', 'seq_1_1')
+        assert excluded(50, None) == self._keys('ch_1', 'seq_1_0', 'seq_1_1', 'seq_2_0')
+        assert excluded(60, 2) == frozenset()
+        assert excluded(60, 3) == self._keys('seq_1_1')
+        assert excluded(70, 1) == frozenset()
+
+    def test_excluded_from_groups(self):
+        def excluded(group_ids):
+            return self.compiled_outline.usage_keys(self.compiled_outline.excluded_from_groups(group_ids))
+
+        assert excluded({}) == self._keys('ch_1', 'seq_1_0', 'seq_1_1', 'seq_2_0')
+        assert excluded({50: 1}) == self._keys('seq_1_1')
+        assert excluded({50: 2, 60: 2}) == self._keys('ch_1', 'seq_1_0', 'seq_1_1')
+        assert excluded({50: 1, 60: 2}) == frozenset()
+
+    def test_remove(self):
+        for usage_keys in [
+            frozenset(),
+            self._keys('seq_1_0'),
+            self._keys('ch_1'),
+            self._keys('seq_2_0', 'seq_2_1'),
+            self._keys('ch_2', 'seq_3_0'),
+        ]:
+            mask = self.compiled_outline.mask(usage_keys)
+            trimmed_outline = self.compiled_outline.remove(mask)
+            assert trimmed_outline == self.outline.remove(usage_keys)
+            # Trimmed outlines are shared by all of the users from whom the same items are removed.
+            assert self.compiled_outline.remove(mask) is trimmed_outline
+
+    def test_compile_course_outline(self):
+        compiled_outline = compile_course_outline(self.outline)
+        assert compile_course_outline(self.outline) is compiled_outline
+
+        # Another outline object of the same version is compiled again.
+        other_outline = attr.evolve(self.outline)
+        assert compile_course_outline(other_outline) is not compiled_outline
+        assert compile_course_outline(other_outline).outline is other_outline
@@ -10,6 +10,7 @@ from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.db.models import signals
 from edx_proctoring.exceptions import ProctoredExamNotFoundException
+from edx_django_utils.cache import RequestCache, TieredCache
 from edx_toggles.toggles.testutils import override_waffle_flag
 from edx_when.api import set_dates_for_course
 from opaque_keys.edx.keys import CourseKey
@@ -47,11 +48,13 @@ from ...data import (
     VisibilityData,
 
 )
+from ...models import LearningContext
 from ..outlines import (
     get_content_errors,
     get_course_outline,
     get_user_course_outline,
     get_user_course_outline_details,
+    get_user_course_outlines,
     key_supports_outlines,
     replace_course_outline,
 )
@@ -158,6 +161,41 @@ class CourseOutlineTestCase(CacheIsolationTestCase):
             uncached_new_version_outline = get_course_outline(self.course_key)  # lint-amnesty, pylint: disable=unused-variable
             assert new_version_outline == new_version_outline  # lint-amnesty, pylint: disable=comparison-with-itself
 
+    def test_process_cached_response(self):
+        replace_course_outline(self.course_outline)
+        uncached_outline = get_course_outline(self.course_key)
+
+        # Outlines kept by the process are returned without going through the
+        # TieredCache, even in a new request.
+        RequestCache.clear_all_namespaces()
+        with patch.object(TieredCache, 'get_cached_response') as mock_get_cached_response:
+            with self.assertNumQueries(1):
+                assert get_course_outline(self.course_key) is uncached_outline
+        mock_get_cached_response.assert_not_called()
+
+        # Replacing the outline, even with the same version, forgets it.
+        changed_outline = attr.evolve(self.course_outline, title="Changed Roundtrip Test Course!")
+        replace_course_outline(changed_outline)
+        assert get_course_outline(self.course_key) == changed_outline
+
+        # Outlines found in the TieredCache of the request are kept by the
+        # process again.
+        replace_course_outline(changed_outline)
+        with self.assertNumQueries(1):
+            tiered_cached_outline = get_course_outline(self.course_key)
+        with patch.object(TieredCache, 'get_cached_response') as mock_get_cached_response:
+            assert get_course_outline(self.course_key) is tiered_cached_outline
+        mock_get_cached_response.assert_not_called()
+
+        # Outlines replaced by other processes, which modify the
+        # LearningContext, are no longer returned by this one.
+        LearningContext.objects.filter(context_key=self.course_key).update(modified=datetime.now(timezone.utc))
+        with patch.object(
+            TieredCache, 'get_cached_response', wraps=TieredCache.get_cached_response
+        ) as mock_get_cached_response:
+            assert get_course_outline(self.course_key) == changed_outline
+        mock_get_cached_response.assert_called_once()
+
 
 class UserCourseOutlineTestCase(CacheIsolationTestCase):
     """
@@ -229,6 +267,95 @@ class UserCourseOutlineTestCase(CacheIsolationTestCase):
         assert global_staff_outline_details.outline == global_staff_outline
 
 
+class BulkUserCourseOutlinesTestCase(CacheIsolationTestCase):
+    """
+    Tests of get_user_course_outlines, which returns the outlines of many users at once.
+    """
+
+    @classmethod
+    def setUpTestData(cls):  # lint-amnesty, pylint: disable=super-method-not-called
+        cls.course_key = CourseKey.from_string("course-v1:OpenEdX+Outline+Bulk")
+        cls.global_staff = UserFactory.create(
+            username='global_staff', email='gstaff@example.com', is_staff=True
+        )
+        cls.beta_tester = BetaTesterFactory(course_key=cls.course_key)
+        cls.anonymous_user = AnonymousUser()
+        cls.learners = [
+            UserFactory.create(username=f'learner{i}', email=f'learner{i}@example.com') for i in range(4)
+        ]
+        for learner, mode in zip(cls.learners, [CourseMode.AUDIT, CourseMode.VERIFIED, CourseMode.VERIFIED]):
+            learner.courseenrollment_set.create(course_id=cls.course_key, is_active=True, mode=mode)
+        cls.beta_tester.courseenrollment_set.create(course_id=cls.course_key, is_active=True, mode=CourseMode.AUDIT)
+        # The last learner is not enrolled.
+
+        signals.post_save.disconnect(update_masters_access_course, sender=CourseMode)
+        try:
+            CourseMode.objects.create(
+                course_id=cls.course_key,
+                mode_slug=CourseMode.VERIFIED,
+                mode_display_name='Verified Certificate',
+                min_price=50,
+            )
+        finally:
+            signals.post_save.connect(update_masters_access_course, sender=CourseMode)
+
+        # The first two learners are in cohorts linked to groups 1001 and 1002 of
+        # the partition 1000, and the other users in a cohort linked to no group.
+        CourseCohortsSettings.objects.create(course_id=cls.course_key, is_cohorted=True)
+        for learner, group_id in zip(cls.learners, [1001, 1002]):
+            cohort = CohortFactory(course_id=cls.course_key, name=f'Cohort {group_id}', users=[learner])
+            CourseUserGroupPartitionGroup(course_user_group=cohort, partition_id=1000, group_id=group_id).save()
+        CohortFactory(
+            course_id=cls.course_key,
+            name='Cohort without group',
+            users=cls.learners[2:] + [cls.beta_tester, cls.global_staff],
+        )
+
+        start_date = datetime(2021, 3, 26, tzinfo=timezone.utc)
+        set_dates_for_course(
+            cls.course_key,
+            [(cls.course_key.make_usage_key('course', 'course'), {'start': start_date})]
+        )
+        sections = generate_sections(cls.course_key, [2, 2, 1])
+        sections[0] = attr.evolve(sections[0], user_partition_groups={1000: frozenset([1001])})
+        sections[1] = attr.evolve(
+            sections[1],
+            sequences=[
+                attr.evolve(
+                    sections[1].sequences[0],
+                    user_partition_groups={ENROLLMENT_TRACK_PARTITION_ID: frozenset([2])},
+                ),
+                attr.evolve(sections[1].sequences[1], visibility=VisibilityData(visible_to_staff_only=True)),
+            ]
+        )
+        sections[2] = attr.evolve(sections[2], user_partition_groups={1000: frozenset([1002])})
+        replace_course_outline(
+            CourseOutlineData(
+                course_key=cls.course_key,
+                title="Bulk User Outlines Test Course",
+                published_at=start_date,
+                published_version="8ebece4b69dd593d82fe2026",
+                sections=sections,
+                self_paced=False,
+                days_early_for_beta=None,
+                entrance_exam_id=None,
+                course_visibility=CourseVisibility.PRIVATE,
+            )
+        )
+
+    def test_same_outlines_as_get_user_course_outline(self):
+        at_time = datetime(2021, 3, 27, tzinfo=timezone.utc)
+        users = self.learners + [self.beta_tester, self.global_staff, self.anonymous_user]
+        outlines = get_user_course_outlines(self.course_key, users, at_time)
+
+        assert outlines == [get_user_course_outline(self.course_key, user, at_time) for user in users]
+        assert [len(outline.sequences) for outline in outlines] == [2, 2, 1, 0, 0, 5, 0]
+
+    def test_no_users(self):
+        at_time = datetime(2021, 3, 27, tzinfo=timezone.utc)
+        assert not get_user_course_outlines(self.course_key, [], at_time)
+
+
 class OutlineProcessorTestCase(CacheIsolationTestCase):  # lint-amnesty, pylint: disable=missing-class-docstring
     @classmethod
     def setUpTestData(cls):  # lint-amnesty, pylint: disable=super-method-not-called
@@ -2191,3 +2318,24 @@ class TeamPartitionGroupsTestCase(OutlineProcessorTestCase):
         assert team_partition_groups_processor.usage_keys_to_remove(self.outline) == {
             self.course_key.make_usage_key('subsection', '2')
         }
+
+    @patch("lms.djangoapps.teams.team_partition_scheme.TeamsConfigurationService")
+    @patch("openedx.core.lib.teams_config._get_team_sets")
+    def test_bulk_load_data(self, team_sets_mock, team_configuration_service_mock):
+        """
+        Test that the team partition groups processor loads the same data for many users at once as for each user.
+        """
+        team_sets_mock.return_value = self.team_sets
+        team_configuration_service_mock.return_value.get_teams_configuration.teamsets = self.team_sets
+        other_student = self._create_and_enroll_learner("other_student")
+        users = [self.student, other_student, self.anonymous_user]
+
+        processors = [TeamPartitionGroupsOutlineProcessor(self.course_key, user, datetime.now()) for user in users]
+        TeamPartitionGroupsOutlineProcessor.bulk_load_data(processors, self.outline)
+
+        for user, processor in zip(users, processors):
+            user_processor = TeamPartitionGroupsOutlineProcessor(self.course_key, user, datetime.now())
+            user_processor.load_data(self.outline)
+            assert processor.current_user_groups == user_processor.current_user_groups
+        assert processors[0].current_user_groups[self.team_sets[0].user_partition_id].name == self.team_1.name
+        assert not processors[1].current_user_groups
@@ -69,7 +69,15 @@ class ContentTypeGateTransformer(BlockStructureTransformer):
             # This fallback code has a bug if UserPartitionTranformer is not being used -- it does not consider
             # inheritance from parent blocks. This is why our class docstring recommends UserPartitionTranformer.
             current_access = block_structure.get_xblock_field(block_key, 'group_access')
-        return current_access or {}
+        # The collected group_access is shared with the collected block
+        # structure, so a copy of it is returned for modification.
+        return dict(current_access or {})
+
+    def transform_signature(self, usage_info, block_structure):
+        return ContentTypeGatingConfig.enabled_for_enrollment(
+            user=usage_info.user,
+            course_key=usage_info.course_key,
+        )
 
     def transform(self, usage_info, block_structure):
         if not ContentTypeGatingConfig.enabled_for_enrollment(
@@ -0,0 +1,44 @@
+"""
+Tests for ContentTypeGateTransformer.
+"""
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from django.conf import settings
+from opaque_keys.edx.locator import CourseLocator
+
+from openedx.core.djangoapps.content.block_structure.block_structure import BlockStructureBlockData
+from openedx.core.djangoapps.content.block_structure.factory import BlockStructureFactory
+from openedx.features.content_type_gating.block_transformers import ContentTypeGateTransformer
+from openedx.features.content_type_gating.helpers import CONTENT_GATING_PARTITION_ID
+
+
+class TestContentTypeGateTransformer(TestCase):
+    """
+    Tests of the group access set by ContentTypeGateTransformer.
+    """
+
+    @patch(
+        'openedx.features.content_type_gating.block_transformers.ContentTypeGatingConfig.enabled_for_enrollment',
+        Mock(return_value=True),
+    )
+    def test_collected_group_access_unmodified(self):
+        course_key = CourseLocator('org', 'course', 'run')
+        vertical_key = course_key.make_usage_key('vertical', 'vertical')
+        problem_key = course_key.make_usage_key('problem', 'problem')
+        collected = BlockStructureBlockData(vertical_key)
+        collected._add_relation(vertical_key, problem_key)  # pylint: disable=protected-access
+        for field_name, value in (('graded', True), ('has_score', True), ('weight', 1), ('group_access', {50: [1]})):
+            collected.override_xblock_field(problem_key, field_name, value)
+
+        for _ in range(2):
+            block_structure = BlockStructureFactory.create_overlay(collected)
+            ContentTypeGateTransformer().transform(Mock(), block_structure)
+            assert block_structure.get_xblock_field(problem_key, 'group_access') == {
+                50: [1],
+                CONTENT_GATING_PARTITION_ID: [settings.CONTENT_TYPE_GATE_GROUP_IDS['full_access']],
+            }
+            assert block_structure.get_xblock_field(vertical_key, 'contains_gated_content')
+
+        assert collected.get_xblock_field(problem_key, 'group_access') == {50: [1]}
+        assert collected.get_xblock_field(vertical_key, 'contains_gated_content') is None
@@ -14,12 +14,15 @@ This is used by capa_block.
 """
 
 
+import hashlib
 import logging
 import os.path
 import re
+import threading
 from collections import OrderedDict
 from copy import deepcopy
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 from xml.sax.saxutils import unescape
 
@@ -77,6 +80,54 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+
+class ProblemTreeCache(object):
+    """
+    A thread safe cache of the most recently parsed problem trees, keyed by the hash of their XML.
+
+    The cached trees are the problem XML parsed and made compatible, before any
+    include, script or seed is applied, so they are identical for every student
+    and each LoncapaProblem works on a copy of one of them.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._trees = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, problem_text, parse):
+        """
+        Returns a copy of the tree of the problem_text (bytes), parsing it with parse if it isn't cached.
+        """
+        key = hashlib.sha1(problem_text).hexdigest()
+        with self._lock:
+            tree = self._trees.get(key)
+            if tree is not None:
+                self._trees.move_to_end(key)
+                return deepcopy(tree)
+
+        tree = parse(problem_text)
+        with self._lock:
+            self._trees[key] = tree
+            while len(self._trees) > self.max_size:
+                self._trees.popitem(last=False)
+        return deepcopy(tree)
+
+    def clear(self):
+        with self._lock:
+            self._trees.clear()
+
+
+PROBLEM_TREE_CACHE = ProblemTreeCache(max_size=1000)
+
+
+@lru_cache(maxsize=None)
+def _compiled_xpath(path):
+    """
+    Returns the compiled XPath of the path, so that the unions of tags searched
+    in every problem aren't compiled again for each of them.
+    """
+    return etree.XPath(path)
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -191,19 +242,7 @@ class LoncapaProblem(object):
         if isinstance(problem_text, str):
             # etree chokes on Unicode XML with an encoding declaration
             problem_text = problem_text.encode('utf-8')
-        self.tree = XML(problem_text)
-
-        try:
-            self.make_xml_compatible(self.tree)
-        except Exception:
-            capa_block = self.capa_block
-            log.exception(
-                "CAPAProblemError: %s, id:%s, data: %s",
-                capa_block.display_name,
-                self.problem_id,
-                capa_block.data
-            )
-            raise
+        self.tree = PROBLEM_TREE_CACHE.get(problem_text, self._parse_problem_text)
 
         # handle any <include file="foo"> tags
         self._process_includes()
@@ -248,6 +287,24 @@ class LoncapaProblem(object):
         """
         return settings.FEATURES.get('ENABLE_GRADING_METHOD_IN_PROBLEMS', False)
 
+    def _parse_problem_text(self, problem_text):
+        """
+        Returns the element tree of the problem XML, made compatible with make_xml_compatible.
+        """
+        tree = XML(problem_text)
+        try:
+            self.make_xml_compatible(tree)
+        except Exception:
+            capa_block = self.capa_block
+            log.exception(
+                "CAPAProblemError: %s, id:%s, data: %s",
+                capa_block.display_name,
+                self.problem_id,
+                capa_block.data
+            )
+            raise
+        return tree
+
     def make_xml_compatible(self, tree):
         """
         Adjust tree xml in-place for compatibility before creating
@@ -1111,18 +1168,16 @@ class LoncapaProblem(object):
         response_id = 1
         problem_data = {}
         self.responders = {}
-        for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
+        responses_xpath = _compiled_xpath('//' + "|//".join(responsetypes.registry.registered_tags()))
+        inputfields_xpath = _compiled_xpath("|".join(['.//' + x for x in inputtypes.registry.registered_tags()]))
+        for response in responses_xpath(tree):
             responsetype_id = self.problem_id + "_" + str(response_id)
             # create and save ID for this response
             response.set('id', responsetype_id)
             response_id += 1
 
             answer_id = 1
-            input_tags = inputtypes.registry.registered_tags()
-            inputfields = tree.xpath(
-                "|".join(['//' + response.tag + '[@id=$id]//' + x for x in input_tags]),
-                id=responsetype_id
-            )
+            inputfields = inputfields_xpath(response)
 
             # assign one answer_id for each input type
             for entry in inputfields:
@@ -0,0 +1,338 @@
+"""
+Compile-once, vectorized evaluation of the formulas of FormulaResponse problems.
+
+`calc.evaluator` parses its formula again on every call, and FormulaResponse
+calls it for every sample of the variables of a problem, for both the student
+and the instructor formulas.  The formulas compiled here are parsed once per
+process, then evaluated for all of the samples at once as NumPy arrays.
+
+The results are identical to those of calling `calc.evaluator` for each sample:
+
+- the arrays only hold real values, and powers are computed with Python's own
+  power operator, so that each element is computed exactly as its sample would be;
+- any floating point exception, non-real value, or function which can't be
+  applied to an array makes the formula fall back to the evaluation of each
+  sample with `calc`'s own actions, which raises the same errors as `calc.evaluator`.
+"""
+
+
+import numbers
+import operator
+from functools import lru_cache, reduce
+
+import numpy
+from calc import evaluator
+from calc.calc import (
+    DEFAULT_FUNCTIONS,
+    ParseAugmenter,
+    add_defaults,
+    check_parens,
+    eval_atom,
+    eval_number,
+    eval_parallel,
+    eval_power,
+    eval_product,
+    eval_sum
+)
+from edx_toggles.toggles import SettingToggle
+
+from xmodule.capa.util import compare_with_tolerance, default_tolerance
+
+# .. toggle_name: ENABLE_COMPILED_FORMULA_EVALUATION
+# .. toggle_implementation: SettingToggle
+# .. toggle_default: True
+# .. toggle_description: When True, the formulas of math expression (FormulaResponse) problems are parsed once per
+#   process and evaluated for all of their samples at once as NumPy arrays, with the same results as evaluating
+#   each sample with calc.evaluator. Set it to False to evaluate each sample with calc.evaluator.
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2026-10-17
+ENABLE_COMPILED_FORMULA_EVALUATION = SettingToggle(
+    'ENABLE_COMPILED_FORMULA_EVALUATION', default=True, module_name=__name__
+)
+
+# Number of compiled formulas kept by each process.
+COMPILED_FORMULA_CACHE_SIZE = 1000
+
+# The default functions of calc which are applied to all of the samples at once.  The others, such
+# as factorial, are only defined for scalars.
+VECTORIZED_FUNCTIONS = {
+    DEFAULT_FUNCTIONS[name] for name in (
+        'sin', 'cos', 'tan', 'sec', 'csc', 'cot', 'sqrt', 'log10', 'log2', 'ln', 'exp', 'arccos', 'arcsin',
+        'arctan', 'arcsec', 'arccsc', 'abs', 'sinh', 'cosh', 'tanh', 'sech', 'csch', 'coth', 'arcsinh',
+        'arccosh', 'arctanh', 'arcsech', 'arccsch', 'arccoth',
+    )
+}
+
+# Relative margin within which the results of the vectorized comparison of two samples are checked
+# again with compare_with_tolerance, which compares the decimal representations of the numbers
+# rather than the numbers themselves.  The two differ by a few units in the last place at most.
+TOLERANCE_MARGIN = 8 * numpy.finfo(float).eps
+
+
+class NotVectorizable(Exception):
+    """
+    Raised when a formula can't be evaluated for all of its samples at once.
+    """
+
+
+def _check_real(value):
+    """
+    Returns the value, unless it is an array of non-real values.
+    """
+    if isinstance(value, numpy.ndarray) and value.dtype != numpy.float64:
+        raise NotVectorizable(value.dtype)
+    return value
+
+
+def _is_value(item):
+    return isinstance(item, (numbers.Number, numpy.ndarray))
+
+
+def _power(base, exponent):
+    """
+    Returns base ** exponent, computed for each sample with Python's power operator.
+    """
+    if isinstance(base, numpy.ndarray) or isinstance(exponent, numpy.ndarray):
+        operands = [
+            operand.astype(object) if isinstance(operand, numpy.ndarray) else operand
+            for operand in (base, exponent)
+        ]
+        return numpy.power(*operands).astype(float)
+    return base ** exponent
+
+
+def eval_vectorized_atom(parse_result):
+    """
+    Same as calc's eval_atom, for atoms which may be arrays.
+    """
+    return next(item for item in parse_result if _is_value(item))
+
+
+def eval_vectorized_power(parse_result):
+    """
+    Same as calc's eval_power, for operands which may be arrays.
+    """
+    operands = reversed([item for item in parse_result if _is_value(item)])
+    return _check_real(reduce(lambda exponent, base: _power(base, exponent), operands))
+
+
+def eval_vectorized_parallel(parse_result):
+    """
+    Same as calc's eval_parallel, for operands which may be arrays none of which is zero.
+    """
+    operands = [item for item in parse_result if _is_value(item)]
+    if len(operands) == 1:
+        return operands[0]
+    if any(numpy.any(operand == 0) for operand in operands):
+        raise NotVectorizable('parallel zero')
+    return _check_real(1. / sum(1. / operand for operand in operands))
+
+
+def eval_vectorized_sum(parse_result):
+    """
+    Same as calc's eval_sum, for operands which may be arrays.
+    """
+    total = 0
+    current_op = operator.add
+    for token in parse_result:
+        if isinstance(token, str):
+            current_op = operator.sub if token == '-' else operator.add
+        else:
+            total = current_op(total, token)
+    return _check_real(total)
+
+
+def eval_vectorized_product(parse_result):
+    """
+    Same as calc's eval_product, for operands which may be arrays.
+    """
+    prod = 1
+    current_op = operator.mul
+    for token in parse_result:
+        if isinstance(token, str):
+            current_op = operator.truediv if token == '/' else operator.mul
+        else:
+            prod = current_op(prod, token)
+    return _check_real(prod)
+
+
+class CompiledFormula:
+    """
+    A formula parsed once, which may then be evaluated for any number of samples of its variables.
+
+    Arguments:
+        math_expr (str): The formula, as given to calc.evaluator.
+        case_sensitive (bool): Whether the variables and functions of the formula are case sensitive.
+
+    Raises the same parsing errors as calc.evaluator.
+    """
+    def __init__(self, math_expr, case_sensitive=False):
+        self.math_expr = math_expr
+        self.case_sensitive = case_sensitive
+        self.parse_augmenter = None
+        if math_expr.strip() != "":
+            check_parens(math_expr)
+            self.parse_augmenter = ParseAugmenter(math_expr, case_sensitive)
+            self.parse_augmenter.parse_algebra()
+
+    def _casify(self, name):
+        return name if self.case_sensitive else name.lower()
+
+    def _evaluate(self, variables, eval_actions):
+        """
+        Returns the value of the formula for the variables, with the given actions for the nodes of its tree.
+        """
+        all_variables, all_functions = add_defaults(variables, {}, self.case_sensitive)
+        self.parse_augmenter.check_variables(all_variables, all_functions)
+
+        def eval_variable(parse_result):
+            return all_variables[self._casify(parse_result[0])]
+
+        def eval_function(parse_result):
+            return eval_actions['call'](all_functions[self._casify(parse_result[0])], parse_result[1])
+
+        actions = dict(eval_actions, variable=eval_variable, function=eval_function)
+        return self.parse_augmenter.reduce_tree(actions)
+
+    def evaluate(self, variables):
+        """
+        Returns the value of the formula for the variables, as calc.evaluator(variables, {}, math_expr).
+        """
+        if self.parse_augmenter is None:
+            return float('nan')
+        return self._evaluate(variables, {
+            'number': eval_number,
+            'atom': eval_atom,
+            'power': eval_power,
+            'parallel': eval_parallel,
+            'product': eval_product,
+            'sum': eval_sum,
+            'call': lambda function, argument: function(argument),
+        })
+
+    def evaluate_vectorized(self, samples):
+        """
+        Returns an array of the values of the formula for each of the samples, evaluated at once.
+
+        Raises NotVectorizable, or any other exception, when the values can't be computed exactly as
+        they would be for each sample.
+        """
+        if any(variables.keys() != samples[0].keys() for variables in samples):
+            raise NotVectorizable('different variables')
+        arrays = {
+            name: numpy.array([variables[name] for variables in samples], dtype=float)
+            for name in samples[0]
+        }
+
+        def call(function, argument):
+            if not isinstance(argument, numpy.ndarray):
+                return function(argument)
+            if function not in VECTORIZED_FUNCTIONS:
+                raise NotVectorizable(function)
+            return _check_real(function(argument))
+
+        with numpy.errstate(divide='raise', over='raise', invalid='raise'):
+            value = self._evaluate(arrays, {
+                'number': eval_number,
+                'atom': eval_vectorized_atom,
+                'power': eval_vectorized_power,
+                'parallel': eval_vectorized_parallel,
+                'product': eval_vectorized_product,
+                'sum': eval_vectorized_sum,
+                'call': call,
+            })
+        if not isinstance(value, numpy.ndarray):
+            # The formula doesn't depend on any of the variables.
+            if isinstance(value, complex):
+                raise NotVectorizable(value)
+            value = numpy.full(len(samples), value, dtype=float)
+        return value
+
+    def evaluate_samples(self, samples):
+        """
+        Returns the values of the formula for each of the samples (dicts of variable values).
+
+        The values are an array when they could be evaluated at once, and a list otherwise.
+        """
+        if self.parse_augmenter is not None and len(samples) > 1:
+            try:
+                return self.evaluate_vectorized(samples)
+            except Exception:  # pylint: disable=broad-except
+                # Evaluating each sample raises the error again if the formula is invalid.
+                pass
+        return [self.evaluate(variables) for variables in samples]
+
+
+@lru_cache(maxsize=COMPILED_FORMULA_CACHE_SIZE)
+def compile_formula(math_expr, case_sensitive=False):
+    """
+    Returns the CompiledFormula of the formula, which is cached by each process.
+    """
+    return CompiledFormula(math_expr, case_sensitive)
+
+
+def evaluate_samples(math_expr, samples, case_sensitive=False):
+    """
+    Returns the values of the formula for each of the samples (dicts of variable values), as
+    calling calc.evaluator(variables, {}, math_expr, case_sensitive) for each of them would.
+    """
+    if not samples:
+        return []
+    if not ENABLE_COMPILED_FORMULA_EVALUATION.is_enabled():
+        return [evaluator(variables, {}, math_expr, case_sensitive=case_sensitive) for variables in samples]
+    return compile_formula(math_expr, case_sensitive).evaluate_samples(samples)
+
+
+def _compare_vectorized(student_results, instructor_results, tolerance):
+    """
+    Returns whether all of the results are equal within the tolerance, as compare_samples_with_tolerance.
+
+    The samples which are clearly within or beyond the tolerance are decided at once, and the others
+    are compared with compare_with_tolerance.
+    """
+    student = numpy.asarray(student_results, dtype=float)
+    instructor = numpy.asarray(instructor_results, dtype=float)
+    relative_tolerance = tolerance == default_tolerance
+    if tolerance.endswith('%'):
+        tolerances = evaluator({}, {}, tolerance[:-1]) * 0.01
+        if not relative_tolerance:
+            tolerances = tolerances * numpy.abs(instructor)
+    else:
+        tolerances = evaluator({}, {}, tolerance)
+    tolerances = numpy.asarray(tolerances, dtype=float)
+
+    with numpy.errstate(all='ignore'):
+        if relative_tolerance:
+            tolerances = tolerances * numpy.maximum(numpy.abs(student), numpy.abs(instructor))
+        difference = numpy.abs(student - instructor)
+        margin = TOLERANCE_MARGIN * numpy.maximum(numpy.maximum(numpy.abs(student), numpy.abs(instructor)),
+                                                  numpy.abs(tolerances))
+        finite = numpy.isfinite(difference) & numpy.isfinite(tolerances) & numpy.isfinite(margin)
+        within = finite & (difference <= tolerances - margin)
+        beyond = finite & (difference > tolerances + margin)
+
+    if beyond.any():
+        return False
+    return all(
+        compare_with_tolerance(float(student[index]), float(instructor[index]), tolerance)
+        for index in numpy.flatnonzero(~within)
+    )
+
+
+def compare_samples_with_tolerance(student_results, instructor_results, tolerance=default_tolerance):
+    """
+    Returns whether each of the student results is equal to the instructor result of the same
+    sample within the tolerance, as compare_with_tolerance.
+    """
+    if (
+        isinstance(student_results, numpy.ndarray) and isinstance(instructor_results, numpy.ndarray) and
+        isinstance(tolerance, str) and ENABLE_COMPILED_FORMULA_EVALUATION.is_enabled()
+    ):
+        try:
+            return _compare_vectorized(student_results, instructor_results, tolerance)
+        except Exception:  # pylint: disable=broad-except
+            pass
+    return all(
+        compare_with_tolerance(student, instructor, tolerance)
+        for student, instructor in zip(student_results, instructor_results)
+    )
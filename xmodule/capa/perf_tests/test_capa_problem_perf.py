@@ -0,0 +1,93 @@
+"""
+Benchmark of rendering and checking capa problems, with and without the cache of the parsed problem trees.
+"""
+
+
+import logging
+import time
+from unittest import TestCase
+
+import ddt
+
+from xmodule.capa.capa_problem import PROBLEM_TREE_CACHE, LoncapaProblem
+from xmodule.capa.tests import helpers
+from xmodule.tests.helpers import skip_unless_perf_tests_enabled
+
+log = logging.getLogger(__name__)
+
+# Number of students rendering and checking each problem.
+NUM_STUDENTS = 500
+
+# Problems and the answers submitted to check them.
+PROBLEMS = {
+    'multiple_choice': (helpers.load_fixture('extended_hints_multiple_choice.xml'), {'1_2_1': 'choice_2'}),
+    'dropdown': (helpers.load_fixture('extended_hints_dropdown.xml'), {'1_2_1': 'Multiple Choice'}),
+    'checkbox': (helpers.load_fixture('extended_hints_checkbox.xml'), {'1_2_1': ['choice_0', 'choice_2']}),
+    'text_input': (helpers.load_fixture('extended_hints_text_input.xml'), {'1_2_1': 'FranceΩ'}),
+    'custom_response': (
+        """
+        <problem>
+            <script type="loncapa/python">
+def check(expect, answer):
+    return answer.strip() == str(sum(range(10)))
+            </script>
+            <customresponse cfn="check">
+                <label>What is the sum of the digits?</label>
+                <textline size="10"/>
+            </customresponse>
+        </problem>
+        """,
+        {'1_2_1': '45'},
+    ),
+}
+
+
+@skip_unless_perf_tests_enabled
+@ddt.ddt
+class CapaProblemPerfTest(TestCase):
+    """
+    Compares the throughput of problem renders and checks with and without the cache of the parsed problem trees.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.capa_system = helpers.test_capa_system()
+        cls.capa_block = helpers.mock_capa_block()
+
+    def _problem(self, xml, seed):
+        return LoncapaProblem(xml, id='1', seed=seed, capa_system=self.capa_system, capa_block=self.capa_block)
+
+    def _render(self, xml, answers, seed):  # pylint: disable=unused-argument
+        self._problem(xml, seed).get_html()
+
+    def _check(self, xml, answers, seed):
+        self._problem(xml, seed).grade_answers(answers)
+
+    def _throughput(self, operation, xml, answers, cached):
+        """
+        Returns the number of operations per second done for NUM_STUDENTS students.
+        """
+        PROBLEM_TREE_CACHE.clear()
+        start = time.perf_counter()
+        for seed in range(NUM_STUDENTS):
+            if not cached:
+                PROBLEM_TREE_CACHE.clear()
+            operation(xml, answers, seed)
+        return NUM_STUDENTS / (time.perf_counter() - start)
+
+    @ddt.data(*PROBLEMS)
+    def test_render_and_check(self, problem):
+        xml, answers = PROBLEMS[problem]
+        correct_map = helpers.new_loncapa_problem(xml).grade_answers(answers)
+        assert all(correct_map.is_correct(answer_id) for answer_id in answers), problem
+
+        results = []
+        for name, operation in (('render', self._render), ('check', self._check)):
+            uncached = self._throughput(operation, xml, answers, cached=False)
+            cached = self._throughput(operation, xml, answers, cached=True)
+            results.append(f'{name}: {uncached:.0f}/s uncached, {cached:.0f}/s cached')
+        PROBLEM_TREE_CACHE.clear()
+        log.info('%s: %s', problem, ', '.join(results))
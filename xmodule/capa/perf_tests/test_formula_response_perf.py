@@ -0,0 +1,75 @@
+"""
+Benchmark of rescoring math expression (FormulaResponse) problems, with the compiled
+evaluation of their formulas and with calc.evaluator.
+"""
+
+
+import logging
+import time
+from unittest import TestCase
+
+import ddt
+from django.test import override_settings
+
+from xmodule.capa.compiled_formula import compile_formula
+from xmodule.capa.tests.helpers import new_loncapa_problem
+from xmodule.capa.tests.response_xml_factory import FormulaResponseXMLFactory
+from xmodule.tests.helpers import skip_unless_perf_tests_enabled
+
+log = logging.getLogger(__name__)
+
+# Number of submissions rescored for each problem.
+NUM_SUBMISSIONS = 20
+
+# Problems, and the formulas submitted for them.
+PROBLEMS = {
+    'polynomial': (
+        {'x': (-10, 10), 'y': (-10, 10)}, 'x^2+2*x*y+y^2', ['(x+y)^2', 'x^2+y^2', 'x*x+2*x*y+y*y'],
+    ),
+    'trigonometry': (
+        {'t': (0, 6)}, 'sin(2*t)', ['2*sin(t)*cos(t)', 'sin(t)^2', '2*cos(t)*sin(t)'],
+    ),
+    'circuit': (
+        {'R1': (1, 100), 'R2': (1, 100), 'V': (1, 10)}, 'V/(R1||R2)', ['V*(R1+R2)/(R1*R2)', 'V/(R1+R2)', 'V/R1+V/R2'],
+    ),
+}
+
+
+@skip_unless_perf_tests_enabled
+@ddt.ddt
+class FormulaResponseRescorePerfTest(TestCase):
+    """
+    Compares the throughput of rescoring math expression problems with and without the compiled evaluation.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    def _rescore(self, problem, submissions):
+        """
+        Returns the number of submissions rescored per second, and their correctness.
+        """
+        start = time.perf_counter()
+        correctness = [
+            problem.grade_answers({'1_2_1': submissions[index % len(submissions)]}).get_correctness('1_2_1')
+            for index in range(NUM_SUBMISSIONS)
+        ]
+        return NUM_SUBMISSIONS / (time.perf_counter() - start), correctness
+
+    @ddt.data(*PROBLEMS)
+    def test_rescore(self, name):
+        sample_dict, answer, submissions = PROBLEMS[name]
+        xml = FormulaResponseXMLFactory().build_xml(
+            sample_dict=sample_dict, num_samples=20, tolerance='0.001%', answer=answer,
+        )
+        problem = new_loncapa_problem(xml)
+
+        with override_settings(ENABLE_COMPILED_FORMULA_EVALUATION=False):
+            evaluator_rate, expected = self._rescore(problem, submissions)
+        compile_formula.cache_clear()
+        compiled_rate, correctness = self._rescore(problem, submissions)
+
+        assert correctness == expected
+        log.info(
+            '%s: %d submissions with 20 samples: %.1f/s with calc.evaluator, %.1f/s compiled (%.0fx)',
+            name, NUM_SUBMISSIONS, evaluator_rate, compiled_rate, compiled_rate / evaluator_rate,
+        )
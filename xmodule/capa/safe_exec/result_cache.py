@@ -0,0 +1,180 @@
+"""
+A store of the results of safe_exec kept by each process, optionally persisted on local disk.
+
+safe_exec caches its results in the cache given by its caller, usually the
+default Django cache, under a key made of the code, its globals, its random
+seed and the contents of its extra files.  Rescoring a problem for all of its
+learners runs the same code with the same globals over and over; the results
+kept here are looked up before the caller's cache, without a network round
+trip, and the results persisted in a SQLite file are shared by all of the
+processes of a host and survive restarts.
+
+Results are stored as JSON, so that each lookup returns a copy which the caller
+may update freely.  Both the memory and the disk stores are bounded by the size
+of the JSON of their results, and evict the least recently used results first.
+Any error of the disk store is logged and treated as a miss: it never fails the
+execution of the code.
+"""
+
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+log = logging.getLogger(__name__)
+
+
+class SafeExecResultCache:
+    """
+    A size-bounded LRU store of safe_exec results, with .get(key) and .set(key, value) methods.
+
+    Arguments:
+        max_size (int): The total size, in bytes of JSON, of the results kept in memory.
+        path (str): The path of a SQLite file in which the results are also persisted, or None.
+        max_disk_size (int): The total size, in bytes of JSON, of the results persisted in the file.
+    """
+    def __init__(self, max_size, path=None, max_disk_size=None):
+        self.max_size = max_size
+        self.path = path
+        self.max_disk_size = max_disk_size
+        self._results = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def get(self, key):
+        """
+        Returns the (emsg, results) pair stored for the key, or None.
+        """
+        with self._lock:
+            value = self._results.get(key)
+            if value is not None:
+                self._results.move_to_end(key)
+        if value is None and self.path:
+            value = self._disk_get(key)
+            if value is not None:
+                self._memory_set(key, value)
+        if value is None:
+            return None
+        return tuple(json.loads(value))
+
+    def set(self, key, value):
+        """
+        Stores the (emsg, results) pair for the key.
+        """
+        value = json.dumps(value)
+        self._memory_set(key, value)
+        if self.path:
+            self._disk_set(key, value)
+
+    def clear(self):
+        """
+        Forgets the results kept in memory.
+        """
+        with self._lock:
+            self._results.clear()
+            self._size = 0
+
+    def _memory_set(self, key, value):
+        """
+        Keeps the JSON of a result in memory, evicting the least recently used results past max_size.
+        """
+        if len(value) > self.max_size:
+            return
+        with self._lock:
+            previous = self._results.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._results[key] = value
+            self._size += len(value)
+            while self._size > self.max_size:
+                _, evicted = self._results.popitem(last=False)
+                self._size -= len(evicted)
+
+    def _connection(self):
+        """
+        Returns the connection of this thread to the SQLite file, creating its table if needed.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS results '
+                '(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)'
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+            self._local.connection = connection
+        return connection
+
+    def _disk_get(self, key):
+        """
+        Returns the JSON of the result persisted for the key, or None.
+        """
+        try:
+            connection = self._connection()
+            row = connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            connection.execute('UPDATE results SET accessed = ? WHERE key = ?', (time.time(), key))
+            return row[0]
+        except sqlite3.Error:
+            log.exception('Failed to read a safe_exec result from %s', self.path)
+            return None
+
+    def _disk_set(self, key, value):
+        """
+        Persists the JSON of a result, evicting the least recently used results past max_disk_size.
+        """
+        try:
+            connection = self._connection()
+            connection.execute(
+                'INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)',
+                (key, value, len(value), time.time()),
+            )
+            if self.max_disk_size is not None:
+                total_size = connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+                if total_size > self.max_disk_size:
+                    self._disk_evict(connection, total_size - self.max_disk_size)
+        except sqlite3.Error:
+            log.exception('Failed to persist a safe_exec result in %s', self.path)
+
+    def _disk_evict(self, connection, excess_size):
+        """
+        Deletes the least recently used results persisted, until at least excess_size bytes are freed.
+        """
+        evicted_keys = []
+        for key, size in connection.execute('SELECT key, size FROM results ORDER BY accessed, rowid'):
+            if excess_size <= 0:
+                break
+            evicted_keys.append((key,))
+            excess_size -= size
+        connection.executemany('DELETE FROM results WHERE key = ?', evicted_keys)
+
+
+_result_cache = (None, None)
+
+
+def get_result_cache():
+    """
+    Returns the SafeExecResultCache of this process configured by settings.SAFE_EXEC_RESULT_CACHE,
+    or None when it is not configured.
+    """
+    global _result_cache  # pylint: disable=global-statement
+    config = getattr(settings, 'SAFE_EXEC_RESULT_CACHE', None)
+    if not config:
+        return None
+    configured, result_cache = _result_cache
+    if configured != config:
+        result_cache = SafeExecResultCache(
+            max_size=config['MAX_SIZE'],
+            path=config.get('PATH'),
+            max_disk_size=config.get('MAX_DISK_SIZE'),
+        )
+        _result_cache = (dict(config), result_cache)
+    return result_cache
@@ -7,6 +7,7 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from edx_django_utils.monitoring import function_trace
 
 from . import lazymod
+from .result_cache import get_result_cache
 from .remote_exec import is_codejail_rest_service_enabled, get_remote_exec
 
 # Establish the Python environment for Capa.
@@ -108,7 +109,7 @@ def safe_exec(
 
     `cache` is an object with .get(key) and .set(key, value) methods.  It will be used
     to cache the execution, taking into account the code, the values of the globals,
-    and the random seed.
+    the random seed, and the contents of the extra files.
 
     `limit_overrides_context` is an optional string to be used as a key on
     the `settings.CODE_JAIL['limit_overrides']` dictionary in order to apply
@@ -123,12 +124,8 @@ def safe_exec(
     """
     # Check the cache for a previous result.
     if cache:
-        safe_globals = json_safe(globals_dict)
-        md5er = hashlib.md5()
-        md5er.update(repr(code).encode('utf-8'))
-        update_hash(md5er, safe_globals)
-        key = "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
-        cached = cache.get(key)
+        key = _cache_key(code, globals_dict, random_seed, extra_files)
+        cached = _get_cached(cache, key)
         if cached is not None:
             # We have a cached result.  The result is a pair: the exception
             # message, if any, else None; and the resulting globals dictionary.
@@ -141,9 +138,77 @@ def safe_exec(
     # Create the complete code we'll run.
     code_prolog = CODE_PROLOG % random_seed
 
+    emsg, exception = _execute(
+        code_prolog + LAZY_IMPORTS + code,
+        globals_dict,
+        python_path=python_path,
+        extra_files=extra_files,
+        limit_overrides_context=limit_overrides_context,
+        slug=slug,
+        unsafely=unsafely,
+    )
+
+    # Put the result back in the cache.  This is complicated by the fact that
+    # the globals dict might not be entirely serializable.
+    if cache:
+        cleaned_results = json_safe(globals_dict)
+        _set_cached(cache, key, (emsg, cleaned_results))
+
+    # If an exception happened, raise it now.
+    if emsg:
+        raise exception
+
+
+def _cache_key(code, globals_dict, random_seed, extra_files):
+    """
+    Returns the key of the result of executing the code with the globals, the random seed
+    and the extra files, such as the python_lib.zip of a course, which may change without
+    the code changing.
+    """
+    safe_globals = json_safe(globals_dict)
+    md5er = hashlib.md5()
+    md5er.update(repr(code).encode('utf-8'))
+    update_hash(md5er, safe_globals)
+    for filename, contents in extra_files or ():
+        md5er.update(repr(filename).encode('utf-8'))
+        md5er.update(contents)
+    return "safe_exec.%r.%s" % (random_seed, md5er.hexdigest())
+
+
+def _get_cached(cache, key):
+    """
+    Returns the (emsg, cleaned_results) pair cached for the key, from the result cache of
+    this process if it is configured, or from the given cache.
+    """
+    result_cache = get_result_cache()
+    cached = result_cache.get(key) if result_cache else None
+    if cached is None:
+        cached = cache.get(key)
+        if cached is not None and result_cache:
+            result_cache.set(key, cached)
+    return cached
+
+
+def _set_cached(cache, key, value):
+    """
+    Caches the (emsg, cleaned_results) pair for the key, in the result cache of this process
+    if it is configured, and in the given cache.
+    """
+    result_cache = get_result_cache()
+    if result_cache:
+        result_cache.set(key, value)
+    cache.set(key, value)
+
+
+def _execute(code, globals_dict, python_path, extra_files, limit_overrides_context, slug, unsafely):
+    """
+    Executes the complete code, with the codejail REST service if it is enabled, or with codejail.
+
+    Returns the exception message, if any, else None; and the SafeExecException to raise.
+    """
     if is_codejail_rest_service_enabled():
         data = {
-            "code": code_prolog + LAZY_IMPORTS + code,
+            "code": code,
             "globals_dict": globals_dict,
             "python_path": python_path,
             "limit_overrides_context": limit_overrides_context,
@@ -152,38 +217,25 @@ def safe_exec(
             "extra_files": extra_files,
         }
 
-        emsg, exception = get_remote_exec(data)
+        return get_remote_exec(data)
 
+    # Decide which code executor to use.
+    if unsafely:
+        exec_fn = codejail_not_safe_exec
     else:
-        # Decide which code executor to use.
-        if unsafely:
-            exec_fn = codejail_not_safe_exec
-        else:
-            exec_fn = codejail_safe_exec
-
-        # Run the code!  Results are side effects in globals_dict.
-        try:
-            exec_fn(
-                code_prolog + LAZY_IMPORTS + code,
-                globals_dict,
-                python_path=python_path,
-                extra_files=extra_files,
-                limit_overrides_context=limit_overrides_context,
-                slug=slug,
-            )
-        except SafeExecException as e:
-            # Saving SafeExecException e in exception to be used later.
-            exception = e
-            emsg = str(e)
-        else:
-            emsg = None
-
-    # Put the result back in the cache.  This is complicated by the fact that
-    # the globals dict might not be entirely serializable.
-    if cache:
-        cleaned_results = json_safe(globals_dict)
-        cache.set(key, (emsg, cleaned_results))
-
-    # If an exception happened, raise it now.
-    if emsg:
-        raise exception
+        exec_fn = codejail_safe_exec
+
+    # Run the code!  Results are side effects in globals_dict.
+    try:
+        exec_fn(
+            code,
+            globals_dict,
+            python_path=python_path,
+            extra_files=extra_files,
+            limit_overrides_context=limit_overrides_context,
+            slug=slug,
+        )
+    except SafeExecException as e:
+        # Saving SafeExecException e in exception to be used later.
+        return str(e), e
+    return None, None
@@ -0,0 +1,95 @@
+"""Test result_cache.py"""
+
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from django.test import override_settings
+
+from xmodule.capa.safe_exec.result_cache import SafeExecResultCache, get_result_cache
+
+
+def _size(value):
+    return len(json.dumps(value))
+
+
+class TestSafeExecResultCache(unittest.TestCase):
+    """Test the SafeExecResultCache."""
+
+    def setUp(self):
+        super().setUp()
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+        self.path = os.path.join(self.tempdir, 'results.sqlite')
+
+    def test_get_set(self):
+        cache = SafeExecResultCache(max_size=1000)
+        assert cache.get('key') is None
+        cache.set('key', (None, {'a': [1, 2]}))
+        assert cache.get('key') == (None, {'a': [1, 2]})
+
+        # Each lookup returns a copy of the result.
+        cache.get('key')[1]['a'].append(3)
+        assert cache.get('key') == (None, {'a': [1, 2]})
+
+    def test_memory_eviction(self):
+        value = (None, {'a': 'x' * 10})
+        cache = SafeExecResultCache(max_size=3 * _size(value))
+        for key in ('a', 'b', 'c'):
+            cache.set(key, value)
+        # Looking up a makes b the least recently used.
+        cache.get('a')
+        cache.set('d', value)
+        assert [key for key in 'abcd' if cache.get(key) is not None] == ['a', 'c', 'd']
+
+        # Results larger than the cache are not kept.
+        cache.set('large', (None, {'a': 'x' * 1000}))
+        assert cache.get('large') is None
+        assert cache.get('a') is not None
+
+    def test_disk_persistence(self):
+        cache = SafeExecResultCache(max_size=1000, path=self.path)
+        cache.set('key', ('error', {}))
+
+        # Another process, or a restarted one, reads the persisted results.
+        other_cache = SafeExecResultCache(max_size=1000, path=self.path)
+        assert other_cache.get('key') == ('error', {})
+        assert other_cache.get('missing') is None
+        assert 'key' in other_cache._results  # pylint: disable=protected-access
+
+    @patch('xmodule.capa.safe_exec.result_cache.time.time', side_effect=range(100))
+    def test_disk_eviction(self, _mock_time):
+        value = (None, {'a': 'x' * 10})
+        cache = SafeExecResultCache(max_size=0, path=self.path, max_disk_size=3 * _size(value))
+        for key in ('a', 'b', 'c'):
+            cache.set(key, value)
+        cache.get('a')
+        cache.set('d', value)
+        assert [key for key in 'abcd' if cache.get(key) is not None] == ['a', 'c', 'd']
+
+    def test_disk_errors(self):
+        cache = SafeExecResultCache(max_size=1000, path=self.path)
+        with patch.object(SafeExecResultCache, '_connection', side_effect=sqlite3.OperationalError):
+            cache.set('key', (None, {}))
+            cache.clear()
+            assert cache.get('key') is None
+        cache.set('key', (None, {}))
+        cache.clear()
+        assert cache.get('key') == (None, {})
+
+    def test_get_result_cache(self):
+        with override_settings(SAFE_EXEC_RESULT_CACHE=None):
+            assert get_result_cache() is None
+        with override_settings(SAFE_EXEC_RESULT_CACHE={'MAX_SIZE': 100}):
+            result_cache = get_result_cache()
+            assert result_cache.max_size == 100
+            assert result_cache.path is None
+            assert get_result_cache() is result_cache
+        with override_settings(SAFE_EXEC_RESULT_CACHE={'MAX_SIZE': 100, 'PATH': self.path}):
+            assert get_result_cache() is not result_cache
+            assert get_result_cache().path == self.path
@@ -21,6 +21,7 @@ from six.moves import range
 from openedx.core.djangolib.testing.utils import skip_unless_lms
 from xmodule.capa.safe_exec import safe_exec, update_hash
 from xmodule.capa.safe_exec.remote_exec import is_codejail_rest_service_enabled
+from xmodule.capa.safe_exec.result_cache import get_result_cache
 
 
 class TestSafeExec(unittest.TestCase):  # lint-amnesty, pylint: disable=missing-class-docstring
@@ -220,6 +221,13 @@ class DictCache(object):
 class TestSafeExecCaching(unittest.TestCase):
     """Test that caching works on safe_exec."""
 
+    def setUp(self):
+        super().setUp()
+        # Only use the given caches.
+        settings_override = override_settings(SAFE_EXEC_RESULT_CACHE=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
     def test_cache_miss_then_hit(self):
         g = {}
         cache = {}
@@ -287,6 +295,53 @@ class TestSafeExecCaching(unittest.TestCase):
                 self.fail("Tried executing code with non-ASCII unicode: {0}".format(code))
 
 
+class TestSafeExecResultCache(unittest.TestCase):
+    """Test that safe_exec keeps its results in the result cache of the process."""
+
+    def setUp(self):
+        super().setUp()
+        settings_override = override_settings(SAFE_EXEC_RESULT_CACHE={'MAX_SIZE': 1024 * 1024})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        get_result_cache().clear()
+
+    def test_cache_miss_then_hit(self):
+        cache = {}
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
+        assert g['a'] == 3
+        key = list(cache.keys())[0]
+        assert get_result_cache().get(key) == (None, {'a': 3})
+
+        # The result of the process is used before the given cache.
+        cache[key] = (None, {'a': 17})
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
+        assert g['a'] == 3
+
+    def test_filled_from_given_cache(self):
+        cache = {}
+        safe_exec("a = int(math.pi)", {}, cache=DictCache(cache))
+        key = list(cache.keys())[0]
+        cache[key] = (None, {'a': 17})
+        get_result_cache().clear()
+
+        g = {}
+        safe_exec("a = int(math.pi)", g, cache=DictCache(cache))
+        assert g['a'] == 17
+        assert get_result_cache().get(key) == (None, {'a': 17})
+
+    def test_extra_files_in_key(self):
+        cache = {}
+        for contents in (b'first', b'first', b'second'):
+            safe_exec("a = 1", {}, extra_files=[('python_lib.zip', contents)], cache=DictCache(cache))
+        assert len(cache) == 2
+
+    def test_no_cache(self):
+        safe_exec("a = 1", {})
+        assert not get_result_cache()._results  # pylint: disable=protected-access
+
+
 class TestUpdateHash(unittest.TestCase):
     """Test the safe_exec.update_hash function to be sure it canonicalizes properly."""
 
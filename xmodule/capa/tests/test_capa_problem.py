@@ -12,6 +12,7 @@ import ddt
 from lxml import etree
 from markupsafe import Markup
 
+from xmodule.capa.capa_problem import PROBLEM_TREE_CACHE, ProblemTreeCache
 from xmodule.capa.correctmap import CorrectMap
 from xmodule.capa.responsetypes import LoncapaProblemError
 from xmodule.capa.tests.helpers import new_loncapa_problem
@@ -840,3 +841,49 @@ class CAPAProblemReportHelpersTest(unittest.TestCase):
             with self.assertRaises(Exception):
                 problem.get_grade_from_current_answers(None, correct_map)
             responder_mock.evaluate_answers.assert_not_called()
+
+
+class ProblemTreeCacheTest(unittest.TestCase):
+    """ Tests of the cache of the parsed problem trees """
+
+    xml = """
+    <problem>
+        <optionresponse>
+            <optioninput>
+                <option correct="False">red</option>
+                <option correct="True">blue</option>
+            </optioninput>
+        </optionresponse>
+    </problem>
+    """
+
+    def setUp(self):
+        super().setUp()
+        PROBLEM_TREE_CACHE.clear()
+        self.addCleanup(PROBLEM_TREE_CACHE.clear)
+
+    def test_cached_tree(self):
+        with patch('xmodule.capa.capa_problem.XML', wraps=etree.XML) as mock_xml:
+            first = new_loncapa_problem(self.xml, problem_id='first')
+            second = new_loncapa_problem(self.xml, problem_id='second')
+        mock_xml.assert_called_once()
+        assert first.tree is not second.tree
+        assert second.tree.find('.//optioninput').get('options') == "('red','blue')"
+        assert second.tree.find('.//optionresponse').get('id') == 'second_1'
+        assert first.tree.find('.//optionresponse').get('id') == 'first_1'
+        assert first.get_html() != second.get_html()
+
+    def test_invalid_problem_not_cached(self):
+        xml = self.xml.replace('False', 'True')
+        with patch('xmodule.capa.capa_problem.XML', wraps=etree.XML) as mock_xml:
+            for _ in range(2):
+                with pytest.raises(LoncapaProblemError):
+                    new_loncapa_problem(xml)
+        assert mock_xml.call_count == 2
+
+    def test_max_size(self):
+        cache = ProblemTreeCache(max_size=2)
+        parse = MagicMock(side_effect=etree.XML)
+        for problem_text in (b'<a/>', b'<b/>', b'<a/>', b'<c/>', b'<b/>'):
+            assert cache.get(problem_text, parse).tag == problem_text.decode()[1]
+        assert [call[0][0] for call in parse.call_args_list] == [b'<a/>', b'<b/>', b'<c/>', b'<b/>']
@@ -0,0 +1,212 @@
+"""
+Tests of the compiled, vectorized evaluation of the formulas of FormulaResponse problems.
+"""
+
+
+import math
+import random
+import unittest
+from functools import lru_cache
+from unittest.mock import patch
+
+import ddt
+import numpy
+from calc import UndefinedVariable, evaluator
+from calc.calc import ParseAugmenter
+from django.test import override_settings
+
+from xmodule.capa import responsetypes
+from xmodule.capa.compiled_formula import (
+    CompiledFormula,
+    compare_samples_with_tolerance,
+    compile_formula,
+    evaluate_samples
+)
+from xmodule.capa.responsetypes import StudentInputError
+from xmodule.capa.tests.helpers import new_loncapa_problem
+from xmodule.capa.tests.response_xml_factory import FormulaResponseXMLFactory
+
+# Groups of formulas sampled over the same ranges and compared with the same tolerance.  The
+# parity tests check every ordered pair of formulas of each group, as instructor and student answers.
+PARITY_CORPUS = [
+    ({'x': (-10, 10), 'y': (-10, 10)}, 0.01, [
+        'x+2*y', '2*x - x + y + y', 'x + y', 'x+2*y+0.005', 'x+2*y+0.0100001', 'X+2*Y',
+    ]),
+    ({'x': (1, 5)}, '0.001%', [
+        'x^2+2*x+1', '(x+1)^2', '(x+1)*(x+1.0000001)', 'sqrt(x)^4 + 2*x + 1', 'exp(2*ln(x+1))',
+        '10^(2*log10(x+1))', 'x^-2', 'x^x^0.5', '2^x', 'sin(x)^2+cos(x)^2', '1', '',
+    ]),
+    ({'x': (-5, 5)}, '1%', [
+        'sqrt(x)', 'x^0.5', 'abs(x)', 'sqrt(x^2)', 'arccot(x)', 'pi/2-arctan(x)', 'sec(x)', '1/cos(x)',
+        'arcsec(x)', 'arccosh(x)', 'ln(x)', 'i*x', 'x*j', 'x^3/x^2',
+    ]),
+    ({'R1': (1, 10), 'R2': (1, 10)}, 0.1, [
+        'R1||R2', 'R1*R2/(R1+R2)', '1/(1/R1+1/R2)', 'R1||R2||0', 'r1||r2', 'R1||3',
+    ]),
+    ({'x': (0, 1)}, 0.1, [
+        'x-x+1.1', 'x-x+1.0', 'x-x+1', '1/(x-x)', 'fact(x)', 'fact(3)*x', 'x+z', '(x+1', 'x+1)', '10^400*x',
+        'x^1000', '5%*x', '0.05*x', 'sin(x', 'x**2',
+    ]),
+]
+
+# Seed of the samples of the parity tests.
+PARITY_SEED = 42
+
+
+@lru_cache(maxsize=None)
+def _cached_evaluate(variables, math_expr, case_sensitive):
+    return evaluator(dict(variables), {}, math_expr, case_sensitive=case_sensitive)
+
+
+def cached_evaluator(variables, functions, math_expr, case_sensitive=False):
+    """
+    calc.evaluator, whose values are cached since it takes milliseconds to parse a formula.
+    """
+    assert not functions
+    return _cached_evaluate(tuple(sorted(variables.items())), math_expr, case_sensitive)
+
+
+def _evaluate_each(math_expr, samples, case_sensitive=False):
+    """
+    Returns the values of the formula for each sample with calc.evaluator, or the exception it raises.
+    """
+    try:
+        return [cached_evaluator(variables, {}, math_expr, case_sensitive=case_sensitive) for variables in samples]
+    except Exception as err:  # pylint: disable=broad-except
+        return err
+
+
+def _same_values(values, expected):
+    """
+    Returns whether the values are the same numbers as the expected ones, nan included.
+    """
+    return len(values) == len(expected) and all(
+        complex(value) == complex(expected_value) or (
+            numpy.isnan(complex(value)) and numpy.isnan(complex(expected_value))
+        )
+        for value, expected_value in zip(values, expected)
+    )
+
+
+@ddt.ddt
+class CompiledFormulaTest(unittest.TestCase):
+    """
+    Tests of the values of compiled formulas.
+    """
+    def _samples(self, sample_dict, num_samples=5):
+        rand = random.Random(PARITY_SEED)
+        return [
+            {name: rand.uniform(*sample_range) for name, sample_range in sample_dict.items()}
+            for _ in range(num_samples)
+        ]
+
+    @ddt.data(*PARITY_CORPUS)
+    @ddt.unpack
+    def test_values(self, sample_dict, tolerance, formulas):  # pylint: disable=unused-argument
+        samples = self._samples(sample_dict)
+        for math_expr in formulas:
+            expected = _evaluate_each(math_expr, samples)
+            try:
+                values = evaluate_samples(math_expr, samples)
+            except Exception as err:  # pylint: disable=broad-except
+                assert isinstance(expected, Exception), math_expr
+                assert (type(err), str(err)) == (type(expected), str(expected)), math_expr
+            else:
+                assert not isinstance(expected, Exception), math_expr
+                assert _same_values(values, expected), math_expr
+
+    def test_case_sensitive(self):
+        samples = [{'x': 1.0, 'X': 2.0}, {'x': 3.0, 'X': 4.0}]
+        assert list(evaluate_samples('x+2*X', samples, case_sensitive=True)) == [5.0, 11.0]
+        with self.assertRaises(UndefinedVariable):
+            evaluate_samples('x+Y', samples, case_sensitive=True)
+        assert list(evaluate_samples('2*x', [{'X': 1.0}, {'X': 2.0}])) == [2.0, 4.0]
+
+    @ddt.data(
+        'x+2*y', 'x^2+2*x+1', 'x^-2', 'x^x^0.5', 'sin(x)^2+cos(x)^2', 'exp(2*ln(x+1))', 'sec(x)', 'R||2',
+        '1', 'fact(3)*x', 'sqrt(x)', 'abs(-x)',
+    )
+    def test_vectorized(self, math_expr):
+        samples = [{'x': value, 'y': value / 2, 'R': value + 1} for value in (0.5, 1.5, 2.5, 3.5)]
+        with patch.object(CompiledFormula, 'evaluate', side_effect=AssertionError):
+            values = evaluate_samples(math_expr, samples)
+        assert isinstance(values, numpy.ndarray)
+        assert _same_values(values, _evaluate_each(math_expr, samples))
+
+    @ddt.data('sqrt(x)', 'x^0.5', 'ln(x)', 'i*x', 'fact(x)', 'arccot(x)', '1/(x-x)', 'R||0', '10^400*x', 'x^1000')
+    def test_not_vectorized(self, math_expr):
+        samples = [{'x': value, 'R': value} for value in (-1.5, 1.5, 20.0)]
+        values = _evaluate_each(math_expr, samples)
+        with patch.object(CompiledFormula, 'evaluate', wraps=compile_formula(math_expr).evaluate) as mock_evaluate:
+            if isinstance(values, Exception):
+                with self.assertRaises(type(values)):
+                    evaluate_samples(math_expr, samples)
+            else:
+                assert _same_values(evaluate_samples(math_expr, samples), values)
+        assert mock_evaluate.called
+
+    def test_compiled_once(self):
+        compile_formula.cache_clear()
+        with patch('xmodule.capa.compiled_formula.ParseAugmenter.parse_algebra', autospec=True,
+                   side_effect=ParseAugmenter.parse_algebra) as mock_parse:
+            for _ in range(3):
+                evaluate_samples('x^2', [{'x': 1.0}, {'x': 2.0}])
+        assert mock_parse.call_count == 1
+        assert compile_formula('x^2') is compile_formula('x^2')
+        assert compile_formula('x^2') is not compile_formula('x^2', case_sensitive=True)
+
+    def test_empty(self):
+        assert evaluate_samples('x', []) == []
+        assert math.isnan(evaluate_samples(' ', [{'x': 1.0}, {'x': 2.0}])[1])
+
+    @override_settings(ENABLE_COMPILED_FORMULA_EVALUATION=False)
+    def test_disabled(self):
+        with patch('xmodule.capa.compiled_formula.compile_formula') as mock_compile:
+            assert evaluate_samples('x^2', [{'x': 1.0}, {'x': 2.0}]) == [1.0, 4.0]
+        assert not mock_compile.called
+
+    @ddt.data(
+        ([1.1, 2.0], [1.0, 2.0], '0.1', True),
+        ([1.1, 2.0], [1.0, 2.05], '0.1', True),
+        ([1.1, 2.0], [1.0, 2.2], '0.1', False),
+        ([100.0, 50.0], [101.0, 50.0], '1%', True),
+        ([100.0, 50.0], [101.02, 50.0], '1%', False),
+        ([1.0, 1.0 + 1e-6], [1.0, 1.0], '0.001%', True),
+        ([1.0, float('inf')], [1.0, float('inf')], '0.1', True),
+        ([1.0, float('nan')], [1.0, float('nan')], '0.1', False),
+    )
+    @ddt.unpack
+    def test_compare(self, student, instructor, tolerance, correct):
+        assert compare_samples_with_tolerance(numpy.array(student), numpy.array(instructor), tolerance) == correct
+        assert compare_samples_with_tolerance(student, instructor, tolerance) == correct
+
+
+class FormulaResponseParityTest(unittest.TestCase):
+    """
+    Checks that FormulaResponse grades the formulas of the parity corpus the same way with the
+    compiled evaluation of its formulas as with calc.evaluator.
+    """
+    def _check_formula(self, responder, expected, given):
+        """
+        Returns the correctness of the given formula, or the message of its StudentInputError.
+        """
+        responsetypes.random.seed(PARITY_SEED)
+        try:
+            return responder.check_formula(expected, given, responder.samples)
+        except StudentInputError as err:
+            return str(err)
+
+    @patch('xmodule.capa.util.evaluator', cached_evaluator)
+    @patch('xmodule.capa.compiled_formula.evaluator', cached_evaluator)
+    def test_parity(self):
+        for sample_dict, tolerance, formulas in PARITY_CORPUS:
+            xml = FormulaResponseXMLFactory().build_xml(
+                sample_dict=sample_dict, num_samples=10, tolerance=tolerance, answer=formulas[0],
+            )
+            responder = list(new_loncapa_problem(xml).responders.values())[0]
+            for expected in formulas:
+                for given in formulas:
+                    with override_settings(ENABLE_COMPILED_FORMULA_EVALUATION=False):
+                        reference = self._check_formula(responder, expected, given)
+                    result = self._check_formula(responder, expected, given)
+                    assert result == reference, (expected, given)
@@ -5,6 +5,8 @@ MongoDB/GridFS-level code for the contentstore.
 
 import json
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import gridfs
 import pymongo
@@ -22,6 +24,9 @@ from xmodule.util.misc import escape_invalid_characters, get_library_or_course_a
 
 from .content import ContentStore, StaticContent, StaticContentStream
 
+# Assets up to this size are read from GridFS ahead of being exported; larger ones are streamed as they are exported.
+EXPORT_READ_AHEAD_MAX_SIZE = 4 * 1024 * 1024
+
 
 class MongoContentStore(ContentStore):
     """
@@ -203,10 +208,32 @@ class MongoContentStore(ContentStore):
             assets_policy_file: the filename for the policy file which should be in the same
                 directory as the other policy files.
         """
+        policy = self.export_all_for_course_to_fs(course_key, OSFS(output_directory, create=True))
+
+        with open(assets_policy_file, 'w') as f:
+            json.dump(policy, f, sort_keys=True, indent=4)
+
+    def export_all_for_course_to_fs(self, course_key, export_fs, max_workers=1):
+        """
+        Export all of this course's assets into the export_fs filesystem, reading up to max_workers
+        of them from GridFS at a time, ahead of writing them.
+
+        Args:
+            course_key (CourseKey): the :class:`CourseKey` identifying the course
+            export_fs (FS): the filesystem under which to put all the asset files
+            max_workers (int): the number of threads reading assets
+
+        Returns:
+            dict: the policy of the assets' attributes, by asset name
+        """
         policy = {}
         assets, __ = self.get_all_content_for_course(course_key)
 
-        for asset in assets:
+        def read_asset(asset):
+            # Only assets small enough to be held in memory are read ahead.
+            return self.find(asset['asset_key'], as_stream=asset.get('length', 0) > EXPORT_READ_AHEAD_MAX_SIZE)
+
+        def export_asset(asset, content):
             # TODO: On 6/19/14, I had to put a try/except around this
             # to export a course. The course failed on JSON files in
             # the /static/ directory placed in it with an import.
@@ -215,13 +242,46 @@ class MongoContentStore(ContentStore):
             #
             # When debugging course exports, this might be a good place
             # to look. -- pmitros
-            self.export(asset['asset_key'], output_directory)
+            self._export_content_to_fs(content, export_fs)
             for attr, value in asset.items():
                 if attr not in ['_id', 'md5', 'uploadDate', 'length', 'chunkSize', 'asset_key']:
                     policy.setdefault(asset['asset_key'].block_id, {})[attr] = value
 
-        with open(assets_policy_file, 'w') as f:
-            json.dump(policy, f, sort_keys=True, indent=4)
+        # Bound the number of assets read ahead, which are held in memory until they're exported.
+        pending_reads = deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for asset in assets:
+                pending_reads.append((asset, executor.submit(read_asset, asset)))
+                if len(pending_reads) > 2 * max_workers:
+                    asset, pending_read = pending_reads.popleft()
+                    export_asset(asset, pending_read.result())
+            while pending_reads:
+                asset, pending_read = pending_reads.popleft()
+                export_asset(asset, pending_read.result())
+
+        return policy
+
+    def _export_content_to_fs(self, content, export_fs):
+        """
+        Write the content, or stream it if it was found as a stream, into the export_fs
+        at the same path that export writes it to in a directory.
+        """
+        output_directory = '/'
+        if content.import_path is not None:
+            output_directory += os.path.dirname(content.import_path)
+        export_fs.makedirs(output_directory, recreate=True)
+
+        # Escape invalid char from filename.
+        export_name = escape_invalid_characters(name=content.name, invalid_char_list=['/', '\\'])
+        export_path = output_directory.rstrip('/') + '/' + export_name
+
+        if isinstance(content, StaticContentStream):
+            try:
+                export_fs.setbinfile(export_path, content._stream)  # pylint: disable=protected-access
+            finally:
+                content.close()
+        else:
+            export_fs.setbytes(export_path, content.data)
 
     def get_all_content_thumbnails_for_course(self, course_key):
         return self._get_all_content_for_course(course_key, get_thumbnails=True)[0]
@@ -0,0 +1,119 @@
+"""
+Benchmark of SplitMongoModuleStore.get_items on a large course, with the
+indexes of the structure and with a scan of all of its blocks.
+"""
+
+
+import datetime
+import logging
+import time
+from unittest import TestCase
+
+import ddt
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_index import STRUCTURE_INDEX_CACHE
+from xmodule.modulestore.tests.utils import make_split_store, make_split_structure
+from xmodule.tests.helpers import skip_unless_perf_tests_enabled
+
+log = logging.getLogger(__name__)
+
+# Number of blocks of each type under each of their parents.
+COURSE_SHAPE = (
+    ('chapter', 20),
+    ('sequential', 10),
+    ('vertical', 5),
+    ('problem', 15),
+)
+
+# Number of times each query is run.
+NUM_QUERIES = 20
+
+
+def _large_structure():
+    """
+    Returns a structure of about 20,000 blocks, with a video in every tenth vertical.
+    """
+    children = {}
+    parents = [('course', 'course')]
+    for block_type, num_children in COURSE_SHAPE:
+        blocks = []
+        for parent in parents:
+            children[parent] = [(block_type, f'{parent[1]}_{index}') for index in range(num_children)]
+            blocks.extend(children[parent])
+        parents = blocks
+    for block in parents:
+        children[block] = []
+    for index, vertical in enumerate(block for block in list(children) if block[0] == 'vertical'):
+        if index % 10 == 0:
+            children[vertical].append(('video', vertical[1]))
+            children[('video', vertical[1])] = []
+
+    structure = make_split_structure(children)
+    for index, (block_key, block_data) in enumerate(structure['blocks'].items()):
+        block_data.fields['display_name'] = f'{block_key.type} {index % 100}'
+        block_data.edit_info.edited_by = index % 7
+        block_data.edit_info.edited_on = datetime.datetime(2023, 1, 1) + datetime.timedelta(minutes=index)
+    return structure
+
+
+@skip_unless_perf_tests_enabled
+@ddt.ddt
+class SplitGetItemsPerfTest(TestCase):
+    """
+    Compares the time taken by get_items queries with and without the indexes of the structure.
+    """
+    # Use this attribute to skip this test on regular unittest CI runs.
+    perf_test = True
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.structure = _large_structure()
+        cls.store, cls.course_key = make_split_store(cls.structure)
+
+    def _scan(self, qualifiers=None, settings=None):
+        """
+        Returns the blocks matching the qualifiers by checking every block, as get_items did before the indexes.
+        """
+        qualifiers = dict(qualifiers or {})
+        if 'category' in qualifiers:
+            qualifiers['block_type'] = qualifiers.pop('category')
+        return [
+            block_key
+            for block_key, block_data in self.structure['blocks'].items()
+            if self.store._block_matches(block_data, qualifiers) and  # pylint: disable=protected-access
+            self.store._block_matches(block_data.fields, settings or {})  # pylint: disable=protected-access
+        ]
+
+    @ddt.data(
+        ({'qualifiers': {'category': 'video'}}),
+        ({'qualifiers': {'category': 'problem'}, 'settings': {'display_name': 'problem 42'}}),
+        ({'settings': {'display_name': 'vertical 7'}}),
+        ({'qualifiers': {'category': 'video'}, 'include_orphans': False}),
+    )
+    def test_get_items(self, query):
+        STRUCTURE_INDEX_CACHE.clear()
+        scan_query = {key: value for key, value in query.items() if key != 'include_orphans'}
+
+        start = time.perf_counter()
+        for _ in range(NUM_QUERIES):
+            expected = self._scan(**scan_query)
+        scan_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        items = self.store.get_items(self.course_key, **query)
+        first_elapsed = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(NUM_QUERIES):
+            items = self.store.get_items(self.course_key, **query)
+        indexed_elapsed = time.perf_counter() - start
+
+        assert items == expected
+        assert all(isinstance(item, BlockKey) for item in items)
+        log.info(
+            '%s: %d blocks, %d items: %.2f ms per scan, %.2f ms for the first indexed query, '
+            '%.2f ms per indexed query',
+            query, len(self.structure['blocks']), len(items), scan_elapsed * 1000 / NUM_QUERIES,
+            first_elapsed * 1000, indexed_elapsed * 1000 / NUM_QUERIES,
+        )
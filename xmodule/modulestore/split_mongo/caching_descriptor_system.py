@@ -75,6 +75,8 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):  # li
         self.module_data = module_data
         self.default_class = default_class
         self.local_modules = {}
+        # Definitions of the blocks in module_data fetched in bulk by the modulestore, by id
+        self.prefetched_definitions = {}
 
         user = get_current_user()
         user_id = user.id if user else None
@@ -290,6 +292,7 @@ class CachingDescriptorSystem(MakoDescriptorSystem, EditInfoRuntimeMixin):  # li
                 block_key.type,
                 definition_id,
                 convert_fields,
+                self.prefetched_definitions,
             )
         else:
             definition_loader = None
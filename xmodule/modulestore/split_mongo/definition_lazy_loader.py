@@ -2,6 +2,7 @@
 
 import copy
 
+from edx_django_utils import monitoring
 from opaque_keys.edx.locator import DefinitionLocator
 
 
@@ -12,16 +13,20 @@ class DefinitionLazyLoader:
     object doesn't force access during init but waits until client wants the
     definition. Only works if the modulestore is a split mongo store.
     """
-    def __init__(self, modulestore, course_key, block_type, definition_id, field_converter):
+    def __init__(
+        self, modulestore, course_key, block_type, definition_id, field_converter, prefetched_definitions=None,
+    ):
         """
         Simple placeholder for yet-to-be-fetched data
         :param modulestore: the pymongo db connection with the definitions
         :param definition_locator: the id of the record in the above to fetch
+        :param prefetched_definitions: a dict of definitions by id which were already fetched in bulk
         """
         self.modulestore = modulestore
         self.course_key = course_key
         self.definition_locator = DefinitionLocator(block_type, definition_id)
         self.field_converter = field_converter
+        self.prefetched_definitions = prefetched_definitions if prefetched_definitions is not None else {}
 
     def fetch(self):
         """
@@ -31,5 +36,16 @@ class DefinitionLazyLoader:
         # get_definition may return a cached value perhaps from another course or code path
         # so, we copy the result here so that updates don't cross-pollinate nor change the cached
         # value in such a way that we can't tell that the definition's been updated.
-        definition = self.modulestore.get_definition(self.course_key, self.definition_locator.definition_id)
+        definition = self.prefetched_definitions.get(self.definition_locator.definition_id)
+        if definition is not None:
+            # .. custom_attribute_name: split_definition_prefetch_hits
+            # .. custom_attribute_description: The number of definitions of split modulestore blocks read
+            #   from the definitions prefetched when the blocks were loaded, in the request.
+            monitoring.accumulate('split_definition_prefetch_hits', 1)
+        else:
+            # .. custom_attribute_name: split_definition_lazy_loads
+            # .. custom_attribute_description: The number of definitions of split modulestore blocks fetched
+            #   one at a time when their content was first accessed, in the request.
+            monitoring.accumulate('split_definition_lazy_loads', 1)
+            definition = self.modulestore.get_definition(self.course_key, self.definition_locator.definition_id)
         return copy.deepcopy(definition)
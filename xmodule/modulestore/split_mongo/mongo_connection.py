@@ -4,15 +4,19 @@ Segregation of pymongo functions from the data modeling mechanisms for split mod
 
 
 import datetime
+import hashlib
 import logging
 import math
+import os
 import pickle
 import re
+import tempfile
 import zlib
 from contextlib import contextmanager
 from time import time
 
 from ccx_keys.locator import CCXLocator
+from django.conf import settings
 from django.core.cache import caches, InvalidCacheBackendError
 from django.db.transaction import TransactionManagementError
 import pymongo
@@ -195,9 +199,22 @@ class CourseStructureCache:
     Wrapper around django cache object to cache course structure objects.
     The course structures are pickled and compressed when cached.
 
+    Compressed structures larger than CHUNK_SIZE, which don't fit in a single
+    memcached item, are split across chunk keys.  A manifest with the number of
+    chunks, their total length and digest is then stored at the structure's key,
+    and the chunks are fetched with a single get_many and verified on reassembly.
+
     If the 'course_structure_cache' doesn't exist, then don't do anything for
     for set and get.
     """
+    # The largest size of a single cached value, below memcached's default item size
+    # limit of 1 MiB to leave room for the key and the cache backend's own overhead.
+    CHUNK_SIZE = 1000 * 1000
+    # The largest number of chunks a structure is split across, so that the largest
+    # courses don't evict a disproportionate share of the cache.
+    MAX_CHUNKS = 32
+    CHUNKED = 'chunked'
+
     def __init__(self):
         self.cache = None
         try:
@@ -205,6 +222,38 @@ class CourseStructureCache:
         except InvalidCacheBackendError:
             pass
 
+    @classmethod
+    def serialize(cls, structure):
+        """Returns the compressed, pickled data of the structure."""
+        pickled_data = pickle.dumps(structure, 4)  # Protocol can't be incremented until cache is cleared
+        # 1 = Fastest (slightly larger results)
+        return zlib.compress(pickled_data, 1)
+
+    @classmethod
+    def num_chunks(cls, data_size):
+        """Returns the number of chunks data of the given size is cached in, 1 if it isn't split."""
+        return max(1, math.ceil(data_size / cls.CHUNK_SIZE))
+
+    @staticmethod
+    def _chunk_keys(key, num_chunks, digest):
+        """
+        Returns the keys of the chunks of the data with the given digest.  The keys
+        include the digest, so chunks of different writes of a key never mix.
+        """
+        return [f'{key}.chunk.{digest}.{index}' for index in range(num_chunks)]
+
+    def _get_chunked(self, key, manifest):
+        """Returns the data reassembled from the chunks of the manifest, or None if any is missing."""
+        _, num_chunks, data_size, digest = manifest
+        chunk_keys = self._chunk_keys(key, num_chunks, digest)
+        chunks = self.cache.get_many(chunk_keys)
+        if len(chunks) != num_chunks:
+            return None
+        data = b''.join(chunks[chunk_key] for chunk_key in chunk_keys)
+        if len(data) != data_size or hashlib.sha1(data).hexdigest() != digest:
+            raise ValueError('Chunked course structure failed its integrity check')
+        return data
+
     def get(self, key, course_context=None):
         """Pull the compressed, pickled struct data from cache and deserialize."""
         if self.cache is None:
@@ -213,6 +262,9 @@ class CourseStructureCache:
         with TIMER.timer("CourseStructureCache.get", course_context) as tagger:
             try:
                 compressed_pickled_data = self.cache.get(key)
+                if isinstance(compressed_pickled_data, tuple) and compressed_pickled_data[0] == self.CHUNKED:
+                    tagger.measure('chunks', compressed_pickled_data[1])
+                    compressed_pickled_data = self._get_chunked(key, compressed_pickled_data)
                 tagger.tag(from_cache=str(compressed_pickled_data is not None).lower())
 
                 if compressed_pickled_data is None:
@@ -233,23 +285,38 @@ class CourseStructureCache:
                 return None
 
     def set(self, key, structure, course_context=None):
-        """Given a structure, will pickle, compress, and write to cache."""
+        """
+        Given a structure, will pickle, compress, and write to cache.
+
+        Returns whether the structure was cached.
+        """
         if self.cache is None:
-            return None
+            return False
 
         with TIMER.timer("CourseStructureCache.set", course_context) as tagger:
-            pickled_data = pickle.dumps(structure, 4)  # Protocol can't be incremented until cache is cleared
-            tagger.measure('uncompressed_size', len(pickled_data))
-
-            # 1 = Fastest (slightly larger results)
-            compressed_pickled_data = zlib.compress(pickled_data, 1)
+            compressed_pickled_data = self.serialize(structure)
             data_size = len(compressed_pickled_data)
             tagger.measure('compressed_size', data_size)
+            num_chunks = self.num_chunks(data_size)
+            tagger.measure('chunks', num_chunks)
 
             # We rely on the course structure cache default timeout, which should be
             # high by default (~ a few days).
             try:
-                self.cache.set(key, compressed_pickled_data)
+                if num_chunks > self.MAX_CHUNKS:
+                    raise ValueError(f'Course structure exceeds {self.MAX_CHUNKS} chunks')
+                if num_chunks == 1:
+                    self.cache.set(key, compressed_pickled_data)
+                else:
+                    digest = hashlib.sha1(compressed_pickled_data).hexdigest()
+                    chunk_keys = self._chunk_keys(key, num_chunks, digest)
+                    failed_keys = self.cache.set_many({
+                        chunk_key: compressed_pickled_data[index * self.CHUNK_SIZE:(index + 1) * self.CHUNK_SIZE]
+                        for index, chunk_key in enumerate(chunk_keys)
+                    })
+                    if failed_keys:
+                        raise ValueError(f'Failed to cache {len(failed_keys)} course structure chunks')
+                    self.cache.set(key, (self.CHUNKED, num_chunks, data_size, digest))
             except Exception:  # pylint: disable=broad-except
                 total_bytes_in_one_mb = 1024 * 1024
                 chunk_size_in_mbs = round(data_size / total_bytes_in_one_mb, 2)
@@ -259,6 +326,137 @@ class CourseStructureCache:
                 #   the memcached client failed to store value in course structure cache.
                 monitoring.set_custom_attribute('split_mongo_compressed_size', chunk_size_in_mbs)
                 log.info('Data caching (course structure) failed on chunk size: {} MB'.format(chunk_size_in_mbs))
+                return False
+            return True
+
+
+class CourseStructureFileCache:
+    """
+    Cache of course structures in files that are shared by all the processes of a host.
+
+    Structures are immutable by version, so each structure is written once, to a
+    file named by its id, which the processes then unpickle.  The files aren't
+    compressed, and are read from the page cache of the operating system rather
+    than over the network, but each process still unpickles its own copy of the
+    structure, so the cache doesn't reduce the memory used by the processes.
+    Unlike memcached, there is no limit on the size of a structure.
+
+    Unpickling a file can run arbitrary code, so the directory must only be
+    writable by the user running the processes, which are the only writers of
+    the files.
+
+    If COURSE_STRUCTURE_FILE_CACHE_DIR isn't set, then don't do anything for set and get.
+    """
+    # The version of the format of the files, which is part of their names so that
+    # files written in an older format are never read.
+    FORMAT_VERSION = 1
+
+    def __init__(self):
+        self.directory = getattr(settings, 'COURSE_STRUCTURE_FILE_CACHE_DIR', None)
+        self.max_size = getattr(settings, 'COURSE_STRUCTURE_FILE_CACHE_MAX_SIZE', None)
+
+    @property
+    def enabled(self):
+        """
+        Whether a directory is configured for the cache.
+        """
+        return bool(self.directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.v{self.FORMAT_VERSION}.structure')
+
+    def get(self, key, course_context=None):
+        """
+        Unpickle the structure from its file, or return None if it isn't cached.
+        """
+        if not self.enabled:
+            return None
+
+        with TIMER.timer("CourseStructureFileCache.get", course_context) as tagger:
+            path = self._path(key)
+            try:
+                with open(path, 'rb') as structure_file:
+                    data = structure_file.read()
+                tagger.measure('size', len(data))
+                structure = pickle.loads(data)
+            except FileNotFoundError:
+                tagger.tag(from_cache='false')
+                return None
+            except Exception:  # lint-amnesty, pylint: disable=broad-except
+                # The file is corrupt in some way, get rid of it.
+                log.warning("CourseStructureFileCache: Bad data in %s for %s", path, course_context)
+                self._remove(path)
+                return None
+
+            # Mark the file as recently used for _prune. Access times aren't
+            # reliable, as file systems are often mounted with noatime or relatime.
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+            tagger.tag(from_cache='true')
+            return structure
+
+    def set(self, key, structure, course_context=None):
+        """
+        Pickle the structure to its file, unless it's already there.
+        """
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+
+        with TIMER.timer("CourseStructureFileCache.set", course_context) as tagger:
+            try:
+                data = pickle.dumps(structure, 5)
+                tagger.measure('size', len(data))
+
+                # Write to a temporary file that is then renamed, so that other processes
+                # never read a partially written file.
+                os.makedirs(self.directory, exist_ok=True)
+                file_descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+                try:
+                    with os.fdopen(file_descriptor, 'wb') as structure_file:
+                        structure_file.write(data)
+                    os.replace(temporary_path, path)
+                except Exception:
+                    self._remove(temporary_path)
+                    raise
+            except Exception:  # lint-amnesty, pylint: disable=broad-except
+                log.warning("CourseStructureFileCache: Failed to write %s for %s", path, course_context, exc_info=True)
+                return
+
+        self._prune()
+
+    def _prune(self):
+        """
+        Remove the least recently used files while their total size is over
+        COURSE_STRUCTURE_FILE_CACHE_MAX_SIZE.
+        """
+        if not self.max_size:
+            return
+
+        with os.scandir(self.directory) as entries:
+            files = [
+                (stat.st_mtime, stat.st_size, entry.path)
+                for entry, stat in ((entry, entry.stat()) for entry in entries if entry.name.endswith('.structure'))
+            ]
+        total_size = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total_size <= self.max_size:
+                break
+            self._remove(path)
+            total_size -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
 
 
 class MongoPersistenceBackend:
@@ -311,9 +509,15 @@ class MongoPersistenceBackend:
         This method will use a cached version of the structure if it is available.
         """
         with TIMER.timer("get_structure", course_context) as tagger_get_structure:
+            file_cache = CourseStructureFileCache()
             cache = CourseStructureCache()
 
-            structure = cache.get(key, course_context)
+            structure = file_cache.get(key, course_context)
+            tagger_get_structure.tag(from_file_cache=str(bool(structure)).lower())
+            if not structure:
+                structure = cache.get(key, course_context)
+                if structure:
+                    file_cache.set(key, structure, course_context)
             tagger_get_structure.tag(from_cache=str(bool(structure)).lower())
             if not structure:
                 # Always log cache misses, because they are unexpected
@@ -332,6 +536,7 @@ class MongoPersistenceBackend:
                     tagger_find_one.sample_rate = 1
 
                 cache.set(key, structure, course_context)
+                file_cache.set(key, structure, course_context)
 
             return structure
 
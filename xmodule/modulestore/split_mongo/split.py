@@ -63,6 +63,8 @@ from importlib import import_module
 
 from bson.objectid import ObjectId
 from ccx_keys.locator import CCXBlockUsageLocator, CCXLocator
+from edx_django_utils import monitoring
+from edx_toggles.toggles import SettingToggle
 from mongodb_proxy import autoretry_read
 from opaque_keys.edx.keys import CourseKey
 from opaque_keys.edx.locator import (
@@ -101,6 +103,13 @@ from xmodule.modulestore.exceptions import (
 )
 from xmodule.modulestore.split_mongo import CourseEnvelope
 from xmodule.modulestore.split_mongo.mongo_connection import DuplicateKeyError, DjangoFlexPersistenceBackend
+from xmodule.modulestore.split_mongo.structure_index import (
+    BLOCK_DATA,
+    EDIT_INFO,
+    SETTINGS,
+    STRUCTURE_INDEX_CACHE,
+    StructureIndex
+)
 from xmodule.modulestore.store_utilities import DETACHED_XBLOCK_TYPES
 from xmodule.partitions.partitions_service import PartitionService
 from xmodule.util.misc import get_library_or_course_attribute
@@ -132,6 +141,19 @@ log = logging.getLogger(__name__)
 # When blacklists are this, all children should be excluded
 EXCLUDE_ALL = '*'
 
+# .. toggle_name: SPLIT_PREFETCH_DEFINITIONS
+# .. toggle_implementation: SettingToggle
+# .. toggle_default: True
+# .. toggle_description: When True, loading the blocks of a split course with a depth other than 0 fetches the
+#   definitions of all of the loaded blocks in a few queries, rather than one query per block when each block's
+#   content is first accessed.
+# .. toggle_use_cases: open_edx
+# .. toggle_creation_date: 2026-10-17
+SPLIT_PREFETCH_DEFINITIONS = SettingToggle('SPLIT_PREFETCH_DEFINITIONS', default=True, module_name=__name__)
+
+# Number of definitions fetched in each query when prefetching definitions.
+DEFINITION_PREFETCH_CHUNK_SIZE = 1000
+
 
 class SplitBulkWriteRecord(BulkOpsRecord):  # lint-amnesty, pylint: disable=missing-class-docstring
     def __init__(self):
@@ -753,10 +775,34 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                         # convert_fields gets done later in the runtime's xblock_from_json
                         block.fields.update(definition.get('fields'))
                         block.definition_loaded = True
+            elif depth != 0 and SPLIT_PREFETCH_DEFINITIONS.is_enabled():
+                self._prefetch_definitions(system, course_key, new_block_data.values())
 
             system.module_data.update(new_block_data)
             return system.module_data
 
+    def _prefetch_definitions(self, system, course_key, blocks):
+        """
+        Fetches the definitions of the given blocks which aren't loaded yet into the system's
+        prefetched definitions, from which their DefinitionLazyLoaders read them.
+        """
+        definition_ids = list({
+            block.definition
+            for block in blocks
+            if block.definition is not None and not isinstance(block.definition, LocalId) and
+            not block.definition_loaded and block.definition not in system.prefetched_definitions
+        })
+        for start in range(0, len(definition_ids), DEFINITION_PREFETCH_CHUNK_SIZE):
+            for definition in self.get_definitions(
+                course_key, definition_ids[start:start + DEFINITION_PREFETCH_CHUNK_SIZE]
+            ):
+                system.prefetched_definitions[definition['_id']] = definition
+
+        # .. custom_attribute_name: split_definitions_prefetched
+        # .. custom_attribute_description: The number of definitions of split modulestore blocks fetched
+        #   in bulk when the blocks were loaded with a depth, in the request.
+        monitoring.accumulate('split_definitions_prefetched', len(definition_ids))
+
     def _load_items(self, course_entry, block_keys, depth=0, **kwargs):
         """
         Load & cache the given blocks from the course. May return the blocks in any order.
@@ -1218,31 +1264,34 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             return []
 
         course = self._lookup_course(course_locator)
-        items = []
+        blocks = course.structure['blocks']
         qualifiers = qualifiers.copy() if qualifiers else {}  # copy the qualifiers (destructively manipulated here)
+        settings = settings.copy() if settings else {}
+        # edited_by and edited_on are matched against the blocks' edit info
+        edit_info_qualifiers = {
+            name: qualifiers.pop(name)
+            for name in ('edited_by', 'edited_on')
+            if name in qualifiers
+        }
 
         def _block_matches_all(block_data):
             """
-            Check that the block matches all the criteria
+            Check that the block matches all the criteria which don't require loading any additional data
             """
-            # do the checks which don't require loading any additional data
-            if (
+            return (
                 self._block_matches(block_data, qualifiers) and
-                self._block_matches(block_data.fields, settings)
-            ):
-                if content:
-                    definition_block = self.get_definition(course_locator, block_data.definition)
-                    return self._block_matches(definition_block['fields'], content)
-                else:
-                    return True
+                self._block_matches(block_data.fields, settings) and
+                self._block_matches(
+                    {name: getattr(block_data.edit_info, name) for name in edit_info_qualifiers},
+                    edit_info_qualifiers,
+                )
+            )
 
-        if settings is None:
-            settings = {}
         if 'name' in qualifiers:
             # odd case where we don't search just confirm
             block_name = qualifiers.pop('name')
             block_ids = []
-            for block_id, block in course.structure['blocks'].items():
+            for block_id, block in blocks.items():
                 # Don't do an in comparison blindly; first check to make sure
                 # that the name qualifier we're looking at isn't a plain string;
                 # if it is a string, then it should match exactly. If it's other
@@ -1256,6 +1305,7 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
                 if name_matches and _block_matches_all(block):
                     block_ids.append(block_id)
 
+            block_ids = self._filter_by_content(course_locator, blocks, block_ids, content)
             return self._load_items(course, block_ids, **kwargs)
 
         if 'category' in qualifiers:
@@ -1265,30 +1315,55 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
         if 'children' in qualifiers:
             settings['children'] = qualifiers.pop('children')
 
-        # No need of these caches unless include_orphans is set to False
-        path_cache = None
-        parents_cache = None
-
-        if not include_orphans:
-            path_cache = {}
-            parents_cache = self.build_block_key_to_parents_mapping(course.structure)
+        # Indexing a structure which is still being edited costs more than scanning it once
+        block_ids = None
+        structure_index = None
+        if not include_orphans or self._is_stored_structure(course.course_key, course.structure):
+            structure_index = self._get_structure_index(course.course_key, course.structure)
+            block_ids = structure_index.find_candidates(
+                blocks, {BLOCK_DATA: qualifiers, SETTINGS: settings, EDIT_INFO: edit_info_qualifiers},
+                self._value_matches,
+            )
+        if block_ids is None:
+            block_ids = blocks
 
-        for block_id, value in course.structure['blocks'].items():
-            if _block_matches_all(value):
+        items = []
+        for block_id in block_ids:
+            if _block_matches_all(blocks[block_id]):
                 if not include_orphans:
                     if (
                         block_id.type in DETACHED_XBLOCK_TYPES or
-                        self.has_path_to_root(block_id, course, path_cache, parents_cache)
+                        structure_index.has_path_to_root(block_id)
                     ):
                         items.append(block_id)
                 else:
                     items.append(block_id)
 
+        items = self._filter_by_content(course_locator, blocks, items, content)
         if len(items) > 0:
             return self._load_items(course, items, depth=0, **kwargs)
         else:
             return []
 
+    def _filter_by_content(self, course_key, blocks, block_ids, content):
+        """
+        Returns the blocks whose definitions match the content qualifiers of get_items,
+        loading all of their definitions at once.
+        """
+        if not content or not block_ids:
+            return block_ids
+
+        definitions = {
+            definition['_id']: definition
+            for definition in self.get_definitions(course_key, [blocks[block_id].definition for block_id in block_ids])
+        }
+        return [
+            block_id
+            for block_id in block_ids
+            if blocks[block_id].definition in definitions and
+            self._block_matches(definitions[blocks[block_id].definition]['fields'], content)
+        ]
+
     def build_block_key_to_parents_mapping(self, structure):
         """
         Given a structure, builds block_key to parents mapping for all block keys in structure
@@ -1305,6 +1380,26 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         return children_to_parents
 
+    def _get_structure_index(self, course_key, structure):
+        """
+        Returns the StructureIndex of the structure of the course.
+
+        The indexes of stored structures are cached, but a structure which was
+        versioned in an active bulk operation may still change, so it is indexed
+        on every call.
+        """
+        if not self._is_stored_structure(course_key, structure):
+            return StructureIndex(structure)
+        return STRUCTURE_INDEX_CACHE.get(structure)
+
+    def _is_stored_structure(self, course_key, structure):
+        """
+        Returns whether the structure of the course is stored, rather than versioned
+        in an active bulk operation, so it can no longer change.
+        """
+        bulk_write_record = self._get_bulk_ops_record(course_key)
+        return not bulk_write_record.active or structure['_id'] in bulk_write_record.structures_in_db
+
     def has_path_to_root(self, block_key, course, path_cache=None, parents_cache=None):
         """
         Check recursively if an xblock has a path to the course root
@@ -1318,14 +1413,13 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         :return Bool: whether or not component has path to the root
         """
+        if parents_cache is None:
+            return self._get_structure_index(course.course_key, course.structure).has_path_to_root(block_key)
 
         if path_cache and block_key in path_cache:
             return path_cache[block_key]
 
-        if parents_cache is None:
-            xblock_parents = self._get_parents_from_structure(block_key, course.structure)
-        else:
-            xblock_parents = parents_cache[block_key]
+        xblock_parents = parents_cache[block_key]
 
         if len(xblock_parents) == 0 and block_key.type in ["course", "library"]:
             # Found, xblock has the path to the root
@@ -1357,14 +1451,15 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
             raise ItemNotFoundError(locator)
 
         course = self._lookup_course(locator.course_key)
-        all_parent_ids = self._get_parents_from_structure(BlockKey.from_usage_key(locator), course.structure)
+        structure_index = self._get_structure_index(course.course_key, course.structure)
+        all_parent_ids = structure_index.parents.get(BlockKey.from_usage_key(locator), [])
 
         # Check and verify the found parent_ids are not orphans; Remove parent which has no valid path
         # to the course root
         parent_ids = [
             valid_parent
             for valid_parent in all_parent_ids
-            if self.has_path_to_root(valid_parent, course)
+            if structure_index.has_path_to_root(valid_parent)
         ]
 
         if len(parent_ids) == 0:
@@ -1388,13 +1483,12 @@ class SplitMongoModuleStore(SplitBulkWriteMixin, ModuleStoreWriteBase):
 
         detached_categories = [name for name, __ in XBlock.load_tagged_classes("detached")]
         course = self._lookup_course(course_key)
-        items = set(course.structure['blocks'].keys())
-        items.remove(course.structure['root'])
         blocks = course.structure['blocks']
-        for block_id, block_data in blocks.items():
-            items.difference_update(BlockKey(*child) for child in block_data.fields.get('children', []))
-            if block_data.block_type in detached_categories:
-                items.discard(block_id)
+        items = [
+            block_id
+            for block_id in self._get_structure_index(course.course_key, course.structure).parentless_blocks
+            if block_id != course.structure['root'] and blocks[block_id].block_type not in detached_categories
+        ]
         return [
             course_key.make_usage_key(block_type=block_id.type, block_id=block_id.id)
             for block_id in items
@@ -0,0 +1,278 @@
+"""
+Indexes of the blocks of split modulestore course structures.
+
+Finding the parents of a block, whether a block is in the course tree, or the
+blocks of a type otherwise scans all of the blocks of a structure.  A
+StructureIndex derives all of those from a structure in a single pass, and as
+structures are immutable once they are stored, the index of a stored structure
+is kept by version and shared by all of the reads of that version in the process.
+
+The index also keeps indexes of the values of the block fields that get_items
+queries, each built on the first query of its field.
+"""
+
+
+import re
+import threading
+from collections import OrderedDict, defaultdict
+
+# The types of the blocks at the root of course trees.
+ROOT_BLOCK_TYPES = ('course', 'library')
+
+# The sources of the fields of BlockData which can be indexed, with functions
+# returning whether a field is set on a block and its value.
+BLOCK_DATA = 'block_data'
+SETTINGS = 'settings'
+EDIT_INFO = 'edit_info'
+FIELD_GETTERS = {
+    BLOCK_DATA: lambda block_data, name: (name in block_data.__dict__, block_data.__dict__.get(name)),
+    SETTINGS: lambda block_data, name: (name in block_data.fields, block_data.fields.get(name)),
+    EDIT_INFO: lambda block_data, name: (True, getattr(block_data.edit_info, name)),
+}
+
+
+class FieldIndex:
+    """
+    The blocks of a structure by the values of one of their fields.
+
+    Blocks are indexed by each of the elements of list values, as get_items matches
+    a list if any of its elements matches.  The index returns the blocks which may
+    match a criteria of get_items, which the caller still needs to check.
+    """
+    def __init__(self, blocks, source, name):
+        get_field = FIELD_GETTERS[source]
+        # set(BlockKey), the blocks on which the field is set.
+        self.set_blocks = set()
+        # {value: set(BlockKey)}
+        self.blocks_by_value = defaultdict(set)
+        # set(BlockKey), the blocks with values which can't be indexed.
+        self.unhashable_blocks = set()
+        for block_key, block_data in blocks.items():
+            is_set, value = get_field(block_data, name)
+            if not is_set:
+                continue
+            self.set_blocks.add(block_key)
+            for element in (value if isinstance(value, list) else [value]):
+                try:
+                    self.blocks_by_value[element].add(block_key)
+                except TypeError:
+                    self.unhashable_blocks.add(block_key)
+
+    def candidates(self, criteria, value_matches):
+        """
+        Returns the set of blocks which may match the criteria, or None if the
+        index can't narrow them down.
+
+        Arguments:
+            criteria: The criteria of the field, as given to get_items.
+            value_matches (function): Returns whether a value matches a criteria.
+        """
+        if isinstance(criteria, dict):
+            if criteria == {'$exists': True}:
+                return self.set_blocks
+            if list(criteria) == ['$in']:
+                candidates = set()
+                for value in criteria['$in']:
+                    value_candidates = self.candidates(value, value_matches)
+                    if value_candidates is None:
+                        return None
+                    candidates |= value_candidates
+                return candidates
+            return None
+
+        if isinstance(criteria, re.Pattern) or callable(criteria):
+            # Test each distinct value once rather than each block.
+            candidates = set(self.unhashable_blocks)
+            for value, block_keys in self.blocks_by_value.items():
+                try:
+                    matches = value_matches(value, criteria)
+                except Exception:  # pylint: disable=broad-except
+                    # Leave values the criteria can't test to the caller.
+                    matches = True
+                if matches:
+                    candidates |= block_keys
+            return candidates
+
+        try:
+            return self.blocks_by_value.get(criteria, set()) | self.unhashable_blocks
+        except TypeError:
+            return None
+
+
+class StructureIndex:
+    """
+    The parents, course tree intervals and types of the blocks of a structure.
+
+    The blocks in the course tree are numbered by an Euler tour of the tree from
+    its root, so that a block is an ancestor of another exactly if the interval
+    of the tour in which the block is visited contains that of the other block.
+    Blocks with several parents are only visited from the first of them, and
+    ancestor checks of such blocks fall back to following their parents.
+
+    The index only keeps block keys and field values, not the blocks of the
+    structure, so that cached indexes don't keep their structures alive.  The
+    field indexes are built from the blocks of the structure that is queried.
+    """
+    def __init__(self, structure):
+        blocks = structure['blocks']
+
+        # {BlockKey: [BlockKey]}, the parents of each block in the order of the structure.
+        self.parents = defaultdict(list)
+        # {block_type: [BlockKey]}, the blocks of each type in the order of the structure.
+        self.blocks_by_type = defaultdict(list)
+        for block_key, block_data in blocks.items():
+            self.blocks_by_type[block_key.type].append(block_key)
+            for child_key in block_data.fields.get('children', []):
+                self.parents[child_key].append(block_key)
+
+        # {BlockKey: (int, int)}, the indexes of the tour at which each block of the
+        # course tree is entered and left.
+        self._intervals = {}
+        # [BlockKey], the blocks of the course tree in the order they are entered.
+        self._tour = []
+        self._has_multiple_parents = False
+        # {BlockKey: int}, the position of each block in the structure.
+        self._positions = {block_key: position for position, block_key in enumerate(blocks)}
+        # {(source, field name): FieldIndex}, built when first queried.
+        self._field_indexes = {}
+
+        # [BlockKey], the blocks which aren't the child of any block, in the order of the structure.
+        self.parentless_blocks = [block_key for block_key in blocks if not self.parents.get(block_key)]
+        for block_key in self.parentless_blocks:
+            if block_key.type in ROOT_BLOCK_TYPES:
+                self._visit(blocks, block_key)
+
+    def _visit(self, blocks, root_key):
+        """
+        Numbers the blocks of the tree of the given root, without recursing so that
+        deep trees don't exceed the recursion limit.
+        """
+        self._intervals[root_key] = (len(self._tour), None)
+        self._tour.append(root_key)
+        stack = [(root_key, iter(blocks[root_key].fields.get('children', [])))]
+        while stack:
+            block_key, children = stack[-1]
+            for child_key in children:
+                if child_key in self._intervals:
+                    self._has_multiple_parents = True
+                elif child_key in blocks:
+                    self._intervals[child_key] = (len(self._tour), None)
+                    self._tour.append(child_key)
+                    stack.append((child_key, iter(blocks[child_key].fields.get('children', []))))
+                    break
+            else:
+                stack.pop()
+                self._intervals[block_key] = (self._intervals[block_key][0], len(self._tour))
+
+    def has_path_to_root(self, block_key):
+        """
+        Returns whether the block is in the course tree.
+        """
+        return block_key in self._intervals
+
+    def is_ancestor(self, ancestor_key, block_key):
+        """
+        Returns whether the block is a descendant of the ancestor in the course tree.
+        """
+        ancestor_interval = self._intervals.get(ancestor_key)
+        block_interval = self._intervals.get(block_key)
+        if ancestor_interval is None or block_interval is None:
+            return False
+        if ancestor_interval[0] < block_interval[0] and block_interval[1] <= ancestor_interval[1]:
+            return True
+        if not self._has_multiple_parents:
+            return False
+
+        visited = set()
+        to_visit = list(self.parents.get(block_key, []))
+        while to_visit:
+            parent_key = to_visit.pop()
+            if parent_key == ancestor_key:
+                return True
+            if parent_key not in visited:
+                visited.add(parent_key)
+                to_visit.extend(self.parents.get(parent_key, []))
+        return False
+
+    def descendants(self, block_key):
+        """
+        Returns the blocks of the subtree of the block in the course tree, excluding the block itself.
+        Blocks with several parents are only included in the subtree of the first of them.
+        """
+        interval = self._intervals.get(block_key)
+        if interval is None:
+            return []
+        return self._tour[interval[0] + 1:interval[1]]
+
+    def field_index(self, blocks, source, name):
+        """
+        Returns the FieldIndex of the named field of the given source, built from
+        the given blocks of the indexed structure if it isn't already.
+        """
+        field_index = self._field_indexes.get((source, name))
+        if field_index is None:
+            field_index = self._field_indexes[(source, name)] = FieldIndex(blocks, source, name)
+        return field_index
+
+    def find_candidates(self, blocks, criteria_by_source, value_matches):
+        """
+        Returns the blocks which may match all of the criteria, in the order of the
+        structure, or None if the indexes can't narrow them down.  The caller still
+        needs to check that the returned blocks match.
+
+        Arguments:
+            blocks (dict): The blocks of the indexed structure.
+            criteria_by_source (dict): {source: {field name: criteria}}, the criteria of
+                get_items of the fields of each of BLOCK_DATA, SETTINGS and EDIT_INFO.
+            value_matches (function): Returns whether a value matches a criteria.
+        """
+        candidate_sets = []
+        for source, criteria in criteria_by_source.items():
+            for name, field_criteria in (criteria or {}).items():
+                if source == BLOCK_DATA and name == 'block_type' and isinstance(field_criteria, str):
+                    candidates = set(self.blocks_by_type.get(field_criteria, []))
+                else:
+                    candidates = self.field_index(blocks, source, name).candidates(field_criteria, value_matches)
+                if candidates is not None:
+                    candidate_sets.append(candidates)
+
+        if not candidate_sets:
+            return None
+        candidate_sets.sort(key=len)
+        candidates = candidate_sets[0].intersection(*candidate_sets[1:])
+        return sorted(candidates, key=self._positions.__getitem__)
+
+
+class StructureIndexCache:
+    """
+    A thread safe cache of the indexes of the most recently used stored structures.
+    """
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, structure):
+        """
+        Returns the index of the stored structure, building it if it isn't cached.
+        """
+        version = structure['_id']
+        with self._lock:
+            index = self._indexes.get(version)
+            if index is not None:
+                self._indexes.move_to_end(version)
+                return index
+
+        index = StructureIndex(structure)
+        with self._lock:
+            self._indexes[version] = index
+            while len(self._indexes) > self.max_size:
+                self._indexes.popitem(last=False)
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+STRUCTURE_INDEX_CACHE = StructureIndexCache(max_size=64)
@@ -0,0 +1,177 @@
+"""
+A write-only filesystem which writes the files of an export into a tar archive as they are closed.
+
+Exporting into a TarExportFS rather than a directory which is archived afterwards
+avoids staging the export on disk and reading all of its files twice.  Each file
+is buffered in memory, or on disk past SPOOL_MAX_SIZE, until it is closed, since
+the size of a member of a tar archive precedes its data.  Files copied from a
+seekable stream with setbinfile are streamed into the archive without buffering.
+"""
+
+
+import io
+import os
+import tarfile
+import time
+from tempfile import SpooledTemporaryFile
+
+from fs import errors
+from fs.base import FS
+from fs.info import Info
+from fs.mode import Mode
+from fs.path import abspath, basename, dirname, normpath, recursepath
+from fs.tools import copy_file_data
+
+# The size up to which the content of a file is buffered in memory before it is written into the archive.
+SPOOL_MAX_SIZE = 4 * 1024 * 1024
+
+
+class TarMemberFile(io.RawIOBase):
+    """
+    A file written into the archive of a TarExportFS when it is closed.
+    """
+    def __init__(self, export_fs, path, mode):
+        super().__init__()
+        self.export_fs = export_fs
+        self.path = path
+        self.mode = mode
+        self.name = path
+        self._buffer = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)  # pylint: disable=consider-using-with
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        return self._buffer.write(b)
+
+    def close(self):
+        if not self.closed:
+            try:
+                size = self._buffer.tell()
+                self._buffer.seek(0)
+                self.export_fs.add_file(self.path, self._buffer, size)
+            finally:
+                self._buffer.close()
+        super().close()
+
+
+class TarExportFS(FS):
+    """
+    A write-only filesystem whose files and directories are written into an open tarfile.TarFile.
+
+    Arguments:
+        tar_file (tarfile.TarFile): The archive opened for writing, which may be a stream (mode 'w|gz').
+    """
+    _meta = {
+        'case_insensitive': False,
+        'invalid_path_chars': '\0',
+        'network': False,
+        'read_only': False,
+        'supports_rename': False,
+        'thread_safe': True,
+        'unicode_paths': True,
+        'virtual': False,
+    }
+
+    def __init__(self, tar_file):
+        super().__init__()
+        self.tar_file = tar_file
+        # The paths of the directories and files written so far.
+        self._dirs = {'/'}
+        self._files = set()
+
+    def _tar_info(self, path, **attributes):
+        """
+        Returns a TarInfo for the path in the archive, with the given attributes.
+        """
+        tar_info = tarfile.TarInfo(path.lstrip('/'))
+        tar_info.mtime = int(time.time())
+        for name, value in attributes.items():
+            setattr(tar_info, name, value)
+        return tar_info
+
+    def add_file(self, path, file, size):
+        """
+        Writes size bytes of the binary file object, from its current position, into the archive at the path.
+        """
+        path = abspath(normpath(path))
+        with self._lock:
+            self._check_parent(path)
+            self.tar_file.addfile(self._tar_info(path, size=size, mode=0o644), file)
+            self._files.add(path)
+
+    def _check_parent(self, path):
+        if dirname(path) not in self._dirs:
+            raise errors.ResourceNotFound(path)
+
+    def getinfo(self, path, namespaces=None):
+        path = abspath(normpath(path))
+        if path not in self._dirs and path not in self._files:
+            raise errors.ResourceNotFound(path)
+        return Info({'basic': {'name': basename(path), 'is_dir': path in self._dirs}})
+
+    def listdir(self, path):
+        path = abspath(normpath(path))
+        if path not in self._dirs:
+            raise errors.ResourceNotFound(path)
+        with self._lock:
+            return sorted(
+                basename(entry) for entry in self._dirs | self._files
+                if entry != '/' and dirname(entry) == path
+            )
+
+    def makedir(self, path, permissions=None, recreate=False):
+        path = abspath(normpath(path))
+        with self._lock:
+            if path in self._dirs:
+                if not recreate:
+                    raise errors.DirectoryExists(path)
+            elif path in self._files:
+                raise errors.DirectoryExpected(path)
+            else:
+                self._check_parent(path)
+                self.tar_file.addfile(self._tar_info(path, type=tarfile.DIRTYPE, mode=0o755))
+                self._dirs.add(path)
+        return self.opendir(path)
+
+    def makedirs(self, path, permissions=None, recreate=False):
+        path = abspath(normpath(path))
+        for parent in recursepath(path)[1:-1]:
+            self.makedir(parent, recreate=True)
+        return self.makedir(path, recreate=recreate)
+
+    def openbin(self, path, mode='r', buffering=-1, **options):
+        path = abspath(normpath(path))
+        _mode = Mode(mode)
+        if not _mode.writing or _mode.appending or _mode.reading:
+            raise errors.ResourceReadOnly(path)
+        if path in self._dirs:
+            raise errors.FileExpected(path)
+        if _mode.exclusive and path in self._files:
+            raise errors.FileExists(path)
+        self._check_parent(path)
+        return TarMemberFile(self, path, mode)
+
+    def setbinfile(self, path, file):
+        try:
+            position = file.tell()
+            file.seek(0, os.SEEK_END)
+            size = file.tell() - position
+            file.seek(position)
+        except (AttributeError, OSError):
+            # Buffer the content of streams which can't be measured.
+            with self.openbin(path, 'wb') as member_file:
+                copy_file_data(file, member_file)
+        else:
+            if abspath(normpath(path)) in self._dirs:
+                raise errors.FileExpected(path)
+            self.add_file(path, file, size)
+
+    def remove(self, path):
+        raise errors.ResourceReadOnly(path)
+
+    def removedir(self, path):
+        raise errors.ResourceReadOnly(path)
+
+    def setinfo(self, path, info):
+        self.getinfo(path)
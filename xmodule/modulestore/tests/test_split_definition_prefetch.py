@@ -0,0 +1,112 @@
+""" Tests of the prefetching of definitions by the split modulestore """
+
+
+import contextlib
+import unittest
+from unittest.mock import Mock, patch
+
+from bson import ObjectId
+from django.test.utils import override_settings
+
+from xmodule.modulestore.split_mongo import CourseEnvelope
+from xmodule.modulestore.split_mongo.definition_lazy_loader import DefinitionLazyLoader
+from xmodule.modulestore.tests.test_split_structure_index import (
+    CHAPTER_1,
+    COURSE,
+    HTML,
+    SEQUENTIAL_1,
+    SHARED_HTML,
+    _make_structure,
+    make_store
+)
+
+
+class TestDefinitionPrefetch(unittest.TestCase):
+    """ Tests of the definitions prefetched by SplitMongoModuleStore.cache_items """
+
+    def setUp(self):
+        super().setUp()
+        self.structure = _make_structure({
+            ('course', 'course'): [('chapter', 'chapter_1')],
+            ('chapter', 'chapter_1'): [('sequential', 'sequential_1')],
+            ('sequential', 'sequential_1'): [('html', 'shared'), ('html', 'html')],
+            ('html', 'shared'): [],
+            ('html', 'html'): [],
+        })
+        self.blocks = self.structure['blocks']
+        self.definitions = {
+            block_data.definition: {'_id': block_data.definition, 'fields': {'data': block_key.id}}
+            for block_key, block_data in self.blocks.items()
+        }
+        self.store, self.course_key = make_store(self.structure, self.definitions)
+        self.store.bulk_operations = Mock(return_value=contextlib.nullcontext())
+        self.system = Mock(
+            course_entry=CourseEnvelope(self.course_key, self.structure), module_data={}, prefetched_definitions={},
+        )
+
+    def _definition_ids(self, *block_keys):
+        return {self.blocks[block_key].definition for block_key in block_keys}
+
+    def _fetched_definition_ids(self):
+        return [set(call[0][1]) for call in self.store.get_definitions.call_args_list]
+
+    def test_prefetch(self):
+        self.store.cache_items(self.system, [CHAPTER_1], self.course_key, depth=None)
+        assert self._fetched_definition_ids() == [self._definition_ids(CHAPTER_1, SEQUENTIAL_1, SHARED_HTML, HTML)]
+        assert self.system.prefetched_definitions[self.blocks[HTML].definition] == self.definitions[
+            self.blocks[HTML].definition
+        ]
+
+        self.store.cache_items(self.system, [COURSE], self.course_key, depth=1)
+        assert self._fetched_definition_ids()[1:] == [self._definition_ids(COURSE)]
+
+    def test_depth(self):
+        self.store.cache_items(self.system, [COURSE], self.course_key, depth=2)
+        assert self._fetched_definition_ids() == [self._definition_ids(COURSE, CHAPTER_1, SEQUENTIAL_1)]
+
+    def test_chunks(self):
+        with patch('xmodule.modulestore.split_mongo.split.DEFINITION_PREFETCH_CHUNK_SIZE', 2):
+            self.store.cache_items(self.system, [COURSE], self.course_key, depth=None)
+        fetched = self._fetched_definition_ids()
+        assert [len(definition_ids) for definition_ids in fetched] == [2, 2, 1]
+        assert set.union(*fetched) == set(self.definitions)
+
+    def test_not_prefetched(self):
+        self.store.cache_items(self.system, [COURSE], self.course_key, depth=0)
+        with override_settings(SPLIT_PREFETCH_DEFINITIONS=False):
+            self.store.cache_items(self.system, [COURSE], self.course_key, depth=None)
+        assert not self.store.get_definitions.called
+        assert not self.system.prefetched_definitions
+        assert set(self.system.module_data) == set(self.blocks)
+
+
+class TestDefinitionLazyLoader(unittest.TestCase):
+    """ Tests of DefinitionLazyLoader.fetch """
+
+    def setUp(self):
+        super().setUp()
+        self.prefetched_id = ObjectId()
+        self.lazy_id = ObjectId()
+        self.modulestore = Mock()
+        self.modulestore.get_definition.return_value = {'_id': self.lazy_id, 'fields': {'data': 'lazy'}}
+        self.prefetched_definitions = {}
+
+    def _loader(self, definition_id):
+        return DefinitionLazyLoader(
+            self.modulestore, Mock(), 'html', definition_id, lambda fields: fields, self.prefetched_definitions,
+        )
+
+    @patch('xmodule.modulestore.split_mongo.definition_lazy_loader.monitoring')
+    def test_fetch(self, mock_monitoring):
+        loader = self._loader(self.prefetched_id)
+        self.prefetched_definitions[self.prefetched_id] = {'_id': self.prefetched_id, 'fields': {'data': 'prefetched'}}
+        definition = loader.fetch()
+        assert definition == self.prefetched_definitions[self.prefetched_id]
+        assert definition is not self.prefetched_definitions[self.prefetched_id]
+        assert not self.modulestore.get_definition.called
+        mock_monitoring.accumulate.assert_called_once_with('split_definition_prefetch_hits', 1)
+
+        mock_monitoring.reset_mock()
+        assert self._loader(self.lazy_id).fetch()['fields'] == {'data': 'lazy'}
+        assert self.modulestore.get_definition.called
+        mock_monitoring.accumulate.assert_called_once_with('split_definition_lazy_loads', 1)
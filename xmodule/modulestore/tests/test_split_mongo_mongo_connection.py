@@ -1,14 +1,30 @@
 """ Test the behavior of split_mongo/MongoPersistenceBackend """
 
 
+import os
+import shutil
+import tempfile
 import unittest
-from unittest.mock import patch
+from datetime import datetime
+from unittest.mock import Mock, patch
 
 import pytest
+from bson import ObjectId
+from django.core.cache import caches
+from django.test.utils import override_settings
 from pymongo.errors import ConnectionFailure
+from pytz import UTC
 
 from xmodule.exceptions import HeartbeatFailure
-from xmodule.modulestore.split_mongo.mongo_connection import MongoPersistenceBackend
+from xmodule.modulestore import BlockData
+from xmodule.modulestore.split_mongo import BlockKey
+from openedx.core.djangolib.testing.utils import CacheIsolationMixin
+from xmodule.modulestore.split_mongo.mongo_connection import (
+    CourseStructureCache,
+    CourseStructureFileCache,
+    MongoPersistenceBackend,
+    structure_to_mongo
+)
 
 
 class TestHeartbeatFailureException(unittest.TestCase):
@@ -24,3 +40,187 @@ class TestHeartbeatFailureException(unittest.TestCase):
 
             with pytest.raises(HeartbeatFailure):
                 useless_conn.heartbeat()
+
+
+def _make_structure():
+    """
+    Return a structure of a course with a chapter, as converted by structure_from_mongo.
+    """
+    edit_info = {
+        'edited_on': datetime(2023, 5, 1, 12, 30, tzinfo=UTC),
+        'edited_by': 42,
+        'previous_version': None,
+        'update_version': ObjectId(),
+    }
+    course_key = BlockKey('course', 'course')
+    chapter_key = BlockKey('chapter', 'chapter')
+    return {
+        '_id': ObjectId(),
+        'root': course_key,
+        'previous_version': None,
+        'original_version': ObjectId(),
+        'edited_by': 42,
+        'edited_on': datetime(2023, 5, 1, 12, 30, tzinfo=UTC),
+        'schema_version': 1,
+        'blocks': {
+            course_key: BlockData(
+                block_type='course',
+                fields={'children': [chapter_key], 'display_name': 'Course'},
+                definition=ObjectId(),
+                edit_info=edit_info,
+            ),
+            chapter_key: BlockData(
+                block_type='chapter',
+                fields={'display_name': 'Chapter'},
+                definition=ObjectId(),
+                edit_info=edit_info,
+            ),
+        },
+    }
+
+
+class TestCourseStructureCacheChunks(CacheIsolationMixin, unittest.TestCase):
+    """ Tests of the chunked storage of large structures in the CourseStructureCache """
+    ENABLED_CACHES = ['default']
+
+    def setUp(self):
+        super().setUp()
+        for patcher in (
+            patch('xmodule.modulestore.split_mongo.mongo_connection.get_cache', return_value=caches['default']),
+            patch.object(CourseStructureCache, 'CHUNK_SIZE', 100),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.structure = _make_structure()
+        self.key = self.structure['_id']
+        self.num_chunks = CourseStructureCache.num_chunks(len(CourseStructureCache.serialize(self.structure)))
+
+    def test_get_set(self):
+        assert self.num_chunks > 1
+        cache = CourseStructureCache()
+        assert cache.set(self.key, self.structure)
+        with patch.object(caches['default'], 'get_many', wraps=caches['default'].get_many) as mock_get_many:
+            assert CourseStructureCache().get(self.key) == self.structure
+        assert mock_get_many.call_count == 1
+        assert len(mock_get_many.call_args[0][0]) == self.num_chunks
+
+    def test_unchunked(self):
+        with patch.object(CourseStructureCache, 'CHUNK_SIZE', 1000 * 1000):
+            assert CourseStructureCache().set(self.key, self.structure)
+        assert isinstance(caches['default'].get(self.key), bytes)
+        assert CourseStructureCache().get(self.key) == self.structure
+
+    def test_missing_chunk(self):
+        cache = CourseStructureCache()
+        cache.set(self.key, self.structure)
+        _, num_chunks, _, digest = caches['default'].get(self.key)
+        caches['default'].delete(cache._chunk_keys(self.key, num_chunks, digest)[-1])  # pylint: disable=protected-access
+        assert cache.get(self.key) is None
+
+    def test_corrupt_chunk(self):
+        cache = CourseStructureCache()
+        cache.set(self.key, self.structure)
+        _, num_chunks, _, digest = caches['default'].get(self.key)
+        chunk_key = cache._chunk_keys(self.key, num_chunks, digest)[0]  # pylint: disable=protected-access
+        caches['default'].set(chunk_key, b'x' * len(caches['default'].get(chunk_key)))
+        assert cache.get(self.key) is None
+        assert caches['default'].get(self.key) is None
+
+    def test_too_many_chunks(self):
+        with patch.object(CourseStructureCache, 'MAX_CHUNKS', self.num_chunks - 1):
+            assert not CourseStructureCache().set(self.key, self.structure)
+        assert caches['default'].get(self.key) is None
+
+    def test_failed_chunk(self):
+        with patch.object(caches['default'], 'set_many', return_value=['failed']):
+            assert not CourseStructureCache().set(self.key, self.structure)
+        assert caches['default'].get(self.key) is None
+
+
+class TestCourseStructureFileCache(unittest.TestCase):
+    """ Tests of the CourseStructureFileCache """
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(COURSE_STRUCTURE_FILE_CACHE_DIR=self.directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _set(self, cache, structure):
+        cache.set(structure['_id'], structure)
+
+    def test_get_set(self):
+        cache = CourseStructureFileCache()
+        structure = _make_structure()
+        assert cache.get(structure['_id']) is None
+
+        self._set(cache, structure)
+        assert CourseStructureFileCache().get(structure['_id']) == structure
+
+    @override_settings(COURSE_STRUCTURE_FILE_CACHE_DIR=None)
+    def test_not_configured(self):
+        cache = CourseStructureFileCache()
+        structure = _make_structure()
+        self._set(cache, structure)
+        assert cache.get(structure['_id']) is None
+        assert not os.listdir(self.directory)
+
+    def test_bad_data(self):
+        cache = CourseStructureFileCache()
+        structure = _make_structure()
+        self._set(cache, structure)
+        [file_name] = os.listdir(self.directory)
+        with open(os.path.join(self.directory, file_name), 'r+b') as structure_file:
+            structure_file.truncate(100)
+
+        assert cache.get(structure['_id']) is None
+        assert not os.listdir(self.directory)
+
+    def test_prune(self):
+        structures = [_make_structure() for _ in range(3)]
+        cache = CourseStructureFileCache()
+        self._set(cache, structures[0])
+        [file_name] = os.listdir(self.directory)
+        file_size = os.path.getsize(os.path.join(self.directory, file_name))
+        os.utime(os.path.join(self.directory, file_name), (0, 0))
+
+        with override_settings(COURSE_STRUCTURE_FILE_CACHE_MAX_SIZE=2 * file_size + 10):
+            cache = CourseStructureFileCache()
+            self._set(cache, structures[1])
+            self._set(cache, structures[2])
+
+        assert len(os.listdir(self.directory)) == 2
+        assert cache.get(structures[0]['_id']) is None
+        assert cache.get(structures[2]['_id']) == structures[2]
+
+    def test_prune_keeps_recently_read(self):
+        structures = [_make_structure() for _ in range(3)]
+        cache = CourseStructureFileCache()
+        for mtime, structure in enumerate(structures[:2]):
+            self._set(cache, structure)
+            os.utime(cache._path(structure['_id']), (mtime, mtime))  # pylint: disable=protected-access
+        file_size = os.path.getsize(cache._path(structures[0]['_id']))  # pylint: disable=protected-access
+        assert cache.get(structures[0]['_id']) == structures[0]
+
+        with override_settings(COURSE_STRUCTURE_FILE_CACHE_MAX_SIZE=2 * file_size + 10):
+            self._set(CourseStructureFileCache(), structures[2])
+
+        assert cache.get(structures[0]['_id']) == structures[0]
+        assert cache.get(structures[1]['_id']) is None
+        assert cache.get(structures[2]['_id']) == structures[2]
+
+    @patch('pymongo.MongoClient')
+    @patch('pymongo.database.Database')
+    def test_get_structure(self, *calls):
+        # pylint: disable=W0613
+        structure = _make_structure()
+        with patch('mongodb_proxy.MongoProxy'):
+            connection = MongoPersistenceBackend('db', 'collection', 'host')
+        connection.structures = Mock()
+        connection.structures.find_one.side_effect = lambda query: structure_to_mongo(structure)
+
+        assert connection.get_structure(structure['_id']) == structure
+        assert connection.get_structure(structure['_id']) == structure
+        assert connection.structures.find_one.call_count == 1
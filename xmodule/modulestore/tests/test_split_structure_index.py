@@ -0,0 +1,229 @@
+""" Tests of the indexes of split modulestore structures """
+
+
+import datetime
+import gc
+import re
+import unittest
+import weakref
+from unittest.mock import Mock
+
+from xmodule.modulestore.split_mongo import BlockKey
+from xmodule.modulestore.split_mongo.structure_index import (
+    BLOCK_DATA,
+    EDIT_INFO,
+    SETTINGS,
+    StructureIndex,
+    StructureIndexCache
+)
+from xmodule.modulestore.tests.utils import make_split_store, make_split_structure
+
+
+COURSE = BlockKey('course', 'course')
+CHAPTER_1 = BlockKey('chapter', 'chapter_1')
+CHAPTER_2 = BlockKey('chapter', 'chapter_2')
+SEQUENTIAL_1 = BlockKey('sequential', 'sequential_1')
+SEQUENTIAL_2 = BlockKey('sequential', 'sequential_2')
+SHARED_HTML = BlockKey('html', 'shared')
+HTML = BlockKey('html', 'html')
+ORPHAN_VERTICAL = BlockKey('vertical', 'orphan')
+ORPHAN_HTML = BlockKey('html', 'orphan')
+
+
+class TestStructureIndex(unittest.TestCase):
+    """ Tests of the StructureIndex """
+
+    def setUp(self):
+        super().setUp()
+        self.structure = make_split_structure({
+            ('course', 'course'): [('chapter', 'chapter_1'), ('chapter', 'chapter_2')],
+            ('chapter', 'chapter_1'): [('sequential', 'sequential_1')],
+            ('chapter', 'chapter_2'): [('sequential', 'sequential_2')],
+            ('sequential', 'sequential_1'): [('html', 'shared'), ('html', 'html')],
+            ('sequential', 'sequential_2'): [('html', 'shared'), ('html', 'missing')],
+            ('html', 'shared'): [],
+            ('html', 'html'): [],
+            ('vertical', 'orphan'): [('html', 'orphan')],
+            ('html', 'orphan'): [],
+        })
+        self.index = StructureIndex(self.structure)
+
+    def test_parents(self):
+        assert self.index.parents[SHARED_HTML] == [SEQUENTIAL_1, SEQUENTIAL_2]
+        assert self.index.parents[ORPHAN_HTML] == [ORPHAN_VERTICAL]
+        assert not self.index.parents.get(COURSE)
+
+    def test_blocks_by_type(self):
+        assert self.index.blocks_by_type['html'] == [SHARED_HTML, HTML, ORPHAN_HTML]
+        assert self.index.blocks_by_type['chapter'] == [CHAPTER_1, CHAPTER_2]
+
+    def test_parentless_blocks(self):
+        assert self.index.parentless_blocks == [COURSE, ORPHAN_VERTICAL]
+
+    def test_has_path_to_root(self):
+        for block_key in (COURSE, CHAPTER_2, SEQUENTIAL_2, SHARED_HTML, HTML):
+            assert self.index.has_path_to_root(block_key)
+        for block_key in (ORPHAN_VERTICAL, ORPHAN_HTML, BlockKey('html', 'missing')):
+            assert not self.index.has_path_to_root(block_key)
+
+    def test_is_ancestor(self):
+        assert self.index.is_ancestor(COURSE, HTML)
+        assert self.index.is_ancestor(CHAPTER_1, SHARED_HTML)
+        # The shared block is only visited from its first parent in the tour.
+        assert self.index.is_ancestor(CHAPTER_2, SHARED_HTML)
+        assert not self.index.is_ancestor(CHAPTER_2, HTML)
+        assert not self.index.is_ancestor(HTML, HTML)
+        assert not self.index.is_ancestor(ORPHAN_VERTICAL, ORPHAN_HTML)
+
+    def test_descendants(self):
+        assert self.index.descendants(CHAPTER_1) == [SEQUENTIAL_1, SHARED_HTML, HTML]
+        assert self.index.descendants(CHAPTER_2) == [SEQUENTIAL_2]
+        assert self.index.descendants(HTML) == []
+        assert self.index.descendants(ORPHAN_VERTICAL) == []
+
+    def test_deep_tree(self):
+        depth = 5000
+        structure = make_split_structure({
+            ('course' if level == 0 else 'vertical', str(level)): [('vertical', str(level + 1))]
+            for level in range(depth)
+        })
+        index = StructureIndex(structure)
+        assert index.is_ancestor(BlockKey('course', '0'), BlockKey('vertical', str(depth - 1)))
+        assert len(index.descendants(BlockKey('course', '0'))) == depth - 1
+
+
+class TestGetItems(unittest.TestCase):
+    """ Tests of the indexed queries of SplitMongoModuleStore.get_items """
+
+    def setUp(self):
+        super().setUp()
+        self.structure = make_split_structure({
+            ('course', 'course'): [('chapter', 'chapter_1'), ('chapter', 'chapter_2')],
+            ('chapter', 'chapter_1'): [('sequential', 'sequential_1')],
+            ('chapter', 'chapter_2'): [('sequential', 'sequential_2')],
+            ('sequential', 'sequential_1'): [('html', 'shared'), ('html', 'html')],
+            ('sequential', 'sequential_2'): [('html', 'shared')],
+            ('html', 'shared'): [],
+            ('html', 'html'): [],
+            ('vertical', 'orphan'): [('html', 'orphan')],
+            ('html', 'orphan'): [],
+        })
+        blocks = self.structure['blocks']
+        blocks[HTML].fields.update({'display_name': 'Intro', 'group_access': {1: [2]}})
+        blocks[SHARED_HTML].fields.update({'display_name': 'Shared', 'tags': ['a', 'b']})
+        blocks[ORPHAN_HTML].fields.update({'display_name': 'Intro', 'tags': ['b']})
+        for index, block_data in enumerate(blocks.values()):
+            block_data.edit_info.edited_by = index % 2
+            block_data.edit_info.edited_on = datetime.datetime(2023, 1, 1 + index)
+        self.definitions = {
+            block_data.definition: {
+                '_id': block_data.definition, 'fields': {'data': f'<p>{block_key.id}</p>'},
+            }
+            for block_key, block_data in blocks.items()
+        }
+        self.store, self.course_key = make_split_store(self.structure, self.definitions)
+
+    def get_items(self, **kwargs):
+        return self.store.get_items(self.course_key, **kwargs)
+
+    def test_category(self):
+        assert self.get_items(qualifiers={'category': 'html'}) == [SHARED_HTML, HTML, ORPHAN_HTML]
+        assert self.get_items(qualifiers={'category': 'html'}, include_orphans=False) == [SHARED_HTML, HTML]
+        assert self.get_items(qualifiers={'category': 'problem'}) == []
+
+    def test_settings(self):
+        assert self.get_items(settings={'display_name': 'Intro'}) == [HTML, ORPHAN_HTML]
+        assert self.get_items(settings={'display_name': re.compile('^Sh')}) == [SHARED_HTML]
+        assert self.get_items(settings={'tags': 'b'}) == [SHARED_HTML, ORPHAN_HTML]
+        assert self.get_items(settings={'tags': {'$in': ['a', 'c']}}) == [SHARED_HTML]
+        assert self.get_items(settings={'group_access': {'$exists': True}}) == [HTML]
+        assert self.get_items(settings={'group_access': {1: [2]}}) == [HTML]
+        assert self.get_items(qualifiers={'category': 'html', 'display_name': 'Intro'}) == []
+        assert self.get_items(
+            qualifiers={'category': 'html'}, settings={'display_name': 'Intro'}, include_orphans=False,
+        ) == [HTML]
+        assert self.get_items(qualifiers={'children': SEQUENTIAL_2}) == [CHAPTER_2]
+
+    def test_edit_info(self):
+        assert self.get_items(qualifiers={'edited_by': 1}) == list(self.structure['blocks'])[1::2]
+        assert self.get_items(qualifiers={
+            'category': 'html',
+            'edited_on': lambda edited_on: edited_on >= datetime.datetime(2023, 1, 7),
+        }) == [HTML, ORPHAN_HTML]
+
+    def test_content(self):
+        assert self.get_items(content={'data': re.compile('shared|html')}) == [SHARED_HTML, HTML]
+        assert self.get_items(qualifiers={'name': 'html'}, content={'data': '<p>html</p>'}) == [HTML]
+        self.store.get_definitions.reset_mock()
+        assert self.get_items(qualifiers={'category': 'html'}, content={'data': '<p>html</p>'}) == [HTML]
+        self.store.get_definitions.assert_called_once()
+
+    def test_edited_structure(self):
+        self.store._get_bulk_ops_record.return_value = Mock(active=True, structures_in_db=set())
+        assert self.get_items(qualifiers={'category': 'html'}) == [SHARED_HTML, HTML, ORPHAN_HTML]
+        assert self.get_items(qualifiers={'category': 'html'}, include_orphans=False) == [SHARED_HTML, HTML]
+
+    def test_unindexed_criteria(self):
+        assert self.get_items(settings={'display_name': {'$nin': ['Intro']}}) == [SHARED_HTML]
+        assert self.get_items(settings={'group_access': {'$exists': False}}, qualifiers={'category': 'html'}) == [
+            SHARED_HTML, ORPHAN_HTML,
+        ]
+
+
+class TestFindCandidates(unittest.TestCase):
+    """ Tests of StructureIndex.find_candidates """
+
+    def setUp(self):
+        super().setUp()
+        self.structure = make_split_structure({
+            ('course', 'course'): [('html', 'html')],
+            ('html', 'html'): [],
+            ('problem', 'problem'): [],
+        })
+        self.blocks = self.structure['blocks']
+        self.blocks[HTML].fields['display_name'] = 'Html'
+        self.index = StructureIndex(self.structure)
+
+    def test_not_narrowed(self):
+        assert self.index.find_candidates(self.blocks, {BLOCK_DATA: {}, SETTINGS: None}, Mock()) is None
+        assert self.index.find_candidates(self.blocks, {SETTINGS: {'display_name': {'$exists': False}}}, Mock()) is None
+
+    def test_narrowed(self):
+        assert self.index.find_candidates(
+            self.blocks, {BLOCK_DATA: {'block_type': 'html'}, SETTINGS: {'display_name': 'Html'}}, Mock(),
+        ) == [HTML]
+        assert self.index.find_candidates(self.blocks, {EDIT_INFO: {'edited_by': 42}}, Mock()) == []
+
+    def test_failing_criteria(self):
+        def criteria(value):
+            raise TypeError(value)
+
+        store, _ = make_split_store(self.structure)
+        assert self.index.find_candidates(
+            self.blocks, {SETTINGS: {'display_name': criteria}}, store._value_matches,  # pylint: disable=protected-access
+        ) == [HTML]
+
+
+class TestStructureIndexCache(unittest.TestCase):
+    """ Tests of the StructureIndexCache """
+
+    def test_get(self):
+        cache = StructureIndexCache(max_size=2)
+        structures = [make_split_structure({('course', 'course'): []}) for _ in range(3)]
+        index = cache.get(structures[0])
+        assert cache.get(structures[0]) is index
+        cache.get(structures[1])
+        cache.get(structures[2])
+        assert cache.get(structures[0]) is not index
+
+    def test_structure_not_kept(self):
+        cache = StructureIndexCache(max_size=2)
+        structure = make_split_structure({('course', 'course'): [('html', 'html')], ('html', 'html'): []})
+        version = structure['_id']
+        index = cache.get(structure)
+        index.find_candidates(structure['blocks'], {SETTINGS: {'display_name': 'Html'}}, Mock())
+        block_data = weakref.ref(structure['blocks'][HTML])
+        del structure
+        gc.collect()
+        assert block_data() is None
+        assert cache.get({'_id': version}) is index
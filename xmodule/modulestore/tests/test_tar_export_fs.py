@@ -0,0 +1,146 @@
+"""
+Tests of exporting into a tar archive with the TarExportFS.
+"""
+
+
+import io
+import json
+import tarfile
+import unittest
+from unittest import mock
+
+import ddt
+from fs import errors
+from opaque_keys.edx.locator import CourseLocator
+
+from xmodule.contentstore.content import StaticContent, StaticContentStream
+from xmodule.contentstore.mongo import MongoContentStore
+from xmodule.modulestore.tar_export_fs import TarExportFS
+
+
+class TarExportFSTestCase(unittest.TestCase):
+    """
+    Base class of tests writing into a TarExportFS.
+    """
+    def setUp(self):
+        super().setUp()
+        self.archive = io.BytesIO()
+        self.tar_file = tarfile.open(fileobj=self.archive, mode='w|gz')  # pylint: disable=consider-using-with
+        self.export_fs = TarExportFS(self.tar_file)
+
+    def read_archive(self):
+        """
+        Returns the content of the files of the archive by name, and the names of its directories.
+        """
+        self.tar_file.close()
+        self.archive.seek(0)
+        files, dirs = {}, []
+        with tarfile.open(fileobj=self.archive, mode='r:gz') as tar_file:
+            for member in tar_file.getmembers():
+                if member.isdir():
+                    dirs.append(member.name)
+                else:
+                    files[member.name] = tar_file.extractfile(member).read()
+        return files, dirs
+
+
+class TestTarExportFS(TarExportFSTestCase):
+    """
+    Tests of the TarExportFS.
+    """
+    def test_write(self):
+        course_dir = self.export_fs.makedir('course')
+        with course_dir.open('course.xml', 'wb') as course_xml:
+            course_xml.write(b'<course/>')
+        course_dir.makedirs('policies/run', recreate=True)
+        with course_dir.open('policies/run/policy.json', 'w') as policy:
+            json.dump({'a': 'b'}, policy)
+        course_dir.makedirs('static/images', recreate=True)
+        course_dir.setbinfile('static/images/image.jpg', io.BytesIO(b'image'))
+
+        assert self.export_fs.exists('course/policies/run/policy.json')
+        assert self.export_fs.isdir('course/static')
+        assert course_dir.listdir('/') == ['course.xml', 'policies', 'static']
+
+        files, dirs = self.read_archive()
+        assert dirs == ['course', 'course/policies', 'course/policies/run', 'course/static', 'course/static/images']
+        assert files == {
+            'course/course.xml': b'<course/>',
+            'course/policies/run/policy.json': b'{"a": "b"}',
+            'course/static/images/image.jpg': b'image',
+        }
+
+    def test_large_file(self):
+        data = bytes(range(256)) * 40000
+        with mock.patch('xmodule.modulestore.tar_export_fs.SPOOL_MAX_SIZE', 1000):
+            with self.export_fs.open('large', 'wb') as large_file:
+                for start in range(0, len(data), 4096):
+                    large_file.write(data[start:start + 4096])
+        assert self.read_archive()[0] == {'large': data}
+
+    def test_missing_parent(self):
+        with self.assertRaises(errors.ResourceNotFound):
+            self.export_fs.open('missing/file', 'wb')
+        with self.assertRaises(errors.ResourceNotFound):
+            self.export_fs.makedir('missing/dir')
+
+    def test_write_only(self):
+        self.export_fs.setbytes('file', b'data')
+        with self.assertRaises(errors.ResourceReadOnly):
+            self.export_fs.getbytes('file')
+        with self.assertRaises(errors.ResourceReadOnly):
+            self.export_fs.remove('file')
+        with self.assertRaises(errors.DirectoryExists):
+            self.export_fs.makedir('/')
+
+
+@ddt.ddt
+class TestExportAllForCourseToFS(TarExportFSTestCase):
+    """
+    Tests of exporting the assets of a course from the MongoContentStore into a TarExportFS.
+    """
+    def setUp(self):
+        super().setUp()
+        self.course_key = CourseLocator('org', 'course', 'run')
+        self.assets = {}
+        for index, import_path in enumerate([None, 'subs/subs.srt', None, 'images/large.png', None]):
+            name = f'asset_{index}.txt' if import_path is None else import_path.split('/')[-1]
+            data = (b'large ' * 10000) if 'large' in name else f'data {index}'.encode()
+            self.assets[name] = (import_path, data)
+        self.contentstore = MongoContentStore.__new__(MongoContentStore)
+        self.contentstore.get_all_content_for_course = mock.Mock(return_value=([
+            {
+                'asset_key': self.course_key.make_asset_key('asset', name),
+                'displayname': name,
+                'length': len(data),
+                'chunkSize': 1024,
+                'locked': name == 'subs.srt',
+            }
+            for name, (_, data) in self.assets.items()
+        ], len(self.assets)))
+        self.contentstore.find = mock.Mock(side_effect=self._find)
+
+    def _find(self, asset_key, as_stream=False):
+        import_path, data = self.assets[asset_key.block_id]
+        if as_stream:
+            return StaticContentStream(asset_key, asset_key.block_id, 'text/plain', io.BytesIO(data),
+                                       import_path=import_path)
+        return StaticContent(asset_key, asset_key.block_id, 'text/plain', data, import_path=import_path)
+
+    @ddt.data(1, 3)
+    def test_export(self, max_workers):
+        with mock.patch('xmodule.contentstore.mongo.EXPORT_READ_AHEAD_MAX_SIZE', 1000):
+            policy = self.contentstore.export_all_for_course_to_fs(
+                self.course_key, self.export_fs.makedir('static'), max_workers=max_workers,
+            )
+        assert policy['subs.srt'] == {'displayname': 'subs.srt', 'locked': True}
+        assert set(policy) == set(self.assets)
+        assert [call[1]['as_stream'] for call in self.contentstore.find.call_args_list] == [
+            False, False, False, True, False,
+        ]
+
+        files, dirs = self.read_archive()
+        assert dirs == ['static', 'static/subs', 'static/images']
+        assert files == {
+            'static/' + (import_path or name): data for name, (import_path, data) in self.assets.items()
+        }
@@ -5,6 +5,7 @@ Tests for XML importer.
 
 import importlib
 import os
+import threading
 import unittest
 from uuid import uuid4
 from unittest import mock
@@ -18,7 +19,7 @@ from xblock.runtime import DictKeyValueStore, KvsFieldData, Runtime
 from xmodule.modulestore import ModuleStoreEnum
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.modulestore.tests.mongo_connection import MONGO_HOST, MONGO_PORT_NUM
-from xmodule.modulestore.xml_importer import StaticContentImporter, _update_block_location
+from xmodule.modulestore.xml_importer import CourseImportManager, StaticContentImporter, _update_block_location
 from xmodule.tests import DATA_DIR
 from xmodule.x_module import XModuleMixin
 
@@ -257,3 +258,70 @@ class StaticContentImporterTest(unittest.TestCase):  # lint-amnesty, pylint: dis
             )
             mock_file.assert_called_with(full_file_path, 'rb')
             self.mocked_content_store.generate_thumbnail.assert_called_once()
+
+    def test_import_static_content_directory_concurrently(self):
+        self.static_content_importer.max_workers = 4
+        file_names = [f'file{index}.txt' for index in range(20)]
+        with mock.patch(
+            'xmodule.modulestore.xml_importer.os.walk',
+            return_value=[('static', None, file_names + ['.DS_Store'])]
+        ), mock.patch.object(
+            self.static_content_importer, 'import_static_file',
+            side_effect=lambda file_path, base_dir: (file_path, f'key {file_path}'),
+        ) as patched_import_static_file:
+            remap_dict = self.static_content_importer.import_static_content_directory('static')
+        assert patched_import_static_file.call_count == len(file_names)
+        assert remap_dict == {f'static/{name}': f'key static/{name}' for name in file_names}
+
+
+class ImportManagerPhasesTest(unittest.TestCase):
+    """
+    Tests of the phases of the ImportManager.
+    """
+    def setUp(self):
+        super().setUp()
+        self.phase_callback = mock.Mock()
+        patcher = mock.patch.object(CourseImportManager, 'store_class')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _manager(self, static_content_workers):
+        return CourseImportManager(
+            mock.Mock(), 1, 'data_dir', static_content_store=mock.Mock(),
+            static_content_workers=static_content_workers, phase_callback=self.phase_callback,
+        )
+
+    def test_timed_phase(self):
+        manager = self._manager(1)
+        with manager.timed_phase('children'):
+            pass
+        with self.assertRaises(ValueError), manager.timed_phase('drafts'):
+            raise ValueError
+        assert list(manager.phase_timings) == ['parse', 'children']
+        assert [call[0][0] for call in self.phase_callback.call_args_list] == ['parse', 'children']
+        assert self.phase_callback.call_args[0][1] == manager.phase_timings['children']
+
+    def _static_import_thread(self, manager):
+        """
+        Returns whether the static content import ran on a thread other than the current
+        one, and whether it had completed when the context of the import started.
+        """
+        static_import_threads = []
+        with mock.patch.object(
+            manager, 'import_static', side_effect=lambda *args: static_import_threads.append(threading.get_ident()),
+        ):
+            with manager.static_import(path('data_dir'), mock.Mock()):
+                imported_first = bool(static_import_threads)
+        assert len(static_import_threads) == 1
+        assert 'static' in manager.phase_timings
+        return static_import_threads[0] != threading.get_ident(), imported_first
+
+    def test_static_import(self):
+        assert self._static_import_thread(self._manager(1)) == (False, True)
+        assert self._static_import_thread(self._manager(4))[0]
+
+    def test_static_import_failure(self):
+        manager = self._manager(4)
+        with mock.patch.object(manager, 'import_static', side_effect=OSError):
+            with self.assertRaises(OSError), manager.static_import(path('data_dir'), mock.Mock()):
+                pass
@@ -6,16 +6,22 @@ from contextlib import contextmanager, ExitStack
 from importlib import import_module
 from shutil import rmtree
 from tempfile import mkdtemp
+from unittest.mock import Mock
 from uuid import uuid4
 
+from bson import ObjectId
+from opaque_keys.edx.locator import CourseLocator
 from path import Path as path
 
 from xmodule.contentstore.mongo import MongoContentStore
+from xmodule.modulestore import BlockData
 from xmodule.modulestore.draft_and_published import ModuleStoreDraftAndPublished
 from xmodule.modulestore.inheritance import InheritanceMixin
 from xmodule.modulestore.mixed import MixedModuleStore
 from xmodule.modulestore.mongo.base import ModuleStoreEnum
 from xmodule.modulestore.mongo.draft import DraftModuleStore
+from xmodule.modulestore.split_mongo import BlockKey, CourseEnvelope
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.modulestore.split_mongo.split_draft import DraftVersioningModuleStore
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase, TEST_DATA_ONLY_SPLIT_MODULESTORE_DRAFT_PREFERRED
 from xmodule.modulestore.tests.factories import BlockFactory
@@ -84,6 +90,39 @@ def remove_temp_files_from_list(file_list, dir):  # lint-amnesty, pylint: disabl
             os.remove(file_path)
 
 
+def make_split_structure(children):
+    """
+    Returns a split modulestore structure of blocks with the given children,
+    keyed by (block_type, block_id).
+    """
+    blocks = {}
+    for block_key, block_children in children.items():
+        block_key = BlockKey(*block_key)
+        blocks[block_key] = BlockData(
+            block_type=block_key.type,
+            fields={'children': [BlockKey(*child) for child in block_children]},
+            definition=ObjectId(),
+        )
+    return {'_id': ObjectId(), 'root': BlockKey('course', 'course'), 'blocks': blocks}
+
+
+def make_split_store(structure, definitions=None):
+    """
+    Returns a SplitMongoModuleStore, and the key of its course, whose get_items
+    finds the block keys of the items in the structure, without loading them
+    from the database.
+    """
+    store = SplitMongoModuleStore.__new__(SplitMongoModuleStore)
+    course_key = CourseLocator('org', 'course', 'run', branch='draft-branch')
+    store._lookup_course = Mock(return_value=CourseEnvelope(course_key, structure))  # pylint: disable=protected-access
+    store._load_items = lambda course, block_ids, **kwargs: list(block_ids)  # pylint: disable=protected-access
+    store._get_bulk_ops_record = Mock(return_value=Mock(active=False))  # pylint: disable=protected-access
+    store.get_definitions = Mock(side_effect=lambda course_key, ids: [
+        definitions[definition_id] for definition_id in ids if definition_id in definitions
+    ])
+    return store, course_key
+
+
 class MixedSplitTestCase(ModuleStoreTestCase):
     """
     A minimal version of ModuleStoreTestCase for testing in xmodule/modulestore that sets up MixedModuleStore
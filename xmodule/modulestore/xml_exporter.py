@@ -4,9 +4,8 @@ Methods for exporting course data to XML
 
 
 import logging
-import os
 from abc import abstractmethod
-from json import dumps
+from json import dump, dumps
 
 import lxml.etree
 from fs.osfs import OSFS
@@ -24,6 +23,7 @@ from xmodule.modulestore import LIBRARY_ROOT, EdxJSONEncoder, ModuleStoreEnum
 from xmodule.modulestore.draft_and_published import DIRECT_ONLY_CATEGORIES
 from xmodule.modulestore.inheritance import own_metadata
 from xmodule.modulestore.store_utilities import draft_node_constructor, get_draft_subtree_roots
+from xmodule.modulestore.tar_export_fs import TarExportFS
 
 DRAFT_DIR = "drafts"
 PUBLISHED_DIR = "published"
@@ -109,7 +109,9 @@ class ExportManager:
     """
     Manages XML exporting for courselike objects.
     """
-    def __init__(self, modulestore, contentstore, courselike_key, root_dir, target_dir):
+    def __init__(
+        self, modulestore, contentstore, courselike_key, root_dir, target_dir, root_fs=None, asset_workers=1,
+    ):
         """
         Export all blocks from `modulestore` and content from `contentstore` as xml to `root_dir`.
 
@@ -118,12 +120,16 @@ class ExportManager:
         `courselike_key`: The Locator of the block to export
         `root_dir`: The directory to write the exported xml to
         `target_dir`: The name of the directory inside `root_dir` to write the content to
+        `root_fs`: The filesystem to write the exported xml to instead of `root_dir`, such as a TarExportFS
+        `asset_workers`: The number of assets read from `contentstore` concurrently
         """
         self.modulestore = modulestore
         self.contentstore = contentstore
         self.courselike_key = courselike_key
         self.root_dir = root_dir
         self.target_dir = str(target_dir)
+        self.root_fs = root_fs
+        self.asset_workers = asset_workers
 
     @abstractmethod
     def get_key(self):
@@ -153,13 +159,25 @@ class ExportManager:
         Get the target courselike object for this export.
         """
 
+    def export_static_assets(self, export_fs, policies_dir):
+        """
+        Export the static assets of the courselike from the contentstore, and their policy.
+        """
+        policy = self.contentstore.export_all_for_course_to_fs(
+            self.courselike_key,
+            export_fs.makedir('static', recreate=True),
+            max_workers=self.asset_workers,
+        )
+        with policies_dir.open('assets.json', 'w') as assets_policy:
+            dump(policy, assets_policy, sort_keys=True, indent=4)
+
     def export(self):
         """
         Perform the export given the parameters handed to this class at init.
         """
         with self.modulestore.bulk_operations(self.courselike_key):
 
-            fsm = OSFS(self.root_dir)
+            fsm = self.root_fs if self.root_fs is not None else OSFS(self.root_dir)
             root = lxml.etree.Element('unknown')
 
             # export only the published content
@@ -207,26 +225,20 @@ class CourseExportManager(ExportManager):
 
     def process_extra(self, root, courselike, root_courselike_dir, xml_centric_courselike_key, export_fs):
         # Export the modulestore's asset metadata.
-        asset_dir = root_courselike_dir + '/' + AssetMetadata.EXPORTED_ASSET_DIR + '/'
-        if not os.path.isdir(asset_dir):
-            os.makedirs(asset_dir)
+        asset_dir = export_fs.makedirs(AssetMetadata.EXPORTED_ASSET_DIR, recreate=True)
         asset_root = lxml.etree.Element(AssetMetadata.ALL_ASSETS_XML_TAG)
         course_assets = self.modulestore.get_all_asset_metadata(self.courselike_key, None)
         for asset_md in course_assets:
             # All asset types are exported using the "asset" tag - but their asset type is specified in each asset key.
             asset = lxml.etree.SubElement(asset_root, AssetMetadata.ASSET_XML_TAG)
             asset_md.to_xml(asset)
-        with OSFS(asset_dir).open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'wb') as asset_xml_file:
+        with asset_dir.open(AssetMetadata.EXPORTED_ASSET_FILENAME, 'wb') as asset_xml_file:
             lxml.etree.ElementTree(asset_root).write(asset_xml_file, encoding='utf-8')
 
         # export the static assets
         policies_dir = export_fs.makedir('policies', recreate=True)
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                root_courselike_dir + '/static/',
-                root_courselike_dir + '/policies/assets.json',
-            )
+            self.export_static_assets(export_fs, policies_dir)
 
             # If we are using the default course image, export it to the
             # legacy location to support backwards compatibility.
@@ -241,10 +253,8 @@ class CourseExportManager(ExportManager):
                 except NotFoundError:
                     pass
                 else:
-                    output_dir = root_courselike_dir + '/static/images/'
-                    if not os.path.isdir(output_dir):
-                        os.makedirs(output_dir)
-                    with OSFS(output_dir).open('course_image.jpg', 'wb') as course_image_file:
+                    output_dir = export_fs.makedirs('static/images', recreate=True)
+                    with output_dir.open('course_image.jpg', 'wb') as course_image_file:
                         course_image_file.write(course_image.data)
 
         # export the static tabs
@@ -327,14 +337,10 @@ class LibraryExportManager(ExportManager):
         to ease in duck typing during import. This may be expanded as a useful feature eventually.
         """
         # export the static assets
-        export_fs.makedir('policies', recreate=True)
+        policies_dir = export_fs.makedir('policies', recreate=True)
 
         if self.contentstore:
-            self.contentstore.export_all_for_course(
-                self.courselike_key,
-                self.root_dir + '/' + self.target_dir + '/static/',
-                self.root_dir + '/' + self.target_dir + '/policies/assets.json',
-            )
+            self.export_static_assets(export_fs, policies_dir)
 
     def post_process(self, root, export_fs):
         """
@@ -363,6 +369,28 @@ def export_library_to_xml(modulestore, contentstore, library_key, root_dir, libr
     LibraryExportManager(modulestore, contentstore, library_key, root_dir, library_dir).export()
 
 
+def export_course_to_tar(modulestore, contentstore, course_key, tar_file, course_dir, asset_workers=1):
+    """
+    Export a course into the `course_dir` directory of `tar_file`, an open tarfile.TarFile,
+    without writing it to disk first. See ExportManager for details.
+    """
+    CourseExportManager(
+        modulestore, contentstore, course_key, '', course_dir,
+        root_fs=TarExportFS(tar_file), asset_workers=asset_workers,
+    ).export()
+
+
+def export_library_to_tar(modulestore, contentstore, library_key, tar_file, library_dir, asset_workers=1):
+    """
+    Export a library into the `library_dir` directory of `tar_file`, an open tarfile.TarFile,
+    without writing it to disk first. See ExportManager for details.
+    """
+    LibraryExportManager(
+        modulestore, contentstore, library_key, '', library_dir,
+        root_fs=TarExportFS(tar_file), asset_workers=asset_workers,
+    ).export()
+
+
 def adapt_references(subtree, destination_course_key, export_fs):
     """
     Map every reference in the subtree into destination_course_key and set it back into the xblock fields
@@ -26,7 +26,10 @@ import logging
 import mimetypes
 import os
 import re
+import time
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 import xblock
 from django.core.exceptions import ObjectDoesNotExist
@@ -118,10 +121,12 @@ class LocationMixin(XBlockMixin):
 
 
 class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docstring
-    def __init__(self, static_content_store, course_data_path, target_id):
+    def __init__(self, static_content_store, course_data_path, target_id, max_workers=1):
         self.static_content_store = static_content_store
         self.target_id = target_id
         self.course_data_path = course_data_path
+        # The number of files read and saved into the static content store concurrently.
+        self.max_workers = max_workers
         try:
             with open(course_data_path / 'policies/assets.json') as f:
                 self.policy = json.load(f)
@@ -138,6 +143,7 @@ class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docs
         remap_dict = {}
 
         static_dir = self.course_data_path / content_subdir
+        file_paths = []
         for dirname, _, filenames in os.walk(static_dir):
             for filename in filenames:
 
@@ -148,15 +154,25 @@ class StaticContentImporter:  # lint-amnesty, pylint: disable=missing-class-docs
                         log.debug('skipping static content %s...', file_path)
                     continue
 
-                if verbose:
-                    log.debug('importing static content %s...', file_path)
+                file_paths.append(file_path)
 
-                imported_file_attrs = self.import_static_file(file_path, base_dir=static_dir)
+        def import_file(file_path):
+            if verbose:
+                log.debug('importing static content %s...', file_path)
+            return self.import_static_file(file_path, base_dir=static_dir)
 
-                if imported_file_attrs:
-                    # store the remapping information which will be needed
-                    # to subsitute in the module data
-                    remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
+        if self.max_workers > 1 and len(file_paths) > 1:
+            # The files are mostly waiting on the disk and the content store, so save them on threads.
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                all_imported_file_attrs = list(executor.map(import_file, file_paths))
+        else:
+            all_imported_file_attrs = map(import_file, file_paths)
+
+        for imported_file_attrs in all_imported_file_attrs:
+            if imported_file_attrs:
+                # store the remapping information which will be needed
+                # to subsitute in the module data
+                remap_dict[imported_file_attrs[0]] = imported_file_attrs[1]
 
         return remap_dict
 
@@ -256,6 +272,13 @@ class ImportManager:
             create this file to implement custom logic in their course.
 
         default_class, load_error_blocks: are arguments for constructing the XMLModuleStore (see its doc)
+
+        static_content_workers: The number of static content files imported concurrently. When greater
+            than 1, the static content is also imported while the blocks of the courselike are imported,
+            rather than before them.
+
+        phase_callback: If specified, called with the name of each phase of the import and the number of
+            seconds it took once the phase completes. The durations are also kept in phase_timings.
     """
     store_class = XMLModuleStore
 
@@ -268,6 +291,7 @@ class ImportManager:
             create_if_not_present=False, raise_on_failure=False,
             static_content_subdir=DEFAULT_STATIC_CONTENT_SUBDIR,
             python_lib_filename='python_lib.zip',
+            static_content_workers=1, phase_callback=None,
     ):
         self.store = store
         self.user_id = user_id
@@ -283,17 +307,37 @@ class ImportManager:
         self.do_import_python_lib = do_import_python_lib
         self.create_if_not_present = create_if_not_present
         self.raise_on_failure = raise_on_failure
-        self.xml_module_store = self.store_class(
-            data_dir,
-            default_class=default_class,
-            source_dirs=source_dirs,
-            load_error_blocks=load_error_blocks,
-            xblock_mixins=store.xblock_mixins,
-            xblock_select=store.xblock_select,
-            target_course_id=target_id,
-        )
+        self.static_content_workers = static_content_workers
+        self.phase_callback = phase_callback
+        # {phase: seconds}, the duration of each completed phase of the import: parse, then for each
+        # courselike courselike, static, asset_metadata and children, all within published which also
+        # includes writing the published blocks, then drafts and tags.
+        self.phase_timings = {}
+        with self.timed_phase('parse'):
+            self.xml_module_store = self.store_class(
+                data_dir,
+                default_class=default_class,
+                source_dirs=source_dirs,
+                load_error_blocks=load_error_blocks,
+                xblock_mixins=store.xblock_mixins,
+                xblock_select=store.xblock_select,
+                target_course_id=target_id,
+            )
         self.logger, self.errors = make_error_tracker()
 
+    @contextmanager
+    def timed_phase(self, phase):
+        """
+        Records the duration of the phase of the import run in the context, if it completes.
+        """
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.phase_timings[phase] = elapsed
+        log.info(f'Course import {self.target_id}: {phase} phase completed in {elapsed:.2f} seconds')
+        if self.phase_callback:
+            self.phase_callback(phase, elapsed)
+
     def preflight(self):
         """
         Perform any pre-import sanity checks.
@@ -316,7 +360,8 @@ class ImportManager:
         static_content_importer = StaticContentImporter(
             self.static_content_store,
             course_data_path=data_path,
-            target_id=dest_id
+            target_id=dest_id,
+            max_workers=self.static_content_workers,
         )
         if self.do_import_static:
             if self.verbose:
@@ -357,6 +402,28 @@ class ImportManager:
                 content_subdir=simport, verbose=self.verbose
             )
 
+    @contextmanager
+    def static_import(self, data_path, dest_id):
+        """
+        Imports all static items into the content store, on a separate thread while the
+        context runs when static content files are imported concurrently, or before it otherwise.
+        """
+        def import_static():
+            with self.timed_phase('static'):
+                self.import_static(data_path, dest_id)
+
+        if self.static_content_workers <= 1:
+            import_static()
+            yield
+            return
+
+        # The static content is only written to the content store, which the blocks don't read while
+        # they are imported, so importing both at once only needs both to have completed at the end.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            static_content_import = executor.submit(import_static)
+            yield
+            static_content_import.result()
+
     def import_asset_metadata(self, data_dir, course_id):
         """
         Read in assets XML file, parse it, and add all asset metadata to the modulestore.
@@ -560,29 +627,33 @@ class ImportManager:
                 continue
 
             # This bulk operation wraps all the operations to populate the published branch.
-            with self.store.bulk_operations(dest_id):
+            with self.timed_phase('published'), self.store.bulk_operations(dest_id):
                 # Retrieve the course itself.
-                source_courselike, courselike, data_path = self.get_courselike(courselike_key, runtime, dest_id)
-
-                # Import all static pieces.
-                self.import_static(data_path, dest_id)
+                with self.timed_phase('courselike'):
+                    source_courselike, courselike, data_path = self.get_courselike(
+                        courselike_key, runtime, dest_id
+                    )
 
-                # Import asset metadata stored in XML.
-                self.import_asset_metadata(data_path, dest_id)
+                # Import all static pieces, while the children are imported if that is done concurrently.
+                with self.static_import(data_path, dest_id):
+                    # Import asset metadata stored in XML.
+                    with self.timed_phase('asset_metadata'):
+                        self.import_asset_metadata(data_path, dest_id)
 
-                # Import all children
-                self.import_children(source_courselike, courselike, courselike_key, dest_id)
+                    # Import all children
+                    with self.timed_phase('children'):
+                        self.import_children(source_courselike, courselike, courselike_key, dest_id)
 
             # This bulk operation wraps all the operations to populate the draft branch with any items
             # from the /drafts subdirectory.
             # Drafts must be imported in a separate bulk operation from published items to import properly,
             # due to the recursive_build() above creating a draft item for each course block
             # and then publishing it.
-            with self.store.bulk_operations(dest_id):
+            with self.timed_phase('drafts'), self.store.bulk_operations(dest_id):
                 # Import all draft items into the courselike.
                 courselike = self.import_drafts(courselike, courselike_key, data_path, dest_id)
 
-            with self.store.bulk_operations(dest_id):
+            with self.timed_phase('tags'), self.store.bulk_operations(dest_id):
                 try:
                     self.import_tags(data_path, dest_id)
                 except FileNotFoundError:
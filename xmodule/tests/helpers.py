@@ -4,13 +4,22 @@ Utility methods for unit tests.
 
 
 import filecmp
+import os
 import pprint
+import unittest
 
 import pytest
 from path import Path as path
 from xblock.reference.user_service import UserService, XBlockUser
 from xmodule.x_module import DescriptorSystem
 
+# Performance tests only run when this environment variable is set, e.g.
+#   EDXAPP_RUN_PERF_TESTS=1 pytest xmodule/modulestore/perf_tests -s
+skip_unless_perf_tests_enabled = unittest.skipUnless(
+    os.environ.get('EDXAPP_RUN_PERF_TESTS'),
+    'Set EDXAPP_RUN_PERF_TESTS to run performance tests.',
+)
+
 
 def directories_equal(directory1, directory2):
     """